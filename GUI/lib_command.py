@@ -0,0 +1,190 @@
+import itertools
+import os
+import threading
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import Any, Dict, List, Optional
+
+"""
+Command scripts for the GUI processes.
+
+A script is a comma separated list such as
+    stage_control, stage_x_left_50, sensor_control, sensor_sweep, testing_control, testing_start
+Each marker key (stage_control, sensor_control, ...) starts the steps owned by
+one GUI. Without a router the whole dict goes to database/command.json, the
+owner of the first marker runs its keys and writes the rest back for the next
+owner (the command chain).
+
+With the state bus the CommandRouter sends one step at a time, tagged with a
+command_id, and waits until the owner acknowledges that id (command_done in
+lib_gui) instead of every owner sleeping before it hands over. Each step's
+duration is reported.
+"""
+
+# Marker key -> owning GUI
+OWNER_PREFIXES = {
+    "stage_control": "stage",
+    "tec_control": "tec",
+    "sensor_control": "sensor",
+    "lim_set": "limit",
+    "as_set": "area_scan",
+    "fa_set": "fine_align",
+    "sweep_set": "laser_sweep",
+    "devices_control": "devices",
+    "testing_control": "testing",
+    "data_window": "data_window",
+}
+
+# Seconds to wait for a step's acknowledgement before the run stops, so a
+# lost command_done cannot hang it. Long enough for a sweep at the slowest
+# speed; the testing GUI acks after a whole auto sweep over the device list.
+DEFAULT_STEP_TIMEOUT_S = 900.0
+STEP_TIMEOUT_S = {"testing": 12 * 3600.0}
+
+_command_ids = itertools.count(1)
+
+
+def owner_of(key: str) -> Optional[str]:
+    """Owning GUI if key is a marker key, else None"""
+    for prefix, owner in OWNER_PREFIXES.items():
+        if key.startswith(prefix):
+            return owner
+    return None
+
+
+def parse_command_text(text: str) -> Dict[str, Any]:
+    """
+    Parse a command script into the ordered command dict.
+
+    "name" with a single underscore is a flag (True), otherwise the text after
+    the last underscore is the value: true/false, a number, or a / separated list.
+    """
+    command = {}
+    for part in (p.strip() for p in text.split(",")):
+        if "_" not in part:
+            continue
+
+        if part.count("_") == 1:
+            command[part] = True
+            continue
+
+        key, val = part.rsplit("_", 1)
+        val_lower = val.lower()
+        if val_lower == "true":
+            val = True
+        elif val_lower == "false":
+            val = False
+        elif "/" in val:
+            items = []
+            for v in val.split("/"):
+                if v.replace(".", "", 1).isdigit():
+                    v = float(v) if "." in v else int(v)
+                items.append(v)
+            val = items
+        elif val.replace(".", "", 1).isdigit():
+            val = float(val) if "." in val else int(val)
+        command[key] = val
+    return command
+
+
+def load_command_file(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_command_text(f.read().strip())
+
+
+@dataclass
+class CommandStep:
+    owner: str
+    commands: Dict[str, Any]          # marker key first, in script order
+    duration_s: Optional[float] = None
+    ok: Optional[bool] = None
+
+
+def split_steps(command: Dict[str, Any]) -> List[CommandStep]:
+    """Cut the command dict at every marker key, keys before the first marker have no owner and are dropped"""
+    steps = []
+    dropped = []
+    for key, val in command.items():
+        owner = owner_of(key)
+        if owner is not None:
+            steps.append(CommandStep(owner=owner, commands={key: val}))
+        elif steps:
+            steps[-1].commands[key] = val
+        else:
+            dropped.append(key)
+    if dropped:
+        print(f"[Warn] Command keys before any control marker ignored: {', '.join(dropped)}")
+    return steps
+
+
+@dataclass
+class CommandRun:
+    steps: List[CommandStep] = field(default_factory=list)
+    cancelled: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return not self.cancelled and all(step.ok for step in self.steps)
+
+    @property
+    def duration_s(self) -> float:
+        return sum(step.duration_s or 0.0 for step in self.steps)
+
+
+class CommandRouter:
+    """
+    Args:
+        bus: connected StateBusClient
+        topic: state topic the GUIs read their command from
+        step_timeout: seconds to wait for one step's acknowledgement, None to wait
+            as long as the step takes
+        step_timeouts: per owner overrides of step_timeout, STEP_TIMEOUT_S by default
+    """
+
+    def __init__(self, bus, topic: str = "command", step_timeout: Optional[float] = DEFAULT_STEP_TIMEOUT_S,
+                 step_timeouts: Optional[Dict[str, Optional[float]]] = None):
+        self.bus = bus
+        self.topic = topic
+        self.step_timeout = step_timeout
+        self.step_timeouts = STEP_TIMEOUT_S if step_timeouts is None else step_timeouts
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop after the step that is running, its owner is not interrupted"""
+        self._cancel.set()
+
+    def run(self, command: Dict[str, Any]) -> CommandRun:
+        run = CommandRun()
+        steps = split_steps(command)
+        for i, step in enumerate(steps):
+            if self._cancel.is_set():
+                run.cancelled = True
+                break
+            run.steps.append(step)
+            step.ok = self._run_step(step)
+            print(f"[Command] {i + 1}/{len(steps)} {step.owner}: {len(step.commands)} keys in "
+                  f"{step.duration_s:.2f} s{'' if step.ok else ' (no completion)'}")
+            if not step.ok:
+                run.cancelled = self._cancel.is_set()
+                break
+        if steps:
+            print(f"[Command] {'done' if run.ok else 'stopped'}, {len(run.steps)}/{len(steps)} steps "
+                  f"in {run.duration_s:.2f} s")
+        return run
+
+    def _run_step(self, step: CommandStep) -> bool:
+        command_id = f"{os.getpid()}-{next(_command_ids)}"
+        t0 = monotonic()
+        # One update, every GUI sees the step and its id together
+        self.bus.set(self.topic, {"command": step.commands, "command_id": command_id})
+        timeout = self.step_timeouts.get(step.owner, self.step_timeout)
+        deadline = None if timeout is None else t0 + timeout
+        done = False
+        while not done:
+            # Wake up now and then to honour cancel() and a dropped connection
+            wait_s = 0.5 if deadline is None else min(0.5, deadline - monotonic())
+            if wait_s <= 0 or self._cancel.is_set() or not self.bus.connected:
+                break
+            done = self.bus.wait_for(self.topic, "command_done", lambda v: v == command_id, wait_s)
+        step.duration_s = monotonic() - t0
+        return done
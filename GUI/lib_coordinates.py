@@ -4,248 +4,487 @@
 # Embedded file name: /home/pi/Desktop/new GUI/File Import/lib_coordinates.py
 # Compiled at: 2022-04-01 14:24:57
 # Size of source mod 2**32: 13303 bytes
+import itertools
+import json
+import os
 import numpy as np
-from tinydb import TinyDB, Query
 import sys
 
+# Device catalog of a die: the devices of the coordinate file as columns, with
+# hash indexes on number, name, wavelength, polarization and type.
+# It is saved next to the old TinyDB file (./database/coordinates.json, still
+# written in TinyDB's layout for the other readers) as a binary snapshot
+# <name>.catalog.npz that loads without parsing any JSON. A snapshot older than
+# the JSON file is ignored and rebuilt from the JSON.
+#
+# The catalog keeps the GDS coordinates. Registration fits a StageTransform
+# from the fiducials, "coordinate" is then the stage position of every device,
+# computed for the whole array at once and cached until the fiducials change.
+
+CATALOG_FIELDS = ("number", "coordinate", "polarization", "wavelength", "type", "devicename")
+INDEXED_FIELDS = ("number", "devicename", "wavelength", "polarization", "type")
+SNAPSHOT_VERSION = 1
+
+# A fiducial whose fitted position is further off than this [um] is rejected
+RESIDUAL_LIMIT_XY = 5.0
+RESIDUAL_LIMIT_Z = 15.0
+# Stage and GDS are both in um, a larger xy scale error is reported as
+# suspicious, beyond SCALE_LIMIT (e.g. the same mark clicked twice) as an error
+SCALE_WARNING = 0.01
+SCALE_LIMIT = 0.5
+# Fits tried when searching for the consistent fiducials, all triples up to this
+MAX_SUBSETS = 2000
+
+
+def snapshot_path(name):
+    return os.path.splitext(name)[0] + ".catalog.npz"
+
+
+def _pack_strings(values):
+    """Strings as one utf-8 blob plus end offsets"""
+    encoded = [str(v).encode("utf-8") for v in values]
+    ends = np.cumsum([len(b) for b in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), ends
+
+
+def _unpack_strings(blob, ends):
+    raw = blob.tobytes()
+    starts = np.concatenate([[0], ends[:-1]]).tolist()
+    return [raw[a:b].decode("utf-8") for a, b in zip(starts, ends.tolist())]
+
+
+class StageTransform:
+    """
+    stage = matrix @ gds + displacement, least squares over N >= 3 fiducials.
+
+    Use StageTransform.fit(). Every set of three fiducials gives an exact fit,
+    the one that puts the most fiducials within the residual limits wins and
+    the final least squares fit uses those; the others are rejected.
+    residuals holds every fiducial's stage minus fitted position (the
+    prediction error for rejected ones), inliers which were kept.
+    """
+
+    def __init__(self, matrix, displacement, numbers=(), gds=(), stage=(), inliers=None, message=""):
+        self.matrix = np.asarray(matrix, dtype=float).reshape(3, 3)
+        self.displacement = np.asarray(displacement, dtype=float).reshape(3)
+        self.numbers = [int(n) for n in numbers]
+        self.gds = np.asarray(gds, dtype=float).reshape(-1, 3)
+        self.stage = np.asarray(stage, dtype=float).reshape(-1, 3)
+        self.inliers = np.ones(len(self.gds), dtype=bool) if inliers is None else np.asarray(inliers, dtype=bool)
+        self.residuals = self.stage - self.apply(self.gds)
+        self.message = message
+
+    @staticmethod
+    def _solve(gds, stage):
+        # One row [x, y, z, 1] per fiducial and an independent fit per stage
+        # axis, the same solution as the 12 parameter system
+        A = np.hstack([gds, np.ones((len(gds), 1))])
+        solution = np.linalg.lstsq(A, stage, rcond=None)[0]
+        return solution[:3].T, solution[3]
+
+    @staticmethod
+    def _excess(residuals, limit_xy, limit_z):
+        """Residual in units of its limit, > 1 is too far off"""
+        return np.max(np.abs(residuals) / np.array([limit_xy, limit_xy, limit_z]), axis=-1)
+
+    @classmethod
+    def fit(cls, numbers, gds, stage, limit_xy=RESIDUAL_LIMIT_XY, limit_z=RESIDUAL_LIMIT_Z):
+        gds = np.asarray(gds, dtype=float).reshape(-1, 3)
+        stage = np.asarray(stage, dtype=float).reshape(-1, 3)
+        if len(gds) < 3 or len(gds) != len(stage):
+            raise ValueError(f"Need at least 3 fiducials with a stage position each, got {len(gds)} / {len(stage)}")
+        subsets = list(itertools.combinations(range(len(gds)), 3))
+        if len(subsets) > MAX_SUBSETS:
+            rng = np.random.default_rng(0)
+            subsets = [tuple(rng.choice(len(gds), 3, replace=False)) for _ in range(MAX_SUBSETS)]
+        best, best_score = None, None
+        for subset in subsets:
+            subset = list(subset)
+            if np.linalg.matrix_rank(np.hstack([gds[subset, :2], np.ones((3, 1))])) < 3:
+                continue  # on one line
+            matrix, displacement = cls._solve(gds[subset], stage[subset])
+            excess = cls._excess(stage - (gds @ matrix.T + displacement), limit_xy, limit_z)
+            inliers = excess <= 1
+            score = (inliers.sum(), -np.sum(excess[inliers] ** 2))
+            if best_score is None or score > best_score:
+                best, best_score = inliers, score
+        if best is None:
+            transform = cls(np.eye(3), np.zeros(3), numbers, gds, stage)
+            transform.message = "Fiducials are on one line, the transform is undetermined"
+            return transform
+        inliers = best
+        matrix, displacement = cls._solve(gds[inliers], stage[inliers])
+        transform = cls(matrix, displacement, numbers, gds, stage, inliers)
+        # Rejected fiducials keep their prediction error, kept ones their fit residual
+        excess = cls._excess(transform.residuals, limit_xy, limit_z)
+        scale, _ = transform.scale_rotation()
+        if np.abs(scale - 1).max() > SCALE_LIMIT:
+            transform.message = f"xy scale {scale[0]:.3f}/{scale[1]:.3f}, the fiducial positions do not match the layout"
+        elif (excess[inliers] > 1).any():
+            transform.message = "Residuals above the limit, check the fiducial positions"
+        return transform
+
+    @property
+    def ok(self):
+        return self.message == ""
+
+    @property
+    def key(self):
+        """Changes when the fiducials or the fit change"""
+        return (tuple(self.numbers), self.gds.tobytes(), self.stage.tobytes(), self.inliers.tobytes())
+
+    def apply(self, gds):
+        """Stage positions of an (N, 3) array of GDS coordinates, or of one coordinate"""
+        return np.asarray(gds, dtype=float) @ self.matrix.T + self.displacement
+
+    def scale_rotation(self):
+        """xy scale factors (singular values) and rotation [deg] of the transform"""
+        xy = self.matrix[:2, :2]
+        scale = np.linalg.svd(xy, compute_uv=False)
+        rotation = np.degrees(np.arctan2(xy[1, 0] - xy[0, 1], xy[0, 0] + xy[1, 1]))
+        return scale, rotation
+
+    def report(self):
+        lines = []
+        for n, gds, stage, res, kept in zip(self.numbers, self.gds, self.stage, self.residuals, self.inliers):
+            lines.append(f"Fiducial {n}: gds ({gds[0]:.1f}, {gds[1]:.1f}, {gds[2]:.1f}) "
+                         f"stage ({stage[0]:.1f}, {stage[1]:.1f}, {stage[2]:.1f}) "
+                         f"residual ({res[0]:+.2f}, {res[1]:+.2f}, {res[2]:+.2f})" + ("" if kept else " REJECTED"))
+        kept = self.residuals[self.inliers]
+        rms = np.sqrt(np.mean(np.sum(kept[:, :2] ** 2, axis=1))) if len(kept) else float("nan")
+        scale, rotation = self.scale_rotation()
+        lines.append(f"{self.inliers.sum()}/{len(self.inliers)} fiducials kept, xy rms residual {rms:.2f} um, "
+                     f"scale {scale[0]:.5f}/{scale[1]:.5f}, rotation {rotation:.4f} deg")
+        if self.ok and np.abs(scale - 1).max() > SCALE_WARNING:
+            lines.append(f"[Warning] xy scale differs from 1 by more than {SCALE_WARNING:.0%}")
+        if self.message:
+            lines.append(f"[Error] {self.message}")
+        return lines
+
+    def to_dict(self):
+        return {"matrix": self.matrix.tolist(), "displacement": self.displacement.tolist(),
+                "numbers": self.numbers, "gds": self.gds.tolist(), "stage": self.stage.tolist(),
+                "inliers": self.inliers.tolist(), "message": self.message}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class DeviceCatalog:
+
+    def __init__(self, number=(), coordinate=(), polarization=(), wavelength=(), type=(), devicename=(),
+                 transform=None):
+        self.number = [int(n) for n in number]
+        coordinate = np.asarray(coordinate)
+        # GDS coordinates, see the coordinate property for the stage positions
+        self.gds = coordinate.reshape(len(self.number), 3) if coordinate.size else np.zeros((0, 3), dtype=np.int64)
+        self.polarization = list(polarization)
+        self.wavelength = list(wavelength)
+        self.type = list(type)
+        self.devicename = list(devicename)
+        self.transform = transform
+        self._indexes = {}
+        self._stage = None
+        self._stage_key = None
+        self._number_order = None
+
+    @property
+    def coordinate(self):
+        """Stage coordinates of all devices (the GDS ones before registration)"""
+        if self.transform is None:
+            return self.gds
+        if self._stage_key != self.transform.key:
+            self._stage = self.transform.apply(self.gds)
+            self._stage_key = self.transform.key
+        return self._stage
+
+    def rows_of_numbers(self, numbers):
+        """Row of each device number, vectorised"""
+        numbers = np.asarray(numbers, dtype=np.int64)
+        if self._number_order is None:
+            all_numbers = np.asarray(self.number, dtype=np.int64)
+            order = np.argsort(all_numbers, kind="stable")
+            self._number_order = (order, all_numbers[order])
+        order, sorted_numbers = self._number_order
+        pos = np.minimum(np.searchsorted(sorted_numbers, numbers), max(len(sorted_numbers) - 1, 0))
+        if len(sorted_numbers) == 0 or (sorted_numbers[pos] != numbers).any():
+            missing = numbers[(sorted_numbers[pos] != numbers)] if len(sorted_numbers) else numbers
+            raise KeyError(f"Unknown device numbers {missing[:5].tolist()}")
+        return order[pos]
+
+    def stage_coordinates(self, numbers):
+        """(len(numbers), 3) stage coordinates of the given device numbers"""
+        return self.coordinate[self.rows_of_numbers(numbers)]
+
+    def index(self, field):
+        """value -> row indices of one indexed field, built on first use"""
+        index = self._indexes.get(field)
+        if index is None:
+            if field not in INDEXED_FIELDS:
+                raise KeyError(f"{field} is not indexed")
+            index = {}
+            for row, value in enumerate(getattr(self, field)):
+                index.setdefault(value, []).append(row)
+            self._indexes[field] = index
+        return index
+
+    def __len__(self):
+        return len(self.number)
+
+    # === Loading ===
+
+    @classmethod
+    def from_rows(cls, rows):
+        rows = list(rows)
+        columns = {field: [row[field] for row in rows] for field in CATALOG_FIELDS}
+        return cls(**columns)
+
+    @classmethod
+    def from_coordinate_file(cls, path):
+        """
+        Parse a coordinate file: header lines, then
+        x, y, polarization, wavelength, type, name[, more name parts]
+        Returns the catalog and the (line number, contents) of lines that were skipped.
+        """
+        with open(path) as f:
+            file_contents = f.readlines()
+        startingline = 0
+        for line in file_contents:
+            try:
+                linesplit = line.split(",")
+                int(linesplit[0])
+                int(linesplit[1])
+                break
+            except (ValueError, IndexError):
+                startingline += 1
+
+        columns = {field: [] for field in CATALOG_FIELDS}
+        skipped = []
+        number = 1
+        for currentline, line in enumerate(file_contents[startingline:], start=startingline):
+            parts = [part.replace(" ", "") for part in line.rstrip("\r\n").split(",")]
+            try:
+                coordinate = [int(parts[0]), int(parts[1]), 0]
+                row = (number, coordinate, parts[2], parts[3], parts[4], "_".join(parts[5:]))
+            except (ValueError, IndexError):
+                skipped.append((currentline, parts))
+                continue
+            for field, value in zip(CATALOG_FIELDS, row):
+                columns[field].append(value)
+            number += 1
+        return cls(**columns), skipped
+
+    @classmethod
+    def from_json(cls, name):
+        """The TinyDB file the GUIs used so far"""
+        with open(name, "r", encoding="utf-8") as f:
+            db = json.load(f)
+        table = db.get("_default", {})
+        rows = [table[k] for k in sorted(table, key=int)]
+        registration = db.get("registration", {})
+        catalog = cls.from_rows({**row, "coordinate": row.get("gds_coordinate", row["coordinate"])} for row in rows)
+        if registration:
+            catalog.transform = StageTransform.from_dict(registration[max(registration, key=int)])
+        return catalog
+
+    @classmethod
+    def from_snapshot(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != SNAPSHOT_VERSION:
+                raise ValueError(f"Catalog snapshot version {int(data['version'])}")
+            columns = {"number": data["number"].tolist(), "coordinate": data["coordinate"]}
+            for field in ("polarization", "wavelength", "type"):
+                values = _unpack_strings(data[f"{field}_values"], data[f"{field}_ends"])
+                columns[field] = [values[c] for c in data[f"{field}_codes"].tolist()]
+            columns["devicename"] = _unpack_strings(data["devicename_blob"], data["devicename_ends"])
+            if "transform_matrix" in data:
+                columns["transform"] = StageTransform(
+                    data["transform_matrix"], data["transform_displacement"], data["fiducial_numbers"].tolist(),
+                    data["fiducial_gds"], data["fiducial_stage"], data["fiducial_inliers"],
+                    _unpack_strings(data["transform_message"], data["transform_message_ends"])[0])
+        return cls(**columns)
+
+    @classmethod
+    def load(cls, name):
+        """Snapshot if it is current, else the JSON file (and a new snapshot), else empty"""
+        snapshot = snapshot_path(name)
+        try:
+            if not os.path.exists(name) or os.path.getmtime(snapshot) >= os.path.getmtime(name):
+                return cls.from_snapshot(snapshot)
+        except (OSError, ValueError, KeyError) as e:
+            if os.path.exists(snapshot):
+                print(f"[Warning] Device catalog snapshot ignored: {e}")
+        if not os.path.exists(name):
+            return cls()
+        catalog = cls.from_json(name)
+        try:
+            catalog.save_snapshot(snapshot)
+        except OSError as e:
+            print(f"[Warning] Could not write the device catalog snapshot: {e}")
+        return catalog
+
+    # === Saving ===
+
+    def save_snapshot(self, path):
+        arrays = {"version": np.array(SNAPSHOT_VERSION),
+                  "number": np.asarray(self.number, dtype=np.int64),
+                  "coordinate": self.gds}
+        for field in ("polarization", "wavelength", "type"):
+            # Few distinct values, stored once with a code per device
+            index = self.index(field)
+            values = list(index)
+            codes = np.empty(len(self), dtype=np.int32)
+            for code, value in enumerate(values):
+                codes[index[value]] = code
+            arrays[f"{field}_values"], arrays[f"{field}_ends"] = _pack_strings(values)
+            arrays[f"{field}_codes"] = codes
+        arrays["devicename_blob"], arrays["devicename_ends"] = _pack_strings(self.devicename)
+        if self.transform is not None:
+            t = self.transform
+            arrays.update(transform_matrix=t.matrix, transform_displacement=t.displacement,
+                          fiducial_numbers=np.asarray(t.numbers, dtype=np.int64), fiducial_gds=t.gds,
+                          fiducial_stage=t.stage, fiducial_inliers=t.inliers)
+            arrays["transform_message"], arrays["transform_message_ends"] = _pack_strings([t.message])
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def save(self, name):
+        """
+        Write the TinyDB layout JSON in one go, then the snapshot. After
+        registration "coordinate" holds the stage position, "gds_coordinate"
+        the GDS one and the "registration" table the transform.
+        """
+        table = {str(i + 1): self.row(i) for i in range(len(self))}
+        db = {"_default": table}
+        if self.transform is not None:
+            for i, row in enumerate(table.values()):
+                row["gds_coordinate"] = self.gds[i].tolist()
+            db["registration"] = {"1": self.transform.to_dict()}
+        os.makedirs(os.path.dirname(name) or ".", exist_ok=True)
+        with open(name, "w", encoding="utf-8") as f:
+            json.dump(db, f)
+        self.save_snapshot(snapshot_path(name))
+
+    # === Queries ===
+
+    def row(self, i):
+        return {"number": self.number[i], "coordinate": self.coordinate[i].tolist(),
+                "polarization": self.polarization[i], "wavelength": self.wavelength[i],
+                "type": self.type[i], "devicename": self.devicename[i]}
+
+    def rows(self, indices):
+        return [self.row(i) for i in indices]
+
+    def find(self, field, value):
+        """Row indices whose field equals value, in catalog order"""
+        return self.index(field).get(value, [])
+
+    def column(self, field):
+        if field == "coordinate":
+            return self.coordinate.tolist()
+        return list(getattr(self, field))
+
+    def register(self, numbers, stage, limit_xy=RESIDUAL_LIMIT_XY, limit_z=RESIDUAL_LIMIT_Z):
+        """Fit a StageTransform from fiducial device numbers and their stage positions"""
+        return StageTransform.fit(numbers, self.gds[self.rows_of_numbers(numbers)], stage, limit_xy, limit_z)
+
+
 class coordinates:
+    """Compatibility layer over DeviceCatalog with the methods the GUIs call"""
 
     def __init__(self, file_directory='./', name='coordinates.json', read_file=False):
         self.path = file_directory
-        self.device_db = TinyDB(name)
-        self.device = Query()
+        self.name = name
         if read_file == True:
-            self.device_db.truncate()
             self.read_file()
+        else:
+            self.catalog = DeviceCatalog.load(name)
+        self._mtime = self._db_mtime()
 
-    def read_file(self):
-        """
-        Reads the file and extracts data from file
+    def _db_mtime(self):
+        try:
+            return os.path.getmtime(self.name)
+        except OSError:
+            return None
+
+    def reload_if_changed(self):
+        """Load the catalog again when another GUI saved it (e.g. a new registration)"""
+        mtime = self._db_mtime()
+        if mtime != self._mtime:
+            self.catalog = DeviceCatalog.load(self.name)
+            self._mtime = mtime
 
-        To search:
-        self.device_db.search(self.device.wavelength == '1550')
+    def stage_coordinates(self, numbers):
+        """Stage coordinates of the given device numbers from the current registration"""
+        self.reload_if_changed()
+        return self.catalog.stage_coordinates(numbers)
 
-        To update:
-        self.device_db.update({'coordinate': [21,232]}, self.device.wavlength == '1550') #what to update to --> which one to update
+    def read_file(self):
+        """
+        Reads the coordinate file at self.path into the catalog and saves it
+        (JSON and snapshot) in one write.
         """
-        with open(self.path) as self.coordinate_file:
-            print("Loading devices into database")
-            print("This may take awhile")
-            file_contents = self.coordinate_file.readlines()
-            startingline = 0
-            for line in file_contents:
-                try:
-                    linesplit = line.split(",")
-                    int(linesplit[0])
-                    int(linesplit[1])
-                    break
-                except:
-                    startingline += 1
-
-            print("Device coordinates start on line " + str(startingline))
-            file_contents = file_contents[startingline:]
-            print("Precentage complete")
-            currentline = startingline
-            number_of_devices = len(file_contents)
-            bracket = 0
-            number = 1
-            for line in file_contents:
-                try:
-                    raw = line.split(",")
-                    line = []
-                    for i in raw:
-                        line.append(i.replace(" ", ""))
-
-                    if "\n" in line[-1]:
-                        line[-1] = line[-1].strip("\n")
-                    coordinate = [
-                     int(line[0]), int(line[1]), 0]
-                    polarization = line[2]
-                    wavelength = line[3]
-                    device_type = line[4]
-                    device_name = "_".join(line[5:])
-                    data = [
-                     number, coordinate,
-                     polarization, wavelength, device_type,
-                     device_name]
-                    param = ['number', 'coordinate', 'polarization', 'wavelength', 'type',
-                     'devicename']
-                    device = dict(zip(param, data))
-                    self.device_db.insert(device)
-                    number += 1
-                    if (number - 1) / number_of_devices * 100 > bracket:
-                        bracket += 10
-                        print(str(round((number - 1) / number_of_devices * 100, 2)) + "%")
-                    currentline += 1
-                except Exception:
-                    print("Problem reading coordinates on line: " + str(currentline))
-                    print("Line contents")
-                    print(line)
-                    print("skipping")
-                    currentline += 1
-
-        file_contents = []
-        self.coordinate_file.close()
-        print("All devices has been uploaded to database")
+        self.catalog, skipped = DeviceCatalog.from_coordinate_file(self.path)
+        for currentline, line in skipped:
+            print("Problem reading coordinates on line: " + str(currentline))
+            print("Line contents")
+            print(line)
+            print("skipping")
+        self.catalog.save(self.name)
+        self._mtime = self._db_mtime()
+        print(f"All {len(self.catalog)} devices has been uploaded to database")
 
     def listdevicenames(self):
-        device_list = []
-        database_entries = self.device_db.all()
-        for device in database_entries:
-            device_list.append(device["devicename"])
-
-        return device_list
+        return self.catalog.column("devicename")
 
     def listselecteddevices(self, wavelength, polarization):
-        database_entries = self.finddevicesbywavelength(wavelength)
-        device_list_wavelength = []
-        for device in database_entries:
-            device_list_wavelength.append(device["devicename"])
-
-        database_entries = self.finddevicesbypolarization(polarization)
-        device_list_polarization = []
-        for device in database_entries:
-            device_list_polarization.append(device["devicename"])
-
-        if wavelength == "all":
-            if polarization == "all":
-                return self.listdevicenames()
-        if wavelength == "all":
-            device_list_wavelength = device_list_polarization
-        if polarization == "all":
-            device_list_polarization = device_list_wavelength
-        return list(set(device_list_wavelength) & set(device_list_polarization))
+        if wavelength == "all" and polarization == "all":
+            return self.listdevicenames()
+        rows = None
+        for field, value in (("wavelength", wavelength), ("polarization", polarization)):
+            if value != "all":
+                found = set(self.catalog.find(field, value))
+                rows = found if rows is None else rows & found
+        return list({self.catalog.devicename[i] for i in rows})
 
     def listdeviceparam(self, parameter):
-        device_list = []
-        database_entries = self.device_db.all()
-        for device in database_entries:
-            device_list.append(device[str(parameter)])
-
-        return device_list
+        return self.catalog.column(str(parameter))
 
     def finddevicesbywavelength(self, string):
-        find = Query()
-        devices = self.device_db.search(find.wavelength == string)
-        return devices
+        return self.catalog.rows(self.catalog.find("wavelength", string))
 
     def finddevicesbypolarization(self, string):
-        find = Query()
-        devices = self.device_db.search(find.polarization == string)
-        return devices
+        return self.catalog.rows(self.catalog.find("polarization", string))
 
     def finddevicenumber(self, string):
-        find = Query()
-        device = self.device_db.search(find.devicename == string)
-        numbers = []
-        for i in device:
-            numbers.append(int(i["number"]))
-
-        return numbers
+        return [self.catalog.number[i] for i in self.catalog.find("devicename", string)]
 
     def finddevicename(self, number):
-        find = Query()
-        device = self.device_db.search(find.number == number)
+        device = self.catalog.rows(self.catalog.find("number", number))
         device = device[0]
         return device["devicename"]
 
-    def apply_transform(self, device_numbers, xy_motor1, xy_motor2, xy_motor3):
+    def apply_transform(self, device_numbers, *xy_motors):
         """
-        given the device number of 3 alignment devices
+        Register the die from N >= 3 alignment devices
+
+        param: device_numbers --> device numbers of the alignment devices, as stored in the catalog
+        param: xy_motors --> one [x, y, z] stage position per alignment device
 
-        param: device_numbers --> int respresenting 3 alignement devices, as stored in the mini db
-        param: xy_motorN --> 3 lists containing the coordinates of the motor at 3 positions
+        Returns 0 when the transform was applied and saved, 1 when the
+        residuals are too large (nothing is changed then).
         """
-        transform_tries = 0
-        while 1:
-            xy_gds1 = np.array(self.device_db.get(self.device.number == device_numbers[0])["coordinate"])
-            xy_gds2 = np.array(self.device_db.get(self.device.number == device_numbers[1])["coordinate"])
-            xy_gds3 = np.array(self.device_db.get(self.device.number == device_numbers[2])["coordinate"])
-            row1 = [xy_gds1[0], xy_gds1[1], xy_gds1[2], 0, 0, 0, 0, 0, 0, 1, 0, 0]
-            row2 = [0, 0, 0, xy_gds1[0], xy_gds1[1], xy_gds1[2], 0, 0, 0, 0, 1, 0]
-            row3 = [0, 0, 0, 0, 0, 0, xy_gds1[0], xy_gds1[1], xy_gds1[2], 0, 0, 1]
-            row4 = [xy_gds2[0], xy_gds2[1], xy_gds2[2], 0, 0, 0, 0, 0, 0, 1, 0, 0]
-            row5 = [0, 0, 0, xy_gds2[0], xy_gds2[1], xy_gds2[2], 0, 0, 0, 0, 1, 0]
-            row6 = [0, 0, 0, 0, 0, 0, xy_gds2[0], xy_gds2[1], xy_gds2[2], 0, 0, 1]
-            row7 = [xy_gds3[0], xy_gds3[1], xy_gds3[2], 0, 0, 0, 0, 0, 0, 1, 0, 0]
-            row8 = [0, 0, 0, xy_gds3[0], xy_gds3[1], xy_gds3[2], 0, 0, 0, 0, 1, 0]
-            row9 = [0, 0, 0, 0, 0, 0, xy_gds3[0], xy_gds3[1], xy_gds3[2], 0, 0, 1]
-            A = np.array([row1, row2, row3, row4, row5, row6, row7, row8, row9])
-            aug = np.array([xy_motor1[0], xy_motor1[1], xy_motor1[2], xy_motor2[0], xy_motor2[1], xy_motor2[2], xy_motor3[0], xy_motor3[1], xy_motor3[2]])
-            solution = np.linalg.lstsq(A, aug, rcond=None)[0]
-            transformation_matrix = solution[:9]
-            transformation_matrix = transformation_matrix.reshape([3, 3])
-            displacement_vector = solution[9:]
-            large_error = 0
-            xy_motor1_calculted = (np.matmul(transformation_matrix, xy_gds1) + displacement_vector).tolist()
-            xy_motor2_calculted = (np.matmul(transformation_matrix, xy_gds2) + displacement_vector).tolist()
-            xy_motor3_calculted = (np.matmul(transformation_matrix, xy_gds3) + displacement_vector).tolist()
-            if abs(xy_motor1[0] - xy_motor1_calculted[0]) > 5:
-                large_error = 1
-            if abs(xy_motor1[1] - xy_motor1_calculted[1]) > 5:
-                large_error = 1
-            if abs(xy_motor1[2] - xy_motor1_calculted[2]) > 15:
-                large_error = 1
-            if abs(xy_motor2[0] - xy_motor2_calculted[0]) > 5:
-                large_error = 1
-            if abs(xy_motor2[1] - xy_motor2_calculted[1]) > 5:
-                large_error = 1
-            if abs(xy_motor2[2] - xy_motor2_calculted[2]) > 15:
-                large_error = 1
-            if abs(xy_motor3[0] - xy_motor3_calculted[0]) > 5:
-                large_error = 1
-            if abs(xy_motor3[1] - xy_motor3_calculted[1]) > 5:
-                large_error = 1
-            if abs(xy_motor3[2] - xy_motor3_calculted[2]) > 15:
-                large_error = 1
-            if large_error == 0:
-                print("Transform matrix" + str(transformation_matrix))
-                print("Displacement vector" + str(displacement_vector))
-                print("Original and transformed alignment marks")
-                print("mark 1: " + str(xy_motor1))
-                print("mark 1 calculated: " + str(xy_motor1_calculted))
-                print("mark 1 error: [" + str(xy_motor1[0] - xy_motor1_calculted[0]) + "," + str(xy_motor1[1] - xy_motor1_calculted[1]) + "," + str(xy_motor1[2] - xy_motor1_calculted[2]) + "]")
-                print("mark 2: " + str(xy_motor2))
-                print("mark 2 calculated: " + str(xy_motor2_calculted))
-                print("mark 2 error: [" + str(xy_motor2[0] - xy_motor2_calculted[0]) + "," + str(xy_motor2[1] - xy_motor2_calculted[1]) + "," + str(xy_motor2[2] - xy_motor2_calculted[2]) + "]")
-                print("mark 3: " + str(xy_motor3))
-                print("mark 3 calculated: " + str(xy_motor3_calculted))
-                print("mark 3 error: [" + str(xy_motor3[0] - xy_motor3_calculted[0]) + "," + str(xy_motor3[1] - xy_motor3_calculted[1]) + "," + str(xy_motor3[2] - xy_motor3_calculted[2]) + "]")
-            else:
-                if transform_tries > 40:
-                    print("out of retries")
-                    print("Transform matrix" + str(transformation_matrix))
-                    print("Displacement vector" + str(displacement_vector))
-                    print("Original and transformed alignment marks")
-                    print("mark 1: " + str(xy_motor1))
-                    print("mark 1 calculated: " + str(xy_motor1_calculted))
-                    print("mark 1 error: [" + str(xy_motor1[0] - xy_motor1_calculted[0]) + "," + str(xy_motor1[1] - xy_motor1_calculted[1]) + "," + str(xy_motor1[2] - xy_motor1_calculted[2]) + "]")
-                    print("mark 2: " + str(xy_motor2))
-                    print("mark 2 calculated: " + str(xy_motor2_calculted))
-                    print("mark 2 error: [" + str(xy_motor2[0] - xy_motor2_calculted[0]) + "," + str(xy_motor2[1] - xy_motor2_calculted[1]) + "," + str(xy_motor2[2] - xy_motor2_calculted[2]) + "]")
-                    print("mark 3: " + str(xy_motor3))
-                    print("mark 3 calculated: " + str(xy_motor3_calculted))
-                    print("mark 3 error: [" + str(xy_motor3[0] - xy_motor3_calculted[0]) + "," + str(xy_motor3[1] - xy_motor3_calculted[1]) + "," + str(xy_motor3[2] - xy_motor3_calculted[2]) + "]")
-                    return 1
-                transform_tries = transform_tries + 1
-                continue
-            data = self.device_db.all()
-            print("Transforming devices this might take awhile")
-            total_length = len(data)
-            bracket = 0
-            current_complete = 0
-            updated = []
-            for item in data:
-                item["coordinate"] = (np.matmul(transformation_matrix, np.array(item["coordinate"])) + displacement_vector).tolist()
-                updated.append(item)
-
-            self.device_db.truncate()
-            for item in updated:
-                self.device_db.insert(item)
-                current_complete += 1
-                percent = current_complete / total_length * 100
-                if percent > bracket:
-                    bracket += 10
-                    print(str(round(percent, 0)) + "%")
-
-            return 0
+        transform = self.catalog.register(device_numbers, xy_motors)
+        self.transform = transform
+        for line in transform.report():
+            print(line)
+        if not transform.ok:
+            return 1
+        print("Transform matrix" + str(transform.matrix))
+        print("Displacement vector" + str(transform.displacement))
+        self.catalog.transform = transform
+        self.catalog.save(self.name)
+        self._mtime = self._db_mtime()
+        return 0
@@ -7,8 +7,15 @@ from motors.config.stage_position import *
 from motors.config.stage_config import *
 from motors.utils.shared_memory import *
 from motors.hal.motors_hal import AxisType
+from utils.state_bus import StateBusClient
+from utils.export_pool import ExportPool
+from utils.decimate import decimate_minmax
+from utils.result_store import ResultStore, link_or_copy, mirror
+import atexit
 import gc
 import plotly.express as px
+import plotly.graph_objects as go
+import base64
 from pathlib import Path
 import matplotlib.pyplot as plt
 import shutil
@@ -398,6 +405,96 @@ class StyledSpinBox(SpinBox):
         if container:
             container.append(self, self.variable_name)
 
+# === State bus ===
+# database/<topic>.json is served by the launcher's state bus when it runs.
+# state_version / load_state replace getmtime / json.load on those files and
+# fall back to the files when no bus is reachable.
+
+_STATE_BUS = None
+_STATE_BUS_RETRY_S = 2.0
+_state_bus_next_try = 0.0
+_state_bus_seen = None  # None: not tried yet, False: no bus at startup, True: had one
+
+def state_bus():
+    """Connected bus client for this process, None if no bus is running"""
+    global _STATE_BUS, _state_bus_next_try, _state_bus_seen
+    if _STATE_BUS is not None and _STATE_BUS.connected:
+        return _STATE_BUS
+    # Standalone GUI without the launcher: stay on the files, a refused connect
+    # can take seconds on Windows. Otherwise reconnect after a bus restart.
+    now = monotonic()
+    if _state_bus_seen is False or now < _state_bus_next_try:
+        return None
+    _state_bus_next_try = now + _STATE_BUS_RETRY_S
+    try:
+        _STATE_BUS = StateBusClient()
+        _state_bus_seen = True
+    except Exception:
+        _STATE_BUS = None
+        if _state_bus_seen is None:
+            _state_bus_seen = False
+    return _STATE_BUS
+
+def _state_topic(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+def state_version(path):
+    """Change marker for a database file: bus sequence number, else the file mtime"""
+    bus = state_bus()
+    if bus is not None:
+        topic = _state_topic(path)
+        if bus.subscribed(topic) or bus.subscribe(topic):
+            return bus.version(topic)
+    return os.path.getmtime(path)
+
+def load_state(path):
+    """Current content of a database file as a dict"""
+    bus = state_bus()
+    if bus is not None:
+        topic = _state_topic(path)
+        if bus.subscribed(topic) or bus.subscribe(topic):
+            return bus.get(topic)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def wait_state(path, key, predicate, timeout=None, poll_s=0.05):
+    """
+    Block until predicate(value of key in a database file) holds.
+    Woken by the bus update itself, without a bus the file is polled every poll_s.
+    Returns False on timeout.
+    """
+    deadline = None if timeout is None else monotonic() + timeout
+    bus = state_bus()
+    if bus is not None and bus.wait_for(_state_topic(path), key, predicate, timeout):
+        return True
+    if bus is not None and bus.connected:
+        return False  # timed out on the bus
+    while True:
+        try:
+            if predicate(load_state(path).get(key)):
+                return True
+        except (OSError, json.JSONDecodeError):
+            pass
+        if deadline is not None and monotonic() >= deadline:
+            return False
+        sleep(poll_s)
+
+def command_done(new_command, path=os.path.join("database", "command.json")):
+    """
+    Called by the owner of a command step once it has run: hand the rest of the
+    chain on and acknowledge the step's command_id to the command router.
+    """
+    bus = state_bus()
+    if bus is None:
+        File("command", "command", new_command).save()
+        return
+    # Same update: the GUIs never see the ack with the old step still in place
+    updates = {"command": new_command}
+    command_id = bus.get(_state_topic(path)).get("command_id")
+    if command_id is not None:
+        updates["command_done"] = command_id
+    bus.set(_state_topic(path), updates)
+
 class Memory():
     def __init__(self):
         self.x_pos = 0
@@ -405,6 +502,12 @@ class Memory():
         self.z_pos = 0
         self.fr_pos = 0
         self.cp_pos = 0
+        self.pos_timestamp = 0.0
+
+        # Stage position block, attached on first read and kept mapped
+        self._pos_shm = None
+        self._pos = None
+        self._history_seen = 0
 
     def writer_pos(self):
         shm, raw = open_shared_stage_position()
@@ -419,21 +522,61 @@ class Memory():
         del raw
         shm.close()
 
-    def reader_pos(self):
-        # give writer a moment
-        # sleep(0.1)
-        shm, raw = open_shared_stage_position("stage_position")
-        sp = StagePosition(shared_struct=raw)
-        self.x_pos = round(sp.x.position, 1)
-        self.y_pos = round(sp.y.position, 1)
-        self.z_pos = round(sp.z.position, 1)
-        self.fr_pos = round(sp.fr.position, 1)
-        self.cp_pos = round(sp.cp.position, 1)
+    def _attach_pos(self):
+        """Map the manager's position block once, re-attach if the manager restarted"""
+        if self._pos is not None and self._pos.closed:
+            self._detach_pos()
+        if self._pos is None:
+            try:
+                self._pos_shm, raw = open_shared_stage_position("stage_position")
+            except FileNotFoundError:
+                return None
+            self._pos = StagePosition(shared_struct=raw)
+            self._history_seen = 0
+        return self._pos
+
+    def _detach_pos(self):
+        # The struct view holds an export of the buffer, drop it before closing
+        self._pos = None
+        if self._pos_shm is not None:
+            try:
+                self._pos_shm.close()
+            except BufferError:
+                gc.collect()
+                self._pos_shm.close()
+            self._pos_shm = None
 
-        # Clean - explicitly delete the object first
-        del sp
-        del raw
-        shm.close()
+    def reader_pos(self):
+        sp = self._attach_pos()
+        if sp is None:
+            return False
+        # Seqlocked copy, every axis comes from the same monitor update
+        sample = sp.snapshot()
+        if sample is None:
+            return False
+        positions = sample.positions
+        self.x_pos = round(positions[AxisType.X.value], 1)
+        self.y_pos = round(positions[AxisType.Y.value], 1)
+        self.z_pos = round(positions[AxisType.Z.value], 1)
+        self.fr_pos = round(positions[AxisType.ROTATION_FIBER.value], 1)
+        self.cp_pos = round(positions[AxisType.ROTATION_CHIP.value], 1)
+        updated = sample.timestamp != self.pos_timestamp
+        self.pos_timestamp = sample.timestamp
+        return updated
+
+    def reader_trajectory(self):
+        """
+        Stage samples written since the last call, for trajectory plots.
+        Returns (timestamps, positions) with one list of axis values per sample.
+        """
+        sp = self._attach_pos()
+        if sp is None:
+            return [], []
+        self._history_seen, times, positions = sp.history(self._history_seen)
+        return times, positions
+
+    def close(self):
+        self._detach_pos()
 
 class File():
     def __init__(self, filename, data_name, data_info="", data_name2="", data_info2=""):
@@ -450,6 +593,15 @@ class File():
         os.replace(temp_filepath, filepath)  # 原子替换
 
     def save(self):
+        updates = {self.data_name: self.data_info}
+        if self.data_info2 != "":
+            updates[self.data_name2] = self.data_info2
+        bus = state_bus()
+        if bus is not None:
+            # Keyed update, the bus writes the file back
+            bus.set(self.filename, updates)
+            return
+
         filepath = os.path.join("database", f"{self.filename}.json")
         os.makedirs("database", exist_ok=True)
         if os.path.exists(filepath):
@@ -492,11 +644,149 @@ class File():
             "DeviceNum": 0
         }
 
+        bus = state_bus()
+        if bus is not None:
+            bus.replace(self.filename, data)
+            return
         self._safe_write(data, filepath)
 
+# === Export pool ===
+# Spectrum exports run in long lived workers that have lib_gui (plotly,
+# matplotlib on Agg, pandas, scipy) loaded already, not in a new process each.
+
+_EXPORT_POOL = None
+
+def export_pool():
+    """Export worker pool of this process, the worker starts on first use or warm_up()"""
+    global _EXPORT_POOL
+    if _EXPORT_POOL is None:
+        _EXPORT_POOL = ExportPool(workers=1, preload=("GUI.lib_gui",))
+        atexit.register(_EXPORT_POOL.shutdown, False)
+    return _EXPORT_POOL
+
+def _spectrum_job(data, **plot_kwargs):
+    # Worker side: row 0 is the wavelength axis, then one row per detector
+    plot(data[0], data[1:], **plot_kwargs).generate_plots()
+
+def submit_spectrum(x, y, **plot_kwargs):
+    """Queue plot(x, y, **plot_kwargs).generate_plots() in the export pool, returns its Future"""
+    data = np.vstack([np.asarray(x, dtype=float), np.atleast_2d(np.asarray(y, dtype=float))])
+    return export_pool().submit(_spectrum_job, data, **plot_kwargs)
+
+# === Spectrum HTML ===
+# The html holds at most DISPLAY_POINTS min/max decimated points per detector.
+# A long sweep also gets <name>.full.js next to it (base64 float64 wavelengths,
+# float32 detectors) which the page loads on the first zoom, as a script so it
+# also works from a file:// URI, and shows the zoomed range at full resolution.
+
+DISPLAY_POINTS = 8000
+
+_ZOOM_SCRIPT = """
+(function () {
+  var gd = document.getElementById("{plot_id}");
+  var KEY = __KEY__, SRC = __SRC__, MAX = __MAX__;
+  var initial = gd.data.map(function (t) { return {x: t.x, y: t.y}; });
+  var full = null, loading = null;
+  function decode(s, T) {
+    var bin = atob(s), buf = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) buf[i] = bin.charCodeAt(i);
+    return new T(buf.buffer);
+  }
+  function load() {
+    if (!loading) loading = new Promise(function (resolve, reject) {
+      var el = document.createElement("script");
+      el.src = SRC;
+      el.onload = function () {
+        var d = window.__spectrumFull[KEY];
+        full = {x: decode(d.x, Float64Array), y: d.y.map(function (s) { return decode(s, Float32Array); })};
+        resolve();
+      };
+      el.onerror = reject;
+      document.head.appendChild(el);
+    });
+    return loading;
+  }
+  function lower(a, v) {
+    var lo = 0, hi = a.length;
+    while (lo < hi) { var m = (lo + hi) >> 1; if (a[m] < v) lo = m + 1; else hi = m; }
+    return lo;
+  }
+  function view(x0, x1) {
+    var i0 = Math.max(lower(full.x, x0) - 1, 0), i1 = Math.min(lower(full.x, x1) + 1, full.x.length);
+    var k = Math.max(1, Math.ceil((i1 - i0) / (MAX / 2))), xs = [], ys = [];
+    full.y.forEach(function (y) {
+      var xo = [], yo = [];
+      for (var b = i0; b < i1; b += k) {
+        var e = Math.min(b + k, i1), lo = b, hi = b;
+        for (var i = b + 1; i < e; i++) { if (y[i] < y[lo]) lo = i; if (y[i] > y[hi]) hi = i; }
+        var a = Math.min(lo, hi), z = Math.max(lo, hi);
+        xo.push(full.x[a]); yo.push(y[a]);
+        if (z !== a) { xo.push(full.x[z]); yo.push(y[z]); }
+      }
+      xs.push(xo); ys.push(yo);
+    });
+    return {x: xs, y: ys};
+  }
+  gd.on("plotly_relayout", function (ev) {
+    if (ev["xaxis.autorange"]) {
+      Plotly.restyle(gd, {x: initial.map(function (t) { return t.x; }), y: initial.map(function (t) { return t.y; })});
+      return;
+    }
+    var r = ev["xaxis.range"] || [ev["xaxis.range[0]"], ev["xaxis.range[1]"]];
+    if (r[0] === undefined) return;
+    load().then(function () { Plotly.restyle(gd, view(+r[0], +r[1])); },
+                function () { console.warn("Full resolution data not found: " + SRC); });
+  });
+})();
+"""
+
+def _spectrum_sidecar(key, x, y_values):
+    def encode(a, dtype):
+        return base64.b64encode(np.ascontiguousarray(a, dtype=dtype).tobytes()).decode("ascii")
+    payload = json.dumps({"n": len(x), "x": encode(x, "<f8"), "y": [encode(y, "<f4") for y in y_values]})
+    return ("window.__spectrumFull = window.__spectrumFull || {};\n"
+            f"window.__spectrumFull[{json.dumps(key)}] = {payload};\n")
+
+# === Spectrum store ===
+# Every sweep is appended to the store of its run (UserData/<user>/<project>/
+# Spectrum/<run>.spectra), see utils.result_store. Auto sweeps no longer write
+# a csv and mat per device, those are exported from the store when needed.
+
+SPECTRUM_STORE_OPTIONS = {"dtype": "float64", "compress": False}
+
+_STORES = {}
+
+def spectrum_store(path):
+    """The ResultStore at path, opened once per process"""
+    store = _STORES.get(path)
+    if store is None:
+        store = _STORES[path] = ResultStore(path, **SPECTRUM_STORE_OPTIONS)
+    return store
+
+def _mirror_files(src_dir, dst_dir, names):
+    # Second output tree: link (or copy) what was written once
+    if os.path.abspath(src_dir) == os.path.abspath(dst_dir):
+        return
+    for name in names:
+        src = os.path.join(src_dir, name)
+        if os.path.exists(src):
+            link_or_copy(src, os.path.join(dst_dir, name))
+
+def _write_spectrum_html(fig, output_html, key, sidecar):
+    os.makedirs(os.path.dirname(output_html), exist_ok=True)
+    script = None
+    if sidecar is not None:
+        with open(os.path.join(os.path.dirname(output_html), f"{key}.full.js"), "w", encoding="ascii") as f:
+            f.write(sidecar)
+        script = (_ZOOM_SCRIPT.replace("__KEY__", json.dumps(key))
+                  .replace("__SRC__", json.dumps(f"{key}.full.js"))
+                  .replace("__MAX__", str(DISPLAY_POINTS)))
+    # plotly.min.js once per folder instead of 3.5 MB inside every html
+    fig.write_html(output_html, include_plotlyjs="directory", post_script=script)
+
 class plot():
     def __init__(self, x=None, y=None, filename=None, fileTime=None, user=None, name=None, project=None, data=None,
-                 file_format=None, file_path=""):
+                 file_format=None, file_path="", run=None, number=None, meta=None):
         if file_format is None:
             self.file_format = {"csv": 1, "mat": 1, "png": 1, "pdf": 1}
         else:
@@ -510,6 +800,10 @@ class plot():
         self.project = project
         self.data = data
         self.file_path = file_path
+        # Spectra of one auto sweep share a store, manual sweeps one per day
+        self.run = run if run else f"sweeps_{str(fileTime)[:10]}"
+        self.number = number
+        self.meta = meta or {}  # extra entries for the store index (fine alignment stats)
 
     def heat_map(self):
         fig, ax = plt.subplots(figsize=(7, 7))
@@ -591,28 +885,35 @@ class plot():
         user = self.user
         name = self.name
         project = self.project
-        path = os.path.join(".", "UserData", user, project, "Spectrum", name)
+        spectrum_dir = os.path.join(".", "UserData", user, project, "Spectrum")
+        path = os.path.join(spectrum_dir, name)
         file_path = os.path.join(self.file_path, user, project, "Spectrum", name)
+        key = f"{filename}_{fileTime}"
+
+        try:
+            store = spectrum_store(os.path.join(spectrum_dir, f"{self.run}.spectra"))
+            store_key = store.append(name, x_axis, y_values, number=self.number, time=fileTime,
+                                     meta={"filename": filename, "user": user, "project": project, **self.meta})
+            mirror(store.path, os.path.join(os.path.dirname(file_path), f"{self.run}.spectra"))
+        except Exception as e:
+            print("Exception saving spectrum to the run store")
+            print(e)
+            store = store_key = None
+
+        # Display copies for the html and the images, the data files keep every point
+        display = [decimate_minmax(x_axis, y_values[element], DISPLAY_POINTS) for element in range(len(y_values))]
 
         try:
-            plots = {"Wavelength [nm]": x_axis}
-            plotnames = []
-            for element in range(0, len(y_values)):
-                plotname = "Detector " + str(element + 1)
-                plots[plotname] = y_values[element]
-                plotnames.append(plotname)
-            fig = px.line(plots, x="Wavelength [nm]", y=plotnames,
-                          labels={'value': "Power [dBm]", 'x': "Wavelength [nm]"})
-            for i in range(0, len(y_values)):
-                fig.data[i].name = str(i + 1)
-            fig.update_layout(legend_title_text="Detector")
-            output_html = os.path.join(path, f"{filename}_{fileTime}.html")
-            os.makedirs(os.path.dirname(output_html), exist_ok=True)
-            fig.write_html(output_html)
-
-            output_html2 = os.path.join(file_path, f"{filename}_{fileTime}.html")
-            os.makedirs(os.path.dirname(output_html2), exist_ok=True)
-            fig.write_html(output_html2)
+            fig = go.Figure()
+            for element, (x_d, y_d) in enumerate(display):
+                fig.add_trace(go.Scatter(x=x_d, y=y_d, mode="lines", name=str(element + 1)))
+            fig.update_layout(xaxis_title="Wavelength [nm]", yaxis_title="Power [dBm]", legend_title_text="Detector")
+            sidecar = _spectrum_sidecar(key, x_axis, y_values) if len(x_axis) > DISPLAY_POINTS else None
+            output_html = os.path.join(path, f"{key}.html")
+            _write_spectrum_html(fig, output_html, key, sidecar)
+            if not os.path.exists(os.path.join(file_path, "plotly.min.js")):
+                _mirror_files(path, file_path, ["plotly.min.js"])
+            _mirror_files(path, file_path, [f"{key}.html", f"{key}.full.js"])
         except Exception as e:
             try:
                 print("Exception generating html plot")
@@ -620,82 +921,51 @@ class plot():
             finally:
                 e = None
                 del e
-        if self.file_format["csv"] == 1:
-            try:
-                df = pd.DataFrame({"Wavelength [nm]": x_axis})
-                for element in range(len(y_values)):
-                    df[f"Detector {element + 1}"] = y_values[element]
-                output_csv = os.path.join(path, f"{filename}_{fileTime}.csv")
-                os.makedirs(os.path.dirname(output_csv), exist_ok=True)
-                df.to_csv(output_csv, index=False)
-
-                output_csv2 = os.path.join(file_path, f"{filename}_{fileTime}.csv")
-                os.makedirs(os.path.dirname(output_csv2), exist_ok=True)
-                df.to_csv(output_csv2, index=False)
-            except Exception as e:
-                print("Exception saving csv")
-                print(e)
 
-        if self.file_format["mat"] == 1:
+        # csv / mat of a single sweep right away, an auto sweep's from the store later
+        formats = [fmt for fmt in ("csv", "mat") if self.file_format.get(fmt) == 1]
+        if formats and self.data != 1:
             try:
-                detectors_matrix = np.column_stack(y_values) if len(y_values) > 0 else np.empty((len(x_axis), 0))
-                detector_names = [f"Detector {i + 1}" for i in range(len(y_values))]
-                mat_dict = {
-                    "wavelength_nm": np.asarray(x_axis),
-                    "detectors_dbm": np.asarray(detectors_matrix),
-                    "detector_names": np.array(detector_names, dtype=object),
-                    "filename": np.array(filename, dtype=object),
-                    "fileTime": np.array(fileTime, dtype=object),
-                    "user": np.array(user, dtype=object),
-                    "project": np.array(project, dtype=object),
-                    "name": np.array(name, dtype=object),
-                }
-                output_mat = os.path.join(path, f"{filename}_{fileTime}.mat")
-                os.makedirs(os.path.dirname(output_mat), exist_ok=True)
-                savemat(output_mat, mat_dict)
-
-                output_mat2 = os.path.join(file_path, f"{filename}_{fileTime}.mat")
-                os.makedirs(os.path.dirname(output_mat2), exist_ok=True)
-                savemat(output_mat2, mat_dict)
+                if store_key is None:
+                    raise RuntimeError("spectrum is not in the store")
+                for fmt in formats:
+                    output = os.path.join(path, f"{key}.{fmt}")
+                    if fmt == "csv":
+                        store.export_csv(store_key, output)
+                    else:
+                        store.export_mat(store_key, output)
+                    _mirror_files(path, file_path, [f"{key}.{fmt}"])
             except Exception as e:
-                print("Exception saving mat")
+                print(f"Exception saving {'/'.join(formats)}")
                 print(e)
 
         try:
             image_dpi = 20
             plt.figure(figsize=(100 / image_dpi, 100 / image_dpi), dpi=image_dpi)
-            for element in range(0, len(y_values)):
-                plt.plot(x_axis, y_values[element], linewidth=0.2, label=f"{element+1}")
+            for element, (x_d, y_d) in enumerate(display):
+                plt.plot(x_d, y_d, linewidth=0.2, label=f"{element+1}")
             plt.xlabel("Wavelength [nm]")
             plt.ylabel("Power [dBm]")
             plt.legend(title="Detector", fontsize=8, title_fontsize=9, ncol=2, loc='upper right')
             plt.tight_layout()
 
             if self.file_format["pdf"] == 1:
-                output_pdf = os.path.join(path, f"{filename}_{fileTime}.pdf")
+                output_pdf = os.path.join(path, f"{key}.pdf")
                 os.makedirs(os.path.dirname(output_pdf), exist_ok=True)
                 plt.savefig(output_pdf, dpi=image_dpi)
+                _mirror_files(path, file_path, [f"{key}.pdf"])
 
-                output_pdf2 = os.path.join(file_path, f"{filename}_{fileTime}.pdf")
-                os.makedirs(os.path.dirname(output_pdf2), exist_ok=True)
-                plt.savefig(output_pdf2, dpi=image_dpi)
-
-            if self.file_format["png"] == 1:
-                output_png2 = os.path.join(path, f"{filename}_{fileTime}.png")
-                os.makedirs(os.path.dirname(output_png2), exist_ok=True)
-                plt.savefig(output_png2, dpi=300)
-
-                output_png3= os.path.join(file_path, f"{filename}_{fileTime}.png")
-                os.makedirs(os.path.dirname(output_png3), exist_ok=True)
-                plt.savefig(output_png3, dpi=300)
-
-            output_png = os.path.join(".", "res", "spectral_sweep", f"{filename}_{fileTime}.png")
+            # Rendered once at 300 dpi, the saved copies are links to it
+            output_png = os.path.join(".", "res", "spectral_sweep", f"{key}.png")
             os.makedirs(os.path.dirname(output_png), exist_ok=True)
             plt.savefig(output_png, dpi=300)
+            if self.file_format["png"] == 1:
+                link_or_copy(output_png, os.path.join(path, f"{key}.png"))
+                _mirror_files(path, file_path, [f"{key}.png"])
             self._cleanup_old_plots(keep=1)
 
             plt.close()
-            file = File("shared_memory", "Image", f"spectral_sweep/{filename}_{fileTime}.png", "Web", output_html)
+            file = File("shared_memory", "Image", f"spectral_sweep/{key}.png", "Web", output_html)
             file.save()
         except Exception as e:
             try:
@@ -1,11 +1,13 @@
 import json
-import math
 import os
 import time
 from pathlib import Path
 import matplotlib.pyplot as plt
-from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 import matplotlib
+import numpy as np
+
+from GUI.lib_gui import load_state
+from measure.route_planner import RoutePlanner, StageCostModel
 
 
 class TSPSolver:
@@ -16,16 +18,29 @@ class TSPSolver:
         selected_json: str,
         time_limit: int = 10,
         output_dir: str = "./res",
+        cost_model: StageCostModel = None,
+        warm_start=None,
+        refine: bool = False,
     ):
-
+        """
+        time_limit caps the planning time (s), the heuristic usually needs far less.
+        cost_model: move times of the stage, read from the stage manager if None
+            (distance in um when no stage manager runs).
+        warm_start: route_numbers of the previous solve, kept where still selected.
+        refine: spend time_limit in OR-tools after the heuristic (if installed).
+        """
         self.coord_json   = Path(coord_json)
         self.selected_json = Path(selected_json)
         self.time_limit    = time_limit
         self.output_dir    = Path(output_dir)
+        self.cost_model    = cost_model if cost_model is not None else self._stage_cost_model()
+        self.warm_start    = warm_start
+        self.refine        = refine
 
         self.numbers = [0]
         self.points  = [(0, 0)]
         self.selected_numbers = []
+        self.route_numbers = []
 
         self._load_selected_numbers()
         self._load_coordinates()
@@ -34,13 +49,8 @@ class TSPSolver:
     # Public API
     # ------------------------------------------------------------------
     def solve_and_plot(self) -> None:
-        self._build_distance_matrix()
-        solution = self._solve_tsp()
-
-        if solution is None:
-            print("⚠️  No Path")
-
-        xs, ys, total_dist = self._print_solution(solution)
+        route = self._solve_tsp()
+        xs, ys, total_time = self._print_solution(route)
 
         ts = int(time.time() * 1000)
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -56,13 +66,13 @@ class TSPSolver:
     # Internal helpers
     # ------------------------------------------------------------------
     def _load_selected_numbers(self) -> None:
-        with self.selected_json.open("r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                self.selected_numbers = set(data.get("Selection", []))
-            except json.JSONDecodeError as e:
-                print(f"❌ Failed to parse JSON: {e}")
-                self.selected_numbers = set()
+        # Through the state bus when it runs, the file can lag behind the GUI
+        try:
+            data = load_state(self.selected_json)
+            self.selected_numbers = set(data.get("Selection", []))
+        except json.JSONDecodeError as e:
+            print(f"❌ Failed to parse JSON: {e}")
+            self.selected_numbers = set()
 
     def _load_coordinates(self) -> None:
         with self.coord_json.open("r", encoding="utf-8") as f:
@@ -77,57 +87,49 @@ class TSPSolver:
         if len(self.numbers) == 1:
             raise ValueError("⚠️  Do Not Have Any Devices")
 
-    def _build_distance_matrix(self) -> None:
-        self.dist = [
-            [int(math.hypot(x1 - x2, y1 - y2)) for x2, y2 in self.points]
-            for x1, y1 in self.points
-        ]
+    def _stage_cost_model(self):
+        # Live velocities / controller accelerations when the stage manager runs,
+        # without it the configured defaults say nothing about the stage: plan in um
+        try:
+            from motors.utils.shared_memory import open_shared_stage_config, read_shared_stage_config
+            shm = open_shared_stage_config()
+            try:
+                config = read_shared_stage_config(shm)
+            finally:
+                shm.close()
+        except Exception:
+            return None
+        return StageCostModel.from_stage_config(config)
 
     def _solve_tsp(self):
-        N = len(self.points)
-        mgr = pywrapcp.RoutingIndexManager(N, 1, 0)
-        routing = pywrapcp.RoutingModel(mgr)
-
-        cb = routing.RegisterTransitCallback(
-            lambda i, j: self.dist[mgr.IndexToNode(i)][mgr.IndexToNode(j)]
+        planner = RoutePlanner(
+            cost_model=self.cost_model,
+            start=self.points[0],
+            time_limit_s=self.time_limit,
+            ortools_s=self.time_limit if self.refine else 0.0,
         )
-        routing.SetArcCostEvaluatorOfAllVehicles(cb)
+        return planner.plan(self.numbers[1:], np.asarray(self.points[1:], dtype=float),
+                            warm_start=self.warm_start)
 
-        params = pywrapcp.DefaultRoutingSearchParameters()
-        params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-        params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-        params.time_limit.seconds = self.time_limit
-
-        return routing.SolveWithParameters(params), routing, mgr
-
-    def _print_solution(self, solve_tuple):
-        solution, routing, mgr = solve_tuple
-        idx = routing.Start(0)
-        step = 0
-        total_dist = 0
-        xs, ys = [], []
-        self.route_idx = []
+    def _print_solution(self, route):
+        point_of = dict(zip(self.numbers, self.points))
+        self.route_numbers = list(route.order)
+        self.route_idx = [self.numbers[0] - 1] + [num - 1 for num in route.order]
 
         print(f"{'Step':>4} {'Device':>8} {'X':>10} {'Y':>10}")
-        while not routing.IsEnd(idx):
-            nid = mgr.IndexToNode(idx)
-            x, y = self.points[nid]
-            print(f"{step:>4} {self.numbers[nid]:>8} {x:>10} {y:>10}")
-
+        xs, ys = [], []
+        for step, num in enumerate([self.numbers[0]] + self.route_numbers):
+            x, y = point_of[num]
+            print(f"{step:>4} {num:>8} {x:>10} {y:>10}")
             xs.append(x)
             ys.append(y)
-            self.route_idx.append(self.numbers[nid] - 1)
-
-            next_idx = solution.Value(routing.NextVar(idx))
-            total_dist += self.dist[nid][mgr.IndexToNode(next_idx)]
-            idx = next_idx
-            step += 1
 
         xs.append(0)
         ys.append(0)
-        print(f"{step:>4} {0:>8} {0:>10} {0:>10}  ← Return to Origin")
-        print(f"\nTotal Distance ≈ {total_dist} (same unit as coordinates)")
-        return xs, ys, total_dist
+        print(f"{len(xs) - 1:>4} {0:>8} {0:>10} {0:>10}  ← Return to Origin")
+        total = f"stage time ≈ {route.cost:.1f} s" if self.cost_model is not None else f"distance ≈ {route.cost:.0f} um"
+        print(f"\nTotal {total} ({route.method}, planned in {route.seconds * 1e3:.0f} ms)")
+        return xs, ys, route.cost
 
     def _plot_route(self, xs, ys, png_path: Path) -> None:
         matplotlib.use("Agg")
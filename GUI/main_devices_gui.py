@@ -3,7 +3,6 @@ from GUI.lib_gui import *
 from remi import start, App
 from GUI import lib_coordinates
 import threading, math, json
-from tinydb import TinyDB, Query
 
 command_path = os.path.join("database", "command.json")
 
@@ -38,7 +37,7 @@ class devices(App):
         self.terminal.terminal_refresh()
 
         try:
-            mtime = os.path.getmtime(command_path)
+            mtime = state_version(command_path)
         except FileNotFoundError:
             mtime = None
 
@@ -351,9 +350,8 @@ class devices(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -419,9 +417,10 @@ class devices(App):
 
         if device == 1:
             print("device record")
-            time.sleep(1)
-            file = File("command", "command", new_command)
-            file.save()
+            if state_bus() is None:
+                # Give the file based readers a tick to pick up the selection
+                time.sleep(1)
+            command_done(new_command)
 
 
 
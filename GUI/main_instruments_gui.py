@@ -26,16 +26,15 @@ class instruments(App):
         self.terminal.terminal_refresh()
 
         try:
-            stime = os.path.getmtime(shared_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             stime = None
 
         if stime != self._user_stime:
             self._user_stime = stime
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.configuration_check = data.get("Configuration_check", {})
+                data = load_state(shared_path)
+                self.configuration_check = data.get("Configuration_check", {})
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
 
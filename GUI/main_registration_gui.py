@@ -2,17 +2,15 @@ from remi import start, App
 import os, lib_coordinates, threading, glob
 from GUI.lib_gui import *
 
+# Rows in the coordinate table, 3 marks are enough for the fit, more let
+# apply_transform reject a bad mark and report residuals
+MARKS = 6
+
 class registration(App):
     def __init__(self, *args, **kwargs):
-        self.first_mark_set = 0
-        self.second_mark_set = 0
-        self.third_mark_set = 0
-        self.number_1 = 1
-        self.number_2 = 1
-        self.number_3 = 1
-        self.first_mark_position = [-100,-100,0]
-        self.second_mark_position = [100, -100,0]
-        self.third_mark_position = [100, 100,0]
+        self.mark_set = [0] * MARKS
+        self.mark_number = [1] * MARKS
+        self.mark_position = [[0, 0, 0] for _ in range(MARKS)]
         self.memory = Memory()
 
         if "editing_mode" not in kwargs:
@@ -55,7 +53,7 @@ class registration(App):
         # ---------------- Coordinate Table Section ----------------
         coordinate_container = StyledContainer(
             container=registration_container, variable_name="coordinate_container",
-            left=10, top=80, height=188, width=625, border=True
+            left=10, top=80, height=98 + 30 * MARKS, width=625, border=True
         )
 
         StyledLabel(
@@ -79,11 +77,11 @@ class registration(App):
 
         StyledTable(
             container=coordinate_container, variable_name="device_table",
-            left=0, top=50, height=30, table_width=625, headers=headers, widths=widths, row=4
+            left=0, top=50, height=30, table_width=625, headers=headers, widths=widths, row=MARKS + 1
         )
 
         # Initialize each row of the coordinate table with UI elements
-        for row_index in range(1, 4):
+        for row_index in range(1, MARKS + 1):
             table = registration_container.children["coordinate_container"].children["device_table"]
             row = list(table.children.values())[row_index]
             cell0, cell1, cell2, cell3, cell4, cell5 = [list(row.children.values())[i] for i in range(6)]
@@ -139,12 +137,11 @@ class registration(App):
 
         # ---------------- Event Bindings ----------------
         self.uploader.ondata.do(lambda emitter, filedata, filename: self.run_in_thread(self.ondata_uploader, emitter, filedata, filename))
-        self.device_id_1.onchange.do(lambda emitter, value: self.run_in_thread(self.onchange_device_1, emitter, value))
-        self.device_id_2.onchange.do(lambda emitter, value: self.run_in_thread(self.onchange_device_2, emitter, value))
-        self.device_id_3.onchange.do(lambda emitter, value: self.run_in_thread(self.onchange_device_3, emitter, value))
-        self.checkbox_1.onchange.do(lambda emitter, value: self.run_in_thread(self.onchange_checkbox_1, emitter, value))
-        self.checkbox_2.onchange.do(lambda emitter, value: self.run_in_thread(self.onchange_checkbox_2, emitter, value))
-        self.checkbox_3.onchange.do(lambda emitter, value: self.run_in_thread(self.onchange_checkbox_3, emitter, value))
+        for i in range(MARKS):
+            getattr(self, f"device_id_{i + 1}").onchange.do(
+                lambda emitter, value, i=i: self.run_in_thread(self.onchange_device, i, emitter, value))
+            getattr(self, f"checkbox_{i + 1}").onchange.do(
+                lambda emitter, value, i=i: self.run_in_thread(self.onchange_checkbox, i, emitter, value))
         self.reset_button.do_onclick(lambda *_: self.run_in_thread(self.onclick_reset))
         self.transform_button.do_onclick(lambda *_: self.run_in_thread(self.onclick_transform))
 
@@ -171,111 +168,51 @@ class registration(App):
         self.type = self.gds.listdeviceparam("type")
         self.devices = [f"{name} ({num})" for name, num in zip(self.gds.listdeviceparam("devicename"), self.number)]
 
-        self.device_id_1.empty()
-        self.device_id_2.empty()
-        self.device_id_3.empty()
-        self.device_id_1.append(self.devices)
-        self.device_id_2.append(self.devices)
-        self.device_id_3.append(self.devices)
-        self.device_id_1.attributes["title"] = self.devices[0]
-        self.device_id_2.attributes["title"] = self.devices[0]
-        self.device_id_3.attributes["title"] = self.devices[0]
-        self.gds_x_1.set_text(str(self.coordinate[0][0]))
-        self.gds_y_1.set_text(str(self.coordinate[0][1]))
-        self.gds_x_2.set_text(str(self.coordinate[0][0]))
-        self.gds_y_2.set_text(str(self.coordinate[0][1]))
-        self.gds_x_3.set_text(str(self.coordinate[0][0]))
-        self.gds_y_3.set_text(str(self.coordinate[0][1]))
-
-    def onchange_device_1(self, emitter, new_value):
-        number_str = new_value.split("(")[-1].split(")")[0]
-        self.number_1 = int(number_str)
-        x = self.coordinate[self.number_1-1][0]
-        y = self.coordinate[self.number_1-1][1]
-        self.gds_x_1.set_text(str(x))
-        self.gds_y_1.set_text(str(y))
-        self.device_id_1.attributes["title"] = new_value
-
-    def onchange_device_2(self, emitter, new_value):
-        number_str = new_value.split("(")[-1].split(")")[0]
-        self.number_2 = int(number_str)
-        x = self.coordinate[self.number_2-1][0]
-        y = self.coordinate[self.number_2-1][1]
-        self.gds_x_2.set_text(str(x))
-        self.gds_y_2.set_text(str(y))
-        self.device_id_2.attributes["title"] = new_value
-
-    def onchange_device_3(self, emitter, new_value):
-        number_str = new_value.split("(")[-1].split(")")[0]
-        self.number_3 = int(number_str)
-        x = self.coordinate[self.number_3-1][0]
-        y = self.coordinate[self.number_3-1][1]
-        self.gds_x_3.set_text(str(x))
-        self.gds_y_3.set_text(str(y))
-        self.device_id_3.attributes["title"] = new_value
-
-    def onchange_checkbox_1(self, emitter, value):
-        self.memory.reader_pos()
-        self.first_mark_position[0] = self.memory.x_pos
-        self.first_mark_position[1] = self.memory.y_pos
-        if int(value) == 1:
-            self.first_mark_set = 1
-            self.stage_x_1.set_text(str(self.first_mark_position[0]))
-            self.stage_y_1.set_text(str(self.first_mark_position[1]))
-        else:
-            self.first_mark_set = 0
-            self.stage_x_1.set_text("N/A")
-            self.stage_y_1.set_text("N/A")
+        for row_index in range(1, MARKS + 1):
+            device_id = getattr(self, f"device_id_{row_index}")
+            device_id.empty()
+            device_id.append(self.devices)
+            device_id.attributes["title"] = self.devices[0]
+            getattr(self, f"gds_x_{row_index}").set_text(str(self.coordinate[0][0]))
+            getattr(self, f"gds_y_{row_index}").set_text(str(self.coordinate[0][1]))
 
-    def onchange_checkbox_2(self, emitter, value):
-        self.memory.reader_pos()
-        self.second_mark_position[0] = self.memory.x_pos
-        self.second_mark_position[1] = self.memory.y_pos
-        if int(value) == 1:
-            self.second_mark_set = 1
-            self.stage_x_2.set_text(str(self.second_mark_position[0]))
-            self.stage_y_2.set_text(str(self.second_mark_position[1]))
-        else:
-            self.second_mark_set = 0
-            self.stage_x_2.set_text("N/A")
-            self.stage_y_2.set_text("N/A")
-
-    def onchange_checkbox_3(self, emitter, value):
+    def onchange_device(self, i, emitter, new_value):
+        number_str = new_value.split("(")[-1].split(")")[0]
+        self.mark_number[i] = int(number_str)
+        x = self.coordinate[self.mark_number[i]-1][0]
+        y = self.coordinate[self.mark_number[i]-1][1]
+        getattr(self, f"gds_x_{i + 1}").set_text(str(x))
+        getattr(self, f"gds_y_{i + 1}").set_text(str(y))
+        getattr(self, f"device_id_{i + 1}").attributes["title"] = new_value
+
+    def onchange_checkbox(self, i, emitter, value):
         self.memory.reader_pos()
-        self.third_mark_position[0] = self.memory.x_pos
-        self.third_mark_position[1] = self.memory.y_pos
+        self.mark_position[i][0] = self.memory.x_pos
+        self.mark_position[i][1] = self.memory.y_pos
         if int(value) == 1:
-            self.third_mark_set = 1
-            self.stage_x_3.set_text(str(self.third_mark_position[0]))
-            self.stage_y_3.set_text(str(self.third_mark_position[1]))
+            self.mark_set[i] = 1
+            getattr(self, f"stage_x_{i + 1}").set_text(str(self.mark_position[i][0]))
+            getattr(self, f"stage_y_{i + 1}").set_text(str(self.mark_position[i][1]))
         else:
-            self.third_mark_set = 0
-            self.stage_x_3.set_text("N/A")
-            self.stage_y_3.set_text("N/A")
+            self.mark_set[i] = 0
+            getattr(self, f"stage_x_{i + 1}").set_text("N/A")
+            getattr(self, f"stage_y_{i + 1}").set_text("N/A")
 
     def onclick_reset(self):
-        self.checkbox_1.set_value(False)
-        self.checkbox_2.set_value(False)
-        self.checkbox_3.set_value(False)
-
-        self.onchange_checkbox_1(1,0)
-        self.onchange_checkbox_2(1, 0)
-        self.onchange_checkbox_3(1, 0)
+        for i in range(MARKS):
+            getattr(self, f"checkbox_{i + 1}").set_value(False)
+            self.onchange_checkbox(i, 1, 0)
 
     def onclick_transform(self):
-        if self.first_mark_set == 1 and self.second_mark_set == 1 and self.third_mark_set == 1:
-            return_value = self.gds.apply_transform([self.number_1, self.number_2, self.number_3],
-                                                    self.first_mark_position, self.second_mark_position, self.third_mark_position)
+        rows = [i for i in range(MARKS) if self.mark_set[i] == 1]
+        if len(rows) >= 3:
+            print(f"Registering with {len(rows)} marks")
+            return_value = self.gds.apply_transform([self.mark_number[i] for i in rows],
+                                                    *[self.mark_position[i] for i in rows])
             print(return_value)
 
         else:
-            print("Not all marks have been found")
-            if self.first_mark_set != 1:
-                print("First mark not found!")
-            if self.second_mark_set != 1:
-                print("Second mark not found!")
-            if self.third_mark_set != 1:
-                print("Third mark not found!")
+            print(f"Only {len(rows)} marks set, at least 3 are needed")
 
 
 
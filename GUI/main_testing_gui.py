@@ -31,6 +31,7 @@ class testing(App):
         self.serial_list = set()
         self.device_num = 0
         self.auto_sweep = 0
+        self.route_numbers = None  # last TSP order, warm start of the next solve
 
         self.gds = None
         self.number = None
@@ -61,8 +62,8 @@ class testing(App):
     def idle(self):
         self.terminal.terminal_refresh()
         try:
-            mtime = os.path.getmtime(command_path)
-            stime = os.path.getmtime(shared_path)
+            mtime = state_version(command_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             mtime = None
             stime = None
@@ -81,17 +82,16 @@ class testing(App):
             self.cur_user = ""
             if stime is not None:
                 try:
-                    with open(shared_path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                        self.cur_user = data.get("User", "").strip()
-                        image_path = data.get("Image", "")
-                        if image_path != self.image_path:
-                            self.image_path = image_path
-                            self.display_plot.set_image(f"my_res:{self.image_path}")
-                        self.serial_list = set(data.get("Selection", []))
-                        self.device_num = data.get("DeviceNum", 0)
-                        self.auto_sweep = data.get("AutoSweep", 0)
-                        self.project = data.get("Project", "")
+                    data = load_state(shared_path)
+                    self.cur_user = data.get("User", "").strip()
+                    image_path = data.get("Image", "")
+                    if image_path != self.image_path:
+                        self.image_path = image_path
+                        self.display_plot.set_image(f"my_res:{self.image_path}")
+                    self.serial_list = set(data.get("Selection", []))
+                    self.device_num = data.get("DeviceNum", 0)
+                    self.auto_sweep = data.get("AutoSweep", 0)
+                    self.project = data.get("Project", "")
 
                 except Exception as e:
                     print(f"[Warn] read json failed: {e}")
@@ -450,9 +450,11 @@ class testing(App):
                 coord_json="./database/coordinates.json",
                 selected_json="./database/shared_memory.json",
                 time_limit=int(self.solve_time.get_value()),
-                output_dir="./res/TSP"
+                output_dir="./res/TSP",
+                warm_start=self.route_numbers,
             )
             solver.solve_and_plot()
+            self.route_numbers = solver.route_numbers
             print(solver.path)
             self.display_plot.set_image(f"my_res:TSP/{solver.path}")
             self.filtered_idx = solver.route_idx[1:]
@@ -461,7 +463,9 @@ class testing(App):
             self.start_btn.set_enabled(True)
             self.stop_btn.set_enabled(True)
 
-            filtered = {str(i + 1): self.coordinate[i][0:2] for i in self.filtered_idx}
+            # Stage positions of the whole selection in one go, from the current registration
+            stage_xy = self.gds.stage_coordinates([self.number[i] for i in self.filtered_idx])[:, :2].tolist()
+            filtered = {str(i + 1): xy for i, xy in zip(self.filtered_idx, stage_xy)}
             self.remaining = len(filtered)
             self.elapsed = 0
             file = File("shared_memory", "Image", f"TSP/{solver.path}", "Filtered", filtered)
@@ -540,9 +544,8 @@ class testing(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -592,14 +595,14 @@ class testing(App):
             elif key == "testing_start":
                 self.start_sequence()
                 self.auto_sweep = 1
-                time.sleep(1)
-            while self.auto_sweep == 1:
-                time.sleep(1)
+            if self.auto_sweep == 1:
+                # start_sequence set AutoSweep, the stage GUI clears it when the run ends
+                wait_state(shared_path, "AutoSweep", lambda auto_sweep: auto_sweep != 1)
+                self.auto_sweep = load_state(shared_path).get("AutoSweep", 0)
 
         if test == 1:
             print("testing record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
     def laser_sweep_setting(self):
         local_ip = get_local_ip()
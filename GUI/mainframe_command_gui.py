@@ -1,4 +1,5 @@
 from GUI.lib_gui import *
+from GUI.lib_command import CommandRouter, parse_command_text
 from remi import start, App
 import threading
 import webview
@@ -12,6 +13,8 @@ class stage_control(App):
         self.command_input = None
         self.confirm_btn = None
         self.uploaded_filename = None
+        self._router = None
+        self._router_thread = None
         self.configuration = {}
         self.configuration_count = 0
         if "editing_mode" not in kwargs:
@@ -19,16 +22,15 @@ class stage_control(App):
 
     def idle(self):
         try:
-            stime = os.path.getmtime(shared_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             stime = None
 
         if stime != self._user_stime:
             self._user_stime = stime
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.configuration = data.get("Configuration", {})
+                data = load_state(shared_path)
+                self.configuration = data.get("Configuration", {})
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
 
@@ -83,58 +85,54 @@ class stage_control(App):
 
     def onclick_confirm_btn(self):
         command_text = self.command_input.get_value().strip()
-        command_data = {}
 
-        if command_text:
-            parts = [p.strip() for p in command_text.split(",")]
-        elif self.uploaded_filename:
+        if not command_text and self.uploaded_filename:
             try:
                 filepath = os.path.join("./res", self.uploaded_filename)
                 with open(filepath, "r", encoding="utf-8") as f:
-                    text = f.read().strip()
-                    parts = [p.strip() for p in text.split(",")]
+                    command_text = f.read().strip()
             except Exception as e:
                 print(f"[Error] Failed to load uploaded .txt file: {e}")
                 return
-        else:
+        elif not command_text:
             print("⚠️ No input or uploaded file to use")
             return
 
         try:
-            for part in parts:
-                if "_" not in part:
-                    continue
-
-                if part.count("_") == 1:
-                    command_data[part] = True
-                    continue
-
-                key_parts = part.rsplit("_", 1)
-                if len(key_parts) != 2:
-                    continue
-                key, val = key_parts
-                val_lower = val.lower()
-                if val_lower == "true":
-                    val = True
-                elif val_lower == "false":
-                    val = False
-                elif "/" in val:
-                    val_list = val.split("/")
-                    val = []
-                    for v in val_list:
-                        if v.replace(".", "", 1).isdigit():
-                            v = float(v) if "." in v else int(v)
-                        val.append(v)
-                elif val.replace(".", "", 1).isdigit():
-                    val = float(val) if "." in val else int(val)
-                command_data[key] = val
-
+            command_data = parse_command_text(command_text)
         except Exception as e:
             print(f"[Error] Failed to parse command text: {e}")
             return
 
-        file = File("command", "command", command_data)
-        file.save()
+        bus = state_bus()
+        if bus is None:
+            # No launcher bus: the GUIs hand the command on through command.json
+            file = File("command", "command", command_data)
+            file.save()
+            return
+
+        # A new script stops the remaining steps of one still running. The run
+        # gets its own thread so clicks keep being handled while it waits.
+        if self._router is not None:
+            self._router.cancel()
+        router = self._router = CommandRouter(bus)
+        previous = self._router_thread
+        self._router_thread = threading.Thread(
+            target=self._run_router, args=(router, command_data, previous), name="command-router", daemon=True
+        )
+        self._router_thread.start()
+
+    def _run_router(self, router, command_data, previous=None):
+        # The cancelled run notices within its 0.5 s wait, don't interleave steps with it
+        if previous is not None:
+            previous.join(timeout=2.0)
+        try:
+            router.run(command_data)
+        except Exception as e:
+            print(f"[Error] Command run failed: {e}")
+        finally:
+            if self._router is router:
+                self._router = None
 
     def ondata_uploader(self, emitter, filedata: bytes, filename: str):
         try:
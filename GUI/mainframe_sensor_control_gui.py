@@ -28,8 +28,8 @@ class stage_control(App):
 
     def idle(self):
         try:
-            mtime = os.path.getmtime(command_path)
-            stime = os.path.getmtime(shared_path)
+            mtime = state_version(command_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             mtime = None
             stime = None
@@ -46,14 +46,13 @@ class stage_control(App):
         if stime != self._user_stime:
             self._user_stime = stime
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.user = data.get("User", "")
-                    self.project = data.get("Project", "")
-                    self.sweep = data.get("Sweep", {})
-                    self.auto_sweep = data.get("AutoSweep", 0)
-                    self.configuration = data.get("Configuration", {})
-                    self.num = data.get("DeviceNum", "")
+                data = load_state(shared_path)
+                self.user = data.get("User", "")
+                self.project = data.get("Project", "")
+                self.sweep = data.get("Sweep", {})
+                self.auto_sweep = data.get("AutoSweep", 0)
+                self.configuration = data.get("Configuration", {})
+                self.num = data.get("DeviceNum", "")
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
 
@@ -328,9 +327,8 @@ class stage_control(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -393,13 +391,14 @@ class stage_control(App):
             elif key == "data_apply_ch2_ref":
                 self.apply_detector_reference(val, 2)
 
-            while self.sweep["sweep"] == 1:
-                time.sleep(1)
+            if self.sweep["sweep"] == 1:
+                # Woken when the stage GUI clears the flag, not on the next 1 s poll
+                wait_state(shared_path, "Sweep", lambda sweep: (sweep or {}).get("sweep") != 1)
+                self.sweep = load_state(shared_path).get("Sweep", self.sweep)
 
         if sensor == 1:
             print("sensor record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
     def apply_detector_range(self, range_dbm, channel):
         """Apply detector range setting via shared memory"""
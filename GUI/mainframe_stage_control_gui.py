@@ -10,8 +10,10 @@ from NIR.nir_manager import NIRManager
 from NIR.config.nir_config import NIRConfiguration
 from measure.area_sweep import AreaSweep
 from measure.fine_align import FineAlign
+from measure.auto_sweep import AutoSweep, DeviceTask
 from measure.config.area_sweep_config import AreaSweepConfiguration
 from measure.config.fine_align_config import FineAlignConfiguration
+from measure.config.auto_sweep_config import AutoSweepConfiguration
 import time
 
 filename = "coordinates.json"
@@ -81,6 +83,10 @@ class stage_control(App):
         self.axis_locked = {"x": False, "y": False, "z": False, "chip": False, "fiber": False}
         self.area_sweep = None
         self.fine_align = None
+        self.fine_align_result = None  # last alignment outcome incl. collected samples, saved with the next sweep
+        self._auto_align_meta = {}  # device key -> alignment stats, until its spectrum is written
+        self.auto_sweep_engine = None
+        self.auto_sweep_run = None
         self.task_laser = 0
 
         if "editing_mode" not in kwargs:
@@ -88,8 +94,8 @@ class stage_control(App):
 
     def idle(self):
         try:
-            mtime = os.path.getmtime(command_path)
-            stime = os.path.getmtime(shared_path)
+            mtime = state_version(command_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             mtime = None
             stime = None
@@ -106,42 +112,41 @@ class stage_control(App):
         if stime != self._user_stime:
             self._user_stime = stime
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.user = data.get("User", "")
-                    self.project = data.get("Project", "")
-                    self.limit = data.get("Limit", {})
-                    self.area_s = data.get("AreaS", {})
-                    self.fine_a = data.get("FineA", {})
-                    self.auto_sweep = data.get("AutoSweep", 0)
-                    self.filter = data.get("Filtered", {})
-                    self.configuration = data.get("Configuration", {})
-                    self.configuration_check = data.get("Configuration_check", {})
-                    self.scanpos = data.get("ScanPos", {})
-                    self.sweep = data.get("Sweep", {})
-                    self.name = data.get("DeviceName", "")
-                    self.data_window = data.get("DataWindow", {})
-                    self.port = data.get("Port", {})
-                    self.web = data.get("Web", "")
-                    self.file_format = data.get("FileFormat", {})
-                    self.file_path = data.get("FilePath", "")
+                data = load_state(shared_path)
+                self.user = data.get("User", "")
+                self.project = data.get("Project", "")
+                self.limit = data.get("Limit", {})
+                self.area_s = data.get("AreaS", {})
+                self.fine_a = data.get("FineA", {})
+                self.auto_sweep = data.get("AutoSweep", 0)
+                self.filter = data.get("Filtered", {})
+                self.configuration = data.get("Configuration", {})
+                self.configuration_check = data.get("Configuration_check", {})
+                self.scanpos = data.get("ScanPos", {})
+                self.sweep = data.get("Sweep", {})
+                self.name = data.get("DeviceName", "")
+                self.data_window = data.get("DataWindow", {})
+                self.port = data.get("Port", {})
+                self.web = data.get("Web", "")
+                self.file_format = data.get("FileFormat", {})
+                self.file_path = data.get("FilePath", "")
                     
-                    # Read detector range and reference settings
-                    detector_range_ch1 = data.get("DetectorRange_Ch1", {})
-                    detector_range_ch2 = data.get("DetectorRange_Ch2", {})
-                    detector_ref_ch1 = data.get("DetectorReference_Ch1", {})
-                    detector_ref_ch2 = data.get("DetectorReference_Ch2", {})
+                # Read detector range and reference settings
+                detector_range_ch1 = data.get("DetectorRange_Ch1", {})
+                detector_range_ch2 = data.get("DetectorRange_Ch2", {})
+                detector_ref_ch1 = data.get("DetectorReference_Ch1", {})
+                detector_ref_ch2 = data.get("DetectorReference_Ch2", {})
                     
-                    # Apply detector settings if NIR manager is available
-                    if hasattr(self, 'nir_manager') and self.nir_manager and self.configuration_sensor == 1:
-                        if detector_range_ch1.get("range_dbm") is not None:
-                            self.nir_manager.set_power_range(detector_range_ch1["range_dbm"], 1)
-                        if detector_range_ch2.get("range_dbm") is not None:
-                            self.nir_manager.set_power_range(detector_range_ch2["range_dbm"], 2)
-                        if detector_ref_ch1.get("ref_dbm") is not None:
-                            self.nir_manager.set_power_reference(detector_ref_ch1["ref_dbm"], 1)
-                        if detector_ref_ch2.get("ref_dbm") is not None:
-                            self.nir_manager.set_power_reference(detector_ref_ch2["ref_dbm"], 2)
+                # Apply detector settings if NIR manager is available
+                if hasattr(self, 'nir_manager') and self.nir_manager and self.configuration_sensor == 1:
+                    if detector_range_ch1.get("range_dbm") is not None:
+                        self.nir_manager.set_power_range(detector_range_ch1["range_dbm"], 1)
+                    if detector_range_ch2.get("range_dbm") is not None:
+                        self.nir_manager.set_power_range(detector_range_ch2["range_dbm"], 2)
+                    if detector_ref_ch1.get("ref_dbm") is not None:
+                        self.nir_manager.set_power_reference(detector_ref_ch1["ref_dbm"], 1)
+                    if detector_ref_ch2.get("ref_dbm") is not None:
+                        self.nir_manager.set_power_reference(detector_ref_ch2["ref_dbm"], 2)
                             
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
@@ -190,16 +195,8 @@ class stage_control(App):
             print(f"[Error] Sweep failed: {e}")
             wl, d1, d2 = [], [], []
 
-        x = wl
-        y = np.vstack([d1, d2])
         fileTime = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        diagram = plot(
-            x, y, "spectral_sweep", fileTime, self.user, name,
-            self.project, auto, self.file_format, self.file_path
-        )
-        p = Process(target=diagram.generate_plots)
-        p.start()
-        p.join()
+        self._write_spectrum(wl, np.vstack([d1, d2]), name, auto, fileTime, meta=self._take_fine_align_meta())
 
         if self.web != "" and auto == 0:
             file_uri = Path(self.web).resolve().as_uri()
@@ -230,14 +227,24 @@ class stage_control(App):
             file.save()
         print("Sweep Done")
 
+    def _write_spectrum(self, x, y, name, auto, fileTime, run=None, number=None, meta=None):
+        future = submit_spectrum(
+            x, y, filename="spectral_sweep", fileTime=fileTime, user=self.user, name=name,
+            project=self.project, data=auto, file_format=self.file_format, file_path=self.file_path,
+            run=run, number=number, meta=meta
+        )
+        try:
+            future.result()
+        except Exception as e:
+            print(f"[Error] Spectrum export failed: {e}")
+
     def scan_move(self):
         x_pos = self.scanpos["x"] * self.area_s["x_step"] + self.stage_x_pos
         y_pos = self.scanpos["y"] * self.area_s["y_step"] + self.stage_y_pos
         # Respect per-axis locks
-        if not self.axis_locked["x"]:
-            asyncio.run(self.stage_manager.move_axis(AxisType.X, x_pos, False))
-        if not self.axis_locked["y"]:
-            asyncio.run(self.stage_manager.move_axis(AxisType.Y, y_pos, False))
+        targets = {axis: pos for axis, pos, lock in ((AxisType.X, x_pos, "x"), (AxisType.Y, y_pos, "y"))
+                   if not self.axis_locked[lock]}
+        asyncio.run(self.stage_manager.move_axes(targets))
         print(f"Move to: {x_pos}, {y_pos}")
         self.scanpos["move"] = 0
         file = File("shared_memory", "ScanPos", self.scanpos)
@@ -309,6 +316,8 @@ class stage_control(App):
             success_sensor = self.nir_manager.initialize()
             if success_sensor:
                 self.configuration_sensor = 1
+                # Load the plotting stack in the export worker before the first sweep
+                export_pool().warm_up()
                 self.configuration_check["sensor"] = 2
                 file = File(
                     "shared_memory", "Configuration_check", self.configuration_check
@@ -338,8 +347,7 @@ class stage_control(App):
             self.nir_manager.disconnect()
             print("Sensor Disconnected")
 
-        if self.configuration_stage == 1:
-            self.memory.reader_pos()
+        if self.configuration_stage == 1 and self.memory.reader_pos():
             if self.memory.x_pos != float(self.x_position_lb.get_text()):
                 self.x_position_lb.set_text(str(self.memory.x_pos))
             if self.memory.y_pos != float(self.y_position_lb.get_text()):
@@ -396,6 +404,8 @@ class stage_control(App):
             elif self.auto_sweep == 0 and self.count == 1:
                 self.lock_all(0)
                 self.count = 0
+                if self.auto_sweep_engine is not None:
+                    self.auto_sweep_engine.stop()
                 self.nir_manager.cancel_sweep()
                 if self.fine_align != None:
                     self.fine_align.stop_alignment()
@@ -426,6 +436,8 @@ class stage_control(App):
                 self.auto_sweep = 0
                 file = File("shared_memory", "AutoSweep", 0)
                 file.save()
+                if self.auto_sweep_engine is not None:
+                    self.auto_sweep_engine.stop()
                 self.nir_manager.cancel_sweep()
                 if self.fine_align != None:
                     self.fine_align.stop_alignment()
@@ -445,68 +457,42 @@ class stage_control(App):
 
     def do_auto_sweep(self):
         device_count = len(self.filter)
+        self._auto_align_meta = {}
         estimated_total_time = self._estimate_total_time(device_count)
-        device_start_times = []
 
         print(f"Starting auto sweep of {device_count} devices (estimated {estimated_total_time:.0f}s total)")
 
-        i = 0
-        while i < device_count:
-            print("It's " + str(i))
-            if self.auto_sweep == 0:
-                break
-
-            device_start_time = time.time()
-            device_start_times.append(device_start_time)
-            device_num = i + 1
-
-            key = list(self.filter.keys())
-            x = float(self.filter[key[i]][0])
-            y = float(self.filter[key[i]][1])
-
-            # Update progress: Moving to device
-            progress_percent = (i / device_count) * 100
-            activity = f"Moving to Device {device_num}/{device_count}"
-            self._write_progress_file(device_num, activity, progress_percent)
-            print(f"Move to Device {device_num} [{x}, {y}]")
-
-            # Respect per-axis locks for XY moves
-            if not self.axis_locked["x"]:
-                asyncio.run(self.stage_manager.move_axis(AxisType.X, x, False))
-            if not self.axis_locked["y"]:
-                asyncio.run(self.stage_manager.move_axis(AxisType.Y, y, False))
-            if self.auto_sweep == 0:
-                break
-
-            # Update progress: Fine alignment
-            progress_percent = (i / device_count) * 100 + (20 / device_count)  # Add 20% for alignment
-            activity = f"Device {device_num}/{device_count}: Fine alignment"
-            self._write_progress_file(device_num, activity, progress_percent)
-
-            self.onclick_start()
-            if self.auto_sweep == 0:
-                break
-
-            # Update progress: Spectral sweep
-            progress_percent = (i / device_count) * 100 + (70 / device_count)  # Add 70% for sweep
-            activity = f"Device {device_num}/{device_count}: Spectral sweep"
-            self._write_progress_file(device_num, activity, progress_percent)
-
-            self.laser_sweep(name=self.devices[int(key[i])])
-
-            # Update progress: Device completed
-            progress_percent = ((i + 1) / device_count) * 100
-            activity = f"Device {device_num}/{device_count}: Completed"
-            self._write_progress_file(device_num, activity, progress_percent)
-
-            file = File("shared_memory", "DeviceName", self.devices[int(key[i])], "DeviceNum", int(key[i]))
-            file.save()
-
-            # Calculate actual device time for learning
-            device_time = time.time() - device_start_time
-            print(f"Device {device_num} completed in {device_time:.1f}s")
-
-            i += 1
+        tasks = [DeviceTask(index=i, name=self.devices[int(key)], x=float(self.filter[key][0]),
+                            y=float(self.filter[key][1]), key=key)
+                 for i, key in enumerate(self.filter.keys())]
+        # All spectra of this sweep go to one store, Spectrum/<run>.spectra
+        self.auto_sweep_run = "auto_sweep_" + datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        config = AutoSweepConfiguration(
+            start_nm=self.sweep["start"],
+            stop_nm=self.sweep["end"],
+            step_nm=self.sweep["step"],
+            power_dbm=self.sweep["power"]
+        )
+        # Files are written in the background while the stage moves on,
+        # the laser slews back to the alignment wavelength during the move
+        self.auto_sweep_engine = AutoSweep(
+            config.to_dict(),
+            self.stage_manager,
+            self.nir_manager,
+            save=self._save_auto_sweep,
+            align=self._align_device,
+            progress=self._write_progress_file,
+            on_device=self._auto_sweep_device_done,
+            cancel_event=self._scan_cancel,
+            axis_locked=self.axis_locked,
+        )
+        try:
+            stats = asyncio.run(self.auto_sweep_engine.run(tasks))
+            print(stats.report())
+        except Exception as e:
+            print(f"[Error] Auto sweep failed: {e}")
+        finally:
+            self.auto_sweep_engine = None
 
         # Final completion
         self._write_progress_file(device_count, "All measurements completed", 100)
@@ -519,6 +505,32 @@ class stage_control(App):
         file = File("shared_memory", "AutoSweep", 0)
         file.save()
 
+    def _save_auto_sweep(self, result):
+        """Writer thread of the auto sweep"""
+        fileTime = datetime.datetime.fromtimestamp(result.timestamp).strftime("%Y-%m-%d_%H-%M-%S")
+        self._write_spectrum(result.wavelength, np.vstack(result.channels), result.task.name, 1, fileTime,
+                             run=self.auto_sweep_run, number=int(result.task.key),
+                             meta=self._auto_align_meta.pop(result.task.key, None))
+
+    def _align_device(self, task):
+        """Auto sweep alignment, its stats wait for the device's spectrum (written in the background)"""
+        self.onclick_start()
+        meta = self._take_fine_align_meta()
+        if meta:
+            self._auto_align_meta[task.key] = meta
+
+    def _take_fine_align_meta(self):
+        """Store meta of the last fine alignment for the sweep that follows it, once"""
+        result, self.fine_align_result = self.fine_align_result, None
+        if not result:
+            return None
+        return {"fine_align": {k: v for k, v in result.items() if v is not None}}
+
+    def _auto_sweep_device_done(self, task, ok):
+        print(f"Device {task.index + 1} {'completed' if ok else 'failed'}")
+        file = File("shared_memory", "DeviceName", task.name, "DeviceNum", int(task.key))
+        file.save()
+
     # NEW: enable/disable a single axis row widgets together
     def set_axis_enabled(self, prefix: str, enabled: bool):
         getattr(self, f"{prefix}_left_btn").set_enabled(enabled)
@@ -871,11 +883,14 @@ class stage_control(App):
                 
                 print("[Info] Starting fine alignment process...")
 
+            self.fine_align_result = None  # a failed alignment leaves nothing to save
+
             # Build config
             config = FineAlignConfiguration()
             config.scan_window = self.fine_a["window_size"]
             config.step_size = self.fine_a["step_size"]
             config.gradient_iters = self.fine_a["max_iters"]
+            config.optimizer = self.fine_a.get("optimizer", config.optimizer)
 
             # Create aligner
             self.fine_align = FineAlign(
@@ -896,6 +911,8 @@ class stage_control(App):
             # ---- IMPORTANT: wait until alignment truly finishes ----
             # If begin_fine_align() is blocking until completion, this is enough:
             asyncio.run(self.fine_align.begin_fine_align())
+            self.fine_align_result = self.fine_align.get_result()
+            self.fine_align_result["time"] = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
 
             # If begin_fine_align() returns quickly and runs work in the background,
             # swap the line above with a polling loop like this (uncomment/change if your API exposes a flag):
@@ -965,6 +982,17 @@ class stage_control(App):
             y_points = int(y_size / y_step)
             total_points = x_points * y_points
 
+            if self.area_s.get("pattern") == "flying":
+                # Row at ~2 samples per step (5 ms detector averaging) + row change
+                velocity = x_step / (2.0 * AreaSweepConfiguration.sample_period)
+                return max(y_points * (x_size / velocity + 0.3), 5)
+
+            if self.area_s.get("pattern") == "hierarchical":
+                # Coarse lattice plus roughly half a coarse window of refinement around one peak
+                f = AreaSweepConfiguration.coarse_factor
+                coarse = (x_points // f + 1) * (y_points // f + 1)
+                return max((coarse + (2 * f + 1) ** 2 // 2) * 0.5, 10)
+
             # Estimate ~0.5 seconds per point
             return max(total_points * 0.5, 10)  # Minimum 10 seconds
         except:
@@ -1250,15 +1278,14 @@ class stage_control(App):
             return
 
         try:
-            device_coord = self.coordinate[index]
+            device_coord = self.gds.stage_coordinates([self.number[index]])[0]
             x = float(device_coord[0])
             y = float(device_coord[1])
             print(f"Moving to coordinate: X={x}, Y={y}")
 
-            if not self.axis_locked["x"]:
-                asyncio.run(self.stage_manager.move_axis(AxisType.X, x, False))
-            if not self.axis_locked["y"]:
-                asyncio.run(self.stage_manager.move_axis(AxisType.Y, y, False))
+            targets = {axis: pos for axis, pos, lock in ((AxisType.X, x, "x"), (AxisType.Y, y, "y"))
+                       if not self.axis_locked[lock]}
+            asyncio.run(self.stage_manager.move_axes(targets))
 
             file = File("shared_memory", "DeviceName", selected_device, "DeviceNum", index + 1)
             file.save()
@@ -1343,9 +1370,8 @@ class stage_control(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -1458,8 +1484,7 @@ class stage_control(App):
 
         if stage == 1:
             print("stage record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
     def apply_detector_range(self, range_dbm, channel):
         """Apply detector range setting via NIR manager"""
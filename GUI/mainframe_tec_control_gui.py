@@ -25,8 +25,8 @@ class tec_control(App):
 
     def idle(self):
         try:
-            mtime = os.path.getmtime(command_path)
-            stime = os.path.getmtime(shared_path)
+            mtime = state_version(command_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             mtime = None
             stime = None
@@ -43,11 +43,10 @@ class tec_control(App):
         if stime != self._user_stime:
             self._user_stime = stime
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.configuration = data.get("Configuration", {})
-                    self.configuration_check = data.get("Configuration_check", {})
-                    self.port = data.get("Port", {})
+                data = load_state(shared_path)
+                self.configuration = data.get("Configuration", {})
+                self.configuration_check = data.get("Configuration_check", {})
+                self.port = data.get("Port", {})
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
 
@@ -174,9 +173,8 @@ class tec_control(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -221,8 +219,7 @@ class tec_control(App):
 
         if tec == 1:
             print("tec record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
 def get_local_ip():
     """Automatically detect local LAN IP address"""
@@ -26,6 +26,8 @@ def find_project_root(start: pathlib.Path) -> pathlib.Path:
         f"expected sibling folders 'GUI' and 'motors'."
     )
 
+state_bus_server = None
+
 # ────────── Configuration ───────────
 THIS_FILE = pathlib.Path(__file__).resolve()
 PROJECT_ROOT = find_project_root(THIS_FILE)
@@ -305,6 +307,8 @@ def start_gui(path: pathlib.Path):
     # Esnure proj root is found as sys.path as child
     # Then make the child see its parent as top-folder package
     env = {**os.environ, "REM_MULTI_INST": "1", "PYTHONUNBUFFERED": "1"}
+    if state_bus_server is not None:
+        env.update(state_bus_server.env())  # address and this run's authkey, only the GUIs get them
     env["PYTHONPATH"] = str(PROJECT_ROOT) + (os.pathsep + os.environ.get("PYTHONPATH", "")) if os.environ.get("PYTHONPATH") else str(PROJECT_ROOT)
     creation = subprocess.CREATE_NEW_PROCESS_GROUP if platform.system() == "Windows" else 0
     proc = subprocess.Popen(
@@ -383,6 +387,9 @@ def terminate_all():
             except Exception as e:
                 FILE_LOG.write_line(f"⚠️ Failed to kill PID {proc.pid}: {e}")
     
+    if state_bus_server is not None:
+        state_bus_server.stop()
+
     # Final status report
     final_remaining = [p for p in processes if p.poll() is None]
     if final_remaining:
@@ -395,6 +402,23 @@ def terminate_all():
     # Close log
     FILE_LOG.close()
 
+def start_state_bus():
+    """
+    Serve database/*.json to the GUIs over the local state bus, they fall back to the files without it.
+    Each launch gets a new private socket / pipe and a random authkey, passed on in the GUIs' environment.
+    """
+    global state_bus_server
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+    try:
+        from utils.state_bus import StateBusServer
+        state_bus_server = StateBusServer(persist_dir=str(GUI_DIR / "database"))
+        state_bus_server.start()
+        FILE_LOG.write_line("✓ State bus started")
+    except Exception as e:
+        state_bus_server = None
+        FILE_LOG.write_line(f"⚠️ State bus not started, GUIs poll the json files: {e!r}")
+
 def main():
     if platform.system() != "Windows":
         print("It's Windows Version")
@@ -402,6 +426,8 @@ def main():
     if not targets:
         print("⚠️  No *gui.py / *setup.py found"); return
 
+    start_state_bus()
+
     print(f"Logging (tail={KEEP_LINES}, trim-threshold={TRIM_THRESHOLD}) → {LOG_FILE}\n")
 
     threads = []
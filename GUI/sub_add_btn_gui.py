@@ -14,16 +14,15 @@ class add_btn(App):
 
     def idle(self):
         try:
-            stime = os.path.getmtime(shared_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             stime = None
 
         if stime != self._user_stime:
             self._user_stime = stime
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.user = data.get("User_add", "")
+                data = load_state(shared_path)
+                self.user = data.get("User_add", "")
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
 
@@ -13,7 +13,7 @@ class area_scan(App):
 
     def idle(self):
         try:
-            mtime = os.path.getmtime(command_path)
+            mtime = state_version(command_path)
         except FileNotFoundError:
             mtime = None
         if self._first_command_check:
@@ -71,7 +71,7 @@ class area_scan(App):
                     font_size=100, flex=True, justify_content="right", color="#222")
         self.pattern_dd = StyledDropDown(
             container=area_scan_setting_container, variable_name="pattern_dd",
-            text=["Crosshair", "Spiral"], left=INP_X, top=y, width=INP_W+UNIT_W, height=24, position="absolute"
+            text=["Crosshair", "Spiral", "Flying", "Hierarchical"], left=INP_X, top=y, width=INP_W+UNIT_W, height=24, position="absolute"
         )
         self.pattern_dd.set_value("Crosshair")
         y += ROW
@@ -189,9 +189,14 @@ class area_scan(App):
             pat = self.pattern_dd.get_value()
             spiral = (isinstance(pat, str) and pat.lower() == "spiral")
         except Exception:
+            pat = None
             spiral = False
         if spiral:
             text = "Spiral: uses Step Size (mirrored to X/Y Step on save)."
+        elif isinstance(pat, str) and pat.lower() == "flying":
+            text = "Flying: continuous rows, uses X Step and Y Step."
+        elif isinstance(pat, str) and pat.lower() == "hierarchical":
+            text = "Hierarchical: coarse grid, refined near the peak to X Step / Y Step."
         else:
             text = "Crosshair: uses X Step and Y Step."
         try:
@@ -209,8 +214,12 @@ class area_scan(App):
         try:
             pat = self.pattern_dd.get_value()
             spiral = (isinstance(pat, str) and pat.lower() == "spiral")
+            flying = (isinstance(pat, str) and pat.lower() == "flying")
+            hierarchical = (isinstance(pat, str) and pat.lower() == "hierarchical")
         except Exception:
             spiral = False
+            flying = False
+            hierarchical = False
 
         if spiral:
             try:
@@ -224,7 +233,7 @@ class area_scan(App):
             y_step_out = float(self.y_step.get_value())
 
         value = {
-            "pattern": "spiral" if spiral else "crosshair",
+            "pattern": "spiral" if spiral else ("flying" if flying else ("hierarchical" if hierarchical else "crosshair")),
             "x_size": float(self.x_size.get_value()),
             "x_step": float(x_step_out),
             "y_size": float(self.y_size.get_value()),
@@ -241,9 +250,8 @@ class area_scan(App):
         record = 0
         new_command = {}
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -280,8 +288,7 @@ class area_scan(App):
 
         if area == 1:
             print("as record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
 # ---- App entry (unchanged) ----
 if __name__ == "__main__":
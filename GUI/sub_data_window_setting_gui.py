@@ -12,7 +12,7 @@ class data_window(App):
 
     def idle(self):
         try:
-            mtime = os.path.getmtime(command_path)
+            mtime = state_version(command_path)
         except FileNotFoundError:
             mtime = None
 
@@ -183,9 +183,8 @@ class data_window(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -234,8 +233,7 @@ class data_window(App):
 
         if dw == 1:
             print("data window record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
 if __name__ == "__main__":
     configuration = {
@@ -15,8 +15,8 @@ class add_btn(App):
 
     def idle(self):
         try:
-            mtime = os.path.getmtime(command_path)
-            stime = os.path.getmtime(shared_path)
+            mtime = state_version(command_path)
+            stime = state_version(shared_path)
         except FileNotFoundError:
             mtime = None
             stime = None
@@ -34,9 +34,8 @@ class add_btn(App):
             self._user_stime = stime
 
             try:
-                with open(shared_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.sweep = data.get("Sweep", {})
+                data = load_state(shared_path)
+                self.sweep = data.get("Sweep", {})
             except Exception as e:
                 print(f"[Warn] read json failed: {e}")
 
@@ -173,9 +172,8 @@ class add_btn(App):
         new_command = {}
 
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                command = data.get("command", {})
+            data = load_state(path)
+            command = data.get("command", {})
         except Exception as e:
             print(f"[Error] Failed to load command: {e}")
             return
@@ -228,8 +226,7 @@ class add_btn(App):
 
         if sweep == 1:
             print("sweep record")
-            file = File("command", "command", new_command)
-            file.save()
+            command_done(new_command)
 
 if __name__ == "__main__":
     configuration = {
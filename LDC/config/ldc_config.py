@@ -54,8 +54,8 @@ class LDCConfiguration:
         return cls(
             visa_address=data.get("visa_address", 'ASRL5::INSTR'),
             sensor_type=data.get("sensor_type", "1"),
-            pid_coeffs=data.get("pid_coeffs", [-1.669519, 0.2317650, 1.078678]),
-            model_coeffs=data.get("model_coeffs", [1.204800e-3, 2.417000e-4, 1.482700e-7]),
+            pid_coeffs=list(data.get("pid_coeffs", [-1.669519, 0.2317650, 1.078678])),
+            model_coeffs=list(data.get("model_coeffs", [1.204800e-3, 2.417000e-4, 1.482700e-7])),
             setpoint=data.get("setpoint", 25.0),
             driver_types=driver_types
         )
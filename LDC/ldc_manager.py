@@ -15,8 +15,10 @@ Cameron Basara, 2025
 logger = logging.getLogger(__name__)
 
 class LDCManager:
-    def __init__(self, config: LDCConfiguration, use_shared_memory: bool = True, debug: bool = False):
+    def __init__(self, config: LDCConfiguration, use_shared_memory: bool = True, debug: bool = False,
+                 instance: str = None):
         self.config = config
+        self.instance = instance  # suffix for the shared memory name when running several controllers
         self.debug = debug
         self._connected = False
         self._event_callbacks: List[Callable[[LDCEvent], None]] = []
@@ -29,7 +31,7 @@ class LDCManager:
         self.use_shared_memory = use_shared_memory
         if use_shared_memory:
             try:
-                self.shm_config = create_shared_ldc_config()
+                self.shm_config = create_shared_ldc_config(channel_name(SHM_NAME, instance))
                 write_shared_ldc_config(self.shm_config, config)
                 logger.info("LDC shared memory initialized")
             except Exception as e:
@@ -75,8 +77,8 @@ class LDCManager:
     def initialize(self) -> bool:
         """Initialize the LDC device"""
         try:
-            # Read config from shared memory if available
-            if self.use_shared_memory:
+            # Read config from shared memory if it changed since it was published
+            if self.use_shared_memory and self.shm_config.changed():
                 try:
                     self.config = read_shared_ldc_config(self.shm_config)
                 except Exception as e:
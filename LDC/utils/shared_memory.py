@@ -1,69 +1,35 @@
-import struct
-import json
-from multiprocessing import shared_memory, Process
-from time import monotonic
-from typing import Optional
-
 from LDC.config.ldc_config import LDCConfiguration
+from utils.config_channel import ConfigChannel, DEFAULT_CAPACITY, channel_name
 
 """
-Helper functions to create shared memory ipc for json (serialization)
+Helper functions for the LDC config channel (see utils/config_channel.py)
 """
 
-# SHM and json framing consts
-MAX_PAYLOAD = 2048
-SHM_SIZE = 4 + MAX_PAYLOAD # 4 byte u_int32
-_LEN_STRUCT = struct.Struct("<I") # 4 byte u_int32 length header 
-SHM_NAME = "ldc_config" # fixed shared mem name
+SHM_NAME = "ldc_config" # default instance name
 
-def create_shared_ldc_config(name: str = SHM_NAME) ->  shared_memory.SharedMemory:
+def create_shared_ldc_config(name: str = SHM_NAME, capacity: int = DEFAULT_CAPACITY) -> ConfigChannel:
     """
-    Create shared-memory block for json serialization
-
+    Create the config channel, one per controller: name it with
+    channel_name(SHM_NAME, instance)
     """
-    shm = shared_memory.SharedMemory(name=name, create=True, size=SHM_SIZE)
+    return ConfigChannel(name, create=True, capacity=capacity)
 
-    # zero the block
-    shm.buf[:] = b'\x00' * SHM_SIZE
-    return shm
-
-def open_shared_ldc_config(name: str = SHM_NAME) -> shared_memory.SharedMemory:
+def open_shared_ldc_config(name: str = SHM_NAME) -> ConfigChannel:
     """
-    Attach to an existing shared-memory block
+    Attach to an existing config channel
     """
-    return shared_memory.SharedMemory(name=name)
+    return ConfigChannel(name)
 
-def read_shared_ldc_config(shm: shared_memory.SharedMemory) -> LDCConfiguration:
+def read_shared_ldc_config(shm: ConfigChannel) -> LDCConfiguration:
+    """
+    Read from the config channel, the payload is only decoded again after a write
     """
-    Read from shared-memory block 
-    """ 
-    # Unpacked serialized JSON buf 
-    (length,) = _LEN_STRUCT.unpack_from(shm.buf, 0) 
-    
-    if length == 0 or length > MAX_PAYLOAD:
-        raise BufferError(f"Invalid config length: {length}")
-    
-    # Convert serialized json to dict and into StageConfiguration format
-    raw = bytes(shm.buf[4:4 + length])
-    data = json.loads(raw.decode("utf-8"))
+    _, data = shm.read()
     return LDCConfiguration.from_dict(data)
 
-def write_shared_ldc_config(shm: shared_memory.SharedMemory,
-                              config: LDCConfiguration) -> None:
+def write_shared_ldc_config(shm: ConfigChannel,
+                            config: LDCConfiguration) -> int:
     """
-    Write serialize config to json into shared-memory buffer
+    Publish config, returns the new generation
     """
-    # Serialize dictionary config
-    payload = json.dumps(config.to_dict()).encode("utf-8")
-    n = len(payload)
-    if n > MAX_PAYLOAD:
-        raise BufferError(f"Config too large / not formatted correctly ({n} > {MAX_PAYLOAD})")
-    
-    # Dump to shm (Header + payload)
-    shm.buf[:4] = _LEN_STRUCT.pack(n)
-    shm.buf[4:4+n] = payload
-
-    shm.buf[4+n:SHM_SIZE] = b'\x00' * (SHM_SIZE - 4 - n) # zero tail
-
-
-
+    return shm.write(config.to_dict())
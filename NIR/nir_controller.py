@@ -5,6 +5,7 @@ import pyvisa
 from typing import Optional, Tuple, List
 
 from NIR.hal.nir_hal import LaserHAL
+from NIR.drivers.agilent_8163a import agilent_8163a_mainframe as scpi
 
 """
 Nir implementation for optical sweeps. Functionality for laser, detector configuration and methods
@@ -239,6 +240,53 @@ class NIR8164(LaserHAL):
         except Exception as e:
             return 0.0
 
+    ######################################################################
+    # Detector logging functions
+    ######################################################################
+
+    def start_power_logging(self, num_samples: int, averaging_s: float, slot: int = 1) -> bool:
+        """
+        Arm and start the detector logging function, both channels of the slot
+        record num_samples readings of averaging_s each, paced by the instrument
+        """
+        try:
+            self.write(scpi.set_detector_data_acquisition(slot, "LOGG", "STOP"))
+            self.write(scpi.set_detector_sensor_logging(slot, int(num_samples), float(averaging_s)))
+            self.write(scpi.set_detector_data_acquisition(slot, "LOGG", "STAR"))
+            return True
+        except Exception:
+            return False
+
+    def read_power_logging(self, slot: int = 1, timeout_s: float = 10.0) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Wait for logging to complete and fetch both channels in dBm
+        """
+        try:
+            t0 = time.monotonic()
+            while "COMPLETE" not in self.query(scpi.power_sensor_logging_state(slot, 1)).upper():
+                if time.monotonic() - t0 > timeout_s:
+                    raise TimeoutError("Detector logging did not complete")
+                time.sleep(0.01)
+
+            chans = []
+            for ch in (1, 2):
+                watts = np.asarray(self.inst.query_binary_values(
+                    scpi.power_sensor_logging_result(slot, ch, 0, 0),
+                    datatype='f', is_big_endian=False, container=np.array
+                ), dtype=np.float64)
+                # Logging results are always linear (W)
+                chans.append(10.0 * np.log10(np.clip(watts, 1e-15, None) * 1e3))
+            return chans[0], chans[1]
+        except Exception:
+            return None
+
+    def stop_power_logging(self, slot: int = 1) -> bool:
+        try:
+            self.write(scpi.set_detector_data_acquisition(slot, "LOGG", "STOP"))
+            return True
+        except Exception:
+            return False
+
     ######################################################################
     # Sweep functions
     ######################################################################
@@ -273,39 +321,56 @@ class NIR8164(LaserHAL):
     ######################################################################
     def optical_sweep(
             self, start_nm: float, stop_nm: float, step_nm: float,
-            laser_power_dbm: float, num_scans: int = 0
+            laser_power_dbm: float, num_scans: int = 0, on_segment=None, session=None
     ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stitched lambda scan. With a LambdaScanSession the driver connection is
+        reused across sweeps, otherwise one is opened and closed for this sweep.
+        """
         from NIR.sweep import HP816xLambdaScan
 
         step_pm = float(step_nm) * 1000.0
-        try:
-            self._preflight_cleanup()
-        except Exception:
-            pass
-
-        hp = HP816xLambdaScan()
-        self.sweep_module = hp
-        try:
-            ok = hp.connect()
-            if not ok:
-                raise RuntimeError("HP816xLambdaScan.connect() failed")
-
-            res = hp.lambda_scan(
-                start_nm=float(start_nm),
-                stop_nm=float(stop_nm),
-                step_pm=step_pm,
-                power_dbm=float(laser_power_dbm),
-                num_scans=0,
-                channels=self.detector_slots
-            )
-        finally:
+        scan_kwargs = dict(
+            start_nm=float(start_nm),
+            stop_nm=float(stop_nm),
+            step_pm=step_pm,
+            power_dbm=float(laser_power_dbm),
+            num_scans=0,
+            channels=self.detector_slots,
+            on_segment=on_segment
+        )
+
+        if session is not None:
+            self.sweep_module = session
             try:
-                hp.disconnect()
+                # configure_units after every sweep like the one off path, the lambda
+                # scan can change the power units and a reused session would never reset them
+                res = session.run(preflight=self._preflight_cleanup, after_sweep=self.configure_units,
+                                  **scan_kwargs)
+            finally:
                 self.sweep_module = False
-                self.configure_units()
+        else:
+            try:
+                self._preflight_cleanup()
             except Exception:
                 pass
 
+            hp = HP816xLambdaScan()
+            self.sweep_module = hp
+            try:
+                ok = hp.connect()
+                if not ok:
+                    raise RuntimeError("HP816xLambdaScan.connect() failed")
+
+                res = hp.lambda_scan(**scan_kwargs)
+            finally:
+                try:
+                    hp.disconnect()
+                    self.sweep_module = False
+                    self.configure_units()
+                except Exception:
+                    pass
+
         wl = np.asarray(res.get('wavelengths_nm', []), dtype=np.float64)
         chs = res.get('channels_dbm', [])
         ch1 = np.asarray(chs[0], dtype=np.float64) if len(chs) >= 1 else np.full_like(wl, np.nan)
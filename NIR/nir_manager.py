@@ -34,6 +34,9 @@ class NIRManager:
             timeout_ms=config.timeout
         )
 
+        # Lambda scan driver session, opened on the first sweep and kept until disconnect
+        self._sweep_session = None
+
     def _log(self, message: str, level: str = "info"):
         """Simple logging that respects debug flag"""
         if level == "debug":
@@ -102,6 +105,7 @@ class NIRManager:
     def disconnect(self) -> bool:
         """Disconnect from the NIR device"""
         try:
+            self._close_sweep_session()
             if self.controller:
                 success = self.controller.disconnect()
                 if success:
@@ -350,10 +354,53 @@ class NIRManager:
             self._log(f"Get power reference error: {e}", "error")
             return 0.0
 
+    def start_power_logging(self, num_samples: int, averaging_s: float) -> bool:
+        """Start instrument paced detector logging (num_samples x averaging_s)"""
+        try:
+            if not self.controller or not self._connected:
+                self._log("Controller not connected", "error")
+                return False
+
+            ok = self.controller.start_power_logging(num_samples, averaging_s)
+            if not ok:
+                self._log("Detector logging start failed", "error")
+            return ok
+
+        except Exception as e:
+            self._log(f"Detector logging start error: {e}", "error")
+            return False
+
+    def read_power_logging(self, timeout_s: float = 10.0):
+        """Fetch logged detector data, returns (ch1[dBm], ch2[dBm]) arrays or None"""
+        try:
+            if not self.controller or not self._connected:
+                self._log("Controller not connected", "error")
+                return None
+
+            result = self.controller.read_power_logging(timeout_s=timeout_s)
+            if result is None:
+                self._log("Detector logging read failed", "error")
+            return result
+
+        except Exception as e:
+            self._log(f"Detector logging read error: {e}", "error")
+            return None
+
+    def stop_power_logging(self) -> bool:
+        """Abort detector logging"""
+        try:
+            if not self.controller or not self._connected:
+                return False
+            return self.controller.stop_power_logging()
+        except Exception as e:
+            self._log(f"Detector logging stop error: {e}", "error")
+            return False
+
     ######################################################################
     # Sweep methods
     ######################################################################
-    def sweep(self, start_nm, stop_nm, step_nm, laser_power_dbm, num_scans=0):
+    def sweep(self, start_nm, stop_nm, step_nm, laser_power_dbm, num_scans=0, on_segment=None,
+              restore_wavelength=True):
         """
         Execute a lambda scan, auto stitches longer measurements (>20,001 points)
         params:
@@ -362,18 +409,32 @@ class NIRManager:
             step_nm[nm]: step size of sweep in nm
             laser_power_dbm[dbm]: laser power in dBm
             averaging_time_s[s]: Optional averaging time in s
+            on_segment: Optional callback(seg, segments, wl_nm, channels_dbm) per stitched
+                segment, called from a worker thread, for drawing partial spectra
+            restore_wavelength: slew back to initial_wavelength_nm before returning,
+                False when the caller does it itself (overlapped with a stage move)
         """
         try:
             if not self.controller or not self._connected:
                 self._log("Controller not connected", "error")
                 return None
 
+            if self._sweep_session is None:
+                from NIR.sweep import LambdaScanSession
+                self._sweep_session = LambdaScanSession()
+
             # (wavelengths[nm], channel1[dBm], channel2[dBm])
             results = self.controller.optical_sweep(
                 start_nm, stop_nm, step_nm, laser_power_dbm,
-                num_scans)
+                num_scans, on_segment=on_segment, session=self._sweep_session)
             self.controller.cleanup_scan()
-            self.controller.set_wavelength(self.config.initial_wavelength_nm)
+            if restore_wavelength:
+                self.controller.set_wavelength(self.config.initial_wavelength_nm)
+
+            stats = self._sweep_session.stats
+            self._log(f"Sweep setup {stats['last_setup_s'] * 1000:.0f} ms "
+                      f"(connect {stats['last_connect_s'] * 1000:.0f} ms), "
+                      f"scan {stats['last_scan_s']:.2f} s", "debug")
 
             if results is not None:
                 self._log("Lambda scan completed successfully")
@@ -386,6 +447,19 @@ class NIRManager:
             self._log(f"Lambda scan error: {e}", "error")
             return None, None, None
 
+    def get_sweep_stats(self) -> Dict[str, Any]:
+        """Sweep session counters and per-sweep setup timing"""
+        if self._sweep_session is None:
+            return {}
+        return self._sweep_session.get_stats()
+
+    def _close_sweep_session(self) -> None:
+        if self._sweep_session is not None:
+            try:
+                self._sweep_session.close()
+            except Exception as e:
+                self._log(f"Sweep session close error: {e}", "error")
+
     def cancel_sweep(self):
         try:
             if not self.controller or not self._connected:
@@ -4,6 +4,8 @@ import pyvisa
 import pandas as pd
 from ctypes import c_double, c_int32, c_uint32, c_char, c_char_p, POINTER, byref, create_string_buffer
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
 import time
 
 import logging
@@ -13,6 +15,20 @@ pyvisa_logger = logging.getLogger('pyvisa')
 pyvisa_logger.setLevel(logging.WARNING)
 
 
+class _StitchGrid:
+    """Output rows of a stitched lambda scan, shared with the placement worker"""
+    DBM_FLOOR = -80  # dBm
+
+    def __init__(self, rows, out_by_ch, channels, pad_front, start_nm, step_nm, n_target):
+        self.rows = rows
+        self.out_by_ch = out_by_ch
+        self.channels = channels
+        self.pad_front = pad_front
+        self.start_nm = start_nm
+        self.step_nm = step_nm
+        self.n_target = n_target
+
+
 class HP816xLambdaScan:
     def __init__(self):
         # Load the HP 816x library
@@ -65,6 +81,10 @@ class HP816xLambdaScan:
         self.lib.hp816x_executeMfLambdaScan.argtypes = [c_int32, POINTER(c_double)]
         self.lib.hp816x_executeMfLambdaScan.restype = c_int32
 
+        # hp816x_executeLambdaScan: wavelength array + 8 power arrays (NULL if unused)
+        self.lib.hp816x_executeLambdaScan.argtypes = [c_int32] + [POINTER(c_double)] * 9
+        self.lib.hp816x_executeLambdaScan.restype = c_int32
+
         # hp816x_getLambdaScanResult
         self.lib.hp816x_getLambdaScanResult.argtypes = [
             c_int32, c_int32, c_int32, c_double, POINTER(c_double), POINTER(c_double)
@@ -256,7 +276,15 @@ class HP816xLambdaScan:
         }
 
     def lambda_scan(self, start_nm: float = 1490, stop_nm: float = 1600, step_pm: float = 0.5,
-                    power_dbm: float = 3.0, num_scans: int = 0, channels: list = [1, 2]):
+                    power_dbm: float = 3.0, num_scans: int = 0, channels: list = [1, 2],
+                    on_segment: Optional[Callable[[int, int, np.ndarray, List[np.ndarray]], None]] = None,
+                    pipelined: bool = True):
+        """
+        Stitched lambda scan. Segments are placed into the output on a worker thread
+        while the next segment is prepared on the instrument; on_segment(seg, segments,
+        wl_nm, channels_dbm) receives a copy of every finished segment (from another
+        thread) so partial spectra can be drawn. pipelined=False runs everything inline.
+        """
         if not self.session:
             raise RuntimeError("Not connected to instrument")
 
@@ -290,116 +318,118 @@ class HP816xLambdaScan:
         pts_est = n_target
         segments = max(1, int(np.ceil(pts_est / float(eff_points_budget))))
 
-        # Preallocate outputs
-        out_by_ch = {ch: np.full(n_target, np.nan, dtype=np.float64) for ch in channels}
-
-        bottom = float(start_nm)
-        for seg in tqdm(range(segments), desc="Lambda Scan Stitching", unit="seg"):
-            if self._cancel:
-                raise RuntimeError("Cancelling Lambda Scan Stitching")
-            planned_top = bottom + (eff_points_budget - 1) * step_nm
-            top = min(planned_top, float(stop_nm))
-
-            bottom_r = bottom
-            top_r = top
-
-            # -------- SINGLE-FRAME PREP --------
-            num_points_seg = c_uint32()
-            num_arrays_seg = c_uint32()
-            result = self.lib.hp816x_prepareLambdaScan(
-                self.session,
-                0,  # powerUnit: 0=dBm
-                c_double(power_dbm),  # TLS setpoint
-                0,  # opticalOutput: 0=HIGHPOW (change if LOWSSE/BHR/BLR)
-                c_int32(num_scans),  # 0->1 scan, 1->2 scans, etc.
-                c_int32(len(channels)),  # PWMChannels = COUNT (NOT a mask)
-                c_double(bottom_r * 1e-9),
-                c_double(top_r * 1e-9),
-                c_double(step_pm * 1e-12),
-                byref(num_points_seg),
-                byref(num_arrays_seg)
-            )
-            if result != 0:
-                raise RuntimeError(f"Prepare scan failed: {result} :: {self._err_msg(result)}")
-
-            points_seg = int(num_points_seg.value)
-            C = int(num_arrays_seg.value)
-            if C < 1:
-                # Nothing enabled; skip this segment
-                bottom = top + step_nm
-                continue
-            if C != len(channels):
-                pass
-
-            # -------- ALLOCATE BUFFERS FOR EXECUTE --------
-            wl_buf = (c_double * points_seg)()
-
-            # Prepare up to 8 power array pointers; fill first C, NULL the rest
-            power_slots = [None] * 8
-            power_arrays = {}
-            for i in range(C):  # i: 0..C-1 maps to powerArray1..C
-                arr = (c_double * points_seg)()
-                power_slots[i] = arr
-                power_arrays[i + 1] = arr  # keep by slot index (1-based)
-
-            # Helper: NULL pointer for unused arrays
-            from ctypes import POINTER
-            def ptr_or_null(arr):
-                return arr if arr is not None else POINTER(c_double)()
-
-            # -------- SINGLE-FRAME EXECUTE (returns wl + all channels at once) --------
-            result = self.lib.hp816x_executeLambdaScan(
-                self.session,
-                wl_buf,
-                ptr_or_null(power_slots[0]),
-                ptr_or_null(power_slots[1]),
-                ptr_or_null(power_slots[2]),
-                ptr_or_null(power_slots[3]),
-                ptr_or_null(power_slots[4]),
-                ptr_or_null(power_slots[5]),
-                ptr_or_null(power_slots[6]),
-                ptr_or_null(power_slots[7]),
-            )
-            if result != 0:
-                raise RuntimeError(f"Execute scan failed: {result} :: {self._err_msg(result)}")
+        # Preallocate outputs: one row per channel with a guard sized pad on both
+        # sides, the DLL writes every segment straight into its final position
+        pad_front = guard_points
+        pad_back = max_points_per_scan
+        rows = np.full((len(channels), pad_front + n_target + pad_back), np.nan, dtype=np.float64)
+        out_by_ch = {ch: rows[i, pad_front:pad_front + n_target] for i, ch in enumerate(channels)}
+        wl_buf = np.empty(max_points_per_scan, dtype=np.float64)
+        pre_points = int(round(guard_pre_pm / step_pm))
+        null = POINTER(c_double)()
+
+        grid = _StitchGrid(rows, out_by_ch, channels, pad_front, float(start_nm), step_nm, n_target)
+        placer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lambda-place") if pipelined else None
+        notifier = (ThreadPoolExecutor(max_workers=1, thread_name_prefix="lambda-notify")
+                    if pipelined and on_segment is not None else None)
+        placing = None  # placement of the previous segment, must finish before the next execute
 
-            # -------- Convert wl + guard-trim + index into global grid --------
-            wl_seg_nm_full = np.ctypeslib.as_array(wl_buf, shape=(points_seg,)).copy() * 1e9
-            # Keep only [bottom_r, top_r] (drop 90 pm guards)
-            mask = (wl_seg_nm_full >= bottom_r - 1e-6) & (wl_seg_nm_full <= top_r + 1e-6)
-            if not np.any(mask):
-                bottom = top + step_nm
-                continue
+        try:
+            bottom = float(start_nm)
+            for seg in tqdm(range(segments), desc="Lambda Scan Stitching", unit="seg"):
+                if self._cancel:
+                    raise RuntimeError("Cancelling Lambda Scan Stitching")
+                planned_top = bottom + (eff_points_budget - 1) * step_nm
+                top = min(planned_top, float(stop_nm))
+
+                bottom_r = bottom
+                top_r = top
+
+                # -------- SINGLE-FRAME PREP (overlaps placement of the previous segment) --------
+                num_points_seg = c_uint32()
+                num_arrays_seg = c_uint32()
+                result = self.lib.hp816x_prepareLambdaScan(
+                    self.session,
+                    0,  # powerUnit: 0=dBm
+                    c_double(power_dbm),  # TLS setpoint
+                    0,  # opticalOutput: 0=HIGHPOW (change if LOWSSE/BHR/BLR)
+                    c_int32(num_scans),  # 0->1 scan, 1->2 scans, etc.
+                    c_int32(len(channels)),  # PWMChannels = COUNT (NOT a mask)
+                    c_double(bottom_r * 1e-9),
+                    c_double(top_r * 1e-9),
+                    c_double(step_pm * 1e-12),
+                    byref(num_points_seg),
+                    byref(num_arrays_seg)
+                )
+                if result != 0:
+                    raise RuntimeError(f"Prepare scan failed: {result} :: {self._err_msg(result)}")
+
+                points_seg = int(num_points_seg.value)
+                C = min(int(num_arrays_seg.value), len(channels))
+                if C < 1:
+                    # Nothing enabled; skip this segment
+                    bottom = top + step_nm
+                    continue
 
-            wl_seg_nm = wl_seg_nm_full[mask]
-            idx = np.rint((wl_seg_nm - float(start_nm)) / step_nm).astype(np.int64)
-            valid = (idx >= 0) & (idx < n_target)
-            idx = idx[valid]
+                # Previous segment must be in place before its tail gets overwritten
+                if placing is not None:
+                    placing.result()
+                    placing = None
+
+                # -------- TARGET BUFFERS FOR EXECUTE --------
+                # Segment data starts pre_points before bottom; write there so the in-range
+                # part lands on the output grid. The pre-guard overwrites the tail of the
+                # previous segment, keep that small region and put it back afterwards.
+                i0 = int(round((bottom_r - float(start_nm)) / step_nm))
+                write_at = pad_front + i0 - pre_points
+                in_place = write_at >= 0 and write_at + points_seg <= rows.shape[1]
+                if in_place:
+                    target = rows[:C, write_at:write_at + points_seg]
+                    kept = rows[:C, write_at:pad_front + i0].copy()
+                else:
+                    target = np.empty((C, points_seg), dtype=np.float64)
+                    kept = None
+                if wl_buf.size < points_seg:
+                    wl_buf = np.empty(points_seg, dtype=np.float64)
+
+                # Up to 8 power array pointers, first C into the target rows, NULL the rest
+                power_slots = [target[i].ctypes.data_as(POINTER(c_double)) if i < C else null for i in range(8)]
+
+                # -------- SINGLE-FRAME EXECUTE (returns wl + all channels at once) --------
+                result = self.lib.hp816x_executeLambdaScan(
+                    self.session,
+                    wl_buf.ctypes.data_as(POINTER(c_double)),
+                    *power_slots
+                )
+                if result != 0:
+                    raise RuntimeError(f"Execute scan failed: {result} :: {self._err_msg(result)}")
+
+                # -------- Guard-trim + place, on the worker while the next segment is prepared --------
+                last = top >= float(stop_nm) - 1e-12
+                job = (C, wl_buf[:points_seg], target, kept, write_at, i0, bottom_r, top_r, last)
+                if placer is not None:
+                    placing = placer.submit(self._place_segment, grid, *job)
+                    if notifier is not None:
+                        notifier.submit(self._notify_segment, on_segment, seg, segments, wl_target, placing)
+                else:
+                    span = self._place_segment(grid, *job)
+                    if on_segment is not None and span is not None:
+                        self._notify_segment(on_segment, seg, segments, wl_target, span)
 
-            # -------- Map slot order (1..C) to 'channels' labels --------
-            # Example: if channels=[2,4], powerArray1->ch=2, powerArray2->ch=4
-            for slot_i, ch_label in enumerate(channels, start=1):
-                if slot_i > C:
+                if last:
                     break
-                arr = power_arrays[slot_i]
-                pwr_full = np.ctypeslib.as_array(arr, shape=(points_seg,)).copy()  # copy: decouple
-                pwr_seg = pwr_full[mask][valid]
-
-                if pwr_seg.size != idx.size:
-                    m = min(pwr_seg.size, idx.size)
-                    if m > 0:
-                        out_by_ch[ch_label][idx[:m]] = pwr_seg[:m]
-                else:
-                    out_by_ch[ch_label][idx] = pwr_seg
+                bottom = top + step_nm
 
-            if top >= float(stop_nm) - 1e-12:
-                break
-            bottom = top + step_nm
+            if placing is not None:
+                placing.result()
+        finally:
+            if placer is not None:
+                placer.shutdown(wait=True)
+            if notifier is not None:
+                notifier.shutdown(wait=True, cancel_futures=self._cancel)
 
         # Fill last sample if instrument left it NaN after stitching
-        DBM_FLOOR = -80 # dBm
         for ch in channels:
-            np.clip(out_by_ch[ch], a_min=DBM_FLOOR, a_max=None, out=out_by_ch[ch])
             if n_target >= 2 and np.isnan(out_by_ch[ch][-1]):
                 nz = np.where(~np.isnan(out_by_ch[ch]))[0]
                 if nz.size:
@@ -413,14 +443,188 @@ class HP816xLambdaScan:
             'num_points': int(n_target)
         }
 
+    @staticmethod
+    def _place_segment(grid: "_StitchGrid", C: int, wl_m: np.ndarray, target: np.ndarray, kept: Optional[np.ndarray],
+                       write_at: int, i0: int, bottom_r: float, top_r: float, last: bool):
+        """
+        Guard-trim one executed segment and put it on the output grid.
+        Returns (first, stop, copies of the segment per channel) or None if empty.
+        """
+        rows, pad_front = grid.rows, grid.pad_front
+        points_seg = wl_m.size
+        wl_seg_nm = wl_m * 1e9
+        k0 = int(np.searchsorted(wl_seg_nm, bottom_r - 1e-6, side="left"))
+        k1 = int(np.searchsorted(wl_seg_nm, top_r + 1e-6, side="right"))
+        if k1 <= k0:
+            if kept is not None:
+                rows[:C, write_at:pad_front + i0] = kept
+            return None
+        g0 = int(round((wl_seg_nm[k0] - grid.start_nm) / grid.step_nm))
+        g1 = int(round((wl_seg_nm[k1 - 1] - grid.start_nm) / grid.step_nm)) + 1
+        on_grid = (g1 - g0 == k1 - k0) and g0 >= i0 and g1 <= grid.n_target
+
+        if kept is not None and on_grid:
+            src = write_at + k0
+            dst = pad_front + g0
+            if src != dst:
+                # Guard was not exactly pre_points long, slide the valid part into place
+                rows[:C, dst:dst + (k1 - k0)] = rows[:C, src:src + (k1 - k0)]
+            rows[:C, write_at:pad_front + i0] = kept
+            rows[:C, pad_front + i0:dst] = np.nan
+            # Post-guard sits where the next segment writes, blank it in case there is none
+            rows[:C, dst + (k1 - k0):write_at + points_seg] = np.nan
+        else:
+            # Off-grid wavelengths or no room: index every point into the grid
+            seg_data = target[:, k0:k1].copy()
+            if kept is not None:
+                rows[:C, write_at:pad_front + i0] = kept
+                rows[:C, pad_front + i0:write_at + points_seg] = np.nan
+            idx = np.rint((wl_seg_nm[k0:k1] - grid.start_nm) / grid.step_nm).astype(np.int64)
+            valid = (idx >= 0) & (idx < grid.n_target)
+            for slot_i in range(C):
+                grid.out_by_ch[grid.channels[slot_i]][idx[valid]] = seg_data[slot_i][valid]
+            g0, g1 = max(0, g0), min(grid.n_target, g1)
+
+        # Floor clip per segment, the whole row is never walked again
+        a, b = pad_front + max(i0, 0), pad_front + (grid.n_target if last else g1)
+        np.clip(rows[:, a:b], a_min=grid.DBM_FLOOR, a_max=None, out=rows[:, a:b])
+        return i0, g1, [grid.out_by_ch[ch][i0:g1].copy() for ch in grid.channels]
+
+    @staticmethod
+    def _notify_segment(on_segment, seg: int, segments: int, wl_target: np.ndarray, span) -> None:
+        """Hand a placed segment to the caller, errors in the callback never stop the scan"""
+        try:
+            if hasattr(span, "result"):
+                span = span.result()
+            if span is None:
+                return
+            first, stop, powers = span
+            on_segment(seg, segments, wl_target[first:stop], powers)
+        except Exception as e:
+            logging.error(f"[LSC] Segment callback error: {e}")
+
     def cancel(self):
         self._cancel = True
         self.disconnect()
     def disconnect(self):
         if self.session:
             self.lib.hp816x_close(self.session)
+            self.session = None
             self.connected = None
 
+
+class LambdaScanSession:
+    """
+    Long lived HP816xLambdaScan connection reused across sweeps.
+
+    The driver library is loaded and the mainframe registered once, on the first
+    sweep, instead of around every sweep. A sweep that fails on the driver side
+    drops the connection and is retried once on a fresh one; a cancelled sweep
+    only drops it, the next sweep reconnects. stats holds per-sweep setup time
+    (preflight + connect, or just preflight when the session is reused).
+    """
+
+    def __init__(self, factory: Callable[[], HP816xLambdaScan] = HP816xLambdaScan, retries: int = 1):
+        self._factory = factory
+        self.retries = retries
+        self.scanner: Optional[HP816xLambdaScan] = None
+        self.stats = {
+            "sweeps": 0,
+            "connects": 0,
+            "recoveries": 0,
+            "last_setup_s": 0.0,
+            "last_connect_s": 0.0,
+            "last_scan_s": 0.0,
+            "total_setup_s": 0.0,
+        }
+
+    @property
+    def connected(self) -> bool:
+        return self.scanner is not None and bool(self.scanner.connected) and bool(self.scanner.session)
+
+    def acquire(self) -> HP816xLambdaScan:
+        """Connected scanner, (re)connecting only when there is none"""
+        if self.connected:
+            self.scanner._cancel = False
+            return self.scanner
+        t0 = time.perf_counter()
+        self.reset()
+        scanner = self._factory()
+        if not scanner.connect():
+            raise RuntimeError("HP816xLambdaScan.connect() failed")
+        self.scanner = scanner
+        self.stats["connects"] += 1
+        self.stats["last_connect_s"] = time.perf_counter() - t0
+        return scanner
+
+    def run(self, preflight: Optional[Callable[[], None]] = None,
+            after_sweep: Optional[Callable[[], None]] = None, **scan_kwargs) -> dict:
+        """
+        lambda_scan on the session scanner. preflight runs before every sweep and
+        counts as setup; after_sweep runs after every sweep, failed ones too, to
+        restore settings the lambda scan changes (power units).
+        """
+        attempt = 0
+        while True:
+            t0 = time.perf_counter()
+            if preflight is not None:
+                try:
+                    preflight()
+                except Exception:
+                    pass
+            connects = self.stats["connects"]
+            scanner = self.acquire()
+            reconnected = self.stats["connects"] != connects
+            t1 = time.perf_counter()
+            self.stats["last_setup_s"] = t1 - t0
+            self.stats["total_setup_s"] += t1 - t0
+            if not reconnected:
+                self.stats["last_connect_s"] = 0.0
+            try:
+                res = scanner.lambda_scan(**scan_kwargs)
+            except Exception as e:
+                cancelled = scanner._cancel
+                self.reset()
+                if cancelled or attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.stats["recoveries"] += 1
+                logging.warning(f"[LSC] Sweep failed ({e}), reconnecting and retrying")
+                continue
+            finally:
+                if after_sweep is not None:
+                    try:
+                        after_sweep()
+                    except Exception:
+                        pass
+            self.stats["last_scan_s"] = time.perf_counter() - t1
+            self.stats["sweeps"] += 1
+            return res
+
+    def cancel(self) -> bool:
+        if self.scanner is None:
+            return False
+        self.scanner.cancel()
+        return True
+
+    def reset(self) -> None:
+        """Drop the current connection, the next sweep reconnects"""
+        scanner, self.scanner = self.scanner, None
+        if scanner is not None:
+            try:
+                scanner.disconnect()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        self.reset()
+
+    def get_stats(self) -> dict:
+        stats = dict(self.stats)
+        stats["connected"] = self.connected
+        stats["mean_setup_s"] = stats["total_setup_s"] / stats["sweeps"] if stats["sweeps"] else 0.0
+        return stats
+
 # def main():
 #     """Tester"""
 #     inst = HP816xLambdaScan()
@@ -0,0 +1,56 @@
+import sys
+import time
+
+import numpy as np
+
+from NIR.sweep import HP816xLambdaScan
+from NIR.test.LAMBDA_SCAN_BENCH import make_scanner
+
+"""
+Pipelined vs serial stitching of a long lambda scan on the synthetic hp816x DLL.
+
+The fake DLL sleeps for a set time in every prepare / execute call (the GIL is
+released like in a real ctypes call), and the segment callback stands in for a
+GUI redraw. Serial runs placement and the callback inline after every execute;
+pipelined places each segment on a worker while the next one is prepared and
+runs callbacks on their own thread. Also reports how long the instrument sat
+idle between the end of one execute and the start of the next prepare.
+Run from the repo root: python -m NIR.test.LAMBDA_PIPELINE_BENCH [prepare_s execute_s callback_s]
+"""
+
+
+def run(pipelined, mode, prepare_s, execute_s, callback_s):
+    scanner = make_scanner(mode, prepare_latency=prepare_s, execute_latency=execute_s)
+    seen = []
+
+    def on_segment(seg, segments, wl_nm, powers):
+        time.sleep(callback_s)
+        seen.append((seg, wl_nm[0], wl_nm[-1], powers[0].size))
+
+    t0 = time.perf_counter()
+    res = scanner.lambda_scan(1490.0, 1640.0, 0.1, on_segment=on_segment, pipelined=pipelined)
+    elapsed = time.perf_counter() - t0
+
+    calls = scanner.lib.calls
+    idle = sum(nxt[1] - cur[2] for cur, nxt in zip(calls[:-1], calls[1:]) if cur[0] == "execute")
+    covered = sum(n for *_, n in seen)
+    return elapsed, idle, len(seen), covered, res
+
+
+def main():
+    prepare_s, execute_s, callback_s = 0.15, 0.4, 0.1
+    if len(sys.argv) == 4:
+        prepare_s, execute_s, callback_s = (float(v) for v in sys.argv[1:])
+    print(f"prepare {prepare_s * 1e3:.0f} ms, execute {execute_s * 1e3:.0f} ms, callback {callback_s * 1e3:.0f} ms")
+
+    for mode in ("grid", "offgrid"):
+        t_ser, idle_ser, n_ser, cov_ser, ser = run(False, mode, prepare_s, execute_s, callback_s)
+        t_pipe, idle_pipe, n_pipe, cov_pipe, pipe = run(True, mode, prepare_s, execute_s, callback_s)
+        same = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(ser['channels_dbm'], pipe['channels_dbm']))
+        print(f"{mode:<8} serial {t_ser:6.2f} s (idle {idle_ser:5.2f} s) | pipelined {t_pipe:6.2f} s "
+              f"(idle {idle_pipe:5.2f} s) | {n_pipe} segment callbacks, {cov_pipe}/{pipe['num_points']} pts, "
+              f"identical {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import ctypes
+import sys
+import time
+import tracemalloc
+from ctypes import c_double, c_int32, c_uint32, POINTER, byref
+
+import numpy as np
+from tqdm import tqdm
+
+from NIR.sweep import HP816xLambdaScan
+
+"""
+lambda_scan buffer handling on a synthetic hp816x DLL, no instrument needed.
+
+FakeHP816x answers hp816x_prepareLambdaScan / hp816x_executeLambdaScan like the
+driver: each segment is returned with a 90 pm guard on both sides and the power
+is a known function of wavelength. The current lambda_scan (DLL writes into the
+output rows) is compared with the previous per-segment ctypes copy + scatter
+implementation for time, peak traced memory and identical output.
+
+Modes: "grid" guard exactly on the step grid, "shifted" guard one point longer
+(exercises the slide into place), "offgrid" wavelengths off the step grid
+(exercises the indexed fallback).
+Run from the repo root: python -m NIR.test.LAMBDA_SCAN_BENCH [start stop step_pm]
+"""
+
+
+def _as_array(obj, n):
+    if isinstance(obj, ctypes.Array):
+        return np.ctypeslib.as_array(obj)[:n]
+    return np.ctypeslib.as_array(obj, shape=(n,))
+
+
+class FakeHP816x:
+    """Stand-in for the hp816x_64.dll lambda scan entry points"""
+
+    def __init__(self, mode="grid", prepare_latency=0.0, execute_latency=0.0):
+        self.mode = mode
+        self.prepare_latency = prepare_latency  # seconds per call, GIL released like a DLL call
+        self.execute_latency = execute_latency
+        self.calls = []  # (name, t_start, t_end)
+        self._seg = None
+        self.dll_time = 0.0  # seconds spent inside the fake calls
+
+    @staticmethod
+    def power(wl_nm, slot):
+        return -20.0 + 10.0 * np.sin(wl_nm * 37.0) - 3.0 * slot
+
+    def hp816x_prepareLambdaScan(self, session, unit, power, output, nscans, nch,
+                                 start_m, stop_m, step_m, p_points, p_arrays):
+        t0 = time.perf_counter()
+        time.sleep(self.prepare_latency)
+        self.calls.append(("prepare", t0, time.perf_counter()))
+        step_nm = step_m.value * 1e9
+        start_nm, stop_nm = start_m.value * 1e9, stop_m.value * 1e9
+        guard = int(round(0.090 / step_nm)) + (1 if self.mode == "shifted" else 0)
+        n = int(round((stop_nm - start_nm) / step_nm)) + 1 + 2 * guard
+        first = start_nm - guard * step_nm + (0.3 * step_nm if self.mode == "offgrid" else 0.0)
+        self._seg = (first, step_nm, n, nch.value)
+        p_points._obj.value = n
+        p_arrays._obj.value = nch.value
+        return 0
+
+    def hp816x_executeLambdaScan(self, session, wl, *powers):
+        t0 = time.perf_counter()
+        time.sleep(self.execute_latency)
+        first, step_nm, n, nch = self._seg
+        wl_nm = first + np.arange(n) * step_nm
+        _as_array(wl, n)[:] = wl_nm * 1e-9
+        for slot in range(nch):
+            _as_array(powers[slot], n)[:] = self.power(wl_nm, slot)
+        self.dll_time += time.perf_counter() - t0
+        self.calls.append(("execute", t0, time.perf_counter()))
+        return 0
+
+
+# Previous implementation, kept here for comparison
+def legacy_lambda_scan(self, start_nm: float = 1490, stop_nm: float = 1600, step_pm: float = 0.5,
+                power_dbm: float = 3.0, num_scans: int = 0, channels: list = [1, 2]):
+    if not self.session:
+        raise RuntimeError("Not connected to instrument")
+
+    # Constrain to instrument limits
+    start_nm = 1490 if start_nm < 1490 else start_nm
+    stop_nm = 1640 if stop_nm > 1640 else stop_nm
+    step_pm = 0.1 if step_pm < 0.1 else step_pm
+    # 2.06279e-007 to 13.5241;
+    if power_dbm < 3e-7: power_dbm = 3e-7
+    elif power_dbm > 13.5: power_dbm = 13.5
+
+    # Convert to meters for DLL
+    step_nm = step_pm / 1000.0
+    start_wl = start_nm * 1e-9
+    stop_wl = stop_nm * 1e-9
+    step_m = step_pm * 1e-12
+
+    # Uniform output grid
+    n_target = int(round((float(stop_nm) - float(start_nm)) / step_nm)) + 1
+    wl_target = start_nm + np.arange(n_target, dtype=np.float64) * step_nm
+
+    # Segmentation (accounting for 90 pm guard)
+    max_points_per_scan = 20001
+    guard_pre_pm, guard_post_pm = 90.0, 90.0
+    guard_total_pm = guard_pre_pm + guard_post_pm
+    guard_points = int(np.ceil(guard_total_pm / step_pm)) + 2
+    eff_points_budget = max_points_per_scan - guard_points
+    if eff_points_budget < 2:
+        raise RuntimeError("Step too large for guard-banded segmentation (eff_points_budget < 2).")
+
+    pts_est = n_target
+    segments = max(1, int(np.ceil(pts_est / float(eff_points_budget))))
+
+    # Preallocate outputs
+    out_by_ch = {ch: np.full(n_target, np.nan, dtype=np.float64) for ch in channels}
+
+    bottom = float(start_nm)
+    for seg in tqdm(range(segments), desc="Lambda Scan Stitching", unit="seg"):
+        if self._cancel:
+            raise RuntimeError("Cancelling Lambda Scan Stitching")
+        planned_top = bottom + (eff_points_budget - 1) * step_nm
+        top = min(planned_top, float(stop_nm))
+
+        bottom_r = bottom
+        top_r = top
+
+        # -------- SINGLE-FRAME PREP --------
+        num_points_seg = c_uint32()
+        num_arrays_seg = c_uint32()
+        result = self.lib.hp816x_prepareLambdaScan(
+            self.session,
+            0,  # powerUnit: 0=dBm
+            c_double(power_dbm),  # TLS setpoint
+            0,  # opticalOutput: 0=HIGHPOW (change if LOWSSE/BHR/BLR)
+            c_int32(num_scans),  # 0->1 scan, 1->2 scans, etc.
+            c_int32(len(channels)),  # PWMChannels = COUNT (NOT a mask)
+            c_double(bottom_r * 1e-9),
+            c_double(top_r * 1e-9),
+            c_double(step_pm * 1e-12),
+            byref(num_points_seg),
+            byref(num_arrays_seg)
+        )
+        if result != 0:
+            raise RuntimeError(f"Prepare scan failed: {result} :: {self._err_msg(result)}")
+
+        points_seg = int(num_points_seg.value)
+        C = int(num_arrays_seg.value)
+        if C < 1:
+            # Nothing enabled; skip this segment
+            bottom = top + step_nm
+            continue
+        if C != len(channels):
+            pass
+
+        # -------- ALLOCATE BUFFERS FOR EXECUTE --------
+        wl_buf = (c_double * points_seg)()
+
+        # Prepare up to 8 power array pointers; fill first C, NULL the rest
+        power_slots = [None] * 8
+        power_arrays = {}
+        for i in range(C):  # i: 0..C-1 maps to powerArray1..C
+            arr = (c_double * points_seg)()
+            power_slots[i] = arr
+            power_arrays[i + 1] = arr  # keep by slot index (1-based)
+
+        # Helper: NULL pointer for unused arrays
+        from ctypes import POINTER
+        def ptr_or_null(arr):
+            return arr if arr is not None else POINTER(c_double)()
+
+        # -------- SINGLE-FRAME EXECUTE (returns wl + all channels at once) --------
+        result = self.lib.hp816x_executeLambdaScan(
+            self.session,
+            wl_buf,
+            ptr_or_null(power_slots[0]),
+            ptr_or_null(power_slots[1]),
+            ptr_or_null(power_slots[2]),
+            ptr_or_null(power_slots[3]),
+            ptr_or_null(power_slots[4]),
+            ptr_or_null(power_slots[5]),
+            ptr_or_null(power_slots[6]),
+            ptr_or_null(power_slots[7]),
+        )
+        if result != 0:
+            raise RuntimeError(f"Execute scan failed: {result} :: {self._err_msg(result)}")
+
+        # -------- Convert wl + guard-trim + index into global grid --------
+        wl_seg_nm_full = np.ctypeslib.as_array(wl_buf, shape=(points_seg,)).copy() * 1e9
+        # Keep only [bottom_r, top_r] (drop 90 pm guards)
+        mask = (wl_seg_nm_full >= bottom_r - 1e-6) & (wl_seg_nm_full <= top_r + 1e-6)
+        if not np.any(mask):
+            bottom = top + step_nm
+            continue
+
+        wl_seg_nm = wl_seg_nm_full[mask]
+        idx = np.rint((wl_seg_nm - float(start_nm)) / step_nm).astype(np.int64)
+        valid = (idx >= 0) & (idx < n_target)
+        idx = idx[valid]
+
+        # -------- Map slot order (1..C) to 'channels' labels --------
+        # Example: if channels=[2,4], powerArray1->ch=2, powerArray2->ch=4
+        for slot_i, ch_label in enumerate(channels, start=1):
+            if slot_i > C:
+                break
+            arr = power_arrays[slot_i]
+            pwr_full = np.ctypeslib.as_array(arr, shape=(points_seg,)).copy()  # copy: decouple
+            pwr_seg = pwr_full[mask][valid]
+
+            if pwr_seg.size != idx.size:
+                m = min(pwr_seg.size, idx.size)
+                if m > 0:
+                    out_by_ch[ch_label][idx[:m]] = pwr_seg[:m]
+            else:
+                out_by_ch[ch_label][idx] = pwr_seg
+
+        if top >= float(stop_nm) - 1e-12:
+            break
+        bottom = top + step_nm
+
+    # Fill last sample if instrument left it NaN after stitching
+    DBM_FLOOR = -80 # dBm
+    for ch in channels:
+        np.clip(out_by_ch[ch], a_min=DBM_FLOOR, a_max=None, out=out_by_ch[ch])
+        if n_target >= 2 and np.isnan(out_by_ch[ch][-1]):
+            nz = np.where(~np.isnan(out_by_ch[ch]))[0]
+            if nz.size:
+                out_by_ch[ch][-1] = out_by_ch[ch][nz[-1]]
+
+    channels_dbm = [out_by_ch[ch] for ch in channels]
+    return {
+        'wavelengths_nm': wl_target,
+        'channels': channels,
+        'channels_dbm': channels_dbm,
+        'num_points': int(n_target)
+    }
+
+
+def make_scanner(mode, **latency):
+    scanner = HP816xLambdaScan.__new__(HP816xLambdaScan)
+    scanner.lib = FakeHP816x(mode, **latency)
+    scanner.session = 1
+    scanner._cancel = False
+    return scanner
+
+
+def measure(fn, mode, *args):
+    scanner = make_scanner(mode)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    res = fn(scanner, *args)
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # buffer handling only, the fake DLL filling its arrays is not counted
+    return res, elapsed - scanner.lib.dll_time, peak
+
+
+def main():
+    start, stop, step_pm = 1490.0, 1640.0, 0.1
+    if len(sys.argv) == 4:
+        start, stop, step_pm = (float(v) for v in sys.argv[1:])
+
+    print("time = lambda_scan minus time inside the fake DLL, peak = tracemalloc peak")
+    for mode in ("grid", "shifted", "offgrid"):
+        new, t_new, m_new = measure(lambda sc, *a: HP816xLambdaScan.lambda_scan(sc, *a, pipelined=False),
+                                    mode, start, stop, step_pm)
+        old, t_old, m_old = measure(legacy_lambda_scan, mode, start, stop, step_pm)
+        same = all(np.array_equal(a, b, equal_nan=True) for a, b in zip(new['channels_dbm'], old['channels_dbm']))
+        nan = int(sum(np.isnan(a).sum() for a in new['channels_dbm']))
+        out_mb = 8 * new['num_points'] * len(new['channels']) / 1e6
+        print(f"{mode:<8} {new['num_points']} pts x {len(new['channels'])} ch ({out_mb:.0f} MB out): "
+              f"legacy {t_old:6.3f} s peak {m_old / 1e6:6.1f} MB | "
+              f"zero-copy {t_new:6.3f} s peak {m_new / 1e6:6.1f} MB | identical {same} nan {nan}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import sys
+import time
+
+import numpy as np
+
+from NIR.sweep import HP816xLambdaScan, LambdaScanSession
+from NIR.test.LAMBDA_SCAN_BENCH import FakeHP816x
+
+"""
+Per-sweep setup cost: a new HP816xLambdaScan per sweep vs one LambdaScanSession.
+
+The synthetic driver adds the connection entry points to FakeHP816x with fixed
+latencies (library load, hp816x_init, registerMainframe, hp816x_close, and the
+configure_units VISA round trips the controller runs after every sweep).
+These are assumed values, pass measured ones on the command line. A short scan
+is repeated so setup dominates; one execute in the session run is made to fail
+to show the reconnect-and-retry path.
+Run from the repo root: python -m NIR.test.SWEEP_SESSION_BENCH [load_s init_s register_s units_s]
+"""
+
+SWEEPS = 10
+
+
+class FakeDriver(FakeHP816x):
+    """FakeHP816x with hp816x_init / registerMainframe / close and failure injection"""
+
+    def __init__(self, init_s, register_s, close_s=0.05, fail_executes=()):
+        super().__init__("grid")
+        self.init_s, self.register_s, self.close_s = init_s, register_s, close_s
+        self.fail_executes = set(fail_executes)
+        self.executes = 0
+        self.inits = 0
+
+    def hp816x_init(self, addr, query_id, reset, p_session):
+        time.sleep(self.init_s)
+        self.inits += 1
+        p_session._obj.value = 1
+        return 0
+
+    def hp816x_error_message(self, session, status, buf):
+        return 0
+
+    def hp816x_error_query(self, session, p_code, buf):
+        return 0
+
+    def hp816x_errorQueryDetect(self, session, on):
+        return 0
+
+    def hp816x_registerMainframe(self, session):
+        time.sleep(self.register_s)
+        return 0
+
+    def hp816x_close(self, session):
+        time.sleep(self.close_s)
+        return 0
+
+    def hp816x_executeLambdaScan(self, session, wl, *powers):
+        self.executes += 1
+        if self.executes in self.fail_executes:
+            return -1074000000
+        return super().hp816x_executeLambdaScan(session, wl, *powers)
+
+
+def scanner_factory(load_s, init_s, register_s, fail_executes=()):
+    driver = FakeDriver(init_s, register_s, fail_executes=fail_executes)
+
+    def make():
+        time.sleep(load_s)  # WinDLL loads + prototype setup in HP816xLambdaScan.__init__
+        scanner = HP816xLambdaScan.__new__(HP816xLambdaScan)
+        scanner.lib = driver
+        scanner.session = None
+        scanner.connected = False
+        scanner.instrument = None
+        scanner._cancel = False
+        return scanner
+
+    return make, driver
+
+
+def scan_kwargs():
+    return dict(start_nm=1550.0, stop_nm=1551.0, step_pm=1.0, power_dbm=1.0, channels=[1, 2])
+
+
+def per_sweep(load_s, init_s, register_s, units_s):
+    """Previous optical_sweep flow: new scanner, connect, scan, disconnect, configure_units"""
+    make, driver = scanner_factory(load_s, init_s, register_s)
+    setups, results = [], []
+    for _ in range(SWEEPS):
+        t0 = time.perf_counter()
+        hp = make()
+        hp.connect()
+        setups.append(time.perf_counter() - t0)
+        results.append(hp.lambda_scan(**scan_kwargs(), pipelined=False))
+        hp.disconnect()
+        time.sleep(units_s)
+    return setups, driver, results
+
+
+def with_session(load_s, init_s, register_s, units_s, fail_executes=()):
+    make, driver = scanner_factory(load_s, init_s, register_s, fail_executes)
+    session = LambdaScanSession(factory=make)
+    setups, results = [], []
+    for _ in range(SWEEPS):
+        results.append(session.run(after_sweep=lambda: time.sleep(units_s), **scan_kwargs(), pipelined=False))
+        setups.append(session.stats["last_setup_s"])
+    session.close()
+    return setups, driver, results, session.get_stats()
+
+
+def main():
+    load_s, init_s, register_s, units_s = 0.2, 0.5, 0.3, 0.06
+    if len(sys.argv) == 5:
+        load_s, init_s, register_s, units_s = (float(v) for v in sys.argv[1:])
+    print(f"load {load_s * 1e3:.0f} ms, init {init_s * 1e3:.0f} ms, register {register_s * 1e3:.0f} ms, "
+          f"units {units_s * 1e3:.0f} ms, {SWEEPS} sweeps")
+
+    t0 = time.perf_counter()
+    setups, driver, ref = per_sweep(load_s, init_s, register_s, units_s)
+    total = time.perf_counter() - t0
+    print(f"per-sweep  setup first {setups[0] * 1e3:6.0f} ms  rest {np.mean(setups[1:]) * 1e3:6.0f} ms  "
+          f"total {total:5.2f} s  inits {driver.inits}")
+
+    t0 = time.perf_counter()
+    setups, driver, res, stats = with_session(load_s, init_s, register_s, units_s)
+    total = time.perf_counter() - t0
+    same = all(np.array_equal(a, b, equal_nan=True)
+               for r0, r1 in zip(ref, res) for a, b in zip(r0['channels_dbm'], r1['channels_dbm']))
+    print(f"session    setup first {setups[0] * 1e3:6.0f} ms  rest {np.mean(setups[1:]) * 1e3:6.0f} ms  "
+          f"total {total:5.2f} s  inits {driver.inits}  identical {same}")
+
+    t0 = time.perf_counter()
+    setups, driver, res, stats = with_session(load_s, init_s, register_s, units_s, fail_executes=(5,))
+    total = time.perf_counter() - t0
+    print(f"session, execute #5 fails  total {total:5.2f} s  sweeps {stats['sweeps']}  "
+          f"connects {stats['connects']}  recoveries {stats['recoveries']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import asyncio
+import time
 import numpy as np
 from typing import Any, Callable, Dict, Optional
 
@@ -6,6 +7,7 @@ from motors.stage_manager import *
 from motors.hal.motors_hal import AxisType, Position
 from NIR.nir_manager import *
 from utils.logging_helper import setup_logger
+from measure.scan_path import plan_spiral_grid, path_stats, estimate_path_time
 
 import logging
 
@@ -37,6 +39,9 @@ class AreaSweep:
         self.debug = debug
         self.primary_detector = None # Max is fine for area sweeps
         self.spiral = None
+        self.sample_mask = None  # cells actually measured by the last hierarchical sweep
+        self.planned_travel_um = None  # spiral plan, set before the scan starts
+        self.planned_time_s = None
         self._stop_requested = False
         self._cancel_event = cancel_event  # external cancel (multiprocessing.Event)
         self._progress = progress
@@ -96,6 +101,10 @@ class AreaSweep:
             return await self._begin_sweep_crosshair()
         elif pattern == "spiral":
             return await self._begin_sweep_spiral_grid()
+        elif pattern == "flying":
+            return await self._begin_sweep_flying()
+        elif pattern == "hierarchical":
+            return await self._begin_sweep_hierarchical()
         else:
             self._log(f"Unknown pattern '{pattern}', defaulting to crosshair.", "warning")
             return await self._begin_sweep_crosshair()
@@ -192,8 +201,7 @@ class AreaSweep:
 
             # Return to origin pose
             self._report(98.0, "Area sweep: returning to start position...")
-            await self.stage_manager.move_axis(AxisType.X, initial_x, relative=False, wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, initial_y, relative=False, wait_for_completion=True)
+            await self.stage_manager.move_axes({AxisType.X: initial_x, AxisType.Y: initial_y})
 
             self._report(100.0, "Area sweep: completed")
             self._log(f"Crosshair sweep completed. Total rows stored: {len(data)}")
@@ -206,6 +214,8 @@ class AreaSweep:
     async def _begin_sweep_spiral_grid(self) -> np.ndarray:
         """
         Spiral search on a discrete grid centered at the current pose.
+        The visit order is planned up front (measure/scan_path.py) for short
+        travel and few axis reversals, X and Y move together between cells.
         """
         try:
             cfg = self.config
@@ -214,6 +224,7 @@ class AreaSweep:
             step = float(getattr(cfg, "step_size", getattr(cfg, "x_step", 1.0)))
             if step <= 0:
                 raise ValueError("step_size must be > 0 µm")
+            backlash = max(0.0, float(getattr(cfg, "backlash_um", 0.0)))
 
             # inclusive endpoints => floor(extent/step) + 1
             def samples_along(extent_um: float, pitch_um: float) -> int:
@@ -223,86 +234,57 @@ class AreaSweep:
             y_cells = samples_along(float(cfg.y_size), step)   # rows
             total_cells = x_cells * y_cells
 
-            self._report(5.0, f"Area sweep (spiral): scanning {total_cells} points...")
+            # plan: a reversal costs one cell of travel plus the backlash take-up
+            path = plan_spiral_grid(x_cells, y_cells, reversal_cost=1.0 + 2.0 * backlash / step)
+            travel_um, reversals = path_stats(path, step, step)
+            stage_cfg = self.stage_manager.config
+            self.planned_time_s = estimate_path_time(
+                path, step, step,
+                velocity=float(stage_cfg.velocities.get(AxisType.X, 2000.0)),
+                acceleration=float(stage_cfg.accelerations.get(AxisType.X, 0.0)),
+                overhead_s=float(getattr(cfg, "point_overhead_s", 0.1)),
+                backlash=backlash,
+            )
+            self.planned_travel_um = travel_um
+            self._log(f"Spiral plan: {total_cells} points, travel {travel_um / 1000.0:.2f} mm, "
+                      f"{reversals} reversals, estimated {self.planned_time_s:.1f} s")
+            self._report(5.0, f"Area sweep (spiral): {total_cells} points, {travel_um / 1000.0:.2f} mm, "
+                              f"~{self.planned_time_s:.0f} s")
 
             #  buffers 
             data = np.full((y_cells, x_cells), np.nan, dtype=float)
-            visited = np.zeros((y_cells, x_cells), dtype=bool)
 
             #  anchor at current physical pose (this is the spiral center) 
             x0 = (await self.stage_manager.get_position(AxisType.X)).actual
             y0 = (await self.stage_manager.get_position(AxisType.Y)).actual
-            await self.stage_manager.move_axis(AxisType.X, x0, relative=False, wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, y0, relative=False, wait_for_completion=True)
+            await self.stage_manager.move_axes({AxisType.X: x0, AxisType.Y: y0})
 
             # center cell indices
             cx = (x_cells - 1) // 2
             cy = (y_cells - 1) // 2
-            x_idx, y_idx = cx, cy
+            here = (x0, y0)
 
-            # first sample (center)
             def read_value() -> float:
                 lm, ls = self.nir_manager.read_power()
                 return float(self._select_detector_channel(lm, ls))
 
-            visited[y_idx, x_idx] = True
-            data[y_idx, x_idx] = read_value()
-            covered = 1
-            self._report(10.0, f"Area sweep (spiral): point {covered}/{total_cells}")
-
-            # right, up, left, down (clockwise)
-            dirs = [(1, 0), (0, 1), (-1, 0), (0, -1)]
-            d = 0          # direction index
-            leg_len = 1     # how many virtual steps to take on this leg
-
-            # virtual cursor walks the ideal spiral; we only move physically when the
-            # next virtual cell is inside the grid and unvisited
-            vx, vy = x_idx, y_idx
-
-            while covered < total_cells and not self._cancelled():
-                # two legs share the same length before we grow the ring
-                for _repeat in range(2):
-                    for _ in range(leg_len):
-                        vx += dirs[d][0]
-                        vy += dirs[d][1]
-
-                        # accept only in-bounds, unvisited cells
-                        if 0 <= vx < x_cells and 0 <= vy < y_cells and not visited[vy, vx]:
-                            dx_cells = vx - x_idx
-                            dy_cells = vy - y_idx
-
-                            # physical motion in um (relative)
-                            if dx_cells:
-                                await self.stage_manager.move_axis(
-                                    AxisType.X, dx_cells * step, relative=True, wait_for_completion=True
-                                )
-                            if dy_cells:
-                                await self.stage_manager.move_axis(
-                                    AxisType.Y, dy_cells * step, relative=True, wait_for_completion=True
-                                )
-
-                            # commit and read
-                            x_idx, y_idx = vx, vy
-                            visited[y_idx, x_idx] = True
-                            data[y_idx, x_idx] = read_value()
-                            covered += 1
-                            
-                            # Report progress
-                            progress = min(95.0, 10.0 + (covered / total_cells) * 85.0)
-                            self._report(progress, f"Area sweep (spiral): point {covered}/{total_cells}")
-
-                        if covered >= total_cells or self._cancelled():
-                            break
-                    # 90deg right turn
-                    d = (d + 1) % 4
-                    if covered >= total_cells or self._cancelled():
-                        break
-                leg_len += 1
+            covered = 0
+            for ix, iy in path:
+                if self._cancelled():
+                    break
+                target = (x0 + (ix - cx) * step, y0 + (iy - cy) * step)
+                await self._move_xy(here, target, backlash)
+                here = target
+                data[iy, ix] = read_value()
+                covered += 1
+
+                # Report progress
+                progress = min(95.0, 10.0 + (covered / total_cells) * 85.0)
+                self._report(progress, f"Area sweep (spiral): point {covered}/{total_cells}")
 
             # return to start
             self._report(98.0, "Area sweep (spiral): returning to start position...")
-            await self.stage_manager.move_axis(AxisType.X, x0, relative=False, wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, y0, relative=False, wait_for_completion=True)
+            await self._move_xy(here, (x0, y0))
 
             self._report(100.0, "Area sweep (spiral): completed")
             self._log(f"Centered spiral completed {x_cells}x{y_cells} at {step:g} µm pitch")
@@ -312,6 +294,327 @@ class AreaSweep:
             self._log(f"Spiral grid sweep error: {e}", "error")
             raise
 
+    async def _begin_sweep_flying(self) -> np.ndarray:
+        """
+        Flying raster centered at the current pose. Each row is swept in X at
+        constant velocity (serpentine) while the detector samples continuously,
+        either through instrument paced logging or timed polling. Samples are
+        placed on the grid from their timestamps and the X trajectory recorded
+        while the row was moving, so the stage never stops per point.
+        """
+        try:
+            cfg = self.config
+            x_step = float(getattr(cfg, "x_step", 1.0))
+            y_step = float(getattr(cfg, "y_step", 1.0))
+            if x_step <= 0 or y_step <= 0:
+                raise ValueError("x_step/y_step must be > 0 µm")
+            sample_period = float(getattr(cfg, "sample_period", 0.005))
+            use_logging = (bool(getattr(cfg, "use_detector_logging", True))
+                           and hasattr(self.nir_manager, "start_power_logging"))
+
+            # inclusive endpoints => floor(extent/step) + 1
+            def samples_along(extent_um: float, pitch_um: float) -> int:
+                return max(1, int(extent_um // pitch_um) + 1)
+
+            x_cells = samples_along(float(cfg.x_size), x_step)
+            y_cells = samples_along(float(cfg.y_size), y_step)
+            total_cells = x_cells * y_cells
+
+            # ~2 samples per cell unless a velocity is given
+            velocity = float(getattr(cfg, "scan_velocity", 0.0) or 0.0) or x_step / (2.0 * sample_period)
+            self._log(f"Flying sweep: {x_cells}x{y_cells}, v={velocity:g} µm/s, "
+                      f"{'logging' if use_logging else 'polling'} @ {sample_period * 1e3:g} ms")
+            self._report(5.0, f"Area sweep (flying): scanning {total_cells} points...")
+
+            snapshot = await self.stage_manager.get_positions_snapshot([AxisType.X, AxisType.Y])
+            x0 = snapshot.positions[AxisType.X].actual
+            y0 = snapshot.positions[AxisType.Y].actual
+            grid_x = x0 + (np.arange(x_cells) - (x_cells - 1) / 2.0) * x_step
+            grid_y = y0 + (np.arange(y_cells) - (y_cells - 1) / 2.0) * y_step
+
+            # One cell of run-in/out so samples taken while accelerating or dwelling
+            # at the row ends fall outside the grid
+            run_up = x_step
+            data = np.full((y_cells, x_cells), np.nan, dtype=float)
+            x_here = x0
+
+            velocity_restore = self.stage_manager.config.velocities.get(AxisType.X)
+            await self.stage_manager.set_velocity(AxisType.X, velocity)
+            try:
+                for row in range(y_cells):
+                    if self._cancelled():
+                        self._log("Area sweep canceled")
+                        self._report(100.0, "Area sweep: canceled")
+                        break
+
+                    if row % 2 == 0:
+                        xs, xe = grid_x[0] - run_up, grid_x[-1] + run_up
+                    else:
+                        xs, xe = grid_x[-1] + run_up, grid_x[0] - run_up
+
+                    await self.stage_manager.move_axis(AxisType.Y, grid_y[row], relative=False, wait_for_completion=True)
+                    if abs(x_here - xs) > 1e-9:
+                        await self.stage_manager.move_axis(AxisType.X, xs, relative=False, wait_for_completion=True)
+
+                    sample_x, power = await self._fly_row(xs, xe, velocity, sample_period, use_logging)
+                    if sample_x is None:
+                        # Logging failed, redo this row with timed polling from here on
+                        self._log("Detector logging unavailable, falling back to timed polling", "error")
+                        use_logging = False
+                        xs, xe = xe, xs
+                        sample_x, power = await self._fly_row(xs, xe, velocity, sample_period, use_logging)
+                    x_here = xe
+
+                    data[row] = self._grid_samples(sample_x, power, grid_x, x_step)
+
+                    progress = min(95.0, 10.0 + ((row + 1) / y_cells) * 85.0)
+                    self._report(progress, f"Area sweep (flying): row {row + 1}/{y_cells}")
+            finally:
+                if velocity_restore:
+                    await self.stage_manager.set_velocity(AxisType.X, velocity_restore)
+
+            # return to start
+            self._report(98.0, "Area sweep (flying): returning to start position...")
+            await self.stage_manager.move_axes({AxisType.X: x0, AxisType.Y: y0})
+
+            self._report(100.0, "Area sweep (flying): completed")
+            self._log(f"Flying sweep completed {x_cells}x{y_cells} at ({x_step:g},{y_step:g}) µm pitch")
+            return data
+
+        except Exception as e:
+            self._log(f"Flying sweep error: {e}", "error")
+            raise
+
+    async def _begin_sweep_hierarchical(self) -> np.ndarray:
+        """
+        Coarse-to-fine sweep centered at the current pose. A coarse lattice
+        (coarse_factor cells apart) is measured first, then each level halves the
+        pitch but only measures around lattice nodes within refine_threshold_db of
+        the best reading, down to x_step/y_step. Cells never measured are filled
+        by bilinear interpolation of the level above.
+        """
+        try:
+            cfg = self.config
+            x_step = float(getattr(cfg, "x_step", 1.0))
+            y_step = float(getattr(cfg, "y_step", 1.0))
+            if x_step <= 0 or y_step <= 0:
+                raise ValueError("x_step/y_step must be > 0 µm")
+            factor = max(1, int(getattr(cfg, "coarse_factor", 8)))
+            threshold_db = float(getattr(cfg, "refine_threshold_db", 10.0))
+
+            # inclusive endpoints => floor(extent/step) + 1
+            def samples_along(extent_um: float, pitch_um: float) -> int:
+                return max(1, int(extent_um // pitch_um) + 1)
+
+            x_cells = samples_along(float(cfg.x_size), x_step)
+            y_cells = samples_along(float(cfg.y_size), y_step)
+            total_cells = x_cells * y_cells
+
+            # Power of two stride so every level halves onto the same lattice
+            stride = 1
+            while stride * 2 <= factor:
+                stride *= 2
+            levels = int(np.log2(stride)) + 1
+
+            self._log(f"Hierarchical sweep: {x_cells}x{y_cells}, coarse stride {stride} cells, "
+                      f"refine within {threshold_db:g} dB of max")
+            self._report(5.0, f"Area sweep (hierarchical): coarse pass on {total_cells} point grid...")
+
+            snapshot = await self.stage_manager.get_positions_snapshot([AxisType.X, AxisType.Y])
+            x0 = snapshot.positions[AxisType.X].actual
+            y0 = snapshot.positions[AxisType.Y].actual
+            grid_x = x0 + (np.arange(x_cells) - (x_cells - 1) / 2.0) * x_step
+            grid_y = y0 + (np.arange(y_cells) - (y_cells - 1) / 2.0) * y_step
+
+            data = np.full((y_cells, x_cells), np.nan, dtype=float)
+            measured = np.zeros((y_cells, x_cells), dtype=bool)
+            here = (x0, y0)
+            count = 0
+
+            async def measure(points, level) -> bool:
+                nonlocal here, count
+                for k, (iy, ix) in enumerate(self._serpentine(points)):
+                    if self._cancelled():
+                        return False
+                    target = (grid_x[ix], grid_y[iy])
+                    await self._move_xy(here, target)
+                    here = target
+                    lm, ls = self.nir_manager.read_power()
+                    data[iy, ix] = float(self._select_detector_channel(lm, ls))
+                    measured[iy, ix] = True
+                    count += 1
+                    progress = min(95.0, 10.0 + ((level + (k + 1) / len(points)) / levels) * 85.0)
+                    self._report(progress, f"Area sweep (hierarchical): stride {stride}, point {count}")
+                return True
+
+            ly, lx = self._lattice(y_cells, stride), self._lattice(x_cells, stride)
+            ok = await measure([(iy, ix) for iy in ly for ix in lx], 0)
+            filled = data[np.ix_(ly, lx)]
+
+            level = 1
+            while ok and stride > 1:
+                best = np.nanmax(data)
+                half = stride // 2
+                ny, nx = self._lattice(y_cells, half), self._lattice(x_cells, half)
+
+                # Refine the cells touching every node close enough to the max
+                want = np.zeros((len(ny), len(nx)), dtype=bool)
+                for a, b in np.argwhere(filled >= best - threshold_db):
+                    want |= ((np.abs(ny - ly[a]) <= stride)[:, None] & (np.abs(nx - lx[b]) <= stride)[None, :])
+                want &= ~measured[np.ix_(ny, nx)]
+                todo = [(ny[a], nx[b]) for a, b in np.argwhere(want)]
+
+                stride = half
+                ok = await measure(todo, level)
+
+                # Next lattice: measured where available, else interpolated from this one
+                coarse = self._bilinear(filled, ly, lx, ny, nx)
+                sub = data[np.ix_(ny, nx)]
+                filled = np.where(np.isnan(sub), coarse, sub)
+                ly, lx = ny, nx
+                level += 1
+
+            if not ok:
+                self._log("Area sweep canceled")
+                self._report(100.0, "Area sweep: canceled")
+
+            # Full grid (no-op at stride 1), measured cells are kept as read
+            full = self._bilinear(filled, ly, lx, np.arange(y_cells), np.arange(x_cells))
+            full[measured] = data[measured]
+            self.sample_mask = measured
+
+            # return to start
+            self._report(98.0, "Area sweep (hierarchical): returning to start position...")
+            await self._move_xy(here, (x0, y0))
+
+            self._report(100.0, "Area sweep (hierarchical): completed")
+            self._log(f"Hierarchical sweep completed {x_cells}x{y_cells}, measured {count}/{total_cells} points")
+            return full
+
+        except Exception as e:
+            self._log(f"Hierarchical sweep error: {e}", "error")
+            raise
+
+    async def _fly_row(self, x_start: float, x_end: float, velocity: float,
+                       sample_period: float, use_logging: bool):
+        """
+        Sweep X from x_start to x_end without stopping, sampling power meanwhile.
+        Returns (sample_x, power) arrays, or (None, None) if logging failed.
+        """
+        row_time = abs(x_end - x_start) / velocity
+        timeout = 3.0 * row_time + 5.0
+        # Within half a cell of the run-out end every grid cell has been crossed
+        pitch = float(getattr(self.config, "x_step", 1.0))
+        tolerance = min(float(getattr(self.stage_manager.config, "position_tolerance", 1.0)), 0.5 * pitch)
+
+        logging_started = False
+        if use_logging:
+            # Cover the row plus ramp / settle, logging runs to completion before readout
+            n_samples = min(20000, int(np.ceil((row_time + 0.1) / sample_period)) + 1)
+            logging_started = self.nir_manager.start_power_logging(n_samples, sample_period)
+            if not logging_started:
+                return None, None
+            t_log = time.monotonic()
+
+        # X trajectory (time, position) recorded while the row moves
+        traj_t = [time.monotonic()]
+        traj_x = [x_start]
+        poll_t, poll_p = [], []
+
+        await self.stage_manager.move_axis(AxisType.X, x_end, relative=False, wait_for_completion=False)
+        deadline = time.monotonic() + timeout
+        while True:
+            # The controller latches the position when the query arrives, so
+            # stamp with the request time rather than the reply time
+            ta = time.monotonic()
+            pos = await self.stage_manager.get_position(AxisType.X)
+            tb = time.monotonic()
+            if pos is not None:
+                traj_t.append(ta)
+                traj_x.append(pos.actual)
+
+            if not logging_started:
+                ta = time.monotonic()
+                lm, ls = self.nir_manager.read_power()
+                tb = time.monotonic()
+                poll_t.append(0.5 * (ta + tb))
+                poll_p.append(self._select_detector_channel(lm, ls))
+
+            if (pos is not None and abs(pos.actual - x_end) <= tolerance) or tb > deadline:
+                break
+
+        # X settles in the run-out while the next row steps Y, no need to wait here
+        traj_t.append(time.monotonic())
+        traj_x.append(x_end)
+
+        if logging_started:
+            result = self.nir_manager.read_power_logging(timeout_s=timeout)
+            if not result:
+                return None, None
+            power = np.maximum(np.asarray(result[0], dtype=float), np.asarray(result[1], dtype=float))
+            sample_t = t_log + (np.arange(len(power)) + 0.5) * sample_period
+        else:
+            power = np.asarray(poll_p, dtype=float)
+            sample_t = np.asarray(poll_t, dtype=float)
+
+        sample_x = np.interp(sample_t, np.asarray(traj_t), np.asarray(traj_x))
+        return sample_x, power
+
+    @staticmethod
+    def _grid_samples(sample_x: np.ndarray, power: np.ndarray, grid_x: np.ndarray, pitch: float) -> np.ndarray:
+        """Average samples into cells centred on grid_x, empty cells are interpolated"""
+        row = np.full(len(grid_x), np.nan, dtype=float)
+        if sample_x is None or len(sample_x) == 0:
+            return row
+
+        idx = np.rint((sample_x - grid_x[0]) / pitch).astype(int)
+        ok = (idx >= 0) & (idx < len(grid_x)) & np.isfinite(power)
+        sums = np.bincount(idx[ok], weights=power[ok], minlength=len(grid_x))
+        counts = np.bincount(idx[ok], minlength=len(grid_x))
+        filled = counts > 0
+        row[filled] = sums[filled] / counts[filled]
+        if filled.any() and not filled.all():
+            row[~filled] = np.interp(grid_x[~filled], grid_x[filled], row[filled])
+        return row
+
+    @staticmethod
+    def _lattice(n: int, stride: int) -> np.ndarray:
+        """Indices 0, stride, 2*stride... plus the last cell so the lattice spans the grid"""
+        return np.unique(np.r_[np.arange(0, n, stride), n - 1])
+
+    @staticmethod
+    def _bilinear(values: np.ndarray, ly: np.ndarray, lx: np.ndarray, ny: np.ndarray, nx: np.ndarray) -> np.ndarray:
+        """Separable linear interpolation of a (ly, lx) lattice onto (ny, nx) indices"""
+        rows = np.array([np.interp(nx, lx, r) for r in values])
+        return np.array([np.interp(ny, ly, c) for c in rows.T]).T
+
+    @staticmethod
+    def _serpentine(points):
+        """Order (iy, ix) cells row by row, alternating X direction"""
+        by_row: Dict[int, list] = {}
+        for iy, ix in points:
+            by_row.setdefault(int(iy), []).append(int(ix))
+        ordered = []
+        for k, iy in enumerate(sorted(by_row)):
+            xs = sorted(by_row[iy], reverse=bool(k % 2))
+            ordered.extend((iy, ix) for ix in xs)
+        return ordered
+
+    async def _move_xy(self, current, target, backlash: float = 0.0) -> None:
+        """
+        Absolute XY move, both axes at once, axes that do not change are not commanded.
+        With backlash > 0 an axis moving in -direction overshoots by backlash and
+        comes back, so every cell is approached from the same side.
+        """
+        changed = [(axis, a, b) for axis, a, b in ((AxisType.X, current[0], target[0]),
+                                                    (AxisType.Y, current[1], target[1])) if abs(a - b) > 1e-9]
+        if not changed:
+            return
+        if backlash > 0.0 and any(b < a for _, a, b in changed):
+            await self.stage_manager.move_axes({axis: b - backlash if b < a else b for axis, a, b in changed})
+            changed = [(axis, b - backlash, b) for axis, a, b in changed if b < a]
+        await self.stage_manager.move_axes({axis: b for axis, _, b in changed})
+
     def _cancelled(self) -> bool:
         """True if a stop was requested or the external Cancel button was pressed."""
         return self._stop_requested or (self._cancel_event is not None and getattr(self._cancel_event, "is_set", lambda: False)())
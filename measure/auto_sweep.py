@@ -0,0 +1,286 @@
+import asyncio
+import inspect
+import queue
+import threading
+from dataclasses import dataclass, field
+from time import monotonic, time
+from typing import Any, Callable, Dict, List, Optional
+
+from motors.hal.motors_hal import AxisType
+from measure.config.auto_sweep_config import AutoSweepConfiguration
+from utils.logging_helper import setup_logger
+
+"""
+Auto sweep over a list of devices, pipelined.
+
+Per device the stage moves, the fiber is aligned and the laser sweeps. Those
+steps need the fiber and the detector, so they stay in sequence, but the rest
+no longer waits:
+    - writing a sweep's files (plots, csv, mat) runs on writer threads fed by a
+      bounded queue. The stage moves on right away and only waits when
+      queue_depth sweeps are still unwritten (backpressure).
+    - the laser slews back from the end of the sweep to the alignment wavelength
+      while the stage moves to the next device.
+
+Every step is timed. The report gives the devices/hour each stage alone would
+allow next to the throughput of the run, which shows the stage that limits it.
+"""
+
+STAGES = ("move", "laser", "align", "sweep", "queue", "write")
+WAIT_STAGES = ("laser", "queue")  # time the stage stood waiting on the overlapped work
+XY_LOCKS = ((AxisType.X, "x"), (AxisType.Y, "y"))
+
+
+@dataclass
+class DeviceTask:
+    index: int           # position in the run
+    name: str
+    x: float             # um
+    y: float             # um
+    key: Any = None      # caller's id for the device (coordinates entry)
+
+
+@dataclass
+class SweepResult:
+    task: DeviceTask
+    wavelength: Any      # nm
+    channels: Any        # dBm, one row per detector
+    timestamp: float     # wall clock at the end of the sweep
+
+
+@dataclass
+class StageTime:
+    count: int = 0
+    total_s: float = 0.0
+
+    def add(self, dt: float) -> None:
+        self.count += 1
+        self.total_s += dt
+
+    @property
+    def mean_s(self) -> float:
+        return self.total_s / self.count if self.count else 0.0
+
+    @property
+    def devices_per_hour(self) -> Optional[float]:
+        """Throughput if this stage alone set the pace, None when it took no time"""
+        return 3600.0 / self.mean_s if self.mean_s > 0 else None
+
+
+@dataclass
+class AutoSweepStats:
+    devices: int = 0      # swept and queued for writing
+    failed: int = 0       # sweeps that returned no data
+    elapsed_s: float = 0.0
+    stages: Dict[str, StageTime] = field(default_factory=lambda: {s: StageTime() for s in STAGES})
+
+    @property
+    def devices_per_hour(self) -> float:
+        return 3600.0 * self.devices / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    def report(self) -> str:
+        lines = [f"{self.devices} devices in {self.elapsed_s:.1f} s ({self.devices_per_hour:.0f} devices/h)"
+                 + (f", {self.failed} failed sweeps" if self.failed else "")]
+        for name in STAGES:
+            stage = self.stages[name]
+            if not stage.count:
+                continue
+            rate = stage.devices_per_hour
+            if name in WAIT_STAGES:
+                lines.append(f"  {name:<6} {stage.mean_s:7.2f} s/device waited")
+            else:
+                lines.append(f"  {name:<6} {stage.mean_s:7.2f} s/device  "
+                             + (f"{rate:6.0f} devices/h" if rate is not None else "     - devices/h"))
+        return "\n".join(lines)
+
+
+class OutputQueue:
+    """
+    Bounded queue of sweep results drained by writer threads.
+    put() blocks while depth results are waiting, close() waits for the rest.
+    """
+
+    def __init__(self, save: Callable[[SweepResult], None], depth: int = 2, writers: int = 1,
+                 stats: Optional[AutoSweepStats] = None, logger=None):
+        self._save = save
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._stats = stats
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._worker, name=f"sweep-writer-{i}", daemon=True)
+                         for i in range(max(1, writers))]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, result: SweepResult) -> float:
+        """Queue a result, returns the seconds spent waiting for room"""
+        t0 = monotonic()
+        self._queue.put(result)
+        return monotonic() - t0
+
+    def close(self) -> None:
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+    def _worker(self) -> None:
+        while True:
+            result = self._queue.get()
+            if result is None:
+                return
+            t0 = monotonic()
+            try:
+                self._save(result)
+            except Exception as e:
+                if self._logger is not None:
+                    self._logger.error(f"Saving {result.task.name} failed: {e}")
+            if self._stats is not None:
+                with self._lock:
+                    self._stats.stages["write"].add(monotonic() - t0)
+
+
+class AutoSweep:
+    """
+    Args:
+        auto_sweep_config: AutoSweepConfiguration.to_dict()
+        save: writes one SweepResult, runs on a writer thread
+        align: aligns the fiber at a device, sync (run in a thread) or async
+        progress: callback(device_num, activity, percent) for the progress dialog
+        on_device: callback(task, ok) after each device was swept
+        axis_locked: {"x": bool, "y": bool}, locked axes are not moved
+    """
+
+    def __init__(
+            self,
+            auto_sweep_config: Dict[str, Any],
+            stage_manager,
+            nir_manager,
+            save: Callable[[SweepResult], None],
+            align: Optional[Callable[[DeviceTask], Any]] = None,
+            progress: Optional[Callable[[int, str, float], None]] = None,
+            on_device: Optional[Callable[[DeviceTask, bool], None]] = None,
+            cancel_event: Optional[Any] = None,
+            axis_locked: Optional[Dict[str, bool]] = None,
+            debug: bool = False
+    ):
+        self.config = AutoSweepConfiguration.from_dict(auto_sweep_config)
+        self.stage_manager = stage_manager
+        self.nir_manager = nir_manager
+        self._save = save
+        self._align = align
+        self._progress = progress
+        self._on_device = on_device
+        self._cancel_event = cancel_event
+        self.axis_locked = axis_locked or {}
+        self._stop_requested = False
+        self.stats = AutoSweepStats()
+
+        self.logger = setup_logger("AutoSweep", "SWEEP", debug_mode=debug)
+
+    def stop(self) -> None:
+        """Finish the current step, skip the remaining devices, queued files are still written"""
+        self._stop_requested = True
+
+    def _cancelled(self) -> bool:
+        return self._stop_requested or (
+            self._cancel_event is not None and getattr(self._cancel_event, "is_set", lambda: False)()
+        )
+
+    def _report(self, device_num: int, activity: str, percent: float) -> None:
+        if self._progress is not None:
+            try:
+                self._progress(device_num, activity, percent)
+            except Exception as e:
+                self.logger.error(f"Progress callback error: {e}")
+
+    def _ref_wavelength(self) -> Optional[float]:
+        if self.config.ref_wl is not None:
+            return self.config.ref_wl
+        nir_config = getattr(self.nir_manager, "config", None)
+        return getattr(nir_config, "initial_wavelength_nm", None)
+
+    async def _timed(self, stage: str, awaitable):
+        t0 = monotonic()
+        try:
+            return await awaitable
+        finally:
+            self.stats.stages[stage].add(monotonic() - t0)
+
+    async def run(self, devices: List[DeviceTask]) -> AutoSweepStats:
+        cfg = self.config
+        n = len(devices)
+        self.stats = stats = AutoSweepStats()
+        writer = OutputQueue(self._save, cfg.queue_depth, cfg.writers, stats, self.logger)
+        ref_wl = self._ref_wavelength()
+        overlap = cfg.overlap_laser and ref_wl is not None
+        laser = None  # wavelength restore of the previous sweep, still running
+        t_run = monotonic()
+        self.logger.info(f"Auto sweep of {n} devices (queue depth {cfg.queue_depth}, "
+                         f"laser overlap {'on' if overlap else 'off'})")
+
+        try:
+            for task in devices:
+                if self._cancelled():
+                    break
+                i = task.index
+                self._report(i + 1, f"Moving to Device {i + 1}/{n}", 100.0 * i / n)
+                targets = {axis: pos for (axis, lock), pos in zip(XY_LOCKS, (task.x, task.y))
+                           if not self.axis_locked.get(lock, False)}
+                if not await self._timed("move", self.stage_manager.move_axes(targets)):
+                    # Measuring here would save a spectrum of whatever the fiber is over
+                    stats.failed += 1
+                    self.logger.error(f"Move to {task.name} failed, device skipped")
+                    self._report(i + 1, f"Device {i + 1}/{n}: Move failed", 100.0 * (i + 1) / n)
+                    if self._on_device is not None:
+                        self._on_device(task, False)
+                    continue
+
+                if laser is not None:
+                    # Only the part of the slew the move did not cover
+                    await self._timed("laser", laser)
+                    laser = None
+                if self._cancelled():
+                    break
+
+                if cfg.align and self._align is not None:
+                    self._report(i + 1, f"Device {i + 1}/{n}: Fine alignment", 100.0 * (i + 0.2) / n)
+                    t0 = monotonic()
+                    result = await asyncio.to_thread(self._align, task)
+                    if inspect.isawaitable(result):
+                        await result
+                    stats.stages["align"].add(monotonic() - t0)
+                    if self._cancelled():
+                        break
+
+                self._report(i + 1, f"Device {i + 1}/{n}: Spectral sweep", 100.0 * (i + 0.7) / n)
+                data = await self._timed("sweep", asyncio.to_thread(
+                    self.nir_manager.sweep, cfg.start_nm, cfg.stop_nm, cfg.step_nm, cfg.power_dbm,
+                    restore_wavelength=not overlap))
+                if overlap:
+                    laser = asyncio.ensure_future(asyncio.to_thread(self.nir_manager.set_wavelength, ref_wl))
+
+                ok = data is not None and data[0] is not None and len(data[0]) > 0
+                if ok:
+                    wl, ch1, ch2 = data
+                    result = SweepResult(task=task, wavelength=wl, channels=[ch1, ch2], timestamp=time())
+                    stats.stages["queue"].add(await asyncio.to_thread(writer.put, result))
+                    stats.devices += 1
+                else:
+                    stats.failed += 1
+                    self.logger.error(f"Sweep at {task.name} returned no data")
+
+                self._report(i + 1, f"Device {i + 1}/{n}: Completed", 100.0 * (i + 1) / n)
+                if self._on_device is not None:
+                    self._on_device(task, ok)
+        finally:
+            if laser is not None:
+                await laser
+            self._report(n, "Writing remaining files", 100.0)
+            await asyncio.to_thread(writer.close)
+            stats.elapsed_s = monotonic() - t_run
+
+        self.logger.info("Auto sweep " + ("stopped" if self._cancelled() else "done"))
+        for line in stats.report().splitlines():
+            self.logger.info(line)
+        return stats
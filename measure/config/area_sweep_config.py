@@ -16,7 +16,20 @@ class AreaSweepConfiguration:
     x_step = 1  # microns
     y_size = 50 # microns
     y_step = 1 # microns
-    pattern = "spiral" # or "crosshair"
+    pattern = "spiral" # or "crosshair", "flying", "hierarchical"
+
+    # Spiral only
+    backlash_um = 0.0  # > 0 approaches every cell from +X/+Y, overshooting by this much
+    point_overhead_s = 0.1  # settle, completion polling and detector read per point, time estimate only
+
+    # Flying raster only
+    scan_velocity = 0.0  # um/s, 0 derives ~2 samples per x_step from sample_period
+    sample_period = 0.005  # s, detector averaging time per sample
+    use_detector_logging = True  # instrument paced logging, else timed polling
+
+    # Hierarchical only
+    coarse_factor = 8  # coarse lattice pitch in steps, rounded down to a power of two
+    refine_threshold_db = 10.0  # refine around points within this of the max
 
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -25,7 +38,14 @@ class AreaSweepConfiguration:
             'x_step': self.x_step,
             'y_size': self.y_size,
             'y_step': self.y_step,
-            'pattern': self.pattern
+            'pattern': self.pattern,
+            'backlash_um': self.backlash_um,
+            'point_overhead_s': self.point_overhead_s,
+            'scan_velocity': self.scan_velocity,
+            'sample_period': self.sample_period,
+            'use_detector_logging': self.use_detector_logging,
+            'coarse_factor': self.coarse_factor,
+            'refine_threshold_db': self.refine_threshold_db
         }
 
     @classmethod
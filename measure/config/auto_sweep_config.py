@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from typing import Optional
+
+"""
+Auto Sweep Configuration
+"""
+
+@dataclass
+class AutoSweepConfiguration:
+    start_nm: float = 1540.0
+    stop_nm: float = 1580.0
+    step_nm: float = 0.001
+    power_dbm: float = 1.0
+    align: bool = True              # fine align at every device before the sweep
+    ref_wl: Optional[float] = None  # nm the laser returns to for alignment, None: NIR initial_wavelength_nm
+    overlap_laser: bool = True      # slew the laser back while the stage moves to the next device
+    queue_depth: int = 2            # sweeps waiting to be written before the stage waits for the writer
+    writers: int = 1                # writer threads
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary"""
+        return {
+            'start_nm': self.start_nm,
+            'stop_nm': self.stop_nm,
+            'step_nm': self.step_nm,
+            'power_dbm': self.power_dbm,
+            'align': self.align,
+            'ref_wl': self.ref_wl,
+            'overlap_laser': self.overlap_laser,
+            'queue_depth': self.queue_depth,
+            'writers': self.writers,
+        }
+
+    @classmethod
+    def default(cls) -> 'AutoSweepConfiguration':
+        """Create default configuration"""
+        return cls()
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'AutoSweepConfiguration':
+        """Create from dictionary"""
+        return cls(**data)
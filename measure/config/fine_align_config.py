@@ -16,6 +16,9 @@ class FineAlignConfiguration:
     primary_detector: str = "ch1"   # "ch1" or "ch2"
     ref_wl: float = 1550.0          # nm
     timeout_s: float = 60.0        # seconds
+    optimizer: str = "gradient"     # "gradient", "gaussian" or "simplex"
+    cache_quantum: float = 0.05     # microns, sample cache grid
+    cache_max_age_s: float = 30.0   # seconds before a cached sample is re-measured
 
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -28,6 +31,9 @@ class FineAlignConfiguration:
             'primary_detector': self.primary_detector,
             'ref_wl': self.ref_wl,
             'timeout_s': self.timeout_s,
+            'optimizer': self.optimizer,
+            'cache_quantum': self.cache_quantum,
+            'cache_max_age_s': self.cache_max_age_s,
         }
     
     @classmethod
@@ -6,6 +6,8 @@ import time
 from motors.stage_manager import StageManager
 from motors.hal.motors_hal import AxisType
 from NIR.nir_manager import NIRManager
+from measure.optimizers import create_optimizer
+from measure.sample_cache import SampleCache
 
 from utils.logging_helper import setup_logger
 
@@ -29,7 +31,8 @@ class FineAlign:
             nir_manager: NIRManager,
             progress: Optional[Callable[[float, str], None]] = None,
             cancel_event: Optional[Any] = None,
-            debug: bool = False
+            debug: bool = False,
+            sample_cache: Optional[SampleCache] = None
         ):
         self.config = config
         self.stage_manager = stage_manager
@@ -54,8 +57,19 @@ class FineAlign:
         self.primary_detector = config.get("primary_detector", "ch1")
         self.ref_wl = config.get("ref_wl", 1550.0)
         self.timeout_s = float(config.get("timeout_s", 180.0))
+        self.optimizer = config.get("optimizer", "gradient")  # "gradient" or a registered optimizer
         self._start_time = 0.0
 
+        # Readings shared by spiral, gradient and optimizer, pass one in to keep it across runs
+        if sample_cache is None:
+            sample_cache = SampleCache(
+                quantum=float(config.get("cache_quantum", 0.05)),
+                max_age_s=float(config.get("cache_max_age_s", 30.0)),
+            )
+        self.samples = sample_cache
+        self.moves = 0
+        self.reads = 0
+
         self.log(f"FineAlign initialized with detector: {self.primary_detector}", "info")
         self._stop_requested = False
 
@@ -112,13 +126,14 @@ class FineAlign:
                 return True
 
             # Return to best before gradient
-            await self.stage_manager.move_axis(AxisType.X, self.best_position[0], relative=False,
-                                               wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, self.best_position[1], relative=False,
-                                               wait_for_completion=True)
+            await self.stage_manager.move_axes({AxisType.X: self.best_position[0],
+                                                AxisType.Y: self.best_position[1]})
 
-            # Gradient refinement
-            bok = await self.gradient_search()
+            # Refinement: +/-X/Y gradient or a model based optimizer
+            if self.optimizer == "gradient":
+                bok = await self.gradient_search()
+            else:
+                bok = await self.model_search()
             if not bok:
                 if self._cancelled():
                     self._report(100.0, "Gradient: canceled")
@@ -128,10 +143,8 @@ class FineAlign:
                 return False
 
             # Return to best finally
-            await self.stage_manager.move_axis(AxisType.X, self.best_position[0], relative=False,
-                                               wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, self.best_position[1], relative=False,
-                                               wait_for_completion=True)
+            await self.stage_manager.move_axes({AxisType.X: self.best_position[0],
+                                                AxisType.Y: self.best_position[1]})
             self._report(100.0, "Fine alignment: completed")
             return True
 
@@ -155,8 +168,7 @@ class FineAlign:
         """
         try:
             # Ensure exact start
-            await self.stage_manager.move_axis(AxisType.X, x_pos, relative=False, wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, y_pos, relative=False, wait_for_completion=True)
+            await self.stage_manager.move_axes({AxisType.X: x_pos, AxisType.Y: y_pos})
 
             step = self.step_size
             limit = max(1, int(self.scan_window / max(1e-9, step)))  # segments per arm (radius in steps)
@@ -166,12 +178,11 @@ class FineAlign:
             direction = 1
             num_steps = 1
 
-            # initial sample
-            lm, ls = self.nir_manager.read_power()
-            best_loss = self._select_detector_channel(lm, ls)
-            x = await self.stage_manager.get_position(AxisType.X)
-            y = await self.stage_manager.get_position(AxisType.Y)
-            best_pos = [x.actual, y.actual]
+            # initial sample, the spiral is walked on absolute nominal points so they can be cached
+            here = (x_pos, y_pos)
+            px, py = x_pos, y_pos
+            best_loss, here = await self._sample(here, (px, py))
+            best_pos = [px, py]
             self.lowest_loss = max(self.lowest_loss, best_loss)
 
             self.log(f"Starting spiral at ({best_pos[0]:.3f}, {best_pos[1]:.3f})", "info")
@@ -185,15 +196,12 @@ class FineAlign:
                 for _ in range(num_steps):
                     if self._cancelled():
                         break
-                    await self.stage_manager.move_axis(AxisType.X, step * direction, relative=True, wait_for_completion=True)
-                    lm, ls = self.nir_manager.read_power()
-                    val = self._select_detector_channel(lm, ls)
+                    px += step * direction
+                    val, here = await self._sample(here, (px, py))
 
                     if val > best_loss:
                         best_loss = val
-                        x = await self.stage_manager.get_position(AxisType.X)
-                        y = await self.stage_manager.get_position(AxisType.Y)
-                        best_pos = [x.actual, y.actual]
+                        best_pos = [px, py]
                         self.lowest_loss = best_loss
                         if best_loss >= self.threshold:
                             covered += 1
@@ -210,14 +218,11 @@ class FineAlign:
                 for _ in range(num_steps):
                     if self._cancelled():
                         break
-                    await self.stage_manager.move_axis(AxisType.Y, step * direction, relative=True, wait_for_completion=True)
-                    lm, ls = self.nir_manager.read_power()
-                    val = self._select_detector_channel(lm, ls)
+                    py += step * direction
+                    val, here = await self._sample(here, (px, py))
                     if val > best_loss:
                         best_loss = val
-                        x = await self.stage_manager.get_position(AxisType.X)
-                        y = await self.stage_manager.get_position(AxisType.Y)
-                        best_pos = [x.actual, y.actual]
+                        best_pos = [px, py]
                         self.lowest_loss = best_loss
                         if best_loss >= self.threshold:
                             covered += 1
@@ -234,15 +239,13 @@ class FineAlign:
             # If canceled mid-loop
             if self._cancelled():
                 # Snap to best found so far
-                await self.stage_manager.move_axis(AxisType.X, best_pos[0], relative=False, wait_for_completion=True)
-                await self.stage_manager.move_axis(AxisType.Y, best_pos[1], relative=False, wait_for_completion=True)
+                await self._move_xy(here, best_pos)
                 self.best_position = best_pos
                 self._report(min(99.0, 100.0 * covered / total_moves), "Spiral: canceled")
                 return False
 
             # Snap to best
-            await self.stage_manager.move_axis(AxisType.X, best_pos[0], relative=False, wait_for_completion=True)
-            await self.stage_manager.move_axis(AxisType.Y, best_pos[1], relative=False, wait_for_completion=True)
+            await self._move_xy(here, best_pos)
             self.best_position = best_pos
 
             if best_loss >= self.threshold:
@@ -273,8 +276,10 @@ class FineAlign:
                 y = await self.stage_manager.get_position(AxisType.Y)
                 self.best_position = [x.actual, y.actual]
 
-            lm, ls = self.nir_manager.read_power()
-            current = self._select_detector_channel(lm, ls)
+            # Stage sits at best_position, probes are absolute points around it so the
+            # stage goes probe to probe instead of back to center, and cached points are free
+            here = (self.best_position[0], self.best_position[1])
+            current, here = await self._sample(here, here)
             self.lowest_loss = current
 
             # Step schedule
@@ -283,51 +288,40 @@ class FineAlign:
 
             ss = self.step_size
             # Probe order: +/-X then +/-Y
-            axes = [(AxisType.X, +1), (AxisType.X, -1), (AxisType.Y, +1), (AxisType.Y, -1)]
+            axes = [(1, 0), (-1, 0), (0, 1), (0, -1)]
             tried_min_step = False
 
             while ss >= self.min_gradient_ss:
                 if self._cancelled() or (time.monotonic() - self._start_time) > self.timeout_s:
+                    await self._move_xy(here, self.best_position)
                     self._report(min(99.0, 100.0 * probes_done / total_probes), "Gradient: canceled/timeout")
                     return False
 
                 improved = False
-                best_axis, best_dir, best_val = None, 0, self.lowest_loss
+                bx, by = self.best_position
+                best_point, best_val = None, self.lowest_loss
 
                 # Probe each direction using the current step size
-                for axis, direction in axes:
+                for dx, dy in axes:
                     if self._cancelled():
+                        await self._move_xy(here, self.best_position)
                         self._report(min(99.0, 100.0 * probes_done / total_probes), "Gradient: canceled")
                         return False
 
-                    await self.stage_manager.move_axis(axis, ss * direction, relative=True, wait_for_completion=True)
-                    lm, ls = self.nir_manager.read_power()
-                    val = self._select_detector_channel(lm, ls)
-
-                    # Immediately move back
-                    await self.stage_manager.move_axis(axis, -ss * direction, relative=True, wait_for_completion=True)
+                    point = (bx + ss * dx, by + ss * dy)
+                    val, here = await self._sample(here, point)
 
                     if val > best_val:
-                        best_axis, best_dir, best_val = axis, direction, val
+                        best_point, best_val = point, val
                         improved = True
 
                     probes_done += 1
                     self._report(min(99.0, 100.0 * probes_done / total_probes),
                                  f"Gradient(ss={ss:.3g}): probing…")
 
-                if self._cancelled():
-                    self._report(min(99.0, 100.0 * probes_done / total_probes), "Gradient: canceled")
-                    return False
-
-                if improved and best_axis is not None:
-                    # Commit the best probing direction
-                    await self.stage_manager.move_axis(best_axis, ss * best_dir, relative=True, wait_for_completion=True)
-
-                    # Update from controller
-                    x = await self.stage_manager.get_position(AxisType.X)
-                    y = await self.stage_manager.get_position(AxisType.Y)
-                    self.best_position = [x.actual, y.actual]
-
+                if improved and best_point is not None:
+                    # Commit the best probing direction, next round probes around it
+                    self.best_position = [best_point[0], best_point[1]]
                     self.lowest_loss = best_val
                     current = best_val
 
@@ -335,6 +329,7 @@ class FineAlign:
                                  f"Gradient: improved → {self.lowest_loss:.2f} dBm")
 
                     if self.lowest_loss >= self.threshold:
+                        await self._move_xy(here, self.best_position)
                         self.log(f"Gradient met threshold at {self.lowest_loss:.2f} dBm", "info")
                         self._report(100.0, f"Gradient: threshold {self.lowest_loss:.2f} dBm")
                         return True
@@ -346,6 +341,7 @@ class FineAlign:
                         tried_min_step = True
                     ss = max(self.min_gradient_ss, ss - grad_step)
 
+            await self._move_xy(here, self.best_position)
             self.log("Gradient descent converged", "info")
             return True
 
@@ -354,6 +350,116 @@ class FineAlign:
             self._report(100.0, f"Gradient: error ({e})")
             return False
 
+    async def model_search(self) -> bool:
+        """
+        Refinement with the configured optimizer (measure/optimizers.py). The
+        optimizer picks each probe point from all samples so far, the stage goes
+        straight there (no move back), until it converges or hits the probe cap.
+        """
+        try:
+            self.log(f"Starting {self.optimizer} search refinement", "info")
+            self._report(20.0, f"Optimizer ({self.optimizer}): starting")
+            max_evals = 4 * max(1, int(self.max_gradient_iters)) + 1
+
+            if self.best_position is None:
+                x = await self.stage_manager.get_position(AxisType.X)
+                y = await self.stage_manager.get_position(AxisType.Y)
+                self.best_position = [x.actual, y.actual]
+
+            # Stage sits at best_position, seed with it and with the spiral samples around it
+            here = (self.best_position[0], self.best_position[1])
+            seeds = self.samples.near(here[0], here[1], 4.0 * self.step_size)
+            optimizer = create_optimizer(
+                self.optimizer,
+                start=here,
+                step=self.step_size,
+                min_step=self.min_gradient_ss,
+                max_evals=max_evals + len(seeds),
+            )
+            for sx, sy, sv in seeds:
+                optimizer.tell((sx, sy), sv)
+            self.lowest_loss, here = await self._sample(here, here)
+            optimizer.tell(here, self.lowest_loss)
+            bx, by, bp = optimizer.best
+            if bp > self.lowest_loss:
+                self.lowest_loss = bp
+                self.best_position = [bx, by]
+            evals = 1
+
+            while True:
+                if self._cancelled() or (time.monotonic() - self._start_time) > self.timeout_s:
+                    await self._move_xy(here, self.best_position)
+                    self._report(min(99.0, 100.0 * evals / max_evals), "Optimizer: canceled/timeout")
+                    return False
+
+                point = optimizer.ask()
+                if point is None:
+                    break
+
+                val, here = await self._sample(here, point)
+                optimizer.tell(point, val)
+                evals += 1
+
+                if val > self.lowest_loss:
+                    self.lowest_loss = val
+                    self.best_position = [point[0], point[1]]
+                    self._report(min(99.0, 100.0 * evals / max_evals),
+                                 f"Optimizer: improved → {self.lowest_loss:.2f} dBm")
+                    if self.lowest_loss >= self.threshold:
+                        await self._move_xy(here, self.best_position)
+                        self.log(f"Optimizer met threshold at {self.lowest_loss:.2f} dBm", "info")
+                        self._report(100.0, f"Optimizer: threshold {self.lowest_loss:.2f} dBm")
+                        return True
+                else:
+                    self._report(min(99.0, 100.0 * evals / max_evals), f"Optimizer: probe {evals}/{max_evals}")
+
+            await self._move_xy(here, self.best_position)
+            self.log(f"{self.optimizer} search converged after {evals} probes: {self.lowest_loss:.2f} dBm", "info")
+            return True
+
+        except Exception as e:
+            self.log(f"Optimizer search error: {e}", "error")
+            self._report(100.0, f"Optimizer: error ({e})")
+            return False
+
+    async def _move_xy(self, current, target) -> None:
+        """Absolute XY move, axes that do not change are not commanded"""
+        targets = {axis: b for axis, a, b in ((AxisType.X, current[0], target[0]),
+                                              (AxisType.Y, current[1], target[1])) if abs(a - b) > 1e-6}
+        if targets:
+            self.moves += 1
+            await self.stage_manager.move_axes(targets)
+
+    async def _sample(self, current, target):
+        """
+        Power at target (dBm). A fresh cached reading is returned without moving or
+        reading, otherwise the stage moves there and the reading is cached.
+
+            Returns:
+                (value, position the stage is now at)
+        """
+        cached = self.samples.get(target[0], target[1])
+        if cached is not None:
+            return cached, current
+        await self._move_xy(current, target)
+        lm, ls = self.nir_manager.read_power()
+        self.reads += 1
+        val = self._select_detector_channel(lm, ls)
+        self.samples.put(target[0], target[1], val)
+        return val, (target[0], target[1])
+
+    def get_result(self) -> Dict[str, Any]:
+        """Alignment outcome plus every cached sample, for saving with the measurement"""
+        return {
+            "best_position": list(self.best_position) if self.best_position else None,
+            "best_power_dbm": self.lowest_loss,
+            "optimizer": self.optimizer,
+            "moves": self.moves,
+            "reads": self.reads,
+            "cache_hits": self.samples.hits,
+            "samples": self.samples.export(),
+        }
+
     def _select_detector_channel(self, loss_master: float, loss_slave: float) -> float:
         """Select detector channel based on config"""
         if self.primary_detector == "ch1":
@@ -0,0 +1,248 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Generator, List, Optional, Tuple, Type
+
+import numpy as np
+
+"""
+Model based optimizers for FineAlign.
+
+Each optimizer follows an ask / tell loop: ask() returns the next XY probe point
+(absolute, um) or None once converged, tell() feeds back the measured power. All
+samples taken so far are kept, so the next probe is chosen from the whole history
+instead of a fixed +/-X, +/-Y pattern, and the stage goes straight from one probe
+to the next without moving back.
+
+Strategies are registered by name, FineAlign picks one from config["optimizer"].
+"""
+
+Point = Tuple[float, float]
+
+
+class AlignOptimizer(ABC):
+    """
+    Base class, keeps the sample history and the best sample
+
+    Args:
+        start: XY starting point in um (usually already measured)
+        step: initial probe distance in um
+        min_step: resolution, optimizers stop once their step is below this
+        max_evals: hard cap on probe points
+    """
+    name = "base"
+
+    def __init__(self, start: Point, step: float, min_step: float, max_evals: int = 50):
+        self.start = (float(start[0]), float(start[1]))
+        self.step = float(step)
+        self.min_step = float(min_step)
+        self.max_evals = int(max_evals)
+        self.samples: List[Tuple[float, float, float]] = []
+        self.converged = False
+
+    def tell(self, point: Point, value: float) -> None:
+        """Record a measured power (dBm) at an XY point"""
+        self.samples.append((float(point[0]), float(point[1]), float(value)))
+
+    @property
+    def best(self) -> Optional[Tuple[float, float, float]]:
+        """(x, y, power) of the highest sample"""
+        if not self.samples:
+            return None
+        return max(self.samples, key=lambda s: s[2])
+
+    def lookup(self, point: Point, tol: Optional[float] = None) -> Optional[float]:
+        """Power of an earlier sample within tol of point, so it is not measured twice"""
+        tol = 0.25 * self.min_step if tol is None else tol
+        for x, y, v in reversed(self.samples):
+            if abs(x - point[0]) <= tol and abs(y - point[1]) <= tol:
+                return v
+        return None
+
+    def ask(self) -> Optional[Point]:
+        """Next point to measure, None when done"""
+        if self.converged or len(self.samples) >= self.max_evals:
+            self.converged = True
+            return None
+        point = self._next()
+        if point is None:
+            self.converged = True
+        return point
+
+    @abstractmethod
+    def _next(self) -> Optional[Point]:
+        ...
+
+
+class ParaboloidFitOptimizer(AlignOptimizer):
+    """
+    Fits p(x, y) = a + bx + cy + dx^2 + exy + fy^2 to the samples near the best
+    point and probes the fitted maximum. A Gaussian mode overlap is exactly a
+    paraboloid in dB, so this is a Gaussian fit done as linear least squares.
+
+    Steps are limited to a trust radius that grows on improvement and shrinks
+    otherwise; the search stops when the trust radius drops below min_step or the
+    fitted peak lands on a point already measured.
+    """
+    name = "gaussian"
+
+    def __init__(self, start: Point, step: float, min_step: float, max_evals: int = 50):
+        super().__init__(start, step, min_step, max_evals)
+        self.trust = self.step
+        self._last_best = None
+        x0, y0 = self.start
+        s = self.step
+        # Six point design is the minimum for a full quadratic
+        self._design = [(x0, y0), (x0 + s, y0), (x0 - s, y0), (x0, y0 + s), (x0, y0 - s), (x0 + s, y0 + s)]
+
+    def _fit(self, center: Point, radius: float):
+        """Weighted quadratic fit around center, returns (coeffs, n_used) or (None, n)"""
+        pts = np.asarray(self.samples, dtype=float)
+        dx = pts[:, 0] - center[0]
+        dy = pts[:, 1] - center[1]
+        near = np.hypot(dx, dy) <= radius
+        if near.sum() < 6:
+            return None, int(near.sum())
+        dx, dy, p = dx[near], dy[near], pts[near, 2]
+        # Emphasise the peak region, dB values in the noise floor are not quadratic
+        w = np.sqrt(10 ** ((p - p.max()) / 10.0))
+        A = np.column_stack([np.ones_like(dx), dx, dy, dx * dx, dx * dy, dy * dy])
+        coeffs, *_ = np.linalg.lstsq(A * w[:, None], p * w, rcond=None)
+        return coeffs, int(near.sum())
+
+    def _next(self) -> Optional[Point]:
+        for point in self._design:
+            if self.lookup(point) is None:
+                return point
+
+        bx, by, bp = self.best
+        if self._last_best is not None:
+            if bp > self._last_best + 1e-3:
+                self.trust = min(2.0 * self.trust, 4.0 * self.step)
+            else:
+                self.trust *= 0.5
+        self._last_best = bp
+        if self.trust < self.min_step:
+            return None
+
+        coeffs, _ = self._fit((bx, by), max(3.0 * self.trust, 2.0 * self.step))
+        if coeffs is None:
+            # Not enough local data, probe around the best point
+            for ddx, ddy in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, -1)):
+                point = (bx + ddx * self.trust, by + ddy * self.trust)
+                if self.lookup(point) is None:
+                    return point
+            return None
+
+        _, b, c, d, e, f = coeffs
+        H = np.array([[2 * d, e], [e, 2 * f]])
+        g = np.array([b, c])
+        if np.all(np.linalg.eigvalsh(H) < 0):
+            delta = np.linalg.solve(H, -g)   # fitted maximum
+        else:
+            norm = np.hypot(*g)
+            delta = g / norm * self.trust if norm > 0 else np.array([self.trust, 0.0])
+
+        dist = float(np.hypot(*delta))
+        if dist > self.trust:
+            delta = delta * (self.trust / dist)
+            dist = self.trust
+        if dist < 0.5 * self.min_step:
+            return None
+        point = (bx + float(delta[0]), by + float(delta[1]))
+        if self.lookup(point, 0.5 * self.min_step) is not None:
+            return None
+        return point
+
+
+class NelderMeadOptimizer(AlignOptimizer):
+    """
+    Downhill simplex on -power, started from a right triangle of side step.
+    Stops when the simplex is smaller than min_step.
+    """
+    name = "simplex"
+
+    def __init__(self, start: Point, step: float, min_step: float, max_evals: int = 50):
+        super().__init__(start, step, min_step, max_evals)
+        self._gen = self._search()
+        self._pending: Optional[Point] = None
+
+    def _next(self) -> Optional[Point]:
+        try:
+            if self._pending is None:
+                point = next(self._gen)
+            else:
+                value = self.lookup(self._pending, 1e-9)
+                if value is None:
+                    return self._pending  # not told yet, ask again
+                point = self._gen.send(value)
+        except StopIteration:
+            return None
+        self._pending = point
+        return point
+
+    def _evaluate(self, point: np.ndarray) -> Generator[Point, float, float]:
+        """Cost at point, yields only if it has not been measured yet"""
+        p = (float(point[0]), float(point[1]))
+        known = self.lookup(p, 1e-9)
+        if known is None:
+            known = yield p
+        return -known
+
+    def _search(self) -> Generator[Point, float, None]:
+        s = self.step
+        x0 = np.asarray(self.start, dtype=float)
+        simplex = [x0, x0 + [s, 0.0], x0 + [0.0, s]]
+        costs = []
+        for v in simplex:
+            costs.append((yield from self._evaluate(v)))
+
+        while True:
+            order = np.argsort(costs)
+            simplex = [simplex[i] for i in order]
+            costs = [costs[i] for i in order]
+            size = max(np.hypot(*(v - simplex[0])) for v in simplex[1:])
+            if size < self.min_step:
+                return
+
+            centroid = (simplex[0] + simplex[1]) / 2.0
+            xr = centroid + (centroid - simplex[2])
+            fr = yield from self._evaluate(xr)
+            if fr < costs[0]:
+                xe = centroid + 2.0 * (centroid - simplex[2])
+                fe = yield from self._evaluate(xe)
+                simplex[2], costs[2] = (xe, fe) if fe < fr else (xr, fr)
+            elif fr < costs[1]:
+                simplex[2], costs[2] = xr, fr
+            else:
+                if fr < costs[2]:
+                    xc = centroid + 0.5 * (xr - centroid)
+                else:
+                    xc = centroid + 0.5 * (simplex[2] - centroid)
+                fc = yield from self._evaluate(xc)
+                if fc < min(fr, costs[2]):
+                    simplex[2], costs[2] = xc, fc
+                else:
+                    # Shrink towards the best vertex
+                    for i in (1, 2):
+                        simplex[i] = simplex[0] + 0.5 * (simplex[i] - simplex[0])
+                        costs[i] = yield from self._evaluate(simplex[i])
+
+
+_registry: Dict[str, Type[AlignOptimizer]] = {}
+
+
+def register_optimizer(name: str, cls: Type[AlignOptimizer]) -> None:
+    """Make an optimizer selectable through FineAlign config["optimizer"]"""
+    _registry[name] = cls
+
+
+def create_optimizer(name: str, **params) -> AlignOptimizer:
+    """Instantiate a registered optimizer; raises if the name is unknown"""
+    try:
+        cls = _registry[name]
+    except KeyError:
+        raise ValueError(f"Optimizer not registered named '{name}'")
+    return cls(**params)
+
+
+register_optimizer(ParaboloidFitOptimizer.name, ParaboloidFitOptimizer)
+register_optimizer(NelderMeadOptimizer.name, NelderMeadOptimizer)
@@ -0,0 +1,338 @@
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from motors.config.stage_config import StageConfiguration
+from motors.hal.motors_hal import AxisType
+from motors.utils.motion_model import profile_time
+
+"""
+Visit order planning for device lists (auto sweep).
+
+The route starts at a fixed point (the origin) and either returns to it or
+ends at the last device. The cost of a hop is either Euclidean um or, with a
+StageCostModel, the seconds the stage needs: X and Y move together, so the
+slower axis sets the time of the trapezoid (or triangle) profile, plus a
+settle time per move.
+
+Planning is a nearest neighbour construction followed by 2-opt and Or-opt
+(moving runs of 1-3 devices), both only trying new edges to each device's
+nearest neighbours, and only revisiting devices next to an edge that changed.
+It stops when nothing improves or the time budget is spent, typically after
+tens of milliseconds for a few hundred devices. OR-tools, if installed, can
+refine the result from there. With warm_start the previous order is kept for
+the devices still selected, new ones are inserted where they cost least and
+the local search only has to repair the seams.
+
+The cost matrix holds node 0 = start, 1..n = devices, n+1 = end (the start
+again for a closed tour, a free end otherwise). Costs must be symmetric.
+"""
+
+logger = logging.getLogger(__name__)
+
+_EPS = 1e-9
+
+
+@dataclass
+class StageCostModel:
+    """Seconds for an XY move between two points, including settling"""
+    velocity_x: float = 2000.0  # um/s
+    velocity_y: float = 2000.0
+    acceleration_x: float = 0.0  # um/s^2, 0 for no ramp
+    acceleration_y: float = 0.0
+    settle_s: float = 0.1  # per move
+
+    @classmethod
+    def from_stage_config(cls, config: StageConfiguration, settle_s: float = 0.1) -> "StageCostModel":
+        """
+        From the config the stage manager publishes, its accelerations are the
+        controller's (ACC?, read on connect), not the StageConfiguration defaults
+        """
+        return cls(velocity_x=config.velocities[AxisType.X], velocity_y=config.velocities[AxisType.Y],
+                   acceleration_x=config.accelerations[AxisType.X],
+                   acceleration_y=config.accelerations[AxisType.Y], settle_s=settle_s)
+
+    def matrix(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """(len(a), len(b)) move times between two point sets"""
+        dx = a[:, None, 0] - b[None, :, 0]
+        dy = a[:, None, 1] - b[None, :, 1]
+        t = np.maximum(profile_time(dx, self.velocity_x, self.acceleration_x),
+                       profile_time(dy, self.velocity_y, self.acceleration_y))
+        return np.where((dx == 0) & (dy == 0), 0.0, t + self.settle_s)
+
+
+def euclidean_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.hypot(a[:, None, 0] - b[None, :, 0], a[:, None, 1] - b[None, :, 1])
+
+
+@dataclass
+class Route:
+    order: List[Hashable]  # device keys in visiting order
+    cost: float  # um, or seconds with a StageCostModel, including the way back if closed
+    method: str
+    seconds: float  # planning time
+
+
+class RoutePlanner:
+    """
+    Args:
+        cost_model: StageCostModel, None for Euclidean um
+        start: XY the route starts from
+        closed: return to start after the last device
+        neighbours: candidate list size for 2-opt / Or-opt
+        time_limit_s: budget for the local search, it usually converges well before
+        ortools_s: > 0 refines the result with OR-tools guided local search for this long
+    """
+
+    def __init__(self, cost_model: Optional[StageCostModel] = None, start: Tuple[float, float] = (0.0, 0.0),
+                 closed: bool = True, neighbours: int = 12, time_limit_s: float = 2.0, ortools_s: float = 0.0):
+        self.cost_model = cost_model
+        self.start = (float(start[0]), float(start[1]))
+        self.closed = closed
+        self.neighbours = neighbours
+        self.time_limit_s = time_limit_s
+        self.ortools_s = ortools_s
+
+        # Improving moves applied, summed over every plan() call on this planner
+        self.two_opt_moves = 0
+        self.or_opt_moves = 0
+
+    # === Cost matrix ===
+
+    def cost_matrix(self, points: np.ndarray) -> np.ndarray:
+        nodes = np.vstack([np.asarray([self.start]), points, np.asarray([self.start])])
+        fn = self.cost_model.matrix if self.cost_model is not None else euclidean_matrix
+        D = fn(nodes, nodes)
+        if not self.closed:
+            D[-1, :] = 0.0
+            D[:, -1] = 0.0
+        return D
+
+    @staticmethod
+    def route_cost(D: np.ndarray, r: np.ndarray) -> float:
+        return float(D[r[:-1], r[1:]].sum())
+
+    # === Construction ===
+
+    @staticmethod
+    def _nearest_neighbour(D: np.ndarray) -> np.ndarray:
+        n = len(D) - 2
+        free = np.ones(len(D), dtype=bool)
+        free[[0, -1]] = False
+        r = [0]
+        for _ in range(n):
+            row = np.where(free, D[r[-1]], np.inf)
+            nxt = int(np.argmin(row))
+            r.append(nxt)
+            free[nxt] = False
+        r.append(len(D) - 1)
+        return np.asarray(r)
+
+    @staticmethod
+    def _insert_cheapest(D: np.ndarray, r: np.ndarray, nodes: Sequence[int]) -> np.ndarray:
+        for node in nodes:
+            u, v = r[:-1], r[1:]
+            k = int(np.argmin(D[u, node] + D[node, v] - D[u, v]))
+            r = np.insert(r, k + 1, node)
+        return r
+
+    # === Local search ===
+
+    def _candidates(self, D: np.ndarray) -> List[List[int]]:
+        """Nearest nodes of each node, never the start / end node itself"""
+        m = len(D)
+        k = min(self.neighbours, m - 3)
+        if k < 1:
+            return [[] for _ in range(m)]
+        masked = D.copy()
+        masked[:, [0, m - 1]] = np.inf
+        np.fill_diagonal(masked, np.inf)
+        near = np.argpartition(masked, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(masked, near, axis=1).argsort(axis=1)
+        return np.take_along_axis(near, order, axis=1).tolist()
+
+    def _two_opt_move(self, D, r, pos, a, candidates):
+        """First improving 2-opt move with a new edge (a, c), returns the reversed span or None"""
+        L = len(r)
+        i = pos[a]
+        for c in candidates:
+            j = pos[c]
+            d_ac = D[a, c]
+            if i < L - 1:
+                # keep a's successor side: (a,b), (c,e) -> (a,c), (b,e)
+                b = r[i + 1]
+                if c != b and j < L - 1:
+                    e = r[j + 1]
+                    if D[a, b] + D[c, e] - d_ac - D[b, e] > _EPS:
+                        return (i + 1, j) if j > i else (j + 1, i)
+            if i > 0:
+                # keep a's predecessor side: (b,a), (e,c) -> (a,c), (b,e)
+                b = r[i - 1]
+                if c != b and j > 0:
+                    e = r[j - 1]
+                    if D[b, a] + D[e, c] - d_ac - D[b, e] > _EPS:
+                        return (j, i - 1) if j < i else (i, j - 1)
+        return None
+
+    def _or_opt_move(self, D, r, pos, a, candidates):
+        """
+        First improving move of a run of 1-3 nodes starting at a next to one of
+        a's candidates. Returns (i, length, k, reverse): insert after r[k].
+        """
+        L = len(r)
+        i = pos[a]
+        if i == 0 or i == L - 1:
+            return None
+        for length in (1, 2, 3):
+            last = i + length - 1
+            if last > L - 2:
+                break
+            s0, s1 = a, r[last]
+            p, q = r[i - 1], r[last + 1]
+            removed = D[p, s0] + D[s1, q] - D[p, q]
+            if removed <= _EPS:
+                continue
+            for c in candidates:
+                j = pos[c]
+                if i - 1 <= j <= last:
+                    continue
+                # c then the run (reversed, so a's run end touches c) or the run then c
+                for k in (j, j - 1):
+                    if k < 0 or k >= L - 1 or i - 1 <= k <= last:
+                        continue
+                    u, v = r[k], r[k + 1]
+                    forward = D[u, s0] + D[s1, v] - D[u, v]
+                    if removed - forward > _EPS:
+                        return i, length, k, False
+                    backward = D[u, s1] + D[s0, v] - D[u, v]
+                    if removed - backward > _EPS:
+                        return i, length, k, True
+        return None
+
+    def _local_search(self, D: np.ndarray, r: np.ndarray, deadline: float,
+                      start_nodes: Optional[Sequence[int]] = None) -> np.ndarray:
+        """start_nodes: nodes to look at first (all by default), others only once an edge next to them changes"""
+        candidates = self._candidates(D)
+        r = r.tolist()
+        L = len(r)
+        pos = [0] * L
+        for idx, node in enumerate(r):
+            pos[node] = idx
+        # Don't look bits: only nodes next to a changed edge are looked at again
+        active = deque(r[:-1] if start_nodes is None else (n for n in start_nodes if n != r[-1]))
+        queued = [False] * L
+        for node in active:
+            queued[node] = True
+        checks = 0
+        while active:
+            checks += 1
+            if checks % 256 == 0 and time.monotonic() > deadline:
+                break
+            a = active.popleft()
+            queued[a] = False
+            touched = None
+            span = self._two_opt_move(D, r, pos, a, candidates[a])
+            if span is not None:
+                lo, hi = span
+                touched = (r[lo - 1], r[lo], r[hi], r[hi + 1])
+                r[lo:hi + 1] = r[lo:hi + 1][::-1]
+                for idx in range(lo, hi + 1):
+                    pos[r[idx]] = idx
+                self.two_opt_moves += 1
+            else:
+                move = self._or_opt_move(D, r, pos, a, candidates[a])
+                if move is not None:
+                    i, length, k, reverse = move
+                    run = r[i:i + length]
+                    touched = (r[i - 1], r[i + length], r[k], r[k + 1], run[0], run[-1])
+                    if reverse:
+                        run = run[::-1]
+                    rest = r[:i] + r[i + length:]
+                    at = k + 1 if k < i else k + 1 - length
+                    r = rest[:at] + run + rest[at:]
+                    lo, hi = min(i, at), max(i + length, at + length)
+                    for idx in range(lo, min(hi + 1, L)):
+                        pos[r[idx]] = idx
+                    self.or_opt_moves += 1
+            if touched is not None:
+                for node in (a,) + touched:
+                    if not queued[node] and pos[node] != L - 1:
+                        queued[node] = True
+                        active.append(node)
+        return np.asarray(r)
+
+    # === OR-tools ===
+
+    def _ortools_refine(self, D: np.ndarray, r: np.ndarray) -> Optional[np.ndarray]:
+        try:
+            from ortools.constraint_solver import pywrapcp, routing_enums_pb2
+        except ImportError:
+            logger.warning("OR-tools is not installed, keeping the heuristic route")
+            return None
+        # Integer arcs, start and end as separate depots
+        scale = 1000.0 if self.cost_model is not None else 1.0
+        arcs = np.rint(D * scale).astype(np.int64).tolist()
+        m = len(D)
+        mgr = pywrapcp.RoutingIndexManager(m, 1, [0], [m - 1])
+        routing = pywrapcp.RoutingModel(mgr)
+        cb = routing.RegisterTransitCallback(lambda i, j: arcs[mgr.IndexToNode(i)][mgr.IndexToNode(j)])
+        routing.SetArcCostEvaluatorOfAllVehicles(cb)
+        params = pywrapcp.DefaultRoutingSearchParameters()
+        params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+        params.time_limit.FromMilliseconds(int(self.ortools_s * 1000))
+        routing.CloseModelWithParameters(params)
+        initial = routing.ReadAssignmentFromRoutes([r[1:-1].tolist()], True)
+        solution = routing.SolveFromAssignmentWithParameters(initial, params)
+        if solution is None:
+            return None
+        idx, out = routing.Start(0), []
+        while not routing.IsEnd(idx):
+            out.append(mgr.IndexToNode(idx))
+            idx = solution.Value(routing.NextVar(idx))
+        out.append(m - 1)
+        return np.asarray(out)
+
+    # === Public API ===
+
+    def plan(self, keys: Sequence[Hashable], points, warm_start: Optional[Sequence[Hashable]] = None) -> Route:
+        """
+        Visiting order of the devices keys (XY points, same order).
+        warm_start: a previous order, kept for the keys still present.
+        """
+        t0 = time.monotonic()
+        keys = list(keys)
+        points = np.asarray(points, dtype=float).reshape(len(keys), -1)[:, :2]
+        if not keys:
+            return Route([], 0.0, "empty", 0.0)
+        D = self.cost_matrix(points)
+        end = len(D) - 1
+
+        node_of = {key: i + 1 for i, key in enumerate(keys)}
+        kept = [node_of[k] for k in (warm_start or []) if k in node_of]
+        start_nodes = None
+        if kept:
+            kept = list(dict.fromkeys(kept))
+            added = sorted(set(range(1, end)) - set(kept))
+            r = self._insert_cheapest(D, np.asarray([0] + kept + [end]), added)
+            method = "warm start"
+            # The previous tour was already improved, only the seams need work
+            previous = [0] + [node_of.get(k, -1) for k in warm_start] + [end]
+            old_edges = {frozenset(e) for e in zip(previous[:-1], previous[1:]) if -1 not in e}
+            start_nodes = list(dict.fromkeys(
+                node for e in zip(r[:-1].tolist(), r[1:].tolist()) if frozenset(e) not in old_edges for node in e))
+        else:
+            r = self._nearest_neighbour(D)
+            method = "nearest neighbour"
+
+        r = self._local_search(D, r, t0 + self.time_limit_s, start_nodes)
+        method += " + 2-opt/Or-opt"
+        if self.ortools_s > 0:
+            refined = self._ortools_refine(D, r)
+            if refined is not None and self.route_cost(D, refined) < self.route_cost(D, r) - _EPS:
+                r = refined
+                method += " + OR-tools"
+        return Route([keys[n - 1] for n in r[1:-1]], self.route_cost(D, r), method, time.monotonic() - t0)
@@ -0,0 +1,78 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+"""
+Spatial store of detector readings taken during alignment.
+
+Samples are keyed by stage XY quantized to a grid, so any phase asking for
+power at a point that was measured recently (spiral, gradient, optimizers)
+gets the stored value without moving or reading. Entries expire by age so
+drift of the chip or fiber does not get baked into the search.
+"""
+
+
+class SampleCache:
+    """
+    Args:
+        quantum: key grid in um, points closer than this share an entry
+        max_age_s: samples older than this are ignored and dropped
+    """
+
+    def __init__(self, quantum: float = 0.05, max_age_s: float = 30.0):
+        self.quantum = float(quantum)
+        self.max_age_s = float(max_age_s)
+        self._entries: Dict[Tuple[int, int], Tuple[float, float, float, float]] = {}  # key -> (x, y, value, t)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(round(x / self.quantum)), int(round(y / self.quantum)))
+
+    def _fresh(self, t: float, now: float) -> bool:
+        return (now - t) <= self.max_age_s
+
+    def put(self, x: float, y: float, value: float, timestamp: Optional[float] = None) -> None:
+        """Store a reading (dBm) at XY (um), replacing any older one in the same cell"""
+        t = time.monotonic() if timestamp is None else timestamp
+        self._entries[self._key(x, y)] = (float(x), float(y), float(value), t)
+
+    def get(self, x: float, y: float) -> Optional[float]:
+        """Fresh reading at XY or None"""
+        entry = self._entries.get(self._key(x, y))
+        if entry is not None and self._fresh(entry[3], time.monotonic()):
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        return None
+
+    def near(self, x: float, y: float, radius: float) -> List[Tuple[float, float, float]]:
+        """Fresh (x, y, value) samples within radius of XY"""
+        now = time.monotonic()
+        r2 = radius * radius
+        return [
+            (ex, ey, v) for ex, ey, v, t in self._entries.values()
+            if self._fresh(t, now) and (ex - x) ** 2 + (ey - y) ** 2 <= r2
+        ]
+
+    def expire(self) -> int:
+        """Drop stale entries, returns how many were removed"""
+        now = time.monotonic()
+        stale = [k for k, e in self._entries.items() if not self._fresh(e[3], now)]
+        for k in stale:
+            del self._entries[k]
+        return len(stale)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def export(self) -> List[Dict[str, float]]:
+        """All fresh samples as JSON friendly dicts, age in seconds"""
+        self.expire()
+        now = time.monotonic()
+        return [
+            {"x": x, "y": y, "power_dbm": v, "age_s": now - t}
+            for x, y, v, t in self._entries.values()
+        ]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,135 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from motors.utils.motion_model import profile_time
+
+"""
+Visit order planning for grid area scans.
+
+The spiral scan keeps its center-out order over the largest square of complete
+rings around the start cell, each ring entered next to where the previous one
+ended so every ring change is a single diagonal XY step. Cells outside that
+square (non-square windows) are covered by whole rows/columns chosen greedily by
+travel plus a penalty per axis reversal, which turns them into a serpentine
+instead of jumping across the window once per ring.
+
+Cells are (ix, iy) grid indices, costs are in cells with XY moving together
+(Chebyshev distance).
+"""
+
+Cell = Tuple[int, int]
+
+
+def _sign(v: int) -> int:
+    return (v > 0) - (v < 0)
+
+
+def _reversals(last_dir: List[int], dx: int, dy: int) -> int:
+    """Axes whose motion direction flips for a move of (dx, dy), updates last_dir"""
+    flips = 0
+    for i, d in enumerate((dx, dy)):
+        s = _sign(d)
+        if s:
+            if last_dir[i] and s != last_dir[i]:
+                flips += 1
+            last_dir[i] = s
+    return flips
+
+
+def _ring(cx: int, cy: int, r: int) -> List[Cell]:
+    """Square ring of radius r, counter-clockwise from the bottom right corner"""
+    cells = [(cx + r, cy - r + k) for k in range(2 * r)]          # right side, up
+    cells += [(cx + r - k, cy + r) for k in range(2 * r)]         # top, left
+    cells += [(cx - r, cy + r - k) for k in range(2 * r)]         # left side, down
+    cells += [(cx - r + k, cy - r) for k in range(2 * r)]         # bottom, right
+    return cells
+
+
+def plan_spiral_grid(x_cells: int, y_cells: int, reversal_cost: float = 1.0) -> List[Cell]:
+    """
+    Visit order for a centered spiral over an x_cells by y_cells grid.
+
+        Args:
+            reversal_cost: extra cost in cells for each axis reversal (backlash)
+        Returns:
+            list of (ix, iy), every cell exactly once, starting at the center cell
+    """
+    cx, cy = (x_cells - 1) // 2, (y_cells - 1) // 2
+    R = min(cx, cy, x_cells - 1 - cx, y_cells - 1 - cy)
+
+    path: List[Cell] = [(cx, cy)]
+    for r in range(1, R + 1):
+        ring = _ring(cx, cy, r)
+        px, py = path[-1]
+        start = min(range(len(ring)), key=lambda i: max(abs(ring[i][0] - px), abs(ring[i][1] - py)))
+        path.extend(ring[start:] + ring[:start])
+
+    # Remainder outside the square: columns beside it, rows above/below it
+    strips: List[List[Cell]] = []
+    for ix in range(x_cells):
+        if abs(ix - cx) > R:
+            strips.append([(ix, iy) for iy in range(y_cells)])
+    for iy in range(y_cells):
+        if abs(iy - cy) > R:
+            strips.append([(ix, iy) for ix in range(cx - R, cx + R + 1)])
+
+    last_dir = [0, 0]
+    if len(path) > 1:
+        for (ax, ay), (bx, by) in zip(path[:-1], path[1:]):
+            _reversals(last_dir, bx - ax, by - ay)
+
+    while strips:
+        px, py = path[-1]
+        best = None
+        for i, strip in enumerate(strips):
+            for cells in (strip, strip[::-1]):
+                d = list(last_dir)
+                sx, sy = cells[0]
+                cost = max(abs(sx - px), abs(sy - py))
+                flips = _reversals(d, sx - px, sy - py)
+                if len(cells) > 1:
+                    flips += _reversals(d, cells[1][0] - sx, cells[1][1] - sy)
+                cost += reversal_cost * flips
+                # Ties go to the strip nearer the center, keeps the scan center-out
+                key = (cost, abs(sx - cx) + abs(sy - cy))
+                if best is None or key < best[0]:
+                    best = (key, i, cells)
+        _, i, cells = best
+        strips.pop(i)
+        prev = path[-1]
+        for c in cells:
+            _reversals(last_dir, c[0] - prev[0], c[1] - prev[1])
+            prev = c
+        path.extend(cells)
+    return path
+
+
+def path_stats(path: Sequence[Cell], x_pitch: float, y_pitch: float) -> Tuple[float, int]:
+    """(travel in um, number of axis reversals) along a planned path"""
+    if len(path) < 2:
+        return 0.0, 0
+    p = np.asarray(path, dtype=float)
+    d = np.diff(p, axis=0) * [x_pitch, y_pitch]
+    travel = float(np.hypot(d[:, 0], d[:, 1]).sum())
+    last_dir = [0, 0]
+    flips = sum(_reversals(last_dir, int(np.sign(dx)), int(np.sign(dy))) for dx, dy in d)
+    return travel, flips
+
+
+def estimate_path_time(path: Sequence[Cell], x_pitch: float, y_pitch: float, velocity: float,
+                       acceleration: float, overhead_s: float, backlash: float = 0.0) -> float:
+    """
+    Seconds to visit every cell moving X and Y together, overhead_s per point
+    covers settling and the detector read. With backlash > 0 every negative
+    move adds an overshoot of that size and a second approach.
+    """
+    total = overhead_s  # first point is read in place
+    for (ax, ay), (bx, by) in zip(path[:-1], path[1:]):
+        dx, dy = (bx - ax) * x_pitch, (by - ay) * y_pitch
+        t = max(profile_time(dx, velocity, acceleration), profile_time(dy, velocity, acceleration))
+        if backlash > 0.0 and (dx < 0 or dy < 0):
+            t += max(profile_time(backlash if dx < 0 else 0.0, velocity, acceleration),
+                     profile_time(backlash if dy < 0 else 0.0, velocity, acceleration))
+        total += t + overhead_s
+    return total
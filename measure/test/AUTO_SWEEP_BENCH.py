@@ -0,0 +1,150 @@
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.io import savemat
+
+from motors.hal.motors_hal import AxisType
+from measure.auto_sweep import AutoSweep, DeviceTask
+from measure.config.auto_sweep_config import AutoSweepConfiguration
+from measure.test.sim_rig import SimNIRManager, make_sim_stage
+
+"""
+Auto sweep throughput: the previous strictly sequential device loop vs the
+pipelined AutoSweep engine on the simulated stage.
+
+Per device: XY move to the next device (DEVICE_PITCH_UM apart), a short
+alignment (two small X moves), a SWEEP_S lambda scan of POINTS points, after
+which the simulated laser slews back to its initial wavelength at SLEW_NM_S.
+Saving spawns a process per device that writes the csv and mat files twice
+(UserData and the export path) like plot.generate_plots; the plotly and
+matplotlib outputs are not part of it, the real save is slower.
+Run from the repo root: python -m measure.test.AUTO_SWEEP_BENCH
+"""
+
+DEVICES = 8
+DEVICE_PITCH_UM = 500.0
+SWEEP_S = 0.6
+SLEW_NM_S = 50.0
+POINTS = 40001
+START_NM, STOP_NM = 1530.0, 1570.0
+
+
+class SimSweepNIR(SimNIRManager):
+    """SimNIRManager with a timed lambda scan and laser slew"""
+
+    class config:
+        initial_wavelength_nm = 1550.0
+
+    def __init__(self, port):
+        super().__init__(port)
+        self.wavelength = self.config.initial_wavelength_nm
+
+    def set_wavelength(self, wavelength_nm: float) -> bool:
+        time.sleep(abs(wavelength_nm - self.wavelength) / SLEW_NM_S)
+        self.wavelength = wavelength_nm
+        return True
+
+    def sweep(self, start_nm, stop_nm, step_nm, laser_power_dbm, num_scans=0, on_segment=None,
+              restore_wavelength=True):
+        self.set_wavelength(start_nm)
+        time.sleep(SWEEP_S)
+        self.wavelength = stop_nm
+        wl = np.linspace(start_nm, stop_nm, POINTS)
+        ch1 = -10.0 - 5.0 * np.cos((wl - start_nm) * 0.7) + np.random.normal(0, 0.05, POINTS)
+        ch2 = np.full(POINTS, -60.0)
+        if restore_wavelength:
+            self.set_wavelength(self.config.initial_wavelength_nm)
+        return wl, ch1, ch2
+
+
+def write_files(root, name, wl, channels):
+    for base in ("UserData", "export"):
+        path = os.path.join(root, base, name)
+        os.makedirs(path, exist_ok=True)
+        df = pd.DataFrame({"Wavelength [nm]": wl})
+        for i, ch in enumerate(channels):
+            df[f"Detector {i + 1}"] = ch
+        df.to_csv(os.path.join(path, "spectral_sweep.csv"), index=False)
+        savemat(os.path.join(path, "spectral_sweep.mat"),
+                {"wavelength_nm": wl, "detectors_dbm": np.column_stack(channels)})
+
+
+def save_in_process(root, name, wl, channels):
+    # The GUI starts one process per sweep for the plots and files and joins it
+    p = multiprocessing.get_context("spawn").Process(target=write_files, args=(root, name, wl, channels))
+    p.start()
+    p.join()
+
+
+def device_tasks():
+    return [DeviceTask(index=i, name=f"device_{i}", x=(i % 4) * DEVICE_PITCH_UM,
+                       y=(i // 4) * DEVICE_PITCH_UM, key=i) for i in range(DEVICES)]
+
+
+def make_align(stage):
+    async def align(task):
+        await stage.move_axis(AxisType.X, task.x + 2.0)
+        await stage.move_axis(AxisType.X, task.x)
+    return align
+
+
+async def sequential(root):
+    """The previous do_auto_sweep: move, align, sweep (laser restored inside), save and join"""
+    stage, port = await make_sim_stage()
+    nir = SimSweepNIR(port)
+    align = make_align(stage)
+    times = {name: 0.0 for name in ("move", "align", "sweep", "write")}
+    t_run = time.monotonic()
+    for task in device_tasks():
+        t0 = time.monotonic()
+        await stage.move_axes({AxisType.X: task.x, AxisType.Y: task.y})
+        t1 = time.monotonic()
+        await align(task)
+        t2 = time.monotonic()
+        wl, ch1, ch2 = nir.sweep(START_NM, STOP_NM, 0.001, 1.0)
+        t3 = time.monotonic()
+        save_in_process(root, task.name, wl, [ch1, ch2])
+        t4 = time.monotonic()
+        for name, dt in zip(times, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+            times[name] += dt
+    elapsed = time.monotonic() - t_run
+    await stage.disconnect_all()
+    return elapsed, {name: total / DEVICES for name, total in times.items()}
+
+
+async def pipelined(root, queue_depth):
+    stage, port = await make_sim_stage()
+    nir = SimSweepNIR(port)
+    config = AutoSweepConfiguration(start_nm=START_NM, stop_nm=STOP_NM, queue_depth=queue_depth)
+    engine = AutoSweep(
+        config.to_dict(), stage, nir,
+        save=lambda r: save_in_process(root, r.task.name, r.wavelength, r.channels),
+        align=make_align(stage),
+    )
+    stats = await engine.run(device_tasks())
+    await stage.disconnect_all()
+    return stats
+
+
+async def main():
+    root = tempfile.mkdtemp()
+    try:
+        elapsed, per_device = await sequential(root)
+        rate = 3600.0 * DEVICES / elapsed
+        print(f"sequential  {DEVICES} devices in {elapsed:5.1f} s ({rate:5.0f} devices/h)  "
+              + "  ".join(f"{name} {dt:.2f} s" for name, dt in per_device.items()))
+        for depth in (1, 2):
+            stats = await pipelined(root, depth)
+            print(f"pipelined (queue depth {depth}) " + stats.report().replace("\n", "\n    "))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import asyncio
+import math
+import time
+
+from measure.fine_align import FineAlign
+from measure.config.fine_align_config import FineAlignConfiguration
+from measure.test.sim_rig import CouplingSurface, SimNIRManager, make_sim_stage
+
+"""
+Fine alignment refinement: +/-X/Y gradient vs model based optimizers.
+
+Starts 3.6 um off the coupling peak of the simulated rig (Gaussian, 4 um waist,
+0.02 dB read noise) and counts stage moves (MVA/MVR sent on the loopback port),
+detector reads and wall time for each strategy.
+Run from the repo root: python -m measure.test.FINE_ALIGN_BENCH
+"""
+
+STRATEGIES = ["gradient", "gaussian", "simplex"]
+
+
+async def run(optimizer):
+    stage, port = await make_sim_stage()
+    surface = CouplingSurface(x0=3.0, y0=-2.0, noise_db=0.02)
+    nir = SimNIRManager(port, surface)
+
+    cfg = FineAlignConfiguration()
+    cfg.step_size = 2.0
+    cfg.min_gradient_ss = 0.2
+    cfg.gradient_iters = 10
+    cfg.threshold = 0.0  # never met, run to convergence
+    cfg.timeout_s = 120.0
+    cfg.optimizer = optimizer
+    fa = FineAlign(cfg.to_dict(), stage, nir)
+    fa.best_position = [0.0, 0.0]
+    fa._start_time = time.monotonic()
+
+    moves0 = sum(1 for c in port.commands if c[1:4] in ("MVA", "MVR"))
+    t0 = time.perf_counter()
+    ok = await (fa.gradient_search() if optimizer == "gradient" else fa.model_search())
+    elapsed = time.perf_counter() - t0
+    moves = sum(1 for c in port.commands if c[1:4] in ("MVA", "MVR")) - moves0
+
+    x, y = fa.best_position
+    err = math.hypot(x - surface.x0, y - surface.y0)
+    await stage.disconnect_all()
+    return ok, moves, nir.reads, elapsed, err, fa.lowest_loss
+
+
+async def main():
+    print(f"{'strategy':<10} {'moves':>6} {'reads':>6} {'time s':>7} {'err um':>7} {'dBm':>7}")
+    for name in STRATEGIES:
+        ok, moves, reads, elapsed, err, best = await run(name)
+        print(f"{name:<10} {moves:6d} {reads:6d} {elapsed:7.2f} {err:7.2f} {best:7.2f}{'' if ok else '  (failed)'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import numpy as np
+
+from measure.area_sweep import AreaSweep
+from measure.config.area_sweep_config import AreaSweepConfiguration
+from measure.test.sim_rig import CouplingSurface, SimNIRManager, make_sim_stage
+from motors.hal.motors_hal import AxisType
+
+"""
+Area map timing: step-and-read crosshair vs flying raster on the simulated rig.
+
+20 x 20 um at 1 um pitch, loopback stage with 50 ms settle per stop and a 5 ms
+detector read. Also checks the flying map against the true coupling surface.
+Run from the repo root: python -m measure.test.FLYING_SCAN_BENCH
+"""
+
+SIZE_UM = 20
+STEP_UM = 1
+
+
+def make_config(pattern, logging=True):
+    cfg = AreaSweepConfiguration()
+    cfg.pattern = pattern
+    cfg.x_size = SIZE_UM
+    cfg.y_size = SIZE_UM
+    cfg.x_step = STEP_UM
+    cfg.y_step = STEP_UM
+    cfg.use_detector_logging = logging
+    return cfg
+
+
+async def run(pattern, logging=True):
+    stage, port = await make_sim_stage()
+    surface = CouplingSurface()
+    nir = SimNIRManager(port, surface)
+    sweep = AreaSweep(make_config(pattern, logging), stage, nir)
+
+    t0 = time.perf_counter()
+    data = await sweep.begin_sweep()
+    elapsed = time.perf_counter() - t0
+
+    err = None
+    if pattern == "flying":
+        # Grid is centered on the start pose (0, 0)
+        n = data.shape[1]
+        g = (np.arange(n) - (n - 1) / 2.0) * STEP_UM
+        gx, gy = np.meshgrid(g, g)
+        err = float(np.sqrt(np.nanmean((data - surface(gx, gy)) ** 2)))
+
+    await stage.disconnect_all()
+    return elapsed, data, err
+
+
+async def main():
+    t_step, _, _ = await run("crosshair")
+    print(f"crosshair (step + read)    {t_step:7.2f} s")
+
+    t_log, data, err = await run("flying", logging=True)
+    iy, ix = np.unravel_index(np.nanargmax(data), data.shape)
+    print(f"flying (detector logging)  {t_log:7.2f} s  rms err {err:.2f} dB  peak cell ({ix},{iy})")
+
+    t_poll, _, err_poll = await run("flying", logging=False)
+    print(f"flying (timed polling)     {t_poll:7.2f} s  rms err {err_poll:.2f} dB")
+
+    print(f"speedup: logging {t_step / t_log:.1f}x, polling {t_step / t_poll:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
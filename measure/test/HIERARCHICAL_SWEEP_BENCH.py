@@ -0,0 +1,78 @@
+import asyncio
+import sys
+import time
+
+import numpy as np
+
+from measure.area_sweep import AreaSweep
+from measure.config.area_sweep_config import AreaSweepConfiguration
+from measure.test.sim_rig import CouplingSurface, SimNIRManager, make_sim_stage
+
+"""
+Hierarchical (coarse-to-fine) area map vs the dense spiral grid on the simulated rig.
+
+50 x 50 um at 1 um pitch around a single 4 um waist coupling peak. Reports the
+number of measured points, time, RMS error against the true surface inside the
+20 dB region of the peak and the peak cell. The dense spiral (2601 points) is
+only run with --dense, otherwise its time is extrapolated per point.
+Run from the repo root: python -m measure.test.HIERARCHICAL_SWEEP_BENCH [--dense]
+"""
+
+SIZE_UM = 50
+STEP_UM = 1
+
+
+def make_config(pattern, coarse_factor=8, threshold_db=10.0):
+    cfg = AreaSweepConfiguration()
+    cfg.pattern = pattern
+    cfg.x_size = SIZE_UM
+    cfg.y_size = SIZE_UM
+    cfg.x_step = STEP_UM
+    cfg.y_step = STEP_UM
+    cfg.step_size = STEP_UM
+    cfg.coarse_factor = coarse_factor
+    cfg.refine_threshold_db = threshold_db
+    return cfg
+
+
+async def run(pattern, **kw):
+    stage, port = await make_sim_stage()
+    surface = CouplingSurface(noise_db=0.02)
+    nir = SimNIRManager(port, surface)
+    sweep = AreaSweep(make_config(pattern, **kw), stage, nir)
+
+    t0 = time.perf_counter()
+    data = await sweep.begin_sweep()
+    elapsed = time.perf_counter() - t0
+    await stage.disconnect_all()
+
+    # Grid is centered on the start pose (0, 0), rows are Y
+    n = data.shape[1]
+    g = (np.arange(n) - (n - 1) / 2.0) * STEP_UM
+    gx, gy = np.meshgrid(g, g)
+    truth = surface(gx, gy)
+    region = truth >= truth.max() - 20.0
+    err = float(np.sqrt(np.nanmean((data - truth)[region] ** 2)))
+    iy, ix = np.unravel_index(np.nanargmax(data), data.shape)
+    return elapsed, nir.reads, err, (g[ix], g[iy])
+
+
+async def main():
+    cells = (SIZE_UM // STEP_UM + 1) ** 2
+    per_point = None
+    for factor, thr in ((8, 10.0), (8, 20.0), (4, 10.0)):
+        elapsed, reads, err, peak = await run("hierarchical", coarse_factor=factor, threshold_db=thr)
+        per_point = elapsed / reads
+        print(f"hierarchical f={factor} thr={thr:4.1f} dB  {reads:5d}/{cells} points  {elapsed:7.2f} s  "
+              f"rms err {err:.2f} dB  peak ({peak[0]:.0f}, {peak[1]:.0f}) um")
+
+    if "--dense" in sys.argv:
+        elapsed, reads, err, peak = await run("spiral")
+        print(f"dense spiral                  {reads:5d}/{cells} points  {elapsed:7.2f} s  "
+              f"rms err {err:.2f} dB  peak ({peak[0]:.0f}, {peak[1]:.0f}) um")
+    else:
+        print(f"dense spiral                  {cells:5d}/{cells} points  ~{cells * per_point:6.0f} s (extrapolated)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
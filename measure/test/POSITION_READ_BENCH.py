@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from measure.area_sweep import AreaSweep
+from measure.config.area_sweep_config import AreaSweepConfiguration
+from measure.config.fine_align_config import FineAlignConfiguration
+from measure.fine_align import FineAlign
+from measure.test.sim_rig import CouplingSurface, SimNIRManager, make_sim_stage
+
+"""
+POS? reads per alignment with and without the commanded position estimate.
+
+One alignment is a 20 x 20 um crosshair area sweep followed by a gradient fine
+align, on the loopback stage with the 10 Hz position monitor running as it does
+on the rig. "reads" disables the estimate (every get_position and monitor cycle
+goes to the port), "tracked" serves settled axes from the last commanded target
+/ encoder read for up to position_max_age_s and lets the monitor reuse the last
+point of a moving axis for position_monitor_moving_age_s.
+Run from the repo root: python -m measure.test.POSITION_READ_BENCH
+"""
+
+
+def sweep_config():
+    cfg = AreaSweepConfiguration()
+    cfg.pattern = "crosshair"
+    cfg.x_size = 20
+    cfg.y_size = 20
+    cfg.x_step = 1
+    cfg.y_step = 1
+    return cfg
+
+
+def align_config():
+    cfg = FineAlignConfiguration()
+    cfg.step_size = 2.0
+    cfg.min_gradient_ss = 0.2
+    cfg.gradient_iters = 10
+    cfg.threshold = 0.0
+    cfg.timeout_s = 120.0
+    return cfg
+
+
+async def run(tracked):
+    stage, port = await make_sim_stage()
+    if not tracked:
+        stage.positions.max_age_s = 0.0
+        stage.config.position_monitor_moving_age_s = None
+    nir = SimNIRManager(port, CouplingSurface(x0=3.0, y0=-2.0, noise_db=0.02))
+    stage._is_running = True
+    monitor = asyncio.create_task(stage._position_monitor_loop())
+
+    pos0 = sum(1 for c in port.commands if c.endswith("POS?"))
+    t0 = time.perf_counter()
+    await AreaSweep(sweep_config(), stage, nir).begin_sweep()
+    fa = FineAlign(align_config().to_dict(), stage, nir)
+    fa.best_position = [0.0, 0.0]
+    fa._start_time = time.monotonic()
+    await fa.gradient_search()
+    elapsed = time.perf_counter() - t0
+    reads = sum(1 for c in port.commands if c.endswith("POS?")) - pos0
+
+    stage._is_running = False
+    monitor.cancel()
+    try:
+        await monitor
+    except asyncio.CancelledError:
+        pass
+    stats = stage.positions.stats
+    await stage.disconnect_all()
+    return reads, elapsed, stats
+
+
+async def main():
+    r_off, t_off, _ = await run(False)
+    r_on, t_on, stats = await run(True)
+    print(f"reads    {r_off:5d} POS?  {t_off:6.2f} s")
+    print(f"tracked  {r_on:5d} POS?  {t_on:6.2f} s  ({stats.hits} served from the estimate, "
+          f"{stats.mismatches} encoder mismatches)")
+    print(f"POS? reduction {1 - r_on / max(r_off, 1):.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+import itertools
+import math
+import statistics
+import time
+
+import numpy as np
+
+from measure.route_planner import RoutePlanner, StageCostModel
+
+"""
+Device visiting order: RoutePlanner on chip like layouts.
+
+- distance matrix: the list of lists math.hypot matrix lib_tsp built vs the
+  vectorised one
+- nearest neighbour tour vs the 2-opt/Or-opt result and the planning time,
+  Euclidean um and stage seconds (2 mm/s, 50 mm/s^2 like the loopback rig, 0.1 s settle)
+- gap to the exact optimum (Held-Karp) on small selections
+- warm start after 5 % of the selection changed vs planning from scratch
+- stage time of the route planned in um vs the route planned in seconds
+
+OR-tools is not installed here, so its guided local search is not compared.
+Run from the repo root: python -m measure.test.ROUTE_PLANNER_BENCH
+"""
+
+SIZES = [50, 200, 1000, 3000]
+EXACT_SIZE = 9
+EXACT_TRIALS = 30
+ACCELERATION = 50000.0  # um/s^2, ACC? 50 mm/s^2
+
+
+def chip(n, rng):
+    """n devices in rectangular arrays spread over a 10 x 10 mm die"""
+    arrays = max(1, n // 40)
+    origins = rng.uniform(0, 10000, size=(arrays, 2))
+    pitch = rng.choice([50.0, 127.0, 250.0], size=arrays)
+    pts = []
+    for i in range(n):
+        a = i % arrays
+        k = i // arrays
+        pts.append(origins[a] + pitch[a] * np.array([k % 8, k // 8]))
+    return np.asarray(pts) + rng.normal(0, 2.0, size=(n, 2))
+
+
+def old_matrix(points):
+    points = [(0, 0)] + [tuple(p) for p in points]
+    return [[int(math.hypot(x1 - x2, y1 - y2)) for x2, y2 in points] for x1, y1 in points]
+
+
+def held_karp(D):
+    """Exact cheapest path 0 -> all of 1..n -> n+1"""
+    n = len(D) - 2
+    full = (1 << n) - 1
+    best = {(1 << j, j): D[0, j + 1] for j in range(n)}
+    for size in range(2, n + 1):
+        for subset in itertools.combinations(range(n), size):
+            mask = sum(1 << j for j in subset)
+            for j in subset:
+                prev = mask & ~(1 << j)
+                best[(mask, j)] = min(best[(prev, k)] + D[k + 1, j + 1] for k in subset if k != j)
+    return min(best[(full, j)] + D[j + 1, n + 1] for j in range(n))
+
+
+def main():
+    rng = np.random.default_rng(7)
+    stage = StageCostModel(acceleration_x=ACCELERATION, acceleration_y=ACCELERATION)
+
+    print("distance matrix")
+    for n in (200, 1000):
+        pts = chip(n, rng)
+        t0 = time.perf_counter()
+        old_matrix(pts)
+        t_old = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        RoutePlanner().cost_matrix(pts)
+        t_new = time.perf_counter() - t0
+        print(f"  n={n:5d}  lists {t_old * 1e3:8.1f} ms   numpy {t_new * 1e3:6.1f} ms")
+
+    print("\nplanning (closed tour from the origin)")
+    for n in SIZES:
+        pts = chip(n, rng)
+        keys = list(range(1, n + 1))
+        for label, model in (("um", None), ("s", stage)):
+            planner = RoutePlanner(cost_model=model, time_limit_s=30.0)
+            D = planner.cost_matrix(pts)
+            nn = planner.route_cost(D, planner._nearest_neighbour(D))
+            route = planner.plan(keys, pts)
+            assert sorted(route.order) == keys
+            print(f"  n={n:5d} {label:>2}  nearest neighbour {nn:12.1f}  final {route.cost:12.1f} "
+                  f"({(1 - route.cost / nn) * 100:4.1f} % shorter)  {route.seconds * 1e3:7.1f} ms")
+
+    print(f"\ngap to the optimum, {EXACT_TRIALS} random selections of {EXACT_SIZE}")
+    for closed in (True, False):
+        gaps = []
+        for _ in range(EXACT_TRIALS):
+            pts = chip(200, rng)[rng.choice(200, EXACT_SIZE, replace=False)]
+            planner = RoutePlanner(cost_model=stage, closed=closed)
+            route = planner.plan(range(EXACT_SIZE), pts)
+            gaps.append(route.cost / held_karp(planner.cost_matrix(pts)) - 1)
+        print(f"  {'closed' if closed else 'open  '}  mean {statistics.mean(gaps) * 100:5.2f} %  "
+              f"max {max(gaps) * 100:5.2f} %  optimal in {sum(g < 1e-9 for g in gaps)}/{EXACT_TRIALS}")
+
+    print("\nwarm start after 5 % of the selection changed (stage seconds)")
+    for n in (200, 1000, 3000):
+        pool = chip(n + n // 10, rng)
+        keys = list(range(n))
+        planner = RoutePlanner(cost_model=stage, time_limit_s=30.0)
+        previous = planner.plan(keys, pool[keys])
+        drop = set(rng.choice(n, n // 20, replace=False).tolist())
+        new = [k for k in keys if k not in drop] + list(range(n, n + n // 20))
+        cold = planner.plan(new, pool[new])
+        warm = planner.plan(new, pool[new], warm_start=previous.order)
+        assert sorted(warm.order) == sorted(new)
+        print(f"  n={n:5d}  cold {cold.cost:8.1f} s in {cold.seconds * 1e3:6.1f} ms   "
+              f"warm {warm.cost:8.1f} s in {warm.seconds * 1e3:6.1f} ms")
+
+    print("\nstage time of the route planned in um vs planned in seconds")
+    for n in (200, 1000):
+        pts = chip(n, rng)
+        keys = list(range(n))
+        timed = RoutePlanner(cost_model=stage, time_limit_s=30.0)
+        D = timed.cost_matrix(pts)
+        node = {k: i + 1 for i, k in enumerate(keys)}
+        by_um = RoutePlanner(time_limit_s=30.0).plan(keys, pts)
+        by_s = timed.plan(keys, pts)
+        t_um = timed.route_cost(D, np.asarray([0] + [node[k] for k in by_um.order] + [n + 1]))
+        print(f"  n={n:5d}  planned in um {t_um:8.1f} s   planned in s {by_s.cost:8.1f} s "
+              f"({(1 - by_s.cost / t_um) * 100:4.1f} % faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import asyncio
+import math
+import time
+
+from measure.fine_align import FineAlign
+from measure.sample_cache import SampleCache
+from measure.config.fine_align_config import FineAlignConfiguration
+from measure.test.sim_rig import CouplingSurface, SimNIRManager, make_sim_stage
+
+"""
+Full fine alignment (spiral + refinement) with and without the shared sample cache.
+
+"off" sets cache_max_age_s to 0 so every point is re-measured, "on" uses the
+default age, "rerun" aligns a second time with the cache of the first run passed
+in, as when the same device is re-aligned shortly after.
+Run from the repo root: python -m measure.test.SAMPLE_CACHE_BENCH
+"""
+
+
+async def run(optimizer, max_age_s, repeat=False):
+    stage, port = await make_sim_stage()
+    surface = CouplingSurface(x0=3.0, y0=-2.0, noise_db=0.02)
+    nir = SimNIRManager(port, surface)
+
+    cfg = FineAlignConfiguration()
+    cfg.step_size = 2.0
+    cfg.scan_window = 10.0
+    cfg.min_gradient_ss = 0.2
+    cfg.gradient_iters = 10
+    cfg.threshold = 0.0  # never met, run to convergence
+    cfg.timeout_s = 120.0
+    cfg.optimizer = optimizer
+    cfg.cache_max_age_s = max_age_s
+
+    cache = SampleCache(cfg.cache_quantum, cfg.cache_max_age_s)
+    if repeat:
+        fa = FineAlign(cfg.to_dict(), stage, nir, sample_cache=cache)
+        fa.best_position = [0.0, 0.0]
+        await fa.begin_fine_align()
+
+    fa = FineAlign(cfg.to_dict(), stage, nir, sample_cache=cache)
+    fa.best_position = [0.0, 0.0]
+    moves0 = sum(1 for c in port.commands if c[1:4] in ("MVA", "MVR"))
+    reads0 = nir.reads
+    hits0 = cache.hits
+    t0 = time.perf_counter()
+    ok = await fa.begin_fine_align()
+    elapsed = time.perf_counter() - t0
+    moves = sum(1 for c in port.commands if c[1:4] in ("MVA", "MVR")) - moves0
+
+    result = fa.get_result()
+    x, y = result["best_position"]
+    err = math.hypot(x - surface.x0, y - surface.y0)
+    await stage.disconnect_all()
+    return ok, moves, nir.reads - reads0, result["cache_hits"] - hits0, len(result["samples"]), elapsed, err
+
+
+async def main():
+    print(f"{'strategy':<10} {'cache':<6} {'moves':>6} {'reads':>6} {'hits':>5} {'kept':>5} {'time s':>7} {'err um':>7}")
+    for name in ("gradient", "gaussian"):
+        for label, age, repeat in (("off", 0.0, False), ("on", 30.0, False), ("rerun", 30.0, True)):
+            ok, moves, reads, hits, kept, elapsed, err = await run(name, age, repeat)
+            print(f"{name:<10} {label:<6} {moves:6d} {reads:6d} {hits:5d} {kept:5d} {elapsed:7.2f} {err:7.2f}"
+                  f"{'' if ok else '  (failed)'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+from measure.area_sweep import AreaSweep
+from measure.config.area_sweep_config import AreaSweepConfiguration
+from measure.scan_path import path_stats
+from measure.test.sim_rig import SimNIRManager, make_sim_stage
+from motors.hal.motors_hal import AxisType
+
+"""
+Spiral grid scan: legacy virtual spiral walk (separate X then Y move per cell,
+jumping over clipped ring segments) vs the planned path with XY moving together.
+
+Prints planned travel / reversals / estimated time next to the measured time on
+the simulated rig for a square and a wide window at 1 um pitch.
+Run from the repo root: python -m measure.test.SPIRAL_PATH_BENCH
+"""
+
+WINDOWS = [(10, 10), (30, 8)]
+
+
+def legacy_order(x_cells, y_cells):
+    """Cell order of the previous _begin_sweep_spiral_grid walk"""
+    cx, cy = (x_cells - 1) // 2, (y_cells - 1) // 2
+    visited = {(cx, cy)}
+    order = [(cx, cy)]
+    dirs = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+    d, leg, vx, vy = 0, 1, cx, cy
+    while len(order) < x_cells * y_cells:
+        for _ in range(2):
+            for _ in range(leg):
+                vx, vy = vx + dirs[d][0], vy + dirs[d][1]
+                if 0 <= vx < x_cells and 0 <= vy < y_cells and (vx, vy) not in visited:
+                    visited.add((vx, vy))
+                    order.append((vx, vy))
+            d = (d + 1) % 4
+        leg += 1
+    return order
+
+
+async def run_legacy(x_size, y_size):
+    stage, port = await make_sim_stage()
+    nir = SimNIRManager(port)
+    nx, ny = x_size + 1, y_size + 1
+    order = legacy_order(nx, ny)
+    t0 = time.perf_counter()
+    nir.read_power()
+    for (ax, ay), (bx, by) in zip(order[:-1], order[1:]):
+        if bx != ax:
+            await stage.move_axis(AxisType.X, float(bx - ax), relative=True, wait_for_completion=True)
+        if by != ay:
+            await stage.move_axis(AxisType.Y, float(by - ay), relative=True, wait_for_completion=True)
+        nir.read_power()
+    elapsed = time.perf_counter() - t0
+    await stage.disconnect_all()
+    return order, elapsed
+
+
+async def run_planned(x_size, y_size):
+    stage, port = await make_sim_stage()
+    nir = SimNIRManager(port)
+    cfg = AreaSweepConfiguration()
+    cfg.pattern = "spiral"
+    cfg.x_size, cfg.y_size = x_size, y_size
+    cfg.step_size = 1.0
+    cfg.point_overhead_s = 0.075  # loopback settle + predicted completion + read, measured per move
+    sweep = AreaSweep(cfg, stage, nir)
+    t0 = time.perf_counter()
+    await sweep.begin_sweep()
+    elapsed = time.perf_counter() - t0
+    await stage.disconnect_all()
+    return sweep, elapsed
+
+
+async def main():
+    for x_size, y_size in WINDOWS:
+        order, t_legacy = await run_legacy(x_size, y_size)
+        travel, flips = path_stats(order, 1.0, 1.0)
+        print(f"{x_size}x{y_size} um legacy   travel {travel / 1000:6.3f} mm  reversals {flips:4d}  "
+              f"time {t_legacy:6.2f} s")
+        sweep, t_plan = await run_planned(x_size, y_size)
+        print(f"{x_size}x{y_size} um planned  travel {sweep.planned_travel_um / 1000:6.3f} mm  "
+              f"estimate {sweep.planned_time_s:6.2f} s  time {t_plan:6.2f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
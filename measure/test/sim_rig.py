@@ -0,0 +1,122 @@
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+from motors.utils.loopback_serial import LoopbackSerial
+import motors.modern_stage as modern_stage
+from motors.stage_manager import StageManager
+from motors.config.stage_config import StageConfiguration
+from motors.hal.motors_hal import AxisType
+
+"""
+Simulated probe station for running the measure/ routines without hardware.
+
+The stage is the real StageManager / StageControl stack talking to a LoopbackSerial
+port, and SimNIRManager exposes the NIRManager detector API on top of a synthetic
+coupling surface evaluated at the loopback axes' true positions.
+"""
+
+# Loopback axis numbers (MMC100 axis map)
+_X_AXIS = modern_stage.StageControl.AXIS_MAP[AxisType.X]
+_Y_AXIS = modern_stage.StageControl.AXIS_MAP[AxisType.Y]
+
+
+class CouplingSurface:
+    """Gaussian fiber-to-grating coupling in dBm vs XY position (um)"""
+
+    def __init__(self, x0: float = 3.0, y0: float = -2.0, peak_dbm: float = -10.0,
+                 waist_um: float = 4.0, floor_dbm: float = -60.0, noise_db: float = 0.0, seed: int = 0):
+        self.x0 = x0
+        self.y0 = y0
+        self.peak_dbm = peak_dbm
+        self.waist_um = waist_um
+        self.floor_dbm = floor_dbm
+        self.noise_db = noise_db
+        self._rng = np.random.default_rng(seed)
+
+    def __call__(self, x_um, y_um):
+        r2 = (np.asarray(x_um) - self.x0) ** 2 + (np.asarray(y_um) - self.y0) ** 2
+        lin = 10 ** (self.peak_dbm / 10.0) * np.exp(-2.0 * r2 / self.waist_um ** 2)
+        dbm = 10.0 * np.log10(lin + 10 ** (self.floor_dbm / 10.0))
+        if self.noise_db:
+            dbm = dbm + self._rng.normal(0.0, self.noise_db, np.shape(dbm))
+        return dbm
+
+
+class SimNIRManager:
+    """
+    NIRManager stand-in: read_power and detector logging from a CouplingSurface.
+
+    Args:
+        port: loopback port whose axes give the true stage position
+        read_latency: seconds per read_power call (GPIB round trips)
+    """
+
+    def __init__(self, port: LoopbackSerial, surface: Optional[CouplingSurface] = None,
+                 read_latency: float = 0.005, logging: bool = True):
+        self.port = port
+        self.surface = surface or CouplingSurface()
+        self.read_latency = read_latency
+        self.logging = logging
+        self.reads = 0
+        self._log_start = None
+        self._log_n = 0
+        self._log_period = 0.0
+
+    def _xy_um(self, t: float) -> Tuple[float, float]:
+        x = self.port.axes[_X_AXIS].position(t) * 1000.0
+        y = self.port.axes[_Y_AXIS].position(t) * 1000.0
+        return x, y
+
+    def set_wavelength(self, wavelength_nm: float) -> bool:
+        return True
+
+    def read_power(self) -> Tuple[float, float]:
+        time.sleep(self.read_latency)
+        self.reads += 1
+        x, y = self._xy_um(time.monotonic())
+        p = float(self.surface(x, y))
+        return p, self.surface.floor_dbm
+
+    def start_power_logging(self, num_samples: int, averaging_s: float) -> bool:
+        if not self.logging:
+            return False
+        self._log_start = time.monotonic()
+        self._log_n = int(num_samples)
+        self._log_period = float(averaging_s)
+        return True
+
+    def read_power_logging(self, timeout_s: float = 10.0):
+        """Valid while the axes are still on the move segment that was logged"""
+        if self._log_start is None:
+            return None
+        done = self._log_start + self._log_n * self._log_period
+        time.sleep(max(0.0, done - time.monotonic()))
+        t = self._log_start + (np.arange(self._log_n) + 0.5) * self._log_period
+        xy = np.array([self._xy_um(ti) for ti in t])
+        ch1 = self.surface(xy[:, 0], xy[:, 1])
+        self._log_start = None
+        return ch1, np.full_like(ch1, self.surface.floor_dbm)
+
+    def stop_power_logging(self) -> bool:
+        self._log_start = None
+        return True
+
+
+async def make_sim_stage(settle_time: float = 0.05,
+                         acceleration_mm_s2: float = 50.0) -> Tuple[StageManager, LoopbackSerial]:
+    """
+    StageManager with X and Y connected to a fresh loopback port, no shared memory.
+    Velocity comes from the StageConfiguration like on the real stage.
+    """
+    port = LoopbackSerial(settle_time=settle_time, acceleration=acceleration_mm_s2)
+    modern_stage.set_shared_serial(port)
+    config = StageConfiguration()
+    config.position_limits[AxisType.X] = (-20000.0, 20000.0)
+    config.position_limits[AxisType.Y] = (-20000.0, 20000.0)
+    config.accelerations[AxisType.X] = acceleration_mm_s2 * 1000.0
+    config.accelerations[AxisType.Y] = acceleration_mm_s2 * 1000.0
+    manager = StageManager(config, create_shm=False)
+    await manager.initialize_all([AxisType.X, AxisType.Y])
+    return manager, port
@@ -16,10 +16,13 @@ class StageConfiguration:
         {ax:(-100.0,25000.0) for ax in AxisType if ax.name!="ALL"}
     ) # field dict values
 
-    # Completion detection settings (placeholder)
-    position_tolerance: float = 1.0  # um
+    # Completion detection settings
+    position_tolerance: float = 1.0  # um, also how far an encoder read may be from a settled target
+    position_max_age_s: float = 2.0  # seconds a settled position estimate is served without a POS? read
+    position_monitor_moving_age_s: float = 0.3  # position monitor reads a moving axis at most this often
     status_poll_interval: float = 0.05  # seconds
     move_timeout: float = 30.0  # seconds
+    predict_completion: bool = True  # sleep through the predicted move time, then poll fast
 
     # factory config 
     driver_types: Dict[AxisType, str] = field(default_factory=lambda: {
@@ -42,7 +45,6 @@ class StageConfiguration:
         d["position_limits"] = {ax.name: tuple(lim)
                                  for ax, lim in self.position_limits.items()}
         d["driver_types"] = {ax.name: dt for ax, dt in self.driver_types.items()}
-        print(d)
         return d
 
     # Need to convert to and from JSON from SHM
@@ -58,13 +60,17 @@ class StageConfiguration:
         lim = {AxisType[name]: tuple(lim)
                for name, lim in data["position_limits"].items()}
         driver_types = {AxisType[name]: dt for name, dt in data["driver_types"].items()}
-        
+        # scalar settings, absent in dicts written before they existed
+        settings = {name: data[name] for name in (
+            "position_tolerance", "position_max_age_s", "position_monitor_moving_age_s",
+            "status_poll_interval", "move_timeout", "predict_completion") if name in data}
         
         return cls(
             velocities=vel,
             accelerations=accel,
             position_limits=lim,
-            driver_types=driver_types
+            driver_types=driver_types,
+            **settings
         )
 
     def get_axis_attributes(self) -> Dict[AxisType, Dict[str, Any]]:
@@ -94,7 +100,8 @@ class StageConfiguration:
                 'velocity': self.velocities.get(axis),
                 'acceleration': self.accelerations.get(axis),
                 'position_limits': self.position_limits.get(axis),
-                'driver_types': self.driver_types.get(axis)
+                'driver_types': self.driver_types.get(axis),
+                'predict_completion': self.predict_completion
             }
         
         return axis_attrs
\ No newline at end of file
@@ -1,5 +1,5 @@
-from typing import Dict, Optional
-from time import monotonic
+from typing import Dict, List, Optional, Tuple
+from time import monotonic, sleep
 
 from dataclasses import dataclass, fields
 import ctypes
@@ -8,8 +8,23 @@ from motors.hal.motors_hal import AxisType
 
 """
 Stage position memory
+
+The manager's position monitor is the only writer. Every write is bracketed by
+the seq counter (odd while a write is in progress), readers copy what they need
+and retry if seq moved, so a snapshot never mixes axes from two updates. Each
+update that changes a position is also appended to a fixed size history ring
+which readers can follow by sample count to draw trajectories.
 """
 
+@dataclass
+class PositionSample:
+    """Consistent copy of every axis from one write"""
+    seq: int
+    timestamp: float
+    positions: List[float]
+    is_homed: List[bool]
+
+
 @dataclass
 class AxisPosition:
     """
@@ -26,6 +41,8 @@ class StagePositionStruct(ctypes.Structure):
     """
     # Max n of axis supported
     MAX_AXES = 5
+    # Trajectory samples kept, ~100 s of motion at the 10 Hz monitor rate
+    HISTORY_LEN = 1024
 
     _fields_ = [
         ('timestamp', ctypes.c_double),
@@ -34,6 +51,16 @@ class StagePositionStruct(ctypes.Structure):
         # Axis data
         ('positions', ctypes.c_double * MAX_AXES),
         ('is_homed', ctypes.c_bool * MAX_AXES),
+
+        # Seqlock, odd while the writer is mid update
+        ('seq', ctypes.c_uint64),
+        # Set by the writer before it unlinks, readers re-attach
+        ('closed', ctypes.c_bool),
+
+        # History ring, sample n lives in slot n % HISTORY_LEN
+        ('history_count', ctypes.c_uint64),
+        ('history_t', ctypes.c_double * HISTORY_LEN),
+        ('history_pos', (ctypes.c_double * MAX_AXES) * HISTORY_LEN),
     ]
 
     def __init__(self):
@@ -46,16 +73,91 @@ class StagePositionStruct(ctypes.Structure):
             self.positions[i] = 0.0
             self.is_homed[i] = False
 
+        self.seq = 0
+        self.closed = False
+        self.history_count = 0
+
 class StagePosition:
     """
     High-level wrapper, easier to interract with
     """
     
+    # Snapshot attempts before giving up on a writer that never finishes
+    READ_RETRIES = 1000
+
     def __init__(self, shared_struct: Optional[StagePositionStruct] = None):
         if shared_struct is None:
             self._struct = StagePositionStruct()
         else:
             self._struct = shared_struct
+
+    # === Seqlock ===
+
+    def _begin_write(self):
+        self._struct.seq += 1
+
+    def _end_write(self):
+        self._struct.seq += 1
+
+    def snapshot(self) -> Optional[PositionSample]:
+        """
+        Copy every axis from a single write, None if the writer stayed mid
+        update for READ_RETRIES attempts (it died holding the lock)
+        """
+        st = self._struct
+        for attempt in range(self.READ_RETRIES):
+            seq = st.seq
+            if not seq & 1:
+                timestamp = st.timestamp
+                positions = list(st.positions)
+                homed = list(st.is_homed)
+                if st.seq == seq:
+                    return PositionSample(seq=seq, timestamp=timestamp,
+                                          positions=positions, is_homed=homed)
+            if attempt % 16 == 15:
+                sleep(0)
+        return None
+
+    def history(self, since: int = 0) -> Tuple[int, List[float], List[List[float]]]:
+        """
+        Trajectory samples written after sample number since.
+
+            Returns:
+                (count, timestamps, positions): pass count back as since on the
+                next call, positions holds one list of MAX_AXES values per sample.
+                Samples that already left the ring are skipped.
+        """
+        st = self._struct
+        for attempt in range(self.READ_RETRIES):
+            seq = st.seq
+            if not seq & 1:
+                count = st.history_count
+                first = max(since, count - st.HISTORY_LEN)
+                slots = [n % st.HISTORY_LEN for n in range(first, count)]
+                times = [st.history_t[i] for i in slots]
+                positions = [list(st.history_pos[i]) for i in slots]
+                if st.seq == seq:
+                    return count, times, positions
+            if attempt % 16 == 15:
+                sleep(0)
+        return since, [], []
+
+    def _append_history(self):
+        st = self._struct
+        slot = st.history_count % st.HISTORY_LEN
+        st.history_t[slot] = st.timestamp
+        st.history_pos[slot][:] = st.positions[:]
+        st.history_count += 1
+
+    @property
+    def closed(self) -> bool:
+        return bool(self._struct.closed)
+
+    def close(self):
+        """Writer side: tell readers this block is going away"""
+        self._begin_write()
+        self._struct.closed = True
+        self._end_write()
     
     @property
     def position(self) -> Dict[AxisType, float]:
@@ -72,7 +174,9 @@ class StagePosition:
         return positions
     
     def set_positions(self, axis: AxisType, value: float):
+        self._begin_write()
         self._struct.positions[axis.value] = value
+        self._end_write()
         return self._struct.positions[axis.value]
     
     def get_homed(self):
@@ -84,7 +188,9 @@ class StagePosition:
         return result
     
     def set_homed(self, axis: AxisType):
+        self._begin_write()
         self._struct.is_homed[axis.value] = True
+        self._end_write()
         return self._struct.is_homed[axis.value]
     
     def get(self, axis : AxisType) -> AxisPosition:
@@ -132,19 +238,29 @@ class StagePosition:
                new_positions: Optional[Dict[AxisType, float]],
                new_homed: Optional[Dict[AxisType, bool]] = None
                ) -> AxisPosition:
-        """Update all positions and is_homed"""
-        # Update positions
-        if new_positions:
-            for axis, val in new_positions.items():
-                self.set_positions(axis, val)
+        """Update all positions and is_homed as one write"""
+        st = self._struct
+        self._begin_write()
+        try:
+            # Update positions
+            moved = False
+            if new_positions:
+                for axis, val in new_positions.items():
+                    if st.positions[axis.value] != val:
+                        st.positions[axis.value] = val
+                        moved = True
 
-        # Update homed
-        if new_homed:
-            for axis, _ in new_homed.items():
-                self.set_homed(axis)
+            # Update homed
+            if new_homed:
+                for axis, _ in new_homed.items():
+                    st.is_homed[axis.value] = True
 
-        # Refresh timestamp
-        self._struct.timestamp = monotonic()
+            # Refresh timestamp, only motion goes into the history
+            st.timestamp = monotonic()
+            if moved or st.history_count == 0:
+                self._append_history()
+        finally:
+            self._end_write()
 
         return self.get_struct()
 
@@ -154,8 +270,7 @@ class StagePosition:
         except KeyError:
             return super().__setattr__(name, value)
         # caught one of ['X','Y','Z','ROTATION_FIBER','ROTATION_CHIP']
-        self.set_positions(axis, float(value))
-        self._struct.timestamp = monotonic()
+        self.update({axis: float(value)})
         
     @property
     def x(self) -> AxisPosition:
@@ -149,6 +149,11 @@ class MotorHAL(ABC):
     async def get_config(self) -> MotorConfig:
         """Get motor configuration."""
         pass
+
+    @property
+    def acceleration(self) -> Optional[float]:
+        """Acceleration the axis currently uses (um/s^2), None if the driver cannot tell."""
+        return None
     
     #  Homing and Limits 
     @abstractmethod
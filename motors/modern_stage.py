@@ -1,12 +1,15 @@
 import asyncio
 import time
-from typing import Optional, Dict, Any, Tuple, Callable
+from typing import Optional, Dict, Any, List, Tuple, Callable
 # from dataclasses import replace
 import threading
 from concurrent.futures import ThreadPoolExecutor
 # import numpy as np
 
 from motors.hal.motors_hal import MotorHAL, AxisType, MotorState, Position, MotorConfig, MotorEventType, MotorEvent
+from motors.utils.serial_transport import SerialTransport
+from motors.utils.motion_model import MotionModel
+from motors.utils.port_scheduler import PortScheduler, URGENT, NORMAL
 import serial
 
 
@@ -23,6 +26,8 @@ _GLOBAL_TIMEOUT = 0.3  # seconds
 
 _serial_lock = threading.Lock() # Guard read / write at serial port
 _global_serial_port = None
+_global_transport = None
+_global_scheduler = None
 
 def _get_shared_serial(): 
     """
@@ -38,13 +43,49 @@ def _get_shared_serial():
         )
     return _global_serial_port
 
+def _get_shared_transport():
+    """
+    Request / response transport bound to the shared port and lock
+    """
+    global _global_transport
+
+    port = _get_shared_serial()
+    if _global_transport is None or _global_transport.port is not port:
+        _global_transport = SerialTransport(port, lock=_serial_lock, deadline=_GLOBAL_TIMEOUT)
+    return _global_transport
+
+def _get_scheduler() -> PortScheduler:
+    """
+    Scheduler that runs every short job on the shared port, stops in the urgent lane
+    """
+    global _global_scheduler
+
+    if _global_scheduler is None or not _global_scheduler.alive:
+        _global_scheduler = PortScheduler()
+    return _global_scheduler
+
+async def run_on_port(fn, *args, priority: int = NORMAL):
+    """Run a blocking serial job on the port scheduler and await its result"""
+    return await asyncio.wrap_future(_get_scheduler().submit(fn, *args, priority=priority))
+
+def set_shared_serial(port):
+    """
+    Replace the shared serial port, e.g. with motors.utils.loopback_serial.LoopbackSerial
+    for running the stack without hardware. Call before any axis connects.
+    """
+    global _global_serial_port, _global_transport
+    _global_serial_port = port
+    _global_transport = None
+
 
 class StageControl(MotorHAL):
     """
     Each StageControl instance drives exactly one axis (AxisType.x, etc) through
-    an MMC100 style serial protocol. Internally, blocking I/O calls are offloaded 
-    to a single thread ThreadPoolExecutor, but all instances share a single serial
-    port, and hence share a serial lock so that r/w overlap never happens.
+    an MMC100 style serial protocol. All instances share a single serial port, and
+    hence share a serial lock so that r/w overlap never happens. Short serial jobs
+    run on the shared port scheduler (stops in its urgent lane), moves wait for
+    completion on the event loop so they never hold it; homing, which blocks for
+    seconds, runs on a per axis single thread ThreadPoolExecutor.
 
     Emits MOVE_STARTED, MOVE_COMPLETED and HOMED events for higher layers. 
     """
@@ -68,7 +109,9 @@ class StageControl(MotorHAL):
                                                 'step_size_fr': 0.1,
                                                 'step_size_cr': 0.1},
                  position_tolerance: float = 1.0,  # um tolerance for move completion
-                 status_poll_interval: float = 0.05):  # seconds between status checks
+                 status_poll_interval: float = 0.05,  # seconds between status checks
+                 predict_completion: bool = True,  # sleep through the predicted move time before polling
+                 fast_poll_interval: float = 0.005):  # seconds between status checks near the predicted stop
         
         super().__init__(axis)
         
@@ -77,12 +120,13 @@ class StageControl(MotorHAL):
         self.baudrate = baudrate
         self.timeout = timeout
 
-        # Thread pool for blocking operations
+        # Thread pool for long blocking operations (homing)
         self._executor = ThreadPoolExecutor(max_workers=1)
         
         # Serial connection (shared across all axes)
         self._serial_lock = _serial_lock
         self._serial_port = None
+        self._transport = None
         self._is_connected = False
         
         # Passing params
@@ -92,12 +136,17 @@ class StageControl(MotorHAL):
         self._step_size = step_size # (um, um)
         self._position_tolerance = position_tolerance  # um
         self._status_poll_interval = status_poll_interval  # seconds
+        self._predict_completion = predict_completion
+        self._fast_poll_interval = fast_poll_interval  # seconds
+        self._motion = MotionModel(velocity, acceleration)
         
         # State tracking
         self._last_position = 0.0 
         self._is_homed = False
         self._move_in_progress = False
         self._target_position = None
+        self._commanded_position = None  # um, last MVA/MVR target, None when unknown (stop, homing)
+        self._move_generation = 0  # bumped by stop / emergency stop, interrupts waiting moves
         self._placeholder = ''
         # self._axis_grid: Tuple[float, float] = ()
         self._callbacks = []
@@ -120,12 +169,15 @@ class StageControl(MotorHAL):
                 
                 if not self._serial_port.is_open:
                     self._serial_port.open()
+                self._transport = _get_shared_transport()
 
-                # Init axis
-                self._send_command(f"{self.AXIS_MAP[self.axis]}FBK3")  # Closed loop mode
-                time.sleep(0.1)
-                self._send_command(f"{self.AXIS_MAP[self.axis]}VEL{self._velocity * 0.001}")  # Set velocity
-                time.sleep(0.1)
+                # Init axis, closed loop mode and velocity in one write
+                self._send_command(
+                    f"{self.AXIS_MAP[self.axis]}FBK3",
+                    f"{self.AXIS_MAP[self.axis]}VEL{self._velocity * 0.001}"
+                )
+                self._read_acceleration()
+                self._motion.reset()  # settle learned before a reconnect may not hold
 
                 # Connection successful
                 self._is_connected = True 
@@ -135,7 +187,7 @@ class StageControl(MotorHAL):
                 print(f"Connection unsuccessful {e}")
                 return False
         
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _connect)
+        return await self._run(_connect)
     
     async def disconnect(self):
         """
@@ -145,67 +197,187 @@ class StageControl(MotorHAL):
             self._serial_port.close()
         self._executor.shutdown(wait=True) 
     
-    def _send_command(self, cmd : str) -> str:
+    def _send_command(self, *cmds : str) -> str:
         """
-        Send a command to the motor drivers via serial, opt receive response
+        Send one or more commands to the motor drivers via serial, back to back
+        without waiting, opt receive any response already waiting
         """
-        with self._serial_lock:
-            if not self._serial_port or not self._serial_port.is_open:
-                raise ConnectionError("Serial port not connected")
-
-            # print(f"cmd: {cmd}")
-            self._serial_port.write((cmd + "\r").encode('ascii')) # maybe
-            time.sleep(0.05)  # Small delay for command processing
-            
-            # Read response if available
-            response = ""
-            if self._serial_port.in_waiting > 0:
-                response = self._serial_port.read_until(b'\r\n').decode('ascii').strip()
-                
-            return response
+        if not self._transport:
+            raise ConnectionError("Serial port not connected")
+        return self._transport.send(*cmds)
      
     def _query_command(self, cmd : str) -> str:
         """
-        Send query command and wait for response
+        Send query command and wait for response, returns as soon as the reply
+        terminator arrives (or the transport deadline expires)
         """
-        with self._serial_lock:
-            if not self._serial_port or not self._serial_port.is_open:
-                raise ConnectionError("Serial port not connected")
+        if not self._transport:
+            raise ConnectionError("Serial port not connected")
+
+        try:
+            text = self._transport.query(cmd)
+        except TimeoutError:
+            text = ""
+
+        if "STA?" in cmd:
+            if len(text) == 0:
+                return str(0)  # Default to moving if no response
             
-            # Clear everything first
-            self._serial_port.reset_input_buffer()
-            self._serial_port.reset_output_buffer()
-
-            # print(f"Querying {cmd}")
-            self._serial_port.write((cmd + "\r").encode('ascii'))   
-            time.sleep(0.05)
-            self._serial_port.flush()          
-            time.sleep(0.05)  # Small delay for command processing
-
-            if "STA?" in cmd:
-                raw = self._serial_port.read_until(b"\n\r")
-                text = raw.decode('ascii').strip()
-                
-                if len(text) == 0:
-                    return str(0)  # Default to moving if no response
-                
-                # Parse status number (remove # prefix)
-                status_number = int(text.strip('#'))
-                status_bit = (status_number >> 3) & 1 # bit 3 is stopped when 1
-                return str(status_bit)
-
-            elif "POS?" in cmd:
-                raw = self._serial_port.read_until(b"\n\r")
-                text = raw.decode('ascii').strip()
-                # print(f"POS raw: {text}")
-                
-                if len(text) == 0:
-                    raise Exception("No data received")
-                
-                # Remove # prefix and split
-                clean_text = text.strip('#')
-                values = clean_text.split(',')
-                return values
+            # Parse status number
+            status_number = int(text)
+            status_bit = (status_number >> 3) & 1 # bit 3 is stopped when 1
+            return str(status_bit)
+
+        elif "POS?" in cmd:
+            if len(text) == 0:
+                raise Exception("No data received")
+            return text.split(',')
+
+    def _read_acceleration(self) -> None:
+        """
+        Seed the motion model with the controller's acceleration (ACC? in mm/s^2),
+        the driver never sets it so the configured value may not be what the axis uses
+        """
+        try:
+            acc_mm_s2 = float(self._transport.query(f"{self.AXIS_MAP[self.axis]}ACC?"))
+            if acc_mm_s2 > 0.0:
+                self._acceleration = acc_mm_s2 * 1000.0
+                self._motion.acceleration = self._acceleration
+        except (TimeoutError, ValueError):
+            pass
+
+    def _move_distance(self, target: Optional[float] = None, delta: Optional[float] = None) -> Optional[float]:
+        """
+        Travel in um of the next move for completion prediction, None when it is
+        unknown (rotation axes, velocity overrides, start position unknown) or
+        prediction is off
+        """
+        if not self._predict_completion or self.axis in (AxisType.ROTATION_FIBER, AxisType.ROTATION_CHIP):
+            return None
+        if delta is not None:
+            return abs(delta)
+        if target is None or self._commanded_position is None:
+            return None
+        return abs(target - self._commanded_position)
+
+    async def _run(self, fn, *args, priority: int = NORMAL):
+        """Run a short blocking serial job on the port scheduler"""
+        return await run_on_port(fn, *args, priority=priority)
+
+    def _wait_stopped(self, axis_num: int, poll_interval: Optional[float] = None,
+                      timeout: Optional[float] = None) -> bool:
+        """
+        Poll STA? until the axis reports stopped, returns False on timeout.
+        Blocking, only for homing which runs on the axis executor.
+        """
+        poll_interval = self._status_poll_interval if poll_interval is None else poll_interval
+        start_time = time.time()
+        while True:
+            status = int(self._query_command(f"{axis_num}STA?"))
+            if status == 1:
+                return True
+            if timeout is not None and (time.time() - start_time) > timeout:
+                return False
+            time.sleep(poll_interval)
+
+    async def _await_stopped(self, distance: Optional[float] = None, started: Optional[float] = None,
+                             generation: Optional[int] = None, poll_interval: Optional[float] = None,
+                             timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the current move to finish without holding the port: sleeps on
+        the event loop and submits only the STA? polls, so stops and queries for
+        any axis run in between. Returns False on timeout or when a stop /
+        emergency stop interrupted the move.
+
+        With the move distance known, sleeps until just before the predicted stop
+        (motion model) and polls at the fast interval from there; the observed
+        move time feeds back into the model's settle estimate.
+        """
+        axis_num = self.AXIS_MAP[self.axis]
+        poll_interval = self._status_poll_interval if poll_interval is None else poll_interval
+        start_time = time.time()
+        model = self._motion if distance is not None else None
+        if model is not None:
+            started = time.monotonic() if started is None else started
+            late = started + model.predict(distance) + 4 * poll_interval  # back to slow polling after this
+            delay = started + model.wake_time(distance) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        first = True
+        while True:
+            if generation is not None and generation != self._move_generation:
+                return False
+            status = int(await self._run(self._query_command, f"{axis_num}STA?"))
+            if status == 1:
+                if generation is not None and generation != self._move_generation:
+                    return False
+                if model is not None:
+                    model.record(distance, time.monotonic() - started, first)
+                return True
+            first = False
+            if timeout is not None and (time.time() - start_time) > timeout:
+                return False
+            if model is not None and time.monotonic() < late:
+                await asyncio.sleep(self._fast_poll_interval)
+            else:
+                await asyncio.sleep(poll_interval)
+
+    def _absolute_command(self, position: float, velocity: Optional[float] = None) -> List[str]:
+        """
+        MVA command(s) for an absolute target in microns (deg for rotation),
+        raises if the target is outside the soft limits
+        """
+        if self.axis == AxisType.ROTATION_FIBER:
+            # Map from deg to mm
+            lim = self._position_limits[1]
+            distance = (45 - position) * (lim / 45) 
+            position_mm = distance * 0.001
+        elif self.axis == AxisType.ROTATION_CHIP:
+            # Map from deg to mm
+            lim = self._position_limits[1]
+            distance = (3.6 - position) * (lim / 3.6)
+            position_mm = distance * 0.001
+        else:
+            # Convert um to mm
+            position_mm = position * 0.001
+
+        # Safety (Previously handled m way, don't know why)
+        lo, hi = self._position_limits
+        if not (lo <= position <= hi):
+            raise Exception(f"Distance entered exceeds softlimits, must be within bounds : {lo} <= {position} <= {hi}")
+
+        # Velocity override and move go out in the same write
+        cmds = [f"{self.AXIS_MAP[self.axis]}MVA{position_mm:.6f}"]
+        if velocity:
+            cmds.insert(0, f"{self.AXIS_MAP[self.axis]}VA{velocity:.6f}")
+        return cmds
+
+    def _relative_command(self, distance: float, velocity: Optional[float] = None) -> List[str]:
+        """
+        MVR command(s) for a relative move in microns (deg for rotation),
+        raises if the resulting position is outside the soft limits
+        """
+        lim = self._position_limits[1] if self._position_limits[1] > 0 else self._position_limits[0]
+        if self.axis == AxisType.ROTATION_FIBER:
+            # Map from deg to mm
+            distance_mm = distance * (lim / 45) * 0.001
+        elif self.axis == AxisType.ROTATION_CHIP:
+            # Map from deg to mm
+            distance_mm = distance * (lim / 3.6) * 0.001
+        else:
+            # Convert um to mm
+            distance_mm = distance * 0.001
+
+        # Safety
+        lo, hi = self._position_limits
+        pos = self._last_position + distance
+        if not (lo <= pos <= hi):
+            raise Exception(f"Relative distance entered exceeds softlimits, must be within bounds : {lo} <= {distance} <= {hi}")
+
+        cmds = [f"{self.AXIS_MAP[self.axis]}MVR{distance_mm:.6f}"]
+        if velocity:
+            cmds.insert(0, f"{self.AXIS_MAP[self.axis]}VA{velocity:.6f}")
+        return cmds
 
     # MOVEMENT
     async def move_absolute(self, position, velocity=None, wait_for_completion=True):
@@ -218,61 +390,38 @@ class StageControl(MotorHAL):
             wait_for_completion: If True, wait for move to complete and emit MOVE_COMPLETED event
         """
         def _move():
-            try:
-                if velocity:
-                    self._send_command(f"{self.AXIS_MAP[self.axis]}VA{velocity:.6f}")
-
-                if self.axis == AxisType.ROTATION_FIBER:
-                    # Map from deg to mm
-                    lim = self._position_limits[1]
-                    distance = (45 - position) * (lim / 45) 
-                    position_mm = distance * 0.001
-                    # print(position_mm)
-                elif self.axis == AxisType.ROTATION_CHIP:
-                    # Map from deg to mm
-                    lim = self._position_limits[1]
-                    distance = (3.6 - position) * (lim / 3.6)
-                    position_mm = distance * 0.001
-                    # print(position_mm)
-                else:
-                    # Convert um to mm
-                    position_mm = position * 0.001
-
-                # Safety (Previously handled m way, don't know why)
-                lo, hi = self._position_limits
-                # if abs(position_mm) >= 1e-6 and abs(position_mm) <= (1000-1e-6):
-                if position >= lo and position <= hi: 
-                    self._send_command(f"{self.AXIS_MAP[self.axis]}MVA{position_mm:.6f}")
-
-                    # Wait for movement
-                    if wait_for_completion:
-                        while True:
-                            response = self._query_command(f"{self.AXIS_MAP[self.axis]}STA?") 
-                            status = int(response)
-                            if status == 1:
-                                break
-                            time.sleep(0.1) 
-                else:
-                    raise Exception(f"Distance entered exceeds softlimits, must be within bounds : {lo} <= {position} <= {hi}")
+            cmds = self._absolute_command(position, velocity)
+            distance = None if velocity else self._move_distance(target=position)
+            started = time.monotonic()
+            self._send_command(*cmds)
+            self._commanded_position = position
+            return distance, started
 
-                # Update state tracking
-                self._move_in_progress = True
-                self._target_position = position
+        try:
+            generation = self._move_generation
+            distance, started = await self._run(_move)
 
-                # Event handling
-                self._emit_event(MotorEventType.MOVE_STARTED, {
-                    'target_position': position,
-                    'velocity': velocity or self._velocity,
-                    'operation': 'absolute_move'
-                })
+            # Wait for movement
+            if wait_for_completion:
+                if not await self._await_stopped(distance, started, generation):
+                    return False
 
-                return True 
-            
-            except Exception as e:
-                self._emit_event(MotorEventType.ERROR_OCCURRED, {'error': str(e)})
-                return False
+            # Update state tracking
+            self._move_in_progress = True
+            self._target_position = position
+
+            # Event handling
+            self._emit_event(MotorEventType.MOVE_STARTED, {
+                'target_position': position,
+                'velocity': velocity or self._velocity,
+                'operation': 'absolute_move'
+            })
+
+            return True 
         
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _move)
+        except Exception as e:
+            self._emit_event(MotorEventType.ERROR_OCCURRED, {'error': str(e)})
+            return False
         
     async def move_relative(self, distance, velocity=None, wait_for_completion=True):
         """
@@ -284,65 +433,47 @@ class StageControl(MotorHAL):
             wait_for_completion: If True, wait for move to complete and emit MOVE_COMPLETED event
         """
         def _move_rel():
-            try:
-                if velocity:
-                    self._send_command(f"{self.AXIS_MAP[self.axis]}VA{velocity:.6f}")
-
-                lim = self._position_limits[1] if self._position_limits[1] > 0 else self._position_limits[0]
-                if self.axis == AxisType.ROTATION_FIBER:
-                    # Map from deg to mm
-                    distance_temp = distance * (lim / 45)
-                    distance_mm = distance_temp * 0.001
-                elif self.axis == AxisType.ROTATION_CHIP:
-                    # Map from deg to mm
-                    distance_temp =  distance * (lim / 3.6)
-                    distance_mm = distance_temp * 0.001
+            cmds = self._relative_command(distance, velocity)
+            travel = None if velocity else self._move_distance(delta=distance)
+            started = time.monotonic()
+            self._send_command(*cmds)
+            if self._commanded_position is not None:
+                self._commanded_position += distance
+            return travel, started
 
-                else:
-                    # Convert um to mm
-                    distance_mm = distance * 0.001
-
-                # Safety
-                lo, hi = self._position_limits
-                pos = self._last_position + distance
-
-                # Event handling
-                self._emit_event(MotorEventType.MOVE_STARTED, {
-                    "target_position": pos,
-                    "distance": distance,
-                    "velocity": velocity or self._velocity,
-                    "operation": "relative_move"
-                })
+        try:
+            pos = self._last_position + distance
+
+            # Event handling
+            self._emit_event(MotorEventType.MOVE_STARTED, {
+                "target_position": pos,
+                "distance": distance,
+                "velocity": velocity or self._velocity,
+                "operation": "relative_move"
+            })
+
+            generation = self._move_generation
+            travel, started = await self._run(_move_rel)
+
+            # Wait for movement
+            if wait_for_completion:
+                if not await self._await_stopped(travel, started, generation):
+                    return None
+
+            self._target_position = pos
+            self._last_position = pos
+            self._emit_event(MotorEventType.MOVE_COMPLETE, {
+                "target_position": pos,
+                "distance": distance,
+                "velocity": velocity or self._velocity,
+                "operation": "relative_move"
+            })
+
+            return pos
                 
-                if pos >= lo and pos <= hi:  
-                    self._send_command(f"{self.AXIS_MAP[self.axis]}MVR{distance_mm:.6f}") 
-                    # Wait for movement
-                    if wait_for_completion:
-                        while True:
-                            response = self._query_command(f"{self.AXIS_MAP[self.axis]}STA?") 
-                            status = int(response)
-                            if status == 1:
-                                break
-                            time.sleep(0.1)
-                else:
-                    raise Exception(f"Relative distance entered exceeds softlimits, must be within bounds : {lo} <= {distance} <= {hi}")
-
-                self._target_position = pos
-                self._last_position = pos
-                self._emit_event(MotorEventType.MOVE_COMPLETE, {
-                    "target_position": pos,
-                    "distance": distance,
-                    "velocity": velocity or self._velocity,
-                    "operation": "relative_move"
-                })
-
-                return pos
-                    
-            except Exception as e:
-                self._emit_event(MotorEventType.ERROR_OCCURRED, {'error': str(e)})
-                return None
-        
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _move_rel)
+        except Exception as e:
+            self._emit_event(MotorEventType.ERROR_OCCURRED, {'error': str(e)})
+            return None
     
     async def stop(self):
         """
@@ -353,12 +484,15 @@ class StageControl(MotorHAL):
                 self._send_command(f"{self.AXIS_MAP[self.axis]}STP")
                 self._move_in_progress = False
                 self._target_position = None
+                self._commanded_position = None
                 return True
             except Exception as e:
                 print(f"Stop error: {e}")
                 return False
                 
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _stop)
+        # Urgent lane: runs ahead of queued polls / reads, waiting moves see the new generation
+        self._move_generation += 1
+        return await self._run(_stop, priority=URGENT)
 
     async def emergency_stop(self):
         """
@@ -369,12 +503,14 @@ class StageControl(MotorHAL):
                 self._send_command(f"{self.AXIS_MAP[self.axis]}EST")  # Stop axes
                 self._move_in_progress = False
                 self._target_position = None
+                self._commanded_position = None
                 return True
             except Exception as e:
                 print(f"Emergency stop error: {e}")
                 return False
                 
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _estop)
+        self._move_generation += 1
+        return await self._run(_estop, priority=URGENT)
 
     # Status and Position
     async def get_position(self):
@@ -384,43 +520,46 @@ class StageControl(MotorHAL):
         def _get_pos():
             try:
                 response = self._query_command(f"{self.AXIS_MAP[self.axis]}POS?")
-
-                
-                # Parse response: "position,encoder_position"
-                # parts = response.split(',')
-                theoretical_mm = float(response[0])
-                actual_mm = float(response[1])  
-                
-                # Convert mm to um
-                theoretical_um = theoretical_mm * 1000
-                actual_um = actual_mm * 1000
-
-                if self.axis == AxisType.ROTATION_FIBER:
-                    if self._is_homed:
-                        # 0-45 deg
-                        theoretical_um = (theoretical_um / self._position_limits[1]) * 45
-                        actual_um = (actual_um / self._position_limits[1]) * 45
-                elif self.axis == AxisType.ROTATION_CHIP:
-                    if self._is_homed:
-                        # 0-3.6 deg
-                        theoretical_um = (theoretical_um / self._position_limits[1]) * 3.6
-                        actual_um = (actual_um / self._position_limits[1]) * 3.6
-
-                # Update cached position
-                self._last_position = actual_um
-                
-                return Position(
-                    theoretical=theoretical_um,
-                    actual=actual_um,
-                    units="um",
-                    timestamp=time.time()
-                )
+                return self._parse_position(response)
                 
             except Exception as e:
                 print(f"Position read error: {e}")
                 return Position(0.0, 0.0, "um", time.time())
                 
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _get_pos)
+        return await self._run(_get_pos)
+
+    def _parse_position(self, response, timestamp: Optional[float] = None) -> Position:
+        """
+        Convert a POS? reply ["theoretical_mm", "actual_mm"] into a Position in um (deg for rotation)
+        """
+        # Parse response: "position,encoder_position"
+        theoretical_mm = float(response[0])
+        actual_mm = float(response[1])  
+        
+        # Convert mm to um
+        theoretical_um = theoretical_mm * 1000
+        actual_um = actual_mm * 1000
+
+        if self.axis == AxisType.ROTATION_FIBER:
+            if self._is_homed:
+                # 0-45 deg
+                theoretical_um = (theoretical_um / self._position_limits[1]) * 45
+                actual_um = (actual_um / self._position_limits[1]) * 45
+        elif self.axis == AxisType.ROTATION_CHIP:
+            if self._is_homed:
+                # 0-3.6 deg
+                theoretical_um = (theoretical_um / self._position_limits[1]) * 3.6
+                actual_um = (actual_um / self._position_limits[1]) * 3.6
+
+        # Update cached position
+        self._last_position = actual_um
+        
+        return Position(
+            theoretical=theoretical_um,
+            actual=actual_um,
+            units="um",
+            timestamp=time.time() if timestamp is None else timestamp
+        )
 
     async def get_state(self):
         """
@@ -441,7 +580,7 @@ class StageControl(MotorHAL):
                 print(f"State read error: {e}")
                 return MotorState.ERROR
                 
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _get_state)
+        return await self._run(_get_state)
 
     async def is_moving(self):
         """
@@ -461,13 +600,15 @@ class StageControl(MotorHAL):
                 vel_mm_s = velocity * 0.001
                 self._send_command(f"{self.AXIS_MAP[self.axis]}VEL{vel_mm_s:.6f}")
                 self._velocity = velocity
+                self._motion.velocity = velocity
+                self._motion.reset()
                 return True
             
             except Exception as e:
                 print(f"Set velocity error: {e}")
                 return False
                 
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _set_vel)
+        return await self._run(_set_vel)
     
     async def set_acceleration(self, acceleration):
         """
@@ -479,13 +620,22 @@ class StageControl(MotorHAL):
                 acc_mm_s2 = acceleration * 0.001
                 self._send_command(f"{self.AXIS_MAP[self.axis]}ACC{acc_mm_s2:.6f}")
                 self._acceleration = acceleration
+                self._motion.acceleration = acceleration
+                self._motion.reset()
                 return True
             
             except Exception as e:
                 print(f"Set acceleration error: {e}")
                 return False
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _set_acc)
+        return await self._run(_set_acc)
     
+    @property
+    def acceleration(self):
+        """
+        Acceleration in um/s2, read back with ACC? on connect
+        """
+        return self._acceleration
+
     async def get_config(self):
         """
         Get motor configuration
@@ -510,7 +660,7 @@ class StageControl(MotorHAL):
                 self._emit_event(MotorEventType.MOVE_STARTED, {'operation': 'homing'})
                 self._move_in_progress = True # Set move to true
                 self._is_homed = False # Set homed to false
-                start_time = time.time()
+                self._commanded_position = None
 
                 if direction == 0:
                     self._send_command(f"{self.AXIS_MAP[self.axis]}MLN")  # Move to negative limit
@@ -518,13 +668,7 @@ class StageControl(MotorHAL):
                     self._send_command(f"{self.AXIS_MAP[self.axis]}MLP")  # Move to positive limit
                 
                 # Wait for completion
-                while True:
-                    response = self._query_command(f"{self.AXIS_MAP[self.axis]}STA?") 
-                    status = int(response)
-                    if status == 1: break
-                    time.sleep(0.3)
-                    if abs(time.time() - start_time) > 30.0:
-                        break
+                self._wait_stopped(self.AXIS_MAP[self.axis], poll_interval=0.3, timeout=30.0)
                 
                 # Set zero point
                 if direction == 0:
@@ -532,6 +676,7 @@ class StageControl(MotorHAL):
                     self._send_command(f"{self.AXIS_MAP[self.axis]}ZRO")
                     self._is_homed = True # todo: check if homed is for specific axis, check super config may be fine
                     self._last_position = 0.0   # Reset position tracking
+                    self._commanded_position = 0.0
                 else:
                     # For homing purposes, it should always be the negative limit
                     print("Set positive limit")
@@ -571,15 +716,11 @@ class StageControl(MotorHAL):
                 self._emit_event(MotorEventType.MOVE_STARTED, {'operation': 'homing_limits'})
                 
                 # Send MLN to drive until negative limit is hit
+                self._commanded_position = None
                 self._send_command(f"{axis_num}MLN")
 
                 # Wait for completion
-                while True:
-                    response = self._query_command(f"{axis_num}STA?")
-                    status = int(response)
-                    if status == 1:  # Stopped
-                        break
-                    time.sleep(0.1)
+                self._wait_stopped(axis_num)
 
                 # Zero neg limit, zeros by default so becomes 0 mm
                 self._send_command(f"{axis_num}ZRO")
@@ -592,12 +733,7 @@ class StageControl(MotorHAL):
                 self._send_command(f"{axis_num}MLP")
 
                 # Wait for completion
-                while True:
-                    response = self._query_command(f"{axis_num}STA?")
-                    status = int(response)
-                    if status == 1:  # Stopped
-                        break
-                    time.sleep(0.1)
+                self._wait_stopped(axis_num)
 
                 # Read position at positive end
                 pos_resp2 = self._query_command(f"{axis_num}POS?")
@@ -640,7 +776,7 @@ class StageControl(MotorHAL):
                     # If position reaches mid point, or movement has stopped and its accurate to 0.001 mm 
                     if (pos_um == mid_point) or (status == 1): # messy
                         break
-                    time.sleep(0.1)
+                    time.sleep(self._status_poll_interval)
 
                 # Get current position
                 self._emit_event(MotorEventType.MOVE_COMPLETE, {'pos': self._position_limits})
@@ -673,12 +809,14 @@ class StageControl(MotorHAL):
             try:
                 self._send_command(f"{self.AXIS_MAP[self.axis]}ZRO")
                 self._last_position = 0.0  # Reset position tracking
+                if self._commanded_position is not None:
+                    self._commanded_position = 0.0
                 return True
             except Exception as e:
                 print(f"Set zero error: {e}")
                 return False
                 
-        return await asyncio.get_event_loop().run_in_executor(self._executor, _set_zero)
+        return await self._run(_set_zero)
 
     # Additional utility methods
     async def wait_for_move_completion(self, timeout: float = 30.0) -> bool:
@@ -709,9 +847,184 @@ class StageControl(MotorHAL):
             'move_in_progress': self._move_in_progress,
             'target_position': self._target_position,
             'last_position': self._last_position,
-            'position_tolerance': self._position_tolerance
+            'position_tolerance': self._position_tolerance,
+            'predicted_settle_s': self._motion.settle_s if self._predict_completion else None
         }
 
+def query_positions(stages) -> Dict[AxisType, Position]:
+    """
+    Read every given axis in one locked burst on the shared port: all POS? queries
+    go out in a single write and the replies are collected in order. Blocking,
+    call from an executor. All returned positions share one timestamp.
+    """
+    stages = [s for s in stages if s._transport is not None]
+    if not stages:
+        return {}
+
+    replies = _get_shared_transport().query_many(
+        [f"{s.AXIS_MAP[s.axis]}POS?" for s in stages]
+    )
+    timestamp = time.time()
+    return {
+        s.axis: s._parse_position(reply.split(','), timestamp)
+        for s, reply in zip(stages, replies)
+    }
+
+def _move_failed(stages, error: Exception, generations: Optional[Dict[Any, int]] = None) -> None:
+    """Report a failed grouped move on each axis, tagged with the move generation it belongs to"""
+    generations = generations or {}
+    for s in stages:
+        s._move_in_progress = False
+        s._emit_event(MotorEventType.ERROR_OCCURRED, {
+            'error': str(error),
+            'generation': generations.get(s, s._move_generation)
+        })
+
+def _parse_stopped(reply: str) -> bool:
+    """STA? reply text -> True when bit 3 (stopped) is set"""
+    return bool((int(reply) >> 3) & 1) if reply else False
+
+async def wait_all_stopped(stages, poll_interval: Optional[float] = None,
+                           timeout: Optional[float] = None, distances: Optional[Dict[Any, float]] = None,
+                           started: Optional[float] = None, generations: Optional[Dict[Any, int]] = None) -> bool:
+    """
+    Poll every given axis with one combined STA? burst per round until all of
+    them report stopped, axes drop out of the burst once stopped. Only the
+    bursts go through the port scheduler, the waiting happens on the event loop.
+    Returns False on timeout, when a stop interrupted one of the axes, or on a
+    port error / unreadable STA? reply (reported as ERROR_OCCURRED on the axes).
+
+    With the travel of every axis known (distances, um) the first burst waits
+    for the latest predicted stop and rounds run at the fast interval near it,
+    each axis' observed move time is fed back into its motion model.
+    """
+    pending = [s for s in stages if s._transport is not None]
+    if not pending:
+        return True
+    transport = _get_shared_transport()
+    poll_interval = pending[0]._status_poll_interval if poll_interval is None else poll_interval
+    fast_interval = min(s._fast_poll_interval for s in pending)
+    generations = generations or {}
+    start_time = time.time()
+
+    def interrupted():
+        return any(s._move_generation != generations[s] for s in stages if s in generations)
+
+    predicted = distances is not None and all(distances.get(s) is not None for s in pending)
+    if predicted:
+        started = time.monotonic() if started is None else started
+        late = started + max(s._motion.predict(distances[s]) for s in pending) + 4 * poll_interval
+        wake = max(s._motion.wake_time(distances[s]) for s in pending)
+        delay = started + wake - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    first = True
+    while True:
+        if interrupted():
+            return False
+        try:
+            replies = await run_on_port(transport.query_many, [f"{s.AXIS_MAP[s.axis]}STA?" for s in pending])
+            stopped = [_parse_stopped(reply) for reply in replies]
+            if predicted:
+                elapsed = time.monotonic() - started
+                for s, done in zip(pending, stopped):
+                    # A first poll only says something about the axis that set the wake up time
+                    if done and (not first or s._motion.wake_time(distances[s]) >= wake - 1e-3):
+                        s._motion.record(distances[s], elapsed, first)
+            pending = [s for s, done in zip(pending, stopped) if not done]
+        except TimeoutError:
+            pass  # treat as still moving, same as a single axis poll
+        except Exception as e:
+            _move_failed(pending, e, generations)
+            return False
+        if not pending:
+            return not interrupted()
+        first = False
+        if timeout is not None and (time.time() - start_time) > timeout:
+            return False
+        await asyncio.sleep(fast_interval if predicted and time.monotonic() < late else poll_interval)
+
+async def move_many(targets, relative: bool = False, velocity: Optional[float] = None,
+                    wait_for_completion: bool = True, timeout: Optional[float] = None) -> bool:
+    """
+    Coordinated move of several axes on the shared port. Every target command
+    goes out back to back in one write, then all axes are waited on together.
+
+        Args:
+            targets: {StageControl: position or distance in um (deg for rotation)}
+            relative: targets are distances
+        Returns:
+            True once every axis is in position, False on error / timeout / stop
+    """
+    stages = list(targets)
+    if not stages:
+        return True
+    try:
+        cmds, goals, distances, commanded = [], {}, {}, {}
+        for s in stages:
+            value = targets[s]
+            if relative:
+                cmds += s._relative_command(value, velocity)
+                goals[s] = s._last_position + value
+                distances[s] = None if velocity else s._move_distance(delta=value)
+                commanded[s] = None if s._commanded_position is None else s._commanded_position + value
+            else:
+                cmds += s._absolute_command(value, velocity)
+                goals[s] = value
+                distances[s] = None if velocity else s._move_distance(target=value)
+                commanded[s] = value
+    except Exception as e:
+        for s in stages:
+            s._emit_event(MotorEventType.ERROR_OCCURRED, {'error': str(e)})
+        return False
+
+    def _send():
+        sent_at = time.monotonic()
+        _get_shared_transport().send(*cmds)
+        for s in stages:
+            s._commanded_position = commanded[s]
+        return sent_at
+
+    generations = {s: s._move_generation for s in stages}
+    try:
+        started = await run_on_port(_send)
+    except Exception as e:
+        _move_failed(stages, e, generations)
+        return False
+    operation = "relative_move" if relative else "absolute_move"
+    for s in stages:
+        s._move_in_progress = True
+        s._target_position = goals[s]
+        s._emit_event(MotorEventType.MOVE_STARTED, {
+            'target_position': goals[s],
+            'velocity': velocity or s._velocity,
+            'operation': operation
+        })
+
+    for s in stages:
+        s._last_position = goals[s]
+    if not wait_for_completion:
+        return True
+    if not await wait_all_stopped(stages, timeout=timeout, distances=distances, started=started,
+                                  generations=generations):
+        # Axes a stop interrupted or a port error already failed are settled, the rest end here
+        left = [s for s in stages if s._move_in_progress and s._move_generation == generations[s]]
+        if timeout is not None and time.monotonic() - started >= timeout:
+            error = TimeoutError(f"Grouped move not finished after {timeout} s")
+        else:
+            error = RuntimeError("Grouped move interrupted on another axis")
+        _move_failed(left, error, generations)
+        return False
+
+    for s in stages:
+        s._move_in_progress = False
+        s._emit_event(MotorEventType.MOVE_COMPLETE, {
+            'target_position': goals[s],
+            'operation': operation
+        })
+    return True
+
 from motors.hal.stage_factory import register_driver
 
 # Register Probe_Stage motor stage
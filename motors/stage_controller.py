@@ -66,13 +66,14 @@ def _get_command_queue():
     return _command_queue
 
 async def _process_command_queue():
-    """Process commands from queue"""
+    """Process commands from queue, each blocking serial call runs in a worker thread"""
     command_queue = _get_command_queue()
+    loop = asyncio.get_running_loop()
     while True:
         try:
             command_func, future = await command_queue.get()
             try:
-                result = command_func()
+                result = await loop.run_in_executor(None, command_func)
                 future.set_result(result)
             except Exception as e:
                 future.set_exception(e)
@@ -90,8 +91,14 @@ async def _ensure_queue_worker():
     else:
         logger.debug("Queue worker already running")
 
-async def _queue_command(command_func):
-    """Queue a command for execution"""
+async def _queue_command(command_func, urgent: bool = False):
+    """
+    Queue a command for execution. Urgent commands (stops) skip the queue, which
+    may be busy with a move polling for completion, and run right away; the
+    serial lock still keeps them from interleaving with another transaction.
+    """
+    if urgent:
+        return await asyncio.get_running_loop().run_in_executor(None, command_func)
     await _ensure_queue_worker()
     future = asyncio.Future()
     command_queue = _get_command_queue()
@@ -487,7 +494,7 @@ class StageController(MotorHAL):
                     logger.error(f"Stop error: {e}")
                 return False
         
-        return await _queue_command(_stop)
+        return await _queue_command(_stop, urgent=True)
 
     async def emergency_stop(self) -> bool:
         """Emergency stop"""
@@ -511,7 +518,7 @@ class StageController(MotorHAL):
                     logger.error(f"Emergency stop error: {e}")
                 return False
         
-        return await _queue_command(_emergency_stop)
+        return await _queue_command(_emergency_stop, urgent=True)
 
     async def set_velocity(self, velocity: float) -> bool:
         """Set velocity"""
@@ -543,6 +550,11 @@ class StageController(MotorHAL):
         
         return await _queue_command(_set_acceleration)
 
+    @property
+    def acceleration(self) -> float:
+        """Acceleration in um/s^2"""
+        return self._acceleration
+
     async def get_config(self) -> MotorConfig:
         """Get motor configuration"""
         units = "degrees" if self.axis in [AxisType.ROTATION_FIBER, AxisType.ROTATION_CHIP] else "um"
@@ -9,9 +9,11 @@ import time
 from motors.hal.motors_hal import AxisType, MotorState, Position, MotorEvent, MotorEventType
 #from motors.stage_controller import StageController
 from motors.modern_stage import StageControl as StageController
+from motors.modern_stage import query_positions, move_many, run_on_port
 import motors.modern_stage
 from motors.hal.stage_factory import create_driver
 from motors.config.stage_config import StageConfiguration
+from motors.utils.position_tracker import PositionTracker
 from motors.utils.shared_memory import *
 
 """
@@ -20,10 +22,21 @@ Cameron Basara, 2025
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class PositionSnapshot:
+    """Positions of several axes read in one pass, sharing one timestamp"""
+    timestamp: float
+    positions: Dict[AxisType, Position]
+
+    def actual(self) -> Dict[AxisType, float]:
+        return {axis: pos.actual for axis, pos in self.positions.items()}
+
 class StageManager:
-    def __init__(self, config: StageConfiguration, create_shm: bool = True, port: int = 4):
+    def __init__(self, config: StageConfiguration, create_shm: bool = True, port: int = 4,
+                 instance: Optional[str] = None):
         # Core components
         self.config = config
+        self.instance = instance  # suffix for the shared memory names when running several stages
         motors.modern_stage._GLOBAL_COM_PORT = f"COM{port}"
         self.motors: Dict[AxisType, StageController] = {}
         self._event_callbacks: List[Callable[[MotorEvent], None]] = []
@@ -32,13 +45,20 @@ class StageManager:
         self._last_positions: Dict[AxisType, float] = {}
         self._homed_axes: Dict[AxisType, bool] = {}
         self._is_running = False
+
+        # Commanded / encoder position estimate, serves get_position without a read while fresh
+        self.positions = PositionTracker(tolerance=config.position_tolerance,
+                                         max_age_s=config.position_max_age_s)
         
         # Shared memory setup
         self.create_shm = create_shm
         if create_shm:
             try:
-                self.shm_position, self.position_struct = create_shared_stage_position()
-                self.shm_config = create_shared_stage_config()
+                self.shm_position, self.position_struct = create_shared_stage_position(
+                    channel_name(POSITION_SHM_NAME, instance))
+                # Mapped once, the monitor writes through it every tick
+                self.shared_position = StagePosition(shared_struct=self.position_struct)
+                self.shm_config = create_shared_stage_config(channel_name(SHM_NAME, instance))
                 write_shared_stage_config(self.shm_config, config)
                 logger.info("Shared memory initialized")
             except Exception as e:
@@ -93,6 +113,11 @@ class StageManager:
         if self.create_shm:
             try:
                 if hasattr(self, 'shm_position'):
+                    # Tell attached readers to let go, then drop the struct views,
+                    # they hold an export of the buffer
+                    self.shared_position.close()
+                    self.shared_position = None
+                    self.position_struct = None
                     self.shm_position.close()
                     self.shm_position.unlink()
                 if hasattr(self, 'shm_config'):
@@ -127,6 +152,7 @@ class StageManager:
                 self.motors[axis] = motor
                 self._last_positions[axis] = 0.0
                 self._homed_axes[axis] = False
+                self._sync_acceleration(axis, motor)
                 logger.info(f"Axis {axis.name} initialized successfully")
             else:
                 logger.error(f"Failed to connect axis {axis.name}")
@@ -137,6 +163,22 @@ class StageManager:
             logger.error(f"Error initializing axis {axis.name}: {e}")
             return False
 
+    def _sync_acceleration(self, axis: AxisType, motor) -> None:
+        """
+        Put the acceleration the driver read from the controller (ACC?, um/s^2)
+        into the config and republish it, the configured value is never sent
+        to the controller, readers such as the route planner need the real one
+        """
+        acceleration = motor.acceleration
+        if acceleration is None or acceleration <= 0.0 or acceleration == self.config.accelerations.get(axis):
+            return
+        self.config.accelerations[axis] = acceleration
+        if self.create_shm:
+            try:
+                write_shared_stage_config(self.shm_config, self.config)
+            except Exception as e:
+                logger.warning(f"Could not publish the {axis.name} acceleration: {e}")
+
     async def initialize_all(self, axes: List[AxisType] = None) -> bool:
         """Initialize all specified axes"""
         if axes is None:
@@ -199,6 +241,7 @@ class StageManager:
         
         try:
             motor = self.motors[axis]
+            self._track_commanded(axis, position, relative)
             
             if relative:
                 success = await motor.move_relative(
@@ -216,13 +259,83 @@ class StageManager:
                 )
                 if success:
                     self._last_positions[axis] = position
+            self._track_result(axis, success, wait_for_completion)
             
             return success
             
         except Exception as e:
+            self.positions.invalidate(axis)
             logger.error(f"Move error for axis {axis.name}: {e}")
             return False
 
+    def _track_commanded(self, axis: AxisType, value: float, relative: bool) -> None:
+        """Tell the position tracker a move was sent"""
+        if relative:
+            known = self.positions.last_known(axis)
+            self.positions.commanded(axis, None if known is None else known + value)
+        else:
+            self.positions.commanded(axis, value)
+
+    def _track_result(self, axis: AxisType, success, waited: bool) -> None:
+        """A waited move that succeeded is at its target, a failed one is unknown"""
+        if not success:
+            self.positions.invalidate(axis)
+        elif waited:
+            self.positions.completed(axis)
+
+    async def move_axes(
+        self,
+        targets: Dict[AxisType, float],
+        relative: bool = False,
+        velocity: Optional[float] = None,
+        wait_for_completion: bool = True
+    ) -> bool:
+        """
+        Coordinated move of any subset of axes, returns once every axis is in position.
+
+        Axes driven by StageControl share a port, so all their target commands go
+        out in one write and completion is a single combined STA? poll instead of
+        one polling loop per axis. Other drivers fall back to move_axis.
+        """
+        missing = [axis for axis in targets if axis not in self.motors]
+        if missing:
+            logger.error(f"Axes {[axis.name for axis in missing]} not initialized")
+            return False
+        if not targets:
+            return True
+
+        try:
+            batched = {self.motors[axis]: value for axis, value in targets.items()
+                       if isinstance(self.motors[axis], StageController)}
+            others = [axis for axis in targets if not isinstance(self.motors[axis], StageController)]
+
+            jobs = [self.move_axis(axis, targets[axis], relative, velocity, wait_for_completion)
+                    for axis in others]
+            if batched:
+                for motor in batched:
+                    self._track_commanded(motor.axis, targets[motor.axis], relative)
+                jobs.append(move_many(batched, relative, velocity, wait_for_completion))
+            results = await asyncio.gather(*jobs)
+            if batched:
+                for motor in batched:
+                    self._track_result(motor.axis, results[-1], wait_for_completion)
+
+            if batched and results[-1]:
+                for motor in batched:
+                    if relative:
+                        self._last_positions[motor.axis] += targets[motor.axis]
+                    else:
+                        self._last_positions[motor.axis] = targets[motor.axis]
+
+            success = all(results)
+            if not success:
+                logger.error(f"Coordinated move failed: {targets} {'relative' if relative else 'absolute'}")
+            return success
+
+        except Exception as e:
+            logger.error(f"Coordinated move error: {e}")
+            return False
+
     async def move_xy(
         self,
         x_pos: float,
@@ -234,29 +347,23 @@ class StageManager:
         if AxisType.X not in self.motors or AxisType.Y not in self.motors:
             logger.error("X or Y axis not initialized")
             return False
-        
+
+        success = await self.move_axes({AxisType.X: x_pos, AxisType.Y: y_pos}, relative,
+                                        wait_for_completion=wait_for_completion)
+        if success:
+            logger.info(f"XY move completed: ({x_pos}, {y_pos}) {'relative' if relative else 'absolute'}")
+        return success
+
+    async def set_velocity(self, axis: AxisType, velocity: float) -> bool:
+        """Set axis velocity in um/s"""
+        if axis not in self.motors:
+            logger.error(f"Axis {axis.name} not initialized")
+            return False
+
         try:
-            # Create movement tasks
-            x_task = asyncio.create_task(
-                self.move_axis(AxisType.X, x_pos, relative, wait_for_completion=wait_for_completion)
-            )
-            y_task = asyncio.create_task(
-                self.move_axis(AxisType.Y, y_pos, relative, wait_for_completion=wait_for_completion)
-            )
-            
-            # Execute moves simultaneously
-            x_result, y_result = await asyncio.gather(x_task, y_task)
-            
-            success = x_result and y_result
-            if success:
-                logger.info(f"XY move completed: ({x_pos}, {y_pos}) {'relative' if relative else 'absolute'}")
-            else:
-                logger.error(f"XY move failed: X={x_result}, Y={y_result}")
-            
-            return success
-            
+            return await self.motors[axis].set_velocity(velocity)
         except Exception as e:
-            logger.error(f"XY move error: {e}")
+            logger.error(f"Set velocity error for axis {axis.name}: {e}")
             return False
 
     async def stop_axis(self, axis: AxisType) -> bool:
@@ -265,29 +372,28 @@ class StageManager:
             return False
         
         try:
+            self.positions.invalidate(axis)
             return await self.motors[axis].stop()
         except Exception as e:
             logger.error(f"Stop error for axis {axis.name}: {e}")
             return False
 
     async def stop_all(self) -> bool:
-        """Stop all axes"""
-        results = []
-        for axis in self.motors:
-            result = await self.stop_axis(axis)
-            results.append(result)
+        """Stop all axes, every stop is queued at once so none waits for another"""
+        results = await asyncio.gather(*(self.stop_axis(axis) for axis in list(self.motors)))
         return all(results)
 
     async def emergency_stop(self) -> bool:
         """Emergency stop all axes"""
-        results = []
-        for motor in self.motors.values():
+        async def _estop(motor):
             try:
-                result = await motor.emergency_stop()
-                results.append(result)
+                self.positions.invalidate(motor.axis)
+                return await motor.emergency_stop()
             except Exception as e:
                 logger.error(f"Emergency stop error: {e}")
-                results.append(False)
+                return False
+
+        results = await asyncio.gather(*(_estop(motor) for motor in list(self.motors.values())))
         return all(results)
 
     # === Homing ===
@@ -299,10 +405,13 @@ class StageManager:
             return False
         
         try:
+            self.positions.invalidate(axis)
             success = await self.motors[axis].home(direction)
             if success:
                 self._homed_axes[axis] = True
                 self._last_positions[axis] = 0.0
+                if direction == 0:
+                    self.positions.completed(axis, 0.0)
                 logger.info(f"Axis {axis.name} homed successfully")
             else:
                 self._homed_axes[axis] = False
@@ -334,6 +443,7 @@ class StageManager:
                 y_limits = self.config.position_limits.get(AxisType.Y, (0, 10000))
                 await self.move_axis(AxisType.Y, y_limits[1], wait_for_completion=True)
             
+            self.positions.invalidate(axis)
             success, limits = await self.motors[axis].home_limits()
             if success:
                 self._homed_axes[axis] = True
@@ -352,24 +462,77 @@ class StageManager:
 
     # === Status and Position ===
     
-    async def get_position(self, axis: AxisType) -> Optional[Position]:
-        """Get position of a single axis"""
+    async def get_position(self, axis: AxisType, max_age_s: Optional[float] = None) -> Optional[Position]:
+        """
+        Get position of a single axis. A settled commanded / encoder estimate no
+        older than max_age_s (config.position_max_age_s by default, 0 forces a
+        read) is returned without touching the port.
+        """
         if axis not in self.motors:
             return None
+
+        cached = self.positions.estimate(axis, max_age_s)
+        if cached is not None:
+            return cached
         
         try:
-            return await self.motors[axis].get_position()
+            pos = await self.motors[axis].get_position()
+            if pos is not None:
+                self.positions.measured(axis, pos)
+            return pos
         except Exception as e:
             logger.error(f"Position read error for axis {axis.name}: {e}")
             return None
 
+    async def get_positions_snapshot(self, axes: Optional[List[AxisType]] = None,
+                                     max_age_s: Optional[float] = None,
+                                     moving_age_s: Optional[float] = None) -> PositionSnapshot:
+        """
+        Read all (or the given) connected axes in one serial burst.
+
+        Axes with a fresh settled estimate (see get_position) are not read, nor
+        are moving axes seen less than moving_age_s ago when that is given.
+        Axes driven by StageControl share a port, so their POS? queries are sent
+        together under a single lock hold instead of one transaction per axis.
+        Other drivers fall back to their own get_position.
+        """
+        if axes is None:
+            axes = list(self.motors.keys())
+        motors = {axis: self.motors[axis] for axis in axes if axis in self.motors}
+
+        positions: Dict[AxisType, Position] = {}
+        for axis in motors:
+            cached = self.positions.estimate(axis, max_age_s, moving_age_s)
+            if cached is not None:
+                positions[axis] = cached
+
+        batched = [m for axis, m in motors.items() if axis not in positions and isinstance(m, StageController)]
+        if batched:
+            try:
+                read = await run_on_port(query_positions, batched)
+                for axis, pos in read.items():
+                    self.positions.measured(axis, pos)
+                positions.update(read)
+            except Exception as e:
+                logger.error(f"Batched position read error: {e}")
+
+        for axis, motor in motors.items():
+            if axis not in positions:
+                pos = await self.get_position(axis, max_age_s=0.0)
+                if pos:
+                    positions[axis] = pos
+
+        for axis, pos in positions.items():
+            self._last_positions[axis] = pos.actual
+
+        timestamp = max((p.timestamp for p in positions.values()), default=time.time())
+        return PositionSnapshot(timestamp=timestamp, positions=positions)
+
     async def get_all_positions(self) -> Dict[AxisType, float]:
         """Get positions of all axes"""
-        positions = {}
-        for axis in self.motors:
-            pos = await self.get_position(axis)
-            positions[axis] = pos.actual if pos else 0.0
-        return positions
+        snapshot = await self.get_positions_snapshot()
+        return {axis: snapshot.positions[axis].actual if axis in snapshot.positions else 0.0
+                for axis in self.motors}
 
     async def get_state(self, axis: AxisType) -> Optional[MotorState]:
         """Get state of a single axis"""
@@ -393,20 +556,15 @@ class StageManager:
             if success:
                 # Update software position tracking
                 self._last_positions[axis] = 0.0
+                if self.positions.last_known(axis) is not None:
+                    self.positions.completed(axis, 0.0)
+                else:
+                    self.positions.invalidate(axis)
                 
                 # Update shared memory position to keep GUI in sync
-                if hasattr(self, '_position_struct') and self._position_struct:
+                if self.create_shm and getattr(self, 'shared_position', None) is not None:
                     try:
-                        if axis == AxisType.X:
-                            self._position_struct.x_pos = 0.0
-                        elif axis == AxisType.Y:
-                            self._position_struct.y_pos = 0.0
-                        elif axis == AxisType.Z:
-                            self._position_struct.z_pos = 0.0
-                        elif axis == AxisType.ROTATION_CHIP:
-                            self._position_struct.cp_pos = 0.0
-                        elif axis == AxisType.ROTATION_FIBER:
-                            self._position_struct.fr_pos = 0.0
+                        self.shared_position.update({axis: 0.0})
                     except Exception as e:
                         logger.warning(f"Could not update shared memory for axis {axis.name}: {e}")
                 
@@ -477,22 +635,14 @@ class StageManager:
                     await asyncio.sleep(1.0)
                     continue
                 
-                # Update positions in shared memory
-                for axis, motor in self.motors.items():
+                # One burst for every axis, then one shared memory update
+                snapshot = await self.get_positions_snapshot(
+                    moving_age_s=self.config.position_monitor_moving_age_s)
+                if snapshot.positions and self.create_shm:
                     try:
-                        pos = await motor.get_position()
-                        if pos:
-                            self._last_positions[axis] = pos.actual
-                            # Update shared memory position
-                            if self.create_shm:
-                                shm, raw = open_shared_stage_position()
-                                sp = StagePosition(shared_struct=raw)
-                                sp.set_positions(axis, pos.actual)
-                                del sp
-                                del raw
-                                shm.close()
+                        self.shared_position.update(snapshot.actual())
                     except Exception as e:
-                        logger.debug(f"Position monitor error for {axis.name}: {e}")
+                        logger.debug(f"Position monitor shared memory error: {e}")
                 
                 await asyncio.sleep(0.1)  # 10Hz update rate
                 
@@ -512,6 +662,7 @@ class StageManager:
             'connected_axes': list(self.motors.keys()),
             'homed_axes': {axis: homed for axis, homed in self._homed_axes.items() if homed},
             'last_positions': self._last_positions.copy(),
+            'position_estimates': vars(self.positions.stats).copy(),
             'create_shm': self.create_shm
         }
 
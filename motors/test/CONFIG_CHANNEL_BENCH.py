@@ -0,0 +1,108 @@
+import json
+import time
+from multiprocessing import shared_memory
+
+from LDC.config.ldc_config import LDCConfiguration
+from LDC.utils.shared_memory import create_shared_ldc_config, open_shared_ldc_config, read_shared_ldc_config, write_shared_ldc_config
+from motors.config.stage_config import StageConfiguration
+from motors.utils.shared_memory import SHM_NAME, create_shared_stage_config, open_shared_stage_config, read_shared_stage_config, write_shared_stage_config
+from utils.config_channel import channel_name, encode_config
+
+"""
+Config in shared memory: JSON in a fixed 2 KB block vs the binary config channel.
+
+Times a reader polling the stage config (the JSON block re-parses on every
+read, the channel only decodes after the generation changed and changed()
+only looks at the generation), compares payload
+sizes, round trips an LDC config larger than the old 2 KB block and runs two
+stage instances side by side.
+Run from the repo root: python -m motors.test.CONFIG_CHANNEL_BENCH
+"""
+
+N = 20000
+
+
+def json_block(config):
+    # Previous layout: u32 length + JSON payload in a 2052 byte block
+    shm = shared_memory.SharedMemory(name="bench_json_config", create=True, size=4 + 2048)
+    payload = json.dumps(config.to_dict()).encode("utf-8")
+    shm.buf[:4] = len(payload).to_bytes(4, "little")
+    shm.buf[4:4 + len(payload)] = payload
+    return shm, len(payload)
+
+
+def json_read(shm):
+    n = int.from_bytes(shm.buf[:4], "little")
+    return StageConfiguration.from_dict(json.loads(bytes(shm.buf[4:4 + n]).decode("utf-8")))
+
+
+def main():
+    cfg = StageConfiguration()
+
+    shm, json_size = json_block(cfg)
+    t0 = time.perf_counter()
+    for _ in range(N):
+        json_read(shm)
+    t_json = (time.perf_counter() - t0) / N
+    shm.close()
+    shm.unlink()
+
+    writer = create_shared_stage_config()
+    write_shared_stage_config(writer, cfg)
+    reader = open_shared_stage_config()
+    t0 = time.perf_counter()
+    for _ in range(N):
+        read_shared_stage_config(reader)
+    t_same = (time.perf_counter() - t0) / N
+
+    t0 = time.perf_counter()
+    for _ in range(N):
+        reader.changed()
+    t_poll = (time.perf_counter() - t0) / N
+
+    t0 = time.perf_counter()
+    for i in range(N // 10):
+        cfg.velocities[next(iter(cfg.velocities))] = float(i)
+        write_shared_stage_config(writer, cfg)
+        read_shared_stage_config(reader)
+    t_changed = (time.perf_counter() - t0) / (N // 10)
+    ok = read_shared_stage_config(reader).velocities == cfg.velocities
+    print(f"stage config  payload JSON {json_size} B, binary {len(encode_config(cfg.to_dict()))} B")
+    print(f"read          JSON {t_json * 1e6:6.1f} us | channel unchanged {t_same * 1e6:6.1f} us "
+          f"({t_json / t_same:.1f}x), after a write {t_changed * 1e6:6.1f} us, decodes {reader.decodes}, "
+          f"values match: {ok}")
+    print(f"poll          changed() {t_poll * 1e6:6.2f} us ({t_json / t_poll:.0f}x cheaper than a JSON read)")
+    reader.close()
+    writer.close()
+    writer.unlink()
+
+    big = LDCConfiguration()
+    big.model_coeffs = [1e-3 * i for i in range(400)]
+    ldc_w = create_shared_ldc_config()
+    write_shared_ldc_config(ldc_w, big)
+    ldc_r = open_shared_ldc_config()
+    back = read_shared_ldc_config(ldc_r)
+    print(f"large config  JSON {len(json.dumps(big.to_dict()))} B (block held 2048), "
+          f"binary {len(encode_config(big.to_dict()))} B, round trip ok: {back.model_coeffs == big.model_coeffs}")
+    ldc_r.close()
+    ldc_w.close()
+    ldc_w.unlink()
+
+    a = create_shared_stage_config(channel_name(SHM_NAME, "left"))
+    b = create_shared_stage_config(channel_name(SHM_NAME, "right"))
+    cfg_a, cfg_b = StageConfiguration(), StageConfiguration()
+    cfg_b.position_limits = {ax: (0.0, 5000.0) for ax in cfg_b.position_limits}
+    write_shared_stage_config(a, cfg_a)
+    write_shared_stage_config(b, cfg_b)
+    ra, rb = open_shared_stage_config(a.name), open_shared_stage_config(b.name)
+    ok = (read_shared_stage_config(ra).position_limits == cfg_a.position_limits
+          and read_shared_stage_config(rb).position_limits == cfg_b.position_limits)
+    print(f"instances     {a.name}, {b.name} independent: {ok}")
+    for ch in (ra, rb, a, b):
+        ch.close()
+    a.unlink()
+    b.unlink()
+
+
+if __name__ == "__main__":
+    main()
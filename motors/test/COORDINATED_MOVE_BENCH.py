@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from motors.hal.motors_hal import AxisType
+from measure.test.sim_rig import make_sim_stage
+
+"""
+Paired X/Y moves on the loopback stage: one axis after the other (previous
+FineAlign / GUI device moves), both move_axis calls gathered (previous move_xy)
+and StageManager.move_axes (one write for both targets, one combined STA? poll).
+
+Reports time per XY move and serial writes / queries per move for small steps
+(fine align, area scan) and a device-to-device hop.
+Run from the repo root: python -m motors.test.COORDINATED_MOVE_BENCH
+"""
+
+N = 20
+
+
+async def sequential(stage, x, y):
+    await stage.move_axis(AxisType.X, x, relative=False, wait_for_completion=True)
+    await stage.move_axis(AxisType.Y, y, relative=False, wait_for_completion=True)
+
+
+async def gathered(stage, x, y):
+    await asyncio.gather(stage.move_axis(AxisType.X, x, relative=False, wait_for_completion=True),
+                         stage.move_axis(AxisType.Y, y, relative=False, wait_for_completion=True))
+
+
+async def coordinated(stage, x, y):
+    await stage.move_axes({AxisType.X: x, AxisType.Y: y})
+
+
+async def run(label, move, step_um):
+    stage, port = await make_sim_stage()
+    w0, q0 = port.writes, port.queries
+    t0 = time.perf_counter()
+    for i in range(N):
+        s = step_um if i % 2 == 0 else 0.0
+        await move(stage, s, s)
+    dt = (time.perf_counter() - t0) / N
+    writes, queries = (port.writes - w0) / N, (port.queries - q0) / N
+    await stage.disconnect_all()
+    print(f"{step_um:7.0f} um  {label:<12} {dt * 1e3:7.1f} ms / move  {writes:5.1f} writes  {queries:5.1f} queries")
+
+
+async def main():
+    for step_um in (1.0, 2.0, 1000.0):
+        for label, move in (("sequential", sequential), ("gathered", gathered), ("move_axes", coordinated)):
+            await run(label, move, step_um)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import asyncio
+import sys
+import time
+
+from motors.hal.motors_hal import AxisType
+from measure.test.sim_rig import make_sim_stage
+
+"""
+Move completion: STA? polling every status_poll_interval vs the kinematic
+prediction (sleep through the trapezoid move time plus the learned settle time,
+then poll at the fast interval).
+
+Runs back and forth single axis moves and coordinated XY moves on the loopback
+stage, whose axes report stopped settle_time after the profile ends. The first
+moves after connect train the settle estimate and are not counted. Reports time
+per move, STA? queries per move and the learned settle time.
+Run from the repo root: python -m motors.test.MOVE_PREDICTION_BENCH [settle_s]
+"""
+
+N = 30
+WARMUP = 10
+
+
+async def run(predict, step_um, xy, settle_s):
+    stage, port = await make_sim_stage(settle_time=settle_s)
+    for motor in stage.motors.values():
+        motor._predict_completion = predict
+
+    async def move(i):
+        s = step_um if i % 2 == 0 else 0.0
+        if xy:
+            await stage.move_axes({AxisType.X: s, AxisType.Y: s})
+        else:
+            await stage.move_axis(AxisType.X, s)
+
+    for i in range(WARMUP):
+        await move(i)
+    sta0 = sum(1 for c in port.commands if c.endswith("STA?"))
+    t0 = time.perf_counter()
+    for i in range(N):
+        await move(i)
+    dt = (time.perf_counter() - t0) / N
+    sta = (sum(1 for c in port.commands if c.endswith("STA?")) - sta0) / N
+    settle = stage.motors[AxisType.X].get_move_status()["predicted_settle_s"]
+    await stage.disconnect_all()
+    return dt, sta, settle
+
+
+async def main():
+    settle_s = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+    print(f"loopback settle {settle_s * 1e3:.0f} ms, {N} moves after {WARMUP} warm-up moves")
+    for xy in (False, True):
+        for step_um in (1.0, 2.0, 100.0):
+            t_poll, q_poll, _ = await run(False, step_um, xy, settle_s)
+            t_pred, q_pred, settle = await run(True, step_um, xy, settle_s)
+            print(f"{'XY' if xy else 'X ':<2} {step_um:6.0f} um  polling {t_poll * 1e3:6.1f} ms {q_poll:4.1f} STA?  | "
+                  f"predicted {t_pred * 1e3:6.1f} ms {q_pred:4.1f} STA?  learned settle {settle * 1e3:5.1f} ms  "
+                  f"({t_poll / t_pred:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
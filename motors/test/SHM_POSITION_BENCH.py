@@ -0,0 +1,123 @@
+import time
+from multiprocessing import Event, Process
+
+from motors.config.stage_position import StagePosition
+from motors.hal.motors_hal import AxisType
+from motors.utils.shared_memory import create_shared_stage_position, open_shared_stage_position
+
+"""
+Stage position shared memory: attach per access vs persistent mapping + seqlock.
+
+1. Cost of one monitor tick writing 5 axes and of one GUI read, re-opening the
+   segment every time (previous monitor / Memory.reader_pos) vs mapped once.
+2. Torn reads: a writer process sets all 5 axes to the same counter value as
+   fast as it can, a reader counts snapshots whose axes disagree, with plain
+   field access vs the seqlocked update() / snapshot().
+3. History ring: samples recovered by a reader following history_count.
+Run from the repo root: python -m motors.test.SHM_POSITION_BENCH
+"""
+
+N = 20000
+AXES = [a for a in AxisType if a != AxisType.ALL]
+NAME = "stage_position"
+
+
+def tick_reopen(values):
+    shm, raw = open_shared_stage_position(NAME)
+    sp = StagePosition(shared_struct=raw)
+    sp.update(values)
+    del sp, raw
+    shm.close()
+
+
+def read_reopen():
+    shm, raw = open_shared_stage_position(NAME)
+    sp = StagePosition(shared_struct=raw)
+    p = sp.get_positions()
+    del sp, raw
+    shm.close()
+    return p
+
+
+def writer(locked, stop):
+    shm, raw = open_shared_stage_position(NAME)
+    sp = StagePosition(shared_struct=raw)
+    n = 0
+    while not stop.is_set():
+        n += 1
+        if locked:
+            sp.update({a: float(n) for a in AXES})
+        else:
+            for a in AXES:
+                raw.positions[a.value] = float(n)
+    del sp, raw
+    shm.close()
+
+
+def torn_reads(locked, reads=200000):
+    stop = Event()
+    p = Process(target=writer, args=(locked, stop))
+    p.start()
+    time.sleep(0.3)
+    shm, raw = open_shared_stage_position(NAME)
+    sp = StagePosition(shared_struct=raw)
+    torn = 0
+    for _ in range(reads):
+        pos = sp.snapshot().positions if locked else list(raw.positions)
+        if len(set(pos)) > 1:
+            torn += 1
+    stop.set()
+    p.join()
+    del sp, raw
+    shm.close()
+    return torn, reads
+
+
+def main():
+    shm, raw = create_shared_stage_position()
+    sp = StagePosition(shared_struct=raw)
+    values = {a: 1.0 for a in AXES}
+
+    t0 = time.perf_counter()
+    for i in range(N):
+        values[AxisType.X] = float(i)
+        tick_reopen(values)
+    t_reopen = (time.perf_counter() - t0) / N
+    t0 = time.perf_counter()
+    for i in range(N):
+        values[AxisType.X] = float(i)
+        sp.update(values)
+    t_mapped = (time.perf_counter() - t0) / N
+    print(f"monitor tick  re-open {t_reopen * 1e6:7.1f} us   mapped {t_mapped * 1e6:7.1f} us  "
+          f"({t_reopen / t_mapped:.1f}x)")
+
+    t0 = time.perf_counter()
+    for _ in range(N):
+        read_reopen()
+    r_reopen = (time.perf_counter() - t0) / N
+    t0 = time.perf_counter()
+    for _ in range(N):
+        sp.snapshot()
+    r_mapped = (time.perf_counter() - t0) / N
+    print(f"GUI read      re-open {r_reopen * 1e6:7.1f} us   mapped {r_mapped * 1e6:7.1f} us  "
+          f"({r_reopen / r_mapped:.1f}x)")
+
+    for locked in (False, True):
+        torn, reads = torn_reads(locked)
+        print(f"torn reads    {'seqlock' if locked else 'plain  '} {torn:6d} / {reads}")
+
+    seen, _, _ = sp.history()
+    for i in range(50):
+        sp.update({AxisType.Y: float(i)})
+    seen, times, positions = sp.history(seen)
+    ok = [p[AxisType.Y.value] for p in positions] == [float(i) for i in range(50)]
+    print(f"history       {len(times)} new samples, in order: {ok}, ring size {raw.HISTORY_LEN}")
+
+    sp.close()
+    del sp, raw
+    shm.close()
+    shm.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import asyncio
+import random
+import statistics
+import time
+
+from motors.hal.motors_hal import AxisType
+import motors.modern_stage as modern_stage
+from measure.test.sim_rig import make_sim_stage
+
+"""
+Stop latency on the shared port while the stage is busy.
+
+X runs a long move, Y steps back and forth and a 10 Hz position monitor reads
+every axis; X is stopped at a random time during its move. Latency is from the
+stop() call until STP is on the wire (stop() returned) and until the move call
+waiting on X returned.
+
+"executor" reproduces the previous driver: the move blocks the axis' single
+thread executor in its STA? loop and the stop is queued behind it. "scheduler"
+is the current driver: moves wait on the event loop and the stop goes through
+the urgent lane of the port scheduler.
+Run from the repo root: python -m motors.test.STOP_LATENCY_BENCH
+"""
+
+TRIALS = 15
+MOVE_UM = 4000.0  # 2 s at the configured 2000 um/s
+
+
+async def background(stage, stop_event):
+    async def stepper():
+        i = 0
+        while not stop_event.is_set():
+            await stage.move_axis(AxisType.Y, 2.0 if i % 2 == 0 else 0.0)
+            i += 1
+
+    async def monitor():
+        while not stop_event.is_set():
+            await stage.get_positions_snapshot()
+            await asyncio.sleep(0.1)
+
+    await asyncio.gather(stepper(), monitor())
+
+
+async def trial(mode, delay):
+    stage, port = await make_sim_stage()
+    motor = stage.motors[AxisType.X]
+    loop = asyncio.get_running_loop()
+    stop_event = asyncio.Event()
+    bg = asyncio.create_task(background(stage, stop_event))
+
+    if mode == "executor":
+        def blocking_move():
+            motor._send_command(f"1MVA{MOVE_UM * 0.001:.6f}")
+            motor._wait_stopped(1)
+            return True
+
+        def blocking_stop():
+            motor._send_command("1STP")
+            return True
+
+        move = loop.run_in_executor(motor._executor, blocking_move)
+        await asyncio.sleep(delay)
+        t0 = time.perf_counter()
+        await loop.run_in_executor(motor._executor, blocking_stop)
+        t_stop = time.perf_counter() - t0
+        await move
+        t_move = time.perf_counter() - t0
+    else:
+        move = asyncio.create_task(stage.move_axis(AxisType.X, MOVE_UM))
+        await asyncio.sleep(delay)
+        t0 = time.perf_counter()
+        await stage.stop_axis(AxisType.X)
+        t_stop = time.perf_counter() - t0
+        await move
+        t_move = time.perf_counter() - t0
+
+    stop_event.set()
+    await bg
+    await stage.disconnect_all()
+    return t_stop, t_move
+
+
+async def main():
+    random.seed(1)
+    delays = [random.uniform(0.2, 1.5) for _ in range(TRIALS)]
+    for mode in ("executor", "scheduler"):
+        stops, moves = [], []
+        for delay in delays:
+            t_stop, t_move = await trial(mode, delay)
+            stops.append(t_stop)
+            moves.append(t_move)
+        print(f"{mode:<10} stop sent: median {statistics.median(stops) * 1e3:7.1f} ms  "
+              f"max {max(stops) * 1e3:7.1f} ms | move returned: median {statistics.median(moves) * 1e3:7.1f} ms  "
+              f"max {max(moves) * 1e3:7.1f} ms")
+    lane = modern_stage._get_scheduler().stats
+    print(f"scheduler queue wait: urgent max {lane[modern_stage.URGENT].max_wait * 1e3:.1f} ms "
+          f"({lane[modern_stage.URGENT].jobs} jobs), normal max {lane[modern_stage.NORMAL].max_wait * 1e3:.1f} ms "
+          f"({lane[modern_stage.NORMAL].jobs} jobs)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
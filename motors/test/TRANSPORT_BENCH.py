@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from motors.utils.loopback_serial import LoopbackSerial
+from motors.utils.serial_transport import SerialTransport
+import motors.modern_stage as modern_stage
+from motors.modern_stage import StageControl
+from motors.hal.motors_hal import AxisType
+
+"""
+Benchmark of the serial request / response path against the loopback port.
+
+Compares the old fixed sleep query (write, sleep 50 ms, flush, sleep 50 ms, read)
+with SerialTransport which returns as soon as the reply terminator arrives.
+Run from the repo root: python -m motors.test.TRANSPORT_BENCH
+"""
+
+N = 50
+
+
+def legacy_query(port, cmd):
+    """Reproduction of the pre-transport StageControl._query_command timing"""
+    port.reset_input_buffer()
+    port.reset_output_buffer()
+    port.write((cmd + "\r").encode('ascii'))
+    time.sleep(0.05)
+    port.flush()
+    time.sleep(0.05)
+    return port.read_until(b"\n\r").decode('ascii').strip()
+
+
+def legacy_send(port, cmd):
+    port.write((cmd + "\r").encode('ascii'))
+    time.sleep(0.05)
+    if port.in_waiting > 0:
+        port.read_until(b'\r\n')
+
+
+def bench(label, fn, n=N):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    dt = (time.perf_counter() - t0) / n
+    print(f"{label:<28} {dt * 1e3:8.2f} ms / op")
+    return dt
+
+
+def legacy_move(port, dist_mm):
+    legacy_send(port, f"1MVR{dist_mm:.6f}")
+    while True:
+        text = legacy_query(port, "1STA?")
+        if text and (int(text.strip('#')) >> 3) & 1:
+            break
+        time.sleep(0.1)
+
+
+def transport_move(tp, dist_mm, poll=0.05):
+    tp.send(f"1MVR{dist_mm:.6f}")
+    while True:
+        text = tp.query("1STA?")
+        if (int(text) >> 3) & 1:
+            break
+        time.sleep(poll)
+
+
+async def stage_moves(n=10):
+    """End to end through StageControl with the loopback injected"""
+    modern_stage.set_shared_serial(LoopbackSerial())
+    x = StageControl(AxisType.X)
+    await x.connect()
+    t0 = time.perf_counter()
+    for i in range(n):
+        await x.move_relative(10.0 if i % 2 == 0 else -10.0)
+        await x.get_position()
+    dt = (time.perf_counter() - t0) / n
+    print(f"{'StageControl 10um move+pos':<28} {dt * 1e3:8.2f} ms / op")
+    await x.disconnect()
+
+
+def main():
+    port = LoopbackSerial()
+    tp = SerialTransport(port)
+
+    print(f"--- single commands, {N} iterations ---")
+    old_pos = bench("legacy POS?", lambda: legacy_query(port, "1POS?"))
+    new_pos = bench("transport POS?", lambda: tp.query("1POS?"))
+    bench("legacy STA?", lambda: legacy_query(port, "1STA?"))
+    bench("transport STA?", lambda: tp.query("1STA?"))
+    bench("transport 5x POS? batched", lambda: tp.query_many([f"{n}POS?" for n in range(1, 6)]))
+    print(f"POS? speedup: {old_pos / new_pos:.1f}x")
+
+    print("--- 10 um relative move + completion poll ---")
+    old_mv = bench("legacy move", lambda: legacy_move(port, 0.01), n=10)
+    new_mv = bench("transport move", lambda: transport_move(tp, -0.01), n=10)
+    print(f"move speedup: {old_mv / new_mv:.1f}x")
+
+    s = tp.stats
+    print(f"transport stats: {s.queries} queries, mean {s.mean_latency * 1e3:.2f} ms, "
+          f"max {s.max_latency * 1e3:.2f} ms, {s.timeouts} timeouts")
+
+    asyncio.run(stage_moves())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import json
+
+from motors.config.stage_config import StageConfiguration
+from motors.hal.motors_hal import AxisType
+
+def test_round_trip():
+    # JSON like the shared memory block, every field set away from its default
+    cfg = StageConfiguration()
+    cfg.velocities[AxisType.X] = 1500.0
+    cfg.accelerations[AxisType.Y] = 50000.0
+    cfg.position_limits[AxisType.Z] = (-50.0, 5000.0)
+    cfg.position_tolerance = 0.5
+    cfg.position_max_age_s = 5.0
+    cfg.position_monitor_moving_age_s = 0.1
+    cfg.status_poll_interval = 0.02
+    cfg.move_timeout = 60.0
+    cfg.predict_completion = False
+    back = StageConfiguration.from_dict(json.loads(json.dumps(cfg.to_dict())))
+    assert back == cfg, f"{back} != {cfg}"
+
+def test_old_dict():
+    # dicts saved before the scalar settings were added load with the defaults
+    d = StageConfiguration().to_dict()
+    for name in ("position_max_age_s", "position_monitor_moving_age_s", "predict_completion"):
+        del d[name]
+    assert StageConfiguration.from_dict(d) == StageConfiguration()
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_old_dict()
+    print("StageConfiguration round trip OK")
@@ -0,0 +1,268 @@
+import math
+import re
+import threading
+from time import monotonic
+from typing import Dict, List, Optional, Tuple
+
+"""
+Loopback stand-in for the MMC100 serial port.
+
+Behaves like a pyserial ``Serial`` object (write / read_until / in_waiting /
+reset_input_buffer ...) but answers from an in-process controller model, so the
+stage drivers can be exercised and benchmarked without hardware. Replies become
+readable only after the configured wire + controller latency, and moves follow a
+trapezoidal velocity profile so STA?/POS? behave like the real stage.
+"""
+
+_CMD_RE = re.compile(r"^(\d)([A-Z]+)(\?)?(.*)$")
+
+
+class _SimAxis:
+    """Single simulated MMC100 axis, units are mm / mm/s / mm/s^2 like the controller."""
+
+    def __init__(self, velocity: float = 3.0, acceleration: float = 5.0, settle_time: float = 0.0):
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.settle_time = settle_time
+        self.travel = (-25.0, 25.0)  # mm, limit switches relative to power-up zero
+        self._start_pos = 0.0
+        self._target = 0.0
+        self._t_start = 0.0
+        self._duration = 0.0
+
+    @staticmethod
+    def profile_time(distance: float, velocity: float, acceleration: float) -> float:
+        """Duration of a trapezoidal (or triangular) move over |distance|"""
+        d = abs(distance)
+        if d == 0.0 or velocity <= 0.0:
+            return 0.0
+        if acceleration <= 0.0:
+            return d / velocity
+        t_acc = velocity / acceleration
+        d_acc = 0.5 * acceleration * t_acc ** 2
+        if 2.0 * d_acc >= d:
+            return 2.0 * math.sqrt(d / acceleration)
+        return 2.0 * t_acc + (d - 2.0 * d_acc) / velocity
+
+    def _travelled(self, t: float) -> float:
+        """Distance covered t seconds into the current move"""
+        d = abs(self._target - self._start_pos)
+        total = self._duration
+        if t >= total or d == 0.0:
+            return d
+        if t <= 0.0:
+            return 0.0
+        if self.acceleration <= 0.0:
+            return self.velocity * t
+        a = self.acceleration
+        t_acc = min(self.velocity / a, total / 2.0)
+        v_peak = a * t_acc
+        t_cruise = total - 2.0 * t_acc
+        if t < t_acc:
+            return 0.5 * a * t ** 2
+        if t < t_acc + t_cruise:
+            return 0.5 * v_peak * t_acc + v_peak * (t - t_acc)
+        rem = total - t
+        return d - 0.5 * a * rem ** 2
+
+    def position(self, now: float) -> float:
+        s = self._travelled(now - self._t_start)
+        return self._start_pos + math.copysign(s, self._target - self._start_pos)
+
+    def is_stopped(self, now: float) -> bool:
+        return now >= self._t_start + self._duration + self.settle_time
+
+    def move_to(self, target: float, now: float) -> None:
+        start = self.position(now)
+        target = min(max(target, self.travel[0]), self.travel[1])
+        self._start_pos = start
+        self._target = target
+        self._t_start = now
+        self._duration = self.profile_time(target - start, self.velocity, self.acceleration)
+
+    def stop(self, now: float) -> None:
+        pos = self.position(now)
+        self._start_pos = self._target = pos
+        self._t_start = now
+        self._duration = 0.0
+
+    def zero(self, now: float) -> None:
+        offset = self.position(now)
+        self.stop(now)
+        self._start_pos = self._target = 0.0
+        self.travel = (self.travel[0] - offset, self.travel[1] - offset)
+
+
+class LoopbackSerial:
+    """
+    pyserial compatible fake of the shared MMC100 port.
+
+    Args:
+        response_latency: controller turnaround per query in seconds
+        baudrate: used to charge per-byte wire time in both directions
+        timeout: default read timeout, same meaning as pyserial
+        settle_time: extra time an axis reports "moving" after the profile ends
+    """
+
+    def __init__(self, response_latency: float = 0.004, baudrate: int = 38400,
+                 timeout: Optional[float] = 0.3, settle_time: float = 0.0,
+                 velocity: float = 3.0, acceleration: float = 5.0):
+        self.port = "LOOPBACK"
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.is_open = True
+        self.response_latency = response_latency
+        self._byte_time = 10.0 / float(baudrate)  # start + 8 data + stop bits
+
+        self.axes: Dict[int, _SimAxis] = {
+            n: _SimAxis(velocity=velocity, acceleration=acceleration, settle_time=settle_time)
+            for n in range(1, 6)
+        }
+
+        self._cond = threading.Condition()
+        self._rx = bytearray()                       # bytes readable by the host
+        self._pending: List[Tuple[float, bytes]] = []  # (ready time, bytes) still on the wire
+        self._line_free_at = 0.0                     # controller -> host line busy until
+
+        # Statistics for benchmarks
+        self.commands: List[str] = []
+        self.queries = 0
+        self.writes = 0
+
+    # pyserial surface
+    def open(self) -> None:
+        self.is_open = True
+
+    def close(self) -> None:
+        self.is_open = False
+
+    @property
+    def in_waiting(self) -> int:
+        with self._cond:
+            self._deliver(monotonic())
+            return len(self._rx)
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._deliver(monotonic())
+            self._rx.clear()
+
+    def reset_output_buffer(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def write(self, data: bytes) -> int:
+        if not self.is_open:
+            raise ConnectionError("Loopback port closed")
+        now = monotonic()
+        self.writes += 1
+        arrived = now
+        with self._cond:
+            for raw in bytes(data).split(b"\r"):
+                arrived += (len(raw) + 1) * self._byte_time
+                cmd = raw.decode("ascii", errors="replace").strip()
+                if not cmd:
+                    continue
+                self.commands.append(cmd)
+                reply = self._execute(cmd, arrived)
+                if reply is not None:
+                    payload = f"#{reply}\n\r".encode("ascii")
+                    start = max(arrived + self.response_latency, self._line_free_at)
+                    ready = start + len(payload) * self._byte_time
+                    self._line_free_at = ready
+                    self._pending.append((ready, payload))
+            self._cond.notify_all()
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        return self._read(lambda buf: len(buf) >= size, size)
+
+    def read_until(self, expected: bytes = b"\n", size: Optional[int] = None) -> bytes:
+        def _complete(buf: bytearray) -> bool:
+            return expected in buf or (size is not None and len(buf) >= size)
+
+        with self._cond:
+            data = self._read_locked(_complete)
+            idx = data.find(expected)
+            if idx >= 0:
+                cut = idx + len(expected)
+                if size is not None:
+                    cut = min(cut, size)
+            else:
+                cut = len(data) if size is None else min(size, len(data))
+            out = bytes(self._rx[:cut])
+            del self._rx[:cut]
+            return out
+
+    # internals
+    def _read(self, done, size: int) -> bytes:
+        with self._cond:
+            self._read_locked(done)
+            out = bytes(self._rx[:size])
+            del self._rx[:size]
+            return out
+
+    def _read_locked(self, done) -> bytearray:
+        deadline = None if self.timeout is None else monotonic() + self.timeout
+        while True:
+            now = monotonic()
+            self._deliver(now)
+            if done(self._rx):
+                return self._rx
+            if deadline is not None and now >= deadline:
+                return self._rx
+            wake = deadline
+            if self._pending:
+                nxt = self._pending[0][0]
+                wake = nxt if wake is None else min(wake, nxt)
+            self._cond.wait(None if wake is None else max(0.0, wake - now))
+
+    def _deliver(self, now: float) -> None:
+        while self._pending and self._pending[0][0] <= now:
+            self._rx += self._pending.pop(0)[1]
+
+    def _execute(self, cmd: str, now: float) -> Optional[str]:
+        """Apply one MMC100 command, return the reply text for queries"""
+        m = _CMD_RE.match(cmd)
+        if not m:
+            return None
+        num, op, query, arg = int(m.group(1)), m.group(2), m.group(3), m.group(4)
+        targets = list(self.axes.values()) if num == 0 else [self.axes.get(num)]
+        if any(ax is None for ax in targets):
+            return None
+        ax = targets[0]
+
+        if query:
+            self.queries += 1
+            if op == "STA":
+                return str(8 if ax.is_stopped(now) else 0)  # bit 3 == stopped
+            if op == "POS":
+                pos = ax.position(now)
+                return f"{pos:.6f},{pos:.6f}"
+            if op == "VEL":
+                return f"{ax.velocity:.6f}"
+            if op == "ACC":
+                return f"{ax.acceleration:.6f}"
+            return "0"
+
+        value = float(arg) if arg not in ("", None) else 0.0
+        for ax in targets:
+            if op == "MVA":
+                ax.move_to(value, now)
+            elif op == "MVR":
+                ax.move_to(ax.position(now) + value, now)
+            elif op in ("VEL", "VA"):
+                ax.velocity = value
+            elif op in ("ACC", "DEC"):
+                ax.acceleration = value
+            elif op in ("STP", "EST"):
+                ax.stop(now)
+            elif op == "MLN":
+                ax.move_to(ax.travel[0], now)
+            elif op == "MLP":
+                ax.move_to(ax.travel[1], now)
+            elif op == "ZRO":
+                ax.zero(now)
+        return None
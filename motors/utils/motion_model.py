@@ -0,0 +1,93 @@
+import statistics
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+"""
+Move completion prediction for a single stage axis.
+
+A move of d um takes the trapezoidal (or triangular) profile time for the
+axis velocity / acceleration, plus a settle time before the controller reports
+the axis stopped. The settle time is learned from completed moves: the driver
+sleeps until shortly before the predicted stop, polls quickly from there and
+reports back how long the move really took. When the very first poll already
+finds the axis stopped the real stop time is unknown (it was earlier), so the
+estimate is pulled down instead.
+"""
+
+
+def profile_time(distance, velocity: float, acceleration: float):
+    """
+    Seconds for the trapezoid (or triangle) motion profile over |distance| um,
+    acceleration 0 for no ramp. distance may be an array, a number gives a float.
+    """
+    d = np.abs(np.asarray(distance, dtype=float))
+    if velocity <= 0.0:
+        t = np.zeros_like(d)
+    elif acceleration <= 0.0:
+        t = d / velocity
+    else:
+        t = np.where(d <= velocity * velocity / acceleration,
+                     2.0 * np.sqrt(d / acceleration),
+                     d / velocity + velocity / acceleration)
+    return float(t) if t.ndim == 0 else t
+
+
+class MotionModel:
+    """
+    Args:
+        velocity: um/s
+        acceleration: um/s^2, 0 for no ramp
+        settle_s: initial settle time guess in seconds
+        lead_s: wake up this long before the predicted stop
+        history: number of recent moves the settle estimate is taken over
+    """
+
+    def __init__(self, velocity: float, acceleration: float, settle_s: float = 0.0,
+                 lead_s: float = 0.015, history: int = 16):
+        self.velocity = velocity
+        self.acceleration = acceleration
+        self.settle_s = settle_s
+        self.initial_settle_s = settle_s
+        self.lead_s = lead_s
+        self._residuals = deque(maxlen=history)
+
+        # Moves learned from since reset(), a large early share means wake_time() runs late
+        self.moves = 0
+        self.early = 0  # moves already stopped at the first poll
+
+    def profile_time(self, distance: float) -> float:
+        """Seconds for the motion profile alone over |distance| um"""
+        return profile_time(distance, self.velocity, self.acceleration)
+
+    def predict(self, distance: float) -> float:
+        """Seconds from the move command until the axis reports stopped"""
+        return max(0.0, self.profile_time(distance) + self.settle_s)
+
+    def wake_time(self, distance: float) -> float:
+        """Seconds to sleep after the move command before the first status poll"""
+        return max(0.0, self.predict(distance) - self.lead_s)
+
+    def record(self, distance: float, elapsed: float, first_poll: bool) -> None:
+        """
+        Learn from a completed move.
+
+            Args:
+                elapsed: seconds from the move command to the poll that saw it stopped
+                first_poll: True when that was the first poll, i.e. it stopped earlier
+        """
+        residual = elapsed - self.profile_time(distance)
+        if first_poll:
+            residual = min(residual, self.settle_s) - self.lead_s
+            self.early += 1
+        self._residuals.append(residual)
+        self.settle_s = statistics.median(self._residuals)
+        self.moves += 1
+
+    def reset(self) -> None:
+        """Forget what was learned, e.g. after a reconnect or a velocity change"""
+        self.settle_s = self.initial_settle_s
+        self._residuals.clear()
+        self.moves = 0
+        self.early = 0
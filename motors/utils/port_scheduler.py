@@ -0,0 +1,96 @@
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from time import monotonic
+from typing import Callable, Dict
+
+"""
+Command scheduler for the shared MMC100 serial port.
+
+One worker thread runs every short serial job (a send, a status poll, a
+position burst) in priority order. Stop and emergency stop go in the urgent
+lane and run before anything still queued, so the worst case is waiting for the
+one transaction already on the wire. Jobs must not block for longer than a
+transaction: moves wait for completion outside the scheduler and only submit
+their status polls.
+"""
+
+URGENT = 0
+NORMAL = 1
+
+
+@dataclass
+class LaneStats:
+    """Queue wait per lane (submit -> start), used by the benchmarks"""
+    jobs: int = 0
+    total_wait: float = 0.0  # s
+    max_wait: float = 0.0    # s
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.jobs if self.jobs else 0.0
+
+    def record(self, wait: float) -> None:
+        self.jobs += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class PortScheduler:
+    """
+    Priority job queue with a single worker thread.
+
+    submit() returns a concurrent.futures.Future, await it from asyncio with
+    asyncio.wrap_future.
+    """
+
+    def __init__(self, name: str = "stage-port"):
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats: Dict[int, LaneStats] = {URGENT: LaneStats(), NORMAL: LaneStats()}
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive() and not self._closed
+
+    def submit(self, fn: Callable, *args, priority: int = NORMAL) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Port scheduler is shut down")
+            heapq.heappush(self._heap, (priority, next(self._seq), monotonic(), fn, args, future))
+            self._cond.notify()
+        return future
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                priority, _, queued, fn, args, future = heapq.heappop(self._heap)
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.stats[priority].record(monotonic() - queued)
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def reset_stats(self) -> None:
+        self.stats = {URGENT: LaneStats(), NORMAL: LaneStats()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Finish queued jobs, then stop the worker"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            self._thread.join()
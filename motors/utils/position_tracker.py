@@ -0,0 +1,117 @@
+from dataclasses import dataclass
+from time import monotonic, time
+from typing import Dict, Hashable, Optional
+
+from motors.hal.motors_hal import Position
+
+"""
+Per-axis position estimate built from what the manager already knows.
+
+A completed closed-loop move leaves the axis at its commanded target (within
+the position tolerance), so the target is as good as an encoder read until the
+estimate gets old. Encoder reads re-anchor the estimate and are checked against
+it. While an axis is moving, after a stop, homing or a failed move the estimate
+is uncertain and callers must read the hardware, except for display type
+readers (the position monitor) which may accept the last point seen on a moving
+axis for a shorter time.
+"""
+
+
+@dataclass
+class AxisEstimate:
+    position: Optional[float]   # um (deg for rotation), None when unknown
+    theoretical: Optional[float]
+    source: str                 # "commanded" | "encoder"
+    timestamp: float            # monotonic time the estimate was last confirmed
+    moving: bool = False
+    target: Optional[float] = None
+
+
+@dataclass
+class TrackerStats:
+    hits: int = 0          # estimates served without touching the port
+    reads: int = 0         # encoder reads fed back
+    mismatches: int = 0    # encoder disagreed with a settled estimate by more than the tolerance
+
+
+class PositionTracker:
+    """
+    Args:
+        tolerance: um an encoder read may differ from a settled commanded target
+        max_age_s: how long a settled estimate is served before the next hardware read
+    """
+
+    def __init__(self, tolerance: float = 1.0, max_age_s: float = 2.0):
+        self.tolerance = tolerance
+        self.max_age_s = max_age_s
+        self._axes: Dict[Hashable, AxisEstimate] = {}
+        self.stats = TrackerStats()
+
+    def last_known(self, axis) -> Optional[float]:
+        est = self._axes.get(axis)
+        return None if est is None or est.moving else est.position
+
+    def commanded(self, axis, target: Optional[float]) -> None:
+        """A move towards target (None if unknown) was sent"""
+        est = self._axes.get(axis)
+        start = est.position if est is not None and not est.moving else None
+        self._axes[axis] = AxisEstimate(position=start, theoretical=start, source="commanded",
+                                        timestamp=monotonic(), moving=True, target=target)
+
+    def completed(self, axis, position: Optional[float] = None) -> None:
+        """The axis reported stopped at its target (or at position)"""
+        est = self._axes.get(axis)
+        position = position if position is not None else (est.target if est is not None else None)
+        if position is None:
+            self.invalidate(axis)
+            return
+        self._axes[axis] = AxisEstimate(position=position, theoretical=position, source="commanded",
+                                        timestamp=monotonic())
+
+    def measured(self, axis, pos: Position) -> None:
+        """Feed back an encoder read"""
+        self.stats.reads += 1
+        est = self._axes.get(axis)
+        if est is not None and not est.moving and est.position is not None:
+            if abs(pos.actual - est.position) > self.tolerance:
+                self.stats.mismatches += 1
+        if est is not None and est.moving:
+            # A non-waited move counts as done once the encoder is at the target,
+            # it may still be in its run-out so keep the target rather than the read
+            if est.target is not None and abs(pos.actual - est.target) <= self.tolerance:
+                self.completed(axis)
+            else:
+                self._axes[axis] = AxisEstimate(position=pos.actual, theoretical=pos.theoretical,
+                                                source="encoder", timestamp=monotonic(),
+                                                moving=True, target=est.target)
+            return
+        self._axes[axis] = AxisEstimate(position=pos.actual, theoretical=pos.theoretical, source="encoder",
+                                        timestamp=monotonic())
+
+    def invalidate(self, axis) -> None:
+        self._axes.pop(axis, None)
+
+    def estimate(self, axis, max_age_s: Optional[float] = None,
+                 moving_age_s: Optional[float] = None) -> Optional[Position]:
+        """
+        Position without a hardware read, None when stale or uncertain.
+
+            Args:
+                max_age_s: oldest settled estimate to accept, default self.max_age_s
+                moving_age_s: if given, also accept the last point seen on a moving
+                    axis (move start or encoder read) up to this old
+        """
+        est = self._axes.get(axis)
+        max_age_s = self.max_age_s if max_age_s is None else max_age_s
+        if est is None or est.position is None:
+            return None
+        if est.moving:
+            if moving_age_s is None:
+                return None
+            max_age_s = moving_age_s
+        if monotonic() - est.timestamp > max_age_s:
+            return None
+        self.stats.hits += 1
+        # Position timestamps are wall clock like the driver's reads
+        return Position(theoretical=est.theoretical, actual=est.position, units="um",
+                        timestamp=time() - (monotonic() - est.timestamp))
@@ -0,0 +1,114 @@
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from typing import List, Optional
+
+"""
+Event driven request / response transport for the shared MMC100 serial port.
+
+Instead of sleeping a fixed amount after every write, replies are read until the
+controller terminator arrives or a per-command deadline expires. Commands that do
+not answer are written back to back (pipelined) so a velocity change and a move
+cost one write, and several queries can be issued in one burst and their replies
+collected in order.
+"""
+
+# MMC100 framing
+_EOL = b"\r"              # host -> controller
+_TERMINATOR = b"\n\r"     # controller -> host
+_DEFAULT_DEADLINE = 0.3   # seconds, matches the old serial timeout
+
+
+@dataclass
+class TransportStats:
+    """Latency bookkeeping, used by the benchmarks and debug logging"""
+    sends: int = 0
+    queries: int = 0
+    timeouts: int = 0
+    total_latency: float = 0.0  # s, summed over queries
+    max_latency: float = 0.0    # s
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.queries if self.queries else 0.0
+
+
+class SerialTransport:
+    """
+    Wraps a pyserial-like port shared by every axis.
+
+    All access goes through ``lock`` so pipelined bursts are never interleaved
+    with another axis' transaction.
+    """
+
+    def __init__(self, port, lock: Optional[threading.Lock] = None,
+                 deadline: float = _DEFAULT_DEADLINE,
+                 eol: bytes = _EOL, terminator: bytes = _TERMINATOR):
+        self.port = port
+        self.lock = lock if lock is not None else threading.Lock()
+        self.deadline = deadline
+        self.eol = eol
+        self.terminator = terminator
+        self.stats = TransportStats()
+
+    def _check(self) -> None:
+        if not self.port or not self.port.is_open:
+            raise ConnectionError("Serial port not connected")
+
+    def _frame(self, cmds) -> bytes:
+        return b"".join(c.encode("ascii") + self.eol for c in cmds)
+
+    def _read_reply(self, deadline: Optional[float]) -> str:
+        """Block until one terminated reply arrives or the deadline passes"""
+        deadline = self.deadline if deadline is None else deadline
+        if self.port.timeout != deadline:
+            self.port.timeout = deadline
+        raw = self.port.read_until(self.terminator)
+        if not raw.endswith(self.terminator):
+            self.stats.timeouts += 1
+            raise TimeoutError(f"No reply within {deadline:.3f}s (got {raw!r})")
+        return raw.decode("ascii", errors="replace").strip().lstrip("#")
+
+    def _record(self, latency: float, n: int = 1) -> None:
+        self.stats.queries += n
+        self.stats.total_latency += latency
+        self.stats.max_latency = max(self.stats.max_latency, latency / n)
+
+    def send(self, *cmds: str) -> str:
+        """
+        Write one or more commands back to back without waiting for a reply.
+
+        Returns whatever complete reply text is already waiting (e.g. an error
+        string from a previous command) without blocking; usually "".
+        """
+        with self.lock:
+            self._check()
+            waiting = ""
+            if self.port.in_waiting > 0:
+                waiting = self.port.read(self.port.in_waiting).decode("ascii", errors="replace").strip()
+            self.port.write(self._frame(cmds))
+            self.stats.sends += len(cmds)
+            return waiting
+
+    def query(self, cmd: str, deadline: Optional[float] = None) -> str:
+        """Send a query and return its reply text ('#' prefix removed)"""
+        return self.query_many([cmd], deadline)[0]
+
+    def query_many(self, cmds: List[str], deadline: Optional[float] = None) -> List[str]:
+        """
+        Pipeline several queries in one write and collect the replies in order.
+
+        Raises TimeoutError if any reply misses its deadline; the next call
+        discards whatever stragglers are left in the input buffer.
+        """
+        with self.lock:
+            self._check()
+            self.port.reset_input_buffer()  # drop stale replies, keep pipelined writes
+            t0 = monotonic()
+            self.port.write(self._frame(cmds))
+            replies = [self._read_reply(deadline) for _ in cmds]
+            self._record(monotonic() - t0, len(cmds))
+            return replies
+
+    def reset_stats(self) -> None:
+        self.stats = TransportStats()
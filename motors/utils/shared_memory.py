@@ -7,27 +7,28 @@ from typing import Optional
 
 from motors.config.stage_position import StagePosition, StagePositionStruct
 from motors.config.stage_config import StageConfiguration
+from utils.config_channel import ConfigChannel, DEFAULT_CAPACITY, channel_name
 
 """
 Helper functions to share stage position memory w the manager
 """
 
-def create_shared_stage_position() ->  tuple[shared_memory.SharedMemory, StagePositionStruct]:
-    """
-    Create shared-memory block
+POSITION_SHM_NAME = "stage_position"
 
-    TODO:
-        Add functionality to support multiple stages "factory" style
+def create_shared_stage_position(name: str = POSITION_SHM_NAME) ->  tuple[shared_memory.SharedMemory, StagePositionStruct]:
+    """
+    Create shared-memory block, one per stage: name it with
+    channel_name(POSITION_SHM_NAME, instance)
     """
     # Create shared mem
     size = ctypes.sizeof(StagePositionStruct)
-    shm = shared_memory.SharedMemory(name="stage_position",create=True,size=size)
+    shm = shared_memory.SharedMemory(name=name,create=True,size=size)
     # Map shm to struct instance
     view = StagePositionStruct.from_buffer(shm.buf)
     view.__init__()
     return shm, view
 
-def open_shared_stage_position(name: str = "stage_position") -> tuple[shared_memory.SharedMemory, StagePositionStruct]:
+def open_shared_stage_position(name: str = POSITION_SHM_NAME) -> tuple[shared_memory.SharedMemory, StagePositionStruct]:
     """
     Attach to an existing shared mem block, to be used in child processes or GUI
     """
@@ -58,65 +59,34 @@ def safe_shm_shutdown(shm: shared_memory.SharedMemory, view: Optional[object] =
         print(f"Warning: Could not unlink shared memory: {e}")
 
 """
-Helper functions to create shared memory ipc for json (serialization)
+Helper functions for the stage config channel (see utils/config_channel.py)
 """
 
-# SHM and json framing consts
-MAX_PAYLOAD = 2048
-SHM_SIZE = 4 + MAX_PAYLOAD # 4 byte u_int32
-_LEN_STRUCT = struct.Struct("<I") # 4 byte u_int32 length header 
-SHM_NAME = "stage_config" # fixed shared mem name
+SHM_NAME = "stage_config" # default instance name
 
-def create_shared_stage_config(name: str = SHM_NAME) ->  shared_memory.SharedMemory:
+def create_shared_stage_config(name: str = SHM_NAME, capacity: int = DEFAULT_CAPACITY) -> ConfigChannel:
     """
-    Create shared-memory block for json serialization
-
-    TODO:
-        Add functionality to support multiple stages "factory" style
+    Create the config channel, one per stage: name it with
+    channel_name(SHM_NAME, instance)
     """
-    shm = shared_memory.SharedMemory(name=name, create=True, size=SHM_SIZE)
+    return ConfigChannel(name, create=True, capacity=capacity)
 
-    # zero the block
-    shm.buf[:] = b'\x00' * SHM_SIZE
-    return shm
-
-def open_shared_stage_config(name: str = SHM_NAME) -> shared_memory.SharedMemory:
+def open_shared_stage_config(name: str = SHM_NAME) -> ConfigChannel:
     """
-    Attach to an existing shared-memory block
+    Attach to an existing config channel
     """
-    return shared_memory.SharedMemory(name=name)
+    return ConfigChannel(name)
 
-def read_shared_stage_config(shm: shared_memory.SharedMemory) -> StageConfiguration:
+def read_shared_stage_config(shm: ConfigChannel) -> StageConfiguration:
     """
-    Read from shared-memory block 
-    """ 
-    # Unpacked serialized JSON buf 
-    (length,) = _LEN_STRUCT.unpack_from(shm.buf, 0) 
-    
-    if length == 0 or length > MAX_PAYLOAD:
-        raise BufferError(f"Invalid config length: {length}")
-    
-    # Convert serialized json to dict and into StageConfiguration format
-    raw = bytes(shm.buf[4:4 + length])
-    data = json.loads(raw.decode("utf-8"))
+    Read from the config channel, the payload is only decoded again after a write
+    """
+    _, data = shm.read()
     return StageConfiguration.from_dict(data)
 
-def write_shared_stage_config(shm: shared_memory.SharedMemory,
-                              config: StageConfiguration) -> None:
+def write_shared_stage_config(shm: ConfigChannel,
+                              config: StageConfiguration) -> int:
     """
-    Write serialize config to json into shared-memory buffer
+    Publish config, returns the new generation
     """
-    # Serialize dictionary config
-    payload = json.dumps(config.to_dict()).encode("utf-8")
-    n = len(payload)
-    if n > MAX_PAYLOAD:
-        raise BufferError(f"Config too large / not formatted correctly ({n} > {MAX_PAYLOAD})")
-    
-    # Dump to shm (Header + payload)
-    shm.buf[:4] = _LEN_STRUCT.pack(n)
-    shm.buf[4:4+n] = payload
-
-    shm.buf[4+n:SHM_SIZE] = b'\x00' * (SHM_SIZE - 4 - n) # zero tail
-
-
-
+    return shm.write(config.to_dict())
@@ -0,0 +1,231 @@
+import struct
+from multiprocessing import shared_memory
+from time import sleep
+from typing import Any, Dict, Optional, Tuple
+
+"""
+Versioned binary config channel in shared memory.
+
+Header (little endian):
+    magic       4s   b"CFGC"
+    version     H    layout version, FORMAT_VERSION
+    reserved    H
+    generation  Q    even when stable, odd while the writer is mid update
+    length      I    payload bytes
+    capacity    I    payload bytes the block can hold
+
+The payload is the config's to_dict() in a tagged binary form (see _encode):
+one tag byte per value, small ints in one byte, floats in four bytes when
+float32 holds them exactly and short strings with a one byte length.
+Each write bumps generation by two, so a reader that remembers the last
+generation it decoded can skip the payload entirely when nothing changed, and
+retries if the generation moved while it was copying.
+
+One block per manager instance: channel_name("stage_config", "probe2") gives
+"stage_config_probe2", the default instance keeps the plain name.
+"""
+
+MAGIC = b"CFGC"
+FORMAT_VERSION = 1
+DEFAULT_CAPACITY = 64 * 1024
+
+_HEADER = struct.Struct("<4sHHQII")
+_GEN_OFFSET = 8
+_GEN = struct.Struct("<Q")
+_U32 = struct.Struct("<I")
+_U8 = struct.Struct("<B")
+_I8 = struct.Struct("<b")
+_I64 = struct.Struct("<q")
+_F32 = struct.Struct("<f")
+_F64 = struct.Struct("<d")
+
+READ_RETRIES = 1000
+
+
+def channel_name(base: str, instance: Optional[str] = None) -> str:
+    """Shared memory name for one stage / controller instance"""
+    return base if not instance else f"{base}_{instance}"
+
+
+# === Binary form ===
+
+def _encode(value: Any, out: bytearray) -> None:
+    if value is None:
+        out += b"N"
+    elif value is True:
+        out += b"T"
+    elif value is False:
+        out += b"F"
+    elif isinstance(value, int):
+        if -128 <= value < 128:
+            out += b"b" + _I8.pack(value)
+        else:
+            out += b"i" + _I64.pack(value)
+    elif isinstance(value, float):
+        try:
+            short = _F32.pack(value)
+        except OverflowError:
+            short = None
+        if short is not None and _F32.unpack(short)[0] == value:
+            out += b"f" + short
+        else:
+            out += b"d" + _F64.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        if len(raw) < 256:
+            out += b"S" + _U8.pack(len(raw)) + raw
+        else:
+            out += b"s" + _U32.pack(len(raw)) + raw
+    elif isinstance(value, (list, tuple)):
+        out += (b"t" if isinstance(value, tuple) else b"l") + _U32.pack(len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += b"m" + _U32.pack(len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    else:
+        raise TypeError(f"Cannot encode {type(value).__name__} in a config channel")
+
+
+def _decode(buf, pos: int) -> Tuple[Any, int]:
+    tag = buf[pos:pos + 1]
+    pos += 1
+    if tag == b"N":
+        return None, pos
+    if tag == b"T":
+        return True, pos
+    if tag == b"F":
+        return False, pos
+    if tag == b"b":
+        return _I8.unpack_from(buf, pos)[0], pos + 1
+    if tag == b"i":
+        return _I64.unpack_from(buf, pos)[0], pos + 8
+    if tag == b"f":
+        return _F32.unpack_from(buf, pos)[0], pos + 4
+    if tag == b"d":
+        return _F64.unpack_from(buf, pos)[0], pos + 8
+    if tag == b"S":
+        n = buf[pos]
+        pos += 1
+        return bytes(buf[pos:pos + n]).decode("utf-8"), pos + n
+    if tag == b"s":
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        return bytes(buf[pos:pos + n]).decode("utf-8"), pos + n
+    if tag in (b"l", b"t"):
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        items = []
+        for _ in range(n):
+            item, pos = _decode(buf, pos)
+            items.append(item)
+        return (tuple(items) if tag == b"t" else items), pos
+    if tag == b"m":
+        (n,) = _U32.unpack_from(buf, pos)
+        pos += 4
+        d = {}
+        for _ in range(n):
+            key, pos = _decode(buf, pos)
+            d[key], pos = _decode(buf, pos)
+        return d, pos
+    raise BufferError(f"Corrupt config payload (tag {tag!r} at {pos - 1})")
+
+
+def encode_config(data: Dict[str, Any]) -> bytes:
+    out = bytearray()
+    _encode(data, out)
+    return bytes(out)
+
+
+def decode_config(payload) -> Dict[str, Any]:
+    data, _ = _decode(payload, 0)
+    return data
+
+
+# === Channel ===
+
+class ConfigChannel:
+    """
+    Writer (create=True, the manager) or reader (create=False) side of one
+    config block. read() decodes only when the generation changed since this
+    instance last decoded, otherwise it hands back the cached dict. Treat that
+    dict as read only, the from_dict() constructors copy what they keep.
+    """
+
+    def __init__(self, name: str, create: bool = False, capacity: int = DEFAULT_CAPACITY):
+        self.name = name
+        if create:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER.size + capacity)
+            self.shm.buf[:_HEADER.size] = _HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0, 0, capacity)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            magic, version, _, _, _, _ = _HEADER.unpack_from(self.shm.buf, 0)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                self.shm.close()
+                raise BufferError(f"{name} is not a v{FORMAT_VERSION} config channel")
+        self.capacity = _HEADER.unpack_from(self.shm.buf, 0)[5]
+
+        self._cached_generation = None
+        self._cached = None
+
+        # Payloads decoded, reads at an unchanged generation return the cached dict
+        self.decodes = 0
+
+    @property
+    def generation(self) -> int:
+        return _GEN.unpack_from(self.shm.buf, _GEN_OFFSET)[0]
+
+    def changed(self) -> bool:
+        """True if another instance wrote since this one last read or wrote"""
+        return self.generation != self._cached_generation
+
+    def write(self, data: Dict[str, Any]) -> int:
+        """Publish a new config dict, returns its generation"""
+        payload = encode_config(data)
+        n = len(payload)
+        if n > self.capacity:
+            raise BufferError(f"Config too large for channel {self.name} ({n} > {self.capacity})")
+
+        buf = self.shm.buf
+        gen = self.generation
+        if gen & 1:
+            gen += 1  # a previous writer died mid update
+        _GEN.pack_into(buf, _GEN_OFFSET, gen + 1)
+        _U32.pack_into(buf, _GEN_OFFSET + 8, n)
+        buf[_HEADER.size:_HEADER.size + n] = payload
+        _GEN.pack_into(buf, _GEN_OFFSET, gen + 2)
+
+        # The writer already knows this config, its own reads need no decode
+        self._cached = decode_config(payload)
+        self._cached_generation = gen + 2
+        return gen + 2
+
+    def read(self) -> Tuple[int, Dict[str, Any]]:
+        """Returns (generation, config dict), decoding only after a change"""
+        buf = self.shm.buf
+        for attempt in range(READ_RETRIES):
+            gen = self.generation
+            if gen == 0:
+                raise BufferError(f"Config channel {self.name} has not been written")
+            if not gen & 1:
+                if gen == self._cached_generation:
+                    return gen, self._cached
+                (n,) = _U32.unpack_from(buf, _GEN_OFFSET + 8)
+                if n <= self.capacity:
+                    payload = bytes(buf[_HEADER.size:_HEADER.size + n])
+                    if self.generation == gen:
+                        self._cached = decode_config(payload)
+                        self._cached_generation = gen
+                        self.decodes += 1
+                        return gen, self._cached
+            if attempt % 16 == 15:
+                sleep(0)
+        raise BufferError(f"Config channel {self.name} stayed mid update")
+
+    def close(self) -> None:
+        self.shm.close()
+
+    def unlink(self) -> None:
+        self.shm.unlink()
@@ -0,0 +1,129 @@
+import importlib
+import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, shared_memory
+from time import perf_counter
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+"""
+Long lived worker processes for exporting measurement data (plots, csv, mat).
+
+Starting a process per export re-imports matplotlib, plotly, pandas and scipy
+every time and pickles the whole spectrum into the child. The pool starts its
+workers once, each imports the preload modules in its initializer and switches
+matplotlib to the Agg backend, so a job costs only its own rendering.
+
+Arrays go through shared memory: submit() copies the data into a fresh block
+and passes the block name, the worker copies it out and detaches, and the block
+is unlinked once the job's future is done. Callers get a Future back and either
+wait on it or let it run.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def _init_worker(preload: Tuple[str, ...]) -> None:
+    for name in preload:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"Export worker could not preload {name}: {e}")
+    try:
+        import matplotlib
+        matplotlib.use("Agg", force=True)
+    except ImportError:
+        pass
+
+
+def _run_job(fn: Callable, shm_name: str, shape: Tuple[int, ...], dtype: str, kwargs: dict) -> Tuple[Any, float]:
+    """Worker side: attach, copy the array out, detach, run fn(data, **kwargs)"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        data = view.copy()
+        del view  # the view pins the buffer, close() fails while it exists
+    finally:
+        shm.close()
+    t0 = perf_counter()
+    result = fn(data, **kwargs)
+    return result, perf_counter() - t0
+
+
+def _release(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+        shm.unlink()
+    except (FileNotFoundError, BufferError):
+        pass
+
+
+class ExportPool:
+    """
+    Args:
+        workers: worker processes, exports run one per worker at a time
+        preload: modules every worker imports once at start
+    """
+
+    def __init__(self, workers: int = 1, preload: Iterable[str] = ()):
+        self.workers = workers
+        self.preload = tuple(preload)
+        self._lock = threading.Lock()
+        self._executor = None
+
+        # Jobs submitted, and pools started again after a worker died
+        self.jobs = 0
+        self.restarts = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=get_context("spawn"),
+                    initializer=_init_worker, initargs=(self.preload,))
+            return self._executor
+
+    def warm_up(self) -> None:
+        """Start the workers and their imports now instead of at the first export"""
+        executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(int)
+
+    def submit(self, fn: Callable, data: np.ndarray, **kwargs) -> Future:
+        """
+        Run fn(data, **kwargs) in a worker. fn must be importable by the worker
+        (a module level function). The future's result is (fn's result, seconds fn took).
+        """
+        data = np.ascontiguousarray(data)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, data.nbytes))
+        shm.buf[:data.nbytes] = data.tobytes()
+        for attempt in range(2):
+            try:
+                future = self._get_executor().submit(_run_job, fn, shm.name, data.shape, data.dtype.str, kwargs)
+                break
+            except (BrokenProcessPool, RuntimeError) as e:
+                # A worker died (or the pool was shut down), start a new one once
+                if attempt:
+                    _release(shm)
+                    raise
+                logger.warning(f"Export pool restarted: {e}")
+                self._reset()
+        self.jobs += 1
+        future.add_done_callback(lambda _: _release(shm))
+        return future
+
+    def _reset(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self.restarts += 1
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
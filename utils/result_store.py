@@ -0,0 +1,311 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import threading
+import zlib
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+"""
+Run level spectrum store.
+
+One directory per run (an auto sweep, or the manual sweeps of a day) instead
+of a csv, a mat, a png and a pdf per device in two trees:
+
+    <run>.spectra/data.bin      the arrays, appended one after the other
+    <run>.spectra/index.jsonl   one line per spectrum: device name and number,
+                                time, shape, dtype and where its arrays are
+
+Wavelengths are always float64 (1 pm steps do not survive float32), the
+detectors are float64 or float32 and optionally zlib compressed. A wavelength
+axis equal to the previous spectrum's is stored once and shared, which is the
+normal case in an auto sweep. Both files are append only: the data is flushed
+before its index line, so a crash loses at most the spectrum being written.
+Uncompressed spectra are read straight from a memory map.
+
+csv and mat files are made on demand from a store:
+
+    python -m utils.result_store UserData/<user>/<project>/Spectrum/<run>.spectra --csv --mat
+
+The second output tree gets the same two files through mirror(), a hard link
+when both trees are on one file system, otherwise only the newly appended
+bytes are copied.
+"""
+
+logger = logging.getLogger(__name__)
+
+DATA_FILE = "data.bin"
+INDEX_FILE = "index.jsonl"
+FORMAT_VERSION = 1
+_ALIGN = 8
+
+
+@dataclass
+class SpectrumEntry:
+    key: str
+    name: str
+    number: Optional[int]
+    time: str
+    points: int
+    detectors: int
+    dtype: str
+    compressed: bool
+    x: Tuple[int, int]  # (offset, bytes) in data.bin
+    y: Tuple[int, int]
+    meta: Dict[str, Any] = field(default_factory=dict)
+    version: int = FORMAT_VERSION
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SpectrumEntry":
+        data = dict(data)
+        data["x"] = tuple(data["x"])
+        data["y"] = tuple(data["y"])
+        return cls(**data)
+
+
+class ResultStore:
+    """
+    Args:
+        path: the <run>.spectra directory, created if missing
+        dtype: detector sample type, "float64" or "float32"
+        compress: zlib compress the detector arrays (level 1)
+    """
+
+    def __init__(self, path: str, dtype: str = "float64", compress: bool = False):
+        if np.dtype(dtype) not in (np.dtype("float64"), np.dtype("float32")):
+            raise ValueError(f"Unsupported detector dtype {dtype}")
+        self.path = path
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.compress = compress
+        self._lock = threading.Lock()
+        self._map = None
+        os.makedirs(path, exist_ok=True)
+        self.entries: List[SpectrumEntry] = self._read_index()
+        self._by_key = {e.key: e for e in self.entries}
+        self._last_x = None
+        self._last_x_ref = None
+
+    @property
+    def data_path(self) -> str:
+        return os.path.join(self.path, DATA_FILE)
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, INDEX_FILE)
+
+    def _read_index(self) -> List[SpectrumEntry]:
+        entries = []
+        try:
+            size = os.path.getsize(self.data_path)
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = SpectrumEntry.from_dict(json.loads(line))
+                    except (ValueError, TypeError, KeyError):
+                        continue  # torn last line
+                    if entry.y[0] + entry.y[1] <= size:
+                        entries.append(entry)
+        except FileNotFoundError:
+            pass
+        return entries
+
+    # === Writing ===
+
+    def _append(self, f, payload: bytes) -> Tuple[int, int]:
+        offset = f.tell()
+        pad = -offset % _ALIGN
+        if pad:
+            f.write(b"\0" * pad)
+            offset += pad
+        f.write(payload)
+        return offset, len(payload)
+
+    def append(self, name: str, x, y, number: Optional[int] = None, time: str = "",
+               meta: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Store one spectrum, x the wavelength axis and y one row per detector.
+        Returns its key, "<name>@<time>" (with a counter if that exists already).
+        """
+        x = np.ascontiguousarray(x, dtype="<f8")
+        y = np.ascontiguousarray(np.atleast_2d(np.asarray(y, dtype=float)), dtype=self.dtype)
+        if y.size and y.shape[1] != len(x):
+            raise ValueError(f"{y.shape[1]} detector samples for {len(x)} wavelengths")
+        with self._lock:
+            key = f"{name}@{time}"
+            n = 1
+            while key in self._by_key:
+                n += 1
+                key = f"{name}@{time}#{n}"
+            payload = y.tobytes()
+            if self.compress:
+                payload = zlib.compress(payload, 1)
+            with open(self.data_path, "ab") as f:
+                if self._last_x is not None and np.array_equal(x, self._last_x):
+                    x_ref = self._last_x_ref
+                else:
+                    x_ref = self._append(f, x.tobytes())
+                y_ref = self._append(f, payload)
+                f.flush()
+                os.fsync(f.fileno())
+            entry = SpectrumEntry(key=key, name=name, number=number, time=time, points=len(x),
+                                  detectors=y.shape[0], dtype=self.dtype.str, compressed=self.compress,
+                                  x=x_ref, y=y_ref, meta=meta or {})
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(entry)) + "\n")
+            self.entries.append(entry)
+            self._by_key[key] = entry
+            self._last_x, self._last_x_ref = x, x_ref
+        return key
+
+    # === Reading ===
+
+    def keys(self) -> List[str]:
+        return [e.key for e in self.entries]
+
+    def find(self, name: Optional[str] = None, number: Optional[int] = None) -> List[SpectrumEntry]:
+        """Entries of one device, by name and / or number, in the order measured"""
+        return [e for e in self.entries
+                if (name is None or e.name == name) and (number is None or e.number == number)]
+
+    def refresh(self) -> None:
+        """Pick up spectra appended by another process"""
+        with self._lock:
+            self.entries = self._read_index()
+            self._by_key = {e.key: e for e in self.entries}
+            self._map = None
+
+    def _buffer(self, ref: Tuple[int, int]) -> np.ndarray:
+        end = ref[0] + ref[1]
+        if self._map is None or len(self._map) < end:
+            self._map = np.memmap(self.data_path, dtype=np.uint8, mode="r")
+        return self._map[ref[0]:end]
+
+    def load(self, key: str) -> Tuple[np.ndarray, np.ndarray]:
+        """(wavelength, detectors) of one spectrum, detectors shaped (detectors, points)"""
+        entry = self._by_key[key]
+        x = np.frombuffer(self._buffer(entry.x), dtype="<f8")
+        raw = self._buffer(entry.y)
+        if entry.compressed:
+            raw = zlib.decompress(raw)
+        y = np.frombuffer(raw, dtype=np.dtype(entry.dtype)).reshape(entry.detectors, entry.points)
+        return x, y
+
+    # === Export ===
+
+    def export_csv(self, key: str, output_csv: str) -> str:
+        import pandas as pd
+        x, y = self.load(key)
+        df = pd.DataFrame({"Wavelength [nm]": x})
+        for element in range(len(y)):
+            df[f"Detector {element + 1}"] = y[element]
+        os.makedirs(os.path.dirname(output_csv) or ".", exist_ok=True)
+        df.to_csv(output_csv, index=False)
+        return output_csv
+
+    def export_mat(self, key: str, output_mat: str) -> str:
+        from scipy.io import savemat
+        entry = self._by_key[key]
+        x, y = self.load(key)
+        mat_dict = {
+            "wavelength_nm": np.asarray(x),
+            "detectors_dbm": np.asarray(y, dtype=float).T,
+            "detector_names": np.array([f"Detector {i + 1}" for i in range(len(y))], dtype=object),
+            "name": np.array(entry.name, dtype=object),
+            "fileTime": np.array(entry.time, dtype=object),
+        }
+        for k, v in entry.meta.items():
+            # dicts (fine alignment stats) become structs
+            mat_dict[k] = v if isinstance(v, dict) else np.array(v, dtype=object)
+        os.makedirs(os.path.dirname(output_mat) or ".", exist_ok=True)
+        savemat(output_mat, mat_dict)
+        return output_mat
+
+    def export(self, output_dir: str, formats: Iterable[str] = ("csv", "mat"),
+               keys: Optional[Iterable[str]] = None) -> List[str]:
+        """
+        Write <output_dir>/<device name>/<filename>_<time>.<csv|mat> for the
+        given keys (all by default), the per device layout the GUI used to write.
+        """
+        written = []
+        for key in (self.keys() if keys is None else keys):
+            entry = self._by_key[key]
+            base = os.path.join(output_dir, entry.name,
+                                f"{entry.meta.get('filename', 'spectral_sweep')}_{entry.time}")
+            if "csv" in formats:
+                written.append(self.export_csv(key, base + ".csv"))
+            if "mat" in formats:
+                written.append(self.export_mat(key, base + ".mat"))
+        return written
+
+
+# === Second output tree ===
+
+def link_or_copy(src: str, dst: str) -> None:
+    """dst becomes src: a hard link if possible, else a copy"""
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    if os.path.exists(dst):
+        if os.path.samefile(src, dst):
+            return
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _append_copy(src: str, dst: str) -> None:
+    """Bring dst up to date with the append only file src, copying only the new tail"""
+    done = os.path.getsize(dst) if os.path.exists(dst) else 0
+    if done > os.path.getsize(src):
+        done = 0
+    with open(src, "rb") as fi, open(dst, "r+b" if done else "wb") as fo:
+        fi.seek(done)
+        fo.seek(done)
+        shutil.copyfileobj(fi, fo)
+
+
+def mirror(store_path: str, mirror_path: str) -> None:
+    """Keep mirror_path a copy of the store at store_path, cheap to call after every append"""
+    os.makedirs(mirror_path, exist_ok=True)
+    for name in (DATA_FILE, INDEX_FILE):
+        src, dst = os.path.join(store_path, name), os.path.join(mirror_path, name)
+        if not os.path.exists(src):
+            continue
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            continue
+        if not os.path.exists(dst):
+            try:
+                os.link(src, dst)
+                continue
+            except OSError:
+                pass
+        _append_copy(src, dst)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List or export the spectra of a run store")
+    parser.add_argument("store", help="the <run>.spectra directory")
+    parser.add_argument("--csv", action="store_true", help="write a csv per spectrum")
+    parser.add_argument("--mat", action="store_true", help="write a mat per spectrum")
+    parser.add_argument("--name", help="only this device")
+    parser.add_argument("--out", help="output folder, default the folder holding the store")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.store)
+    entries = store.find(name=args.name)
+    formats = [fmt for fmt in ("csv", "mat") if getattr(args, fmt)]
+    if not formats:
+        for e in entries:
+            print(f"{e.key}  number={e.number}  {e.detectors}x{e.points} {e.dtype}")
+        return
+    out = args.out or os.path.dirname(os.path.abspath(args.store))
+    for path in store.export(out, formats, [e.key for e in entries]):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
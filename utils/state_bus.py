@@ -0,0 +1,424 @@
+import json
+import logging
+import os
+import queue
+import secrets
+import shutil
+import sys
+import tempfile
+import threading
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+"""
+Local publish / subscribe state bus for the GUI processes.
+
+The launcher hosts one StateBusServer. State is grouped in topics (one per
+former database/<topic>.json file), each key carries the topic sequence number
+of its last write, so versions are atomic per key and increase per topic.
+Clients send keyed updates instead of rewriting whole files, a subscriber gets
+the current state replayed on subscribe and every later update pushed to it,
+and keeps a local mirror so reads and change checks cost no I/O.
+
+The server writes each changed topic back to <persist_dir>/<topic>.json a
+short while after the last update, so tools that read the files keep working
+and state survives a restart.
+
+The launcher picks a fresh address and a random authkey per run and hands
+both to the GUIs in STATE_BUS_ENV / STATE_BUS_KEY_ENV; nothing is fixed in the
+source. The address is a unix socket in a private (0700) directory, or a named
+pipe on Windows, so other machines cannot reach it at all. Messages are
+pickled, so the authkey is what keeps other local users out.
+
+Messages (pickled tuples over a multiprocessing connection):
+    client -> server   ("subscribe", topic)
+                       ("sync", topic, token)
+                       ("set", topic, {key: value})
+                       ("replace", topic, {key: value})
+    server -> client   ("snapshot", topic, seq, {key: (version, value)})
+                       ("update", topic, seq, {key: (version, value)})
+                       ("sync", topic, seq, token)   after every earlier message of that client
+"""
+
+STATE_BUS_ENV = "SIEPIC_STATE_BUS"
+STATE_BUS_KEY_ENV = "SIEPIC_STATE_BUS_KEY"
+
+Address = Union[str, Tuple[str, int]]
+
+logger = logging.getLogger(__name__)
+
+
+def new_address() -> Address:
+    """Private address for one run: a named pipe on Windows, else a unix socket only we can open"""
+    token = secrets.token_hex(8)
+    if sys.platform == "win32":
+        return rf"\\.\pipe\siepic-ida-state-{token}"
+    return os.path.join(tempfile.mkdtemp(prefix="siepic-ida-"), "state-bus.sock")
+
+
+def encode_address(address: Address) -> str:
+    if isinstance(address, tuple):
+        return f"{address[0]}:{address[1]}"
+    return address
+
+
+def decode_address(text: str) -> Address:
+    if text.startswith("\\\\") or os.sep in text or "/" in text:
+        return text
+    host, _, port = text.rpartition(":")
+    return host, int(port)
+
+
+def env_address() -> Tuple[Address, bytes]:
+    """(address, authkey) the launcher published, ConnectionError if there is no bus"""
+    address, key = os.environ.get(STATE_BUS_ENV), os.environ.get(STATE_BUS_KEY_ENV)
+    if not address or not key:
+        raise ConnectionError("No state bus in this environment")
+    return decode_address(address), bytes.fromhex(key)
+
+
+class _Topic:
+    def __init__(self):
+        self.seq = 0
+        self.values: Dict[str, Tuple[int, Any]] = {}
+        self.subscribers = []
+        self.dirty = False
+
+
+class _Peer:
+    """
+    One client connection. send() only queues, a thread per connection does
+    the writing, so a slow client never holds up the server lock or other
+    clients, and still gets its messages in the order they were queued.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.alive = True
+        self._queue = queue.SimpleQueue()
+        threading.Thread(target=self._send_loop, name="state-bus-send", daemon=True).start()
+
+    def send(self, msg) -> bool:
+        if self.alive:
+            self._queue.put(msg)
+        return self.alive
+
+    def _send_loop(self) -> None:
+        while True:
+            msg = self._queue.get()
+            if msg is None:
+                return
+            try:
+                self.conn.send(msg)
+            except (OSError, EOFError, ValueError):
+                self.alive = False
+                return
+
+    def close(self) -> None:
+        self.alive = False
+        self._queue.put(None)
+        self.conn.close()
+
+
+class StateBusServer:
+    """
+    Args:
+        address: unix socket path, named pipe or (host, port); None for a new private one
+        authkey: shared secret of the connections, None for a random one
+        persist_dir: directory of the <topic>.json files, None to keep state in memory
+        flush_interval: seconds between writing changed topics back to disk
+    """
+
+    def __init__(self, address: Optional[Address] = None, authkey: Optional[bytes] = None,
+                 persist_dir: Optional[str] = None, flush_interval: float = 0.2):
+        self._own_dir = None
+        if address is None:
+            address = new_address()
+            if not isinstance(address, tuple) and not address.startswith("\\\\"):
+                self._own_dir = os.path.dirname(address)
+        self.address = address
+        self.authkey = authkey if authkey is not None else secrets.token_bytes(32)
+        self.persist_dir = persist_dir
+        self.flush_interval = flush_interval
+        self._topics: Dict[str, _Topic] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener = None
+
+        # Updates received vs file writes, a dirty topic is written once per flush
+        self.updates = 0
+        self.flushes = 0
+
+    def start(self) -> None:
+        self._listener = Listener(self.address, authkey=self.authkey)
+        threading.Thread(target=self._accept_loop, name="state-bus-accept", daemon=True).start()
+        if self.persist_dir:
+            threading.Thread(target=self._flush_loop, name="state-bus-flush", daemon=True).start()
+        logger.info(f"State bus listening on {encode_address(self.address)}")
+
+    def env(self) -> Dict[str, str]:
+        """Environment variables that let StateBusClient() in a child process find this bus"""
+        return {STATE_BUS_ENV: encode_address(self.address), STATE_BUS_KEY_ENV: self.authkey.hex()}
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.close()
+        self.flush()
+        if self._own_dir:
+            shutil.rmtree(self._own_dir, ignore_errors=True)
+
+    # === Topics ===
+
+    def _topic(self, name: str) -> _Topic:
+        """Get a topic, loading its persisted file the first time (caller holds the lock)"""
+        topic = self._topics.get(name)
+        if topic is None:
+            topic = self._topics[name] = _Topic()
+            path = self._path(name)
+            if path and os.path.exists(path):
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    for key, value in data.items():
+                        topic.seq += 1
+                        topic.values[key] = (topic.seq, value)
+                except Exception as e:
+                    logger.warning(f"State bus could not load {path}: {e}")
+        return topic
+
+    def _path(self, name: str) -> Optional[str]:
+        return os.path.join(self.persist_dir, f"{name}.json") if self.persist_dir else None
+
+    def _publish(self, name: str, topic: _Topic, msg) -> None:
+        topic.dirty = True
+        self.updates += 1
+        # Queued under the lock, so every subscriber sees updates in seq order,
+        # the socket writes happen on each peer's own thread
+        topic.subscribers = [peer for peer in topic.subscribers if peer.send(msg)]
+
+    # === Connections ===
+
+    def _accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._stop.is_set():
+                    return
+                continue
+            except Exception as e:
+                # Failed handshake (wrong authkey, port scan), keep serving
+                logger.debug(f"State bus rejected a connection: {e}")
+                continue
+            threading.Thread(target=self._client_loop, args=(_Peer(conn),), daemon=True).start()
+
+    def _client_loop(self, peer: _Peer) -> None:
+        try:
+            while not self._stop.is_set():
+                msg = peer.conn.recv()
+                kind, name = msg[0], msg[1]
+                with self._lock:
+                    topic = self._topic(name)
+                    if kind == "subscribe":
+                        if peer.send(("snapshot", name, topic.seq, dict(topic.values))):
+                            topic.subscribers.append(peer)
+                    elif kind == "sync":
+                        # Messages of one client are handled in order, so every
+                        # earlier update of it has been published by now
+                        peer.send(("sync", name, topic.seq, msg[2]))
+                    elif kind == "set":
+                        changes = {}
+                        for key, value in msg[2].items():
+                            topic.seq += 1
+                            topic.values[key] = changes[key] = (topic.seq, value)
+                        self._publish(name, topic, ("update", name, topic.seq, changes))
+                    elif kind == "replace":
+                        topic.seq += 1
+                        topic.values = {key: (topic.seq, value) for key, value in msg[2].items()}
+                        self._publish(name, topic, ("snapshot", name, topic.seq, dict(topic.values)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self._lock:
+                for topic in self._topics.values():
+                    if peer in topic.subscribers:
+                        topic.subscribers.remove(peer)
+            peer.close()
+
+    # === Persistence ===
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write changed topics to their json files (atomic replace)"""
+        if not self.persist_dir:
+            return
+        with self._lock:
+            pending = {name: {key: value for key, (_, value) in topic.values.items()}
+                       for name, topic in self._topics.items() if topic.dirty}
+            for name in pending:
+                self._topics[name].dirty = False
+        for name, data in pending.items():
+            path = self._path(name)
+            try:
+                os.makedirs(self.persist_dir, exist_ok=True)
+                with open(path + ".tmp", "w", encoding="utf-8") as f:
+                    json.dump(data, f, indent=2)
+                os.replace(path + ".tmp", path)
+                self.flushes += 1
+            except Exception as e:
+                logger.warning(f"State bus could not write {path}: {e}")
+
+
+class StateBusClient:
+    """
+    Connection to the bus with a local mirror of every subscribed topic.
+
+    address / authkey default to the bus the launcher published in the
+    environment. Raises OSError / ConnectionError from the constructor when
+    there is none or no server is listening, callers fall back to the json
+    files then.
+    """
+
+    def __init__(self, address: Optional[Address] = None, authkey: Optional[bytes] = None,
+                 timeout: float = 2.0):
+        if address is None or authkey is None:
+            env_addr, env_key = env_address()
+            address = env_addr if address is None else address
+            authkey = env_key if authkey is None else authkey
+        self.timeout = timeout
+        self._conn = Client(address, authkey=authkey)
+        self._send_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._synced = 0
+        self._sync_token = 0
+        self._mirror: Dict[str, Dict[str, Tuple[int, Any]]] = {}
+        self._seq: Dict[str, int] = {}
+        self._ready: Dict[str, threading.Event] = {}
+        self._callbacks: Dict[str, list] = {}
+        self._connected = True
+        threading.Thread(target=self._receive_loop, name="state-bus-client", daemon=True).start()
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def _send(self, msg) -> None:
+        with self._send_lock:
+            self._conn.send(msg)
+
+    def _receive_loop(self) -> None:
+        try:
+            while True:
+                kind, name, seq, values = self._conn.recv()
+                if kind == "sync":
+                    with self._lock:
+                        self._synced = max(self._synced, values)
+                        self._changed.notify_all()
+                    continue
+                with self._lock:
+                    if kind == "snapshot":
+                        self._mirror[name] = dict(values)
+                    else:
+                        self._mirror.setdefault(name, {}).update(values)
+                    self._seq[name] = seq
+                    self._changed.notify_all()
+                    callbacks = list(self._callbacks.get(name, ()))
+                    ready = self._ready.get(name)
+                if ready is not None:
+                    ready.set()
+                changes = {key: value for key, (_, value) in values.items()}
+                for callback in callbacks:
+                    try:
+                        callback(name, changes)
+                    except Exception as e:
+                        logger.error(f"State bus callback error on {name}: {e}")
+        except (EOFError, OSError, TypeError):
+            # TypeError: close() dropped the handle under a waiting recv()
+            pass
+        finally:
+            self._connected = False
+            for event in list(self._ready.values()):
+                event.set()
+            with self._lock:
+                self._changed.notify_all()
+
+    def subscribe(self, topic: str, callback: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> bool:
+        """
+        Mirror topic locally, waits for the current state to be replayed.
+        callback(topic, {key: value}) runs on the receiver thread for every update.
+        """
+        with self._lock:
+            if callback is not None:
+                self._callbacks.setdefault(topic, []).append(callback)
+            event = self._ready.get(topic)
+            first = event is None
+            if first:
+                event = self._ready[topic] = threading.Event()
+        if first:
+            self._send(("subscribe", topic))
+        return event.wait(self.timeout) and self._connected
+
+    def subscribed(self, topic: str) -> bool:
+        event = self._ready.get(topic)
+        return event is not None and event.is_set()
+
+    def version(self, topic: str) -> int:
+        """Sequence number of the last update seen on topic"""
+        return self._seq.get(topic, 0)
+
+    def key_version(self, topic: str, key: str) -> int:
+        entry = self._mirror.get(topic, {}).get(key)
+        return entry[0] if entry else 0
+
+    def get(self, topic: str) -> Dict[str, Any]:
+        """Copy of the mirrored topic"""
+        with self._lock:
+            return {key: value for key, (_, value) in self._mirror.get(topic, {}).items()}
+
+    def set(self, topic: str, updates: Dict[str, Any]) -> None:
+        """Keyed update, only the given keys change"""
+        self._send(("set", topic, updates))
+
+    def replace(self, topic: str, data: Dict[str, Any]) -> None:
+        """Replace the whole topic"""
+        self._send(("replace", topic, data))
+
+    def sync(self, topic: str) -> bool:
+        """Wait until every update this client sent on topic is in the mirror"""
+        with self._lock:
+            self._sync_token += 1
+            token = self._sync_token
+        self._send(("sync", topic, token))
+        with self._lock:
+            return self._changed.wait_for(
+                lambda: self._synced >= token or not self._connected, self.timeout
+            ) and self._connected
+
+    def wait_for(self, topic: str, key: str, predicate: Callable[[Any], bool],
+                 timeout: Optional[float] = None) -> bool:
+        """
+        Block until predicate(value of key) holds, woken by each update.
+        Own writes sent before the call are seen first. False on timeout or
+        when the connection drops.
+        """
+        if not self.subscribed(topic):
+            self.subscribe(topic)
+        self.sync(topic)
+
+        def check():
+            if not self._connected:
+                return True
+            entry = self._mirror.get(topic, {}).get(key)
+            return predicate(entry[1] if entry else None)
+
+        with self._lock:
+            return self._changed.wait_for(check, timeout) and self._connected
+
+    def close(self) -> None:
+        self._connected = False
+        self._conn.close()
@@ -0,0 +1,179 @@
+import contextlib
+import io
+import os
+import statistics
+import threading
+import time
+
+from GUI.lib_command import CommandRouter, owner_of, parse_command_text, split_steps
+from utils.state_bus import StateBusClient, StateBusServer
+
+"""
+Scripted multi-step command run: command chain with sleep polling vs the
+command router with completion acks.
+
+Each simulated GUI has its own bus client and checks the command topic on the
+remi idle tick (0.1 s) like the real ones. The stage GUI runs sweeps and the
+auto sweep sequence in the background and clears the Sweep / AutoSweep flags
+when they end.
+
+"chain" is the previous execute_command: the owner waits on its flag with
+time.sleep(1) polls (the devices GUI always sleeps 1 s, the testing GUI 1 s
+before it starts polling) and writes the rest of the command back.
+"router" sends one step at a time and waits for the owner's command_done,
+owners block in wait_state until the flag changes.
+Run from the repo root: python -m utils.test.COMMAND_ROUTER_BENCH
+"""
+
+IDLE_S = 0.1
+MOVE_S = 0.15
+SWEEP_S = 0.8
+AUTO_SWEEP_S = 1.5
+REPEATS = 3
+
+SCRIPT = ("stage_control, stage_x_left_50, stage_y_left_20, "
+          "sensor_control, sensor_wvl_1550, sensor_sweep, "
+          "devices_control, devices_sel_1/2/3, devices_confirm, "
+          "testing_control, testing_start, "
+          "tec_control, tec_on")
+
+
+class SimGUI:
+    def __init__(self, owner, mode):
+        self.owner = owner
+        self.mode = mode
+        self.bus = StateBusClient()
+        self.bus.subscribe("command")
+        self.bus.subscribe("shared_memory")
+        self.forwarded = []  # (time, owner) per step handed on
+        self._seen = self.bus.version("command")
+        self._stop = threading.Event()
+        threading.Thread(target=self._idle_loop, daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+        self.bus.close()
+
+    def _idle_loop(self):
+        while not self._stop.wait(IDLE_S):
+            version = self.bus.version("command")
+            if version != self._seen:
+                self._seen = version
+                threading.Thread(target=self.execute_command, daemon=True).start()
+
+    def _flag(self, key):
+        return self.bus.get("shared_memory").get(key)
+
+    def _wait_clear(self, key, value_of):
+        if self.mode == "chain":
+            # The GUI set its local copy to 1, idle refreshes it from the file
+            flag = 1
+            while flag == 1:
+                time.sleep(1)
+                flag = value_of(self._flag(key))
+        else:
+            self.bus.wait_for("shared_memory", key, lambda v: value_of(v) != 1)
+
+    def execute_command(self):
+        command = self.bus.get("command").get("command", {})
+        keys = list(command)
+        if not keys or owner_of(keys[0]) != self.owner:
+            return
+        rest = {}
+        for key in keys[1:]:
+            if rest or owner_of(key) is not None:
+                rest[key] = command[key]
+            elif key in ("stage_x_left", "stage_y_left"):
+                time.sleep(MOVE_S)
+            elif key == "sensor_sweep":
+                self.bus.set("shared_memory", {"Sweep": {"sweep": 1}})
+                if self.mode == "router":
+                    self.bus.sync("shared_memory")
+                self._wait_clear("Sweep", lambda s: (s or {}).get("sweep"))
+            elif key == "devices_confirm":
+                self.bus.set("shared_memory", {"Selection": command["devices_sel"]})
+            elif key == "testing_start":
+                self.bus.set("shared_memory", {"AutoSweep": 1})
+                if self.mode == "chain":
+                    time.sleep(1)
+                else:
+                    self.bus.sync("shared_memory")
+                self._wait_clear("AutoSweep", lambda v: v)
+        if self.owner == "devices" and self.mode == "chain":
+            time.sleep(1)
+        self.forwarded.append((time.perf_counter(), self.owner))
+        # lib_gui.command_done
+        updates = {"command": rest}
+        command_id = self.bus.get("command").get("command_id")
+        if self.mode == "router" and command_id is not None:
+            updates["command_done"] = command_id
+        self.bus.set("command", updates)
+
+
+class SimStage:
+    """Background part of the stage GUI: runs sweeps and auto sweeps, then clears their flag"""
+
+    def __init__(self):
+        self.bus = StateBusClient()
+        self.bus.subscribe("shared_memory", self._on_change)
+
+    def _on_change(self, topic, changes):
+        if (changes.get("Sweep") or {}).get("sweep") == 1:
+            threading.Timer(SWEEP_S, self.bus.set, ("shared_memory", {"Sweep": {"sweep": 0}})).start()
+        if changes.get("AutoSweep") == 1:
+            threading.Timer(AUTO_SWEEP_S, self.bus.set, ("shared_memory", {"AutoSweep": 0})).start()
+
+    def close(self):
+        self.bus.close()
+
+
+def run_once(mode, command):
+    owners = {step.owner for step in split_steps(command)}
+    guis = [SimGUI(owner, mode) for owner in sorted(owners)]
+    stage = SimStage()
+    master = StateBusClient()
+    master.subscribe("command")
+    t0 = time.perf_counter()
+    if mode == "chain":
+        master.set("command", {"command": command})
+        master.wait_for("command", "command", lambda v: v == {}, timeout=30)
+    else:
+        with contextlib.redirect_stdout(io.StringIO()):
+            run = CommandRouter(master).run(command)
+        assert run.ok
+    total = time.perf_counter() - t0
+    handed = sorted(t for gui in guis for t, _ in gui.forwarded)
+    steps = [b - a for a, b in zip([t0] + handed, handed)]
+    for gui in guis:
+        gui.close()
+    stage.close()
+    master.close()
+    return total, steps
+
+
+def main():
+    server = StateBusServer()
+    server.start()
+    os.environ.update(server.env())
+    command = parse_command_text(SCRIPT)
+    owners = [step.owner for step in split_steps(command)]
+    work = {"stage": 2 * MOVE_S, "sensor": SWEEP_S, "devices": 0.0, "testing": AUTO_SWEEP_S, "tec": 0.0}
+    work_steps = [work[owner] for owner in owners]
+
+    results = {}
+    for mode in ("chain", "router"):
+        runs = [run_once(mode, command) for _ in range(REPEATS)]
+        totals = [total for total, _ in runs]
+        steps = [statistics.median(step) for step in zip(*(s for _, s in runs))]
+        results[mode] = steps
+        print(f"{mode:<7} total median {statistics.median(totals):5.2f} s  "
+              f"(min {min(totals):5.2f} max {max(totals):5.2f}, work {sum(work_steps):4.2f} s)")
+
+    print(f"{'step':<10}{'work s':>8}{'chain s':>9}{'router s':>10}")
+    for owner, w, chain, router in zip(owners, work_steps, results["chain"], results["router"]):
+        print(f"{owner:<10}{w:8.2f}{chain:9.2f}{router:10.2f}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
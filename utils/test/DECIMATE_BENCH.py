@@ -0,0 +1,75 @@
+import base64
+import json
+import time
+
+import numpy as np
+
+from utils.decimate import decimate_minmax
+
+"""
+Spectrum display decimation: what the html would carry for a long sweep.
+
+A 2 detector sweep of POINTS points (1 pm over 1500 nm) with a few resonances
+only WIDTH_PM wide. "full" is every point written as plotly JSON, as before.
+"stride" keeps every k-th point down to DISPLAY_POINTS, the cheap way, and
+"minmax" is decimate_minmax with the same budget. Reported: time to decimate,
+the JSON payload the html would embed, the base64 sidecar loaded on zoom, and
+and how deep each dip still is after decimation.
+plotly is not installed here, the payload is measured as the JSON of the arrays.
+Run from the repo root: python -m utils.test.DECIMATE_BENCH
+"""
+
+POINTS = 1_500_001
+DISPLAY_POINTS = 8000
+WIDTH_PM = 3.0
+DIPS_NM = (1312.3456, 1450.00037, 1550.12349, 1620.7771)
+
+
+def spectrum():
+    wl = np.linspace(1260.0, 2760.0, POINTS)
+    rng = np.random.default_rng(0)
+    channels = []
+    for shift in (0.0, 0.4):
+        y = -10.0 - 2.0 * np.cos(wl * 0.05) + rng.normal(0, 0.02, POINTS)
+        for dip in DIPS_NM:
+            y -= 25.0 / (1.0 + ((wl - dip - shift) / (WIDTH_PM * 1e-3 / 2)) ** 2)
+        channels.append(y)
+    return wl, channels
+
+
+def payload(x, channels):
+    return len(json.dumps({"x": np.asarray(x).tolist(), "y": [np.asarray(y).tolist() for y in channels]}))
+
+
+def dip_depth(x, y, centre):
+    window = (x > centre - 0.2) & (x < centre + 0.2)
+    return float(y[window].min()) if window.any() else float("nan")
+
+
+def main():
+    wl, channels = spectrum()
+
+    t0 = time.perf_counter()
+    minmax = [decimate_minmax(wl, y, DISPLAY_POINTS) for y in channels]
+    t_minmax = (time.perf_counter() - t0) / len(channels)
+    k = -(-POINTS // DISPLAY_POINTS)
+    stride = [(wl[::k], y[::k]) for y in channels]
+
+    full_bytes = payload(wl, channels)
+    minmax_bytes = sum(payload(x, [y]) for x, y in minmax)
+    stride_bytes = sum(payload(x, [y]) for x, y in stride)
+    sidecar = len(json.dumps({"x": base64.b64encode(wl.astype("<f8").tobytes()).decode(),
+                              "y": [base64.b64encode(y.astype("<f4").tobytes()).decode() for y in channels]}))
+
+    print(f"{POINTS} points x {len(channels)} detectors, decimate_minmax {t_minmax * 1e3:.1f} ms per detector")
+    print(f"html data  full {full_bytes / 1e6:6.1f} MB | stride {stride_bytes / 1e6:5.2f} MB "
+          f"({len(stride[0][0])} points) | minmax {minmax_bytes / 1e6:5.2f} MB ({len(minmax[0][0])} points)")
+    print(f"sidecar loaded on zoom {sidecar / 1e6:.1f} MB")
+    print("dip depth [dBm]  full / stride / minmax")
+    for dip in DIPS_NM:
+        row = [dip_depth(wl, channels[0], dip), dip_depth(*stride[0], dip), dip_depth(*minmax[0], dip)]
+        print(f"  {dip:10.5f} nm  " + " / ".join(f"{v:7.2f}" for v in row))
+
+
+if __name__ == "__main__":
+    main()
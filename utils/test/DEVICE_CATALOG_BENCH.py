@@ -0,0 +1,106 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from GUI.lib_coordinates import DeviceCatalog, coordinates
+
+"""
+Device catalog: loading a coordinate file and querying it, TinyDB vs DeviceCatalog.
+
+tinydb is not installed here, its load is emulated by what its JSON storage
+does per insert: read the whole file, add the row, write the whole file. Its
+queries are emulated by a plain scan over the row dicts, a lower bound for a
+TinyDB search. The catalog rows: synthetic die, DEVICES devices over a few
+wavelengths, polarizations and types.
+Run from the repo root: python -m utils.test.DEVICE_CATALOG_BENCH
+"""
+
+DEVICES = 50000
+TINYDB_DEVICES = (500, 1000, 2000)
+QUERIES = 200
+
+
+def write_coordinate_file(path, n):
+    rng = np.random.default_rng(0)
+    with open(path, "w") as f:
+        f.write("% X-coord, Y-coord, polarization, wavelength, type, deviceID, params\n")
+        for i in range(n):
+            x, y = rng.integers(-5000, 5000, 2)
+            f.write(f"{x}, {y}, {('TE', 'TM')[i % 2]}, {(1310, 1550)[i % 3 == 0]}, "
+                    f"{('ring', 'mzi', 'gc', 'pcm')[i % 4]}, device_{i}\n")
+
+
+def tinydb_load(path, db):
+    catalog, _ = DeviceCatalog.from_coordinate_file(path)
+    with open(db, "w") as f:
+        json.dump({"_default": {}}, f)
+    for i in range(len(catalog)):
+        with open(db) as f:
+            table = json.load(f)
+        table["_default"][str(i + 1)] = catalog.row(i)
+        with open(db, "w") as f:
+            json.dump(table, f)
+
+
+def main():
+    root = tempfile.mkdtemp()
+    try:
+        for n in TINYDB_DEVICES:
+            path = os.path.join(root, f"die_{n}.txt")
+            write_coordinate_file(path, n)
+            t0 = time.perf_counter()
+            tinydb_load(path, os.path.join(root, f"tinydb_{n}.json"))
+            print(f"TinyDB style load   {n:6d} devices {time.perf_counter() - t0:8.2f} s")
+
+        path = os.path.join(root, "die.txt")
+        name = os.path.join(root, "coordinates.json")
+        write_coordinate_file(path, DEVICES)
+        t0 = time.perf_counter()
+        gds = coordinates(path, read_file=True, name=name)
+        t_load = time.perf_counter() - t0
+        print(f"catalog load + save {DEVICES:6d} devices {t_load:8.2f} s")
+
+        t0 = time.perf_counter()
+        with open(name) as f:
+            raw = json.load(f)["_default"]
+        DeviceCatalog.from_rows(raw[k] for k in sorted(raw, key=int))
+        t_json = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        coordinates(read_file=False, name=name)
+        t_snap = time.perf_counter() - t0
+        print(f"reload  JSON {t_json * 1e3:7.1f} ms | snapshot {t_snap * 1e3:7.1f} ms "
+              f"({os.path.getsize(name) / 1e6:.1f} MB JSON, "
+              f"{os.path.getsize(name.replace('.json', '.catalog.npz')) / 1e6:.1f} MB snapshot)")
+
+        rows = [gds.catalog.row(i) for i in range(len(gds.catalog))]
+        names = [f"device_{i}" for i in range(0, DEVICES, DEVICES // QUERIES)]
+        t0 = time.perf_counter()
+        for device in names:
+            [r["number"] for r in rows if r["devicename"] == device]
+        t_scan = (time.perf_counter() - t0) / QUERIES
+        t0 = time.perf_counter()
+        for device in names:
+            gds.finddevicenumber(device)
+        t_index = (time.perf_counter() - t0) / QUERIES
+        print(f"finddevicenumber  scan {t_scan * 1e3:7.3f} ms | index {t_index * 1e3:7.4f} ms")
+
+        t0 = time.perf_counter()
+        scan = {r["devicename"] for r in rows if r["wavelength"] == "1550"} & \
+               {r["devicename"] for r in rows if r["polarization"] == "TE"}
+        t_scan = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        selected = gds.listselecteddevices("1550", "TE")
+        t_index = time.perf_counter() - t0
+        assert set(selected) == scan
+        print(f"listselecteddevices  scan {t_scan * 1e3:7.2f} ms | index {t_index * 1e3:7.2f} ms "
+              f"({len(selected)} devices)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
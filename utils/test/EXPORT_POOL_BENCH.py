@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import pickle
+import shutil
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from utils.export_pool import ExportPool
+
+"""
+Spectrum export: a new process per sweep vs the persistent ExportPool.
+
+The job writes one 2 detector spectrum of POINTS points as csv (pandas) and
+mat (scipy) twice like plot.generate_plots. plotly and matplotlib are not
+installed here, a real export also imports and renders those, which makes the
+per process import cost larger still.
+"process" starts a spawn Process per sweep with the arrays as arguments, the
+GUI did this and joined it. "pool" submits to a warmed ExportPool (pandas and
+scipy preloaded) with the arrays in shared memory and waits on the future.
+Run from the repo root: python -m utils.test.EXPORT_POOL_BENCH
+"""
+
+POINTS = 40001
+SWEEPS = 8
+
+
+def write_spectrum(data, root, name):
+    import pandas as pd
+    from scipy.io import savemat
+    wl, channels = data[0], data[1:]
+    for base in ("UserData", "export"):
+        path = os.path.join(root, base, name)
+        os.makedirs(path, exist_ok=True)
+        df = pd.DataFrame({"Wavelength [nm]": wl})
+        for i, ch in enumerate(channels):
+            df[f"Detector {i + 1}"] = ch
+        df.to_csv(os.path.join(path, "spectral_sweep.csv"), index=False)
+        savemat(os.path.join(path, "spectral_sweep.mat"),
+                {"wavelength_nm": wl, "detectors_dbm": np.column_stack(channels)})
+
+
+def spectrum(i):
+    wl = np.linspace(1530.0, 1570.0, POINTS)
+    ch1 = -10.0 - 5.0 * np.cos((wl - 1530.0) * 0.7 + i) + np.random.normal(0, 0.05, POINTS)
+    return np.vstack([wl, ch1, np.full(POINTS, -60.0)])
+
+
+def main():
+    root = tempfile.mkdtemp()
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        per_process = []
+        for i in range(SWEEPS):
+            data = spectrum(i)
+            t0 = time.perf_counter()
+            p = ctx.Process(target=write_spectrum, args=(data, root, f"proc_{i}"))
+            p.start()
+            p.join()
+            per_process.append(time.perf_counter() - t0)
+
+        pool = ExportPool(workers=1, preload=("pandas", "scipy.io"))
+        t0 = time.perf_counter()
+        pool.warm_up()
+        pool.submit(write_spectrum, spectrum(0), root=root, name="warm").result()
+        t_start = time.perf_counter() - t0
+
+        per_job, render = [], []
+        for i in range(SWEEPS):
+            data = spectrum(i)
+            t0 = time.perf_counter()
+            _, job_s = pool.submit(write_spectrum, data, root=root, name=f"pool_{i}").result()
+            per_job.append(time.perf_counter() - t0)
+            render.append(job_s)
+
+        # Fire and forget: the caller only pays for the hand-off
+        spectra = [spectrum(i) for i in range(SWEEPS)]
+        t0 = time.perf_counter()
+        futures = [pool.submit(write_spectrum, data, root=root, name=f"async_{i}") for i, data in enumerate(spectra)]
+        t_submit = (time.perf_counter() - t0) / SWEEPS
+        for f in futures:
+            f.result()
+        pool.shutdown()
+
+        data = spectrum(0)
+        t0 = time.perf_counter()
+        for _ in range(100):
+            pickle.loads(pickle.dumps(data))
+        t_pickle = (time.perf_counter() - t0) / 100
+
+        print(f"process per sweep  median {statistics.median(per_process):6.3f} s  max {max(per_process):6.3f} s")
+        print(f"export pool        median {statistics.median(per_job):6.3f} s  max {max(per_job):6.3f} s  "
+              f"(job itself {statistics.median(render):6.3f} s, pool start + first job {t_start:.2f} s once)")
+        print(f"submit without waiting {t_submit * 1e3:.2f} ms per sweep | "
+              f"pickle round trip of the spectrum {t_pickle * 1e3:.2f} ms ({data.nbytes / 1e6:.1f} MB)")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
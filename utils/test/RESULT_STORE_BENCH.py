@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.io import savemat
+
+from utils.result_store import ResultStore, mirror
+
+"""
+Saving an auto sweep: per device csv + mat in two trees vs the run store.
+
+DEVICES spectra of POINTS points and 2 detectors on the same wavelength axis.
+"per device" is what plot.generate_plots wrote for the data files: a csv and a
+mat per device, each encoded twice (UserData and the export path). "store" is
+ResultStore.append plus mirror() into the second tree, per dtype / compression.
+Reported: time per device, files and bytes on disk for both trees, and the
+on demand csv + mat export of one device from the store. The png / pdf / html
+outputs are left out, they are the same in both.
+Run from the repo root: python -m utils.test.RESULT_STORE_BENCH
+"""
+
+DEVICES = 100
+POINTS = 40001
+
+
+def spectra():
+    wl = np.linspace(1530.0, 1570.0, POINTS)
+    rng = np.random.default_rng(0)
+    for i in range(DEVICES):
+        ch1 = -10.0 - 5.0 * np.cos((wl - 1530.0) * 0.7 + i) + rng.normal(0, 0.05, POINTS)
+        yield f"device_{i}", wl, np.vstack([ch1, np.full(POINTS, -60.0)])
+
+
+def disk(root):
+    """Files in both trees and the bytes they take, hard links counted once"""
+    files, inodes = 0, {}
+    for folder, _, names in os.walk(root):
+        for name in names:
+            st = os.stat(os.path.join(folder, name))
+            files += 1
+            inodes[(st.st_dev, st.st_ino)] = st.st_size
+    return files, sum(inodes.values())
+
+
+def per_device(root):
+    for name, wl, y in spectra():
+        for base in ("UserData", "export"):
+            path = os.path.join(root, base, name)
+            os.makedirs(path, exist_ok=True)
+            df = pd.DataFrame({"Wavelength [nm]": wl})
+            for i, ch in enumerate(y):
+                df[f"Detector {i + 1}"] = ch
+            df.to_csv(os.path.join(path, "spectral_sweep.csv"), index=False)
+            savemat(os.path.join(path, "spectral_sweep.mat"),
+                    {"wavelength_nm": wl, "detectors_dbm": np.column_stack(y)})
+
+
+def run_store(root, **options):
+    store = ResultStore(os.path.join(root, "UserData", "run.spectra"), **options)
+    for i, (name, wl, y) in enumerate(spectra()):
+        store.append(name, wl, y, number=i, time="2026-01-01_00-00-00")
+        mirror(store.path, os.path.join(root, "export", "run.spectra"))
+    return store
+
+
+def timed(fn, *args, **kwargs):
+    root = tempfile.mkdtemp()
+    t0 = time.perf_counter()
+    result = fn(root, *args, **kwargs)
+    return root, (time.perf_counter() - t0) / DEVICES, result
+
+
+def main():
+    roots = []
+    try:
+        root, dt, _ = timed(per_device)
+        roots.append(root)
+        files, size = disk(root)
+        print(f"per device csv + mat x2   {dt * 1e3:7.1f} ms/device  {files:4d} files {size / 1e6:7.1f} MB")
+
+        for options in ({"dtype": "float64"}, {"dtype": "float32"}, {"dtype": "float32", "compress": True}):
+            root, dt, store = timed(run_store, **options)
+            roots.append(root)
+            files, size = disk(root)
+            label = "store " + options["dtype"] + (" + zlib" if options.get("compress") else "")
+            print(f"{label:25s} {dt * 1e3:7.1f} ms/device  {files:4d} files {size / 1e6:7.1f} MB")
+
+        _, wl, y = next(spectra())
+        x_back, y_back = store.load(store.keys()[0])
+        assert np.array_equal(x_back, wl) and np.allclose(y_back, y, atol=1e-4)
+        t0 = time.perf_counter()
+        store.export(os.path.join(root, "exported"), keys=store.keys()[:1])
+        print(f"on demand csv + mat of one device {(time.perf_counter() - t0) * 1e3:.1f} ms")
+    finally:
+        for root in roots:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
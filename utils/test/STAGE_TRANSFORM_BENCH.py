@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+
+from GUI.lib_coordinates import DeviceCatalog, StageTransform
+
+"""
+GDS to stage transform: per device mapping vs the cached StageTransform.
+
+A die of DEVICES devices, a true transform (0.3 deg rotation, 0.05 % scale,
+offset) and FIDUCIALS alignment devices whose stage positions carry 0.5 um of
+noise, one of them 40 um off (a wrong mark clicked).
+"per device" is the previous apply_transform: an exact fit through the first 3
+fiducials (the bad one among them), then np.matmul per device.
+"StageTransform" fits all fiducials with outlier rejection and maps the whole
+array in one operation. Selection lookups (a filtered device list for the auto
+sweep) then come from the cache.
+Run from the repo root: python -m utils.test.STAGE_TRANSFORM_BENCH
+"""
+
+DEVICES = 50000
+FIDUCIALS = 6
+SELECTION = 5000
+BAD_FIDUCIAL = 1
+
+
+def true_transform():
+    a = np.radians(0.3)
+    matrix = 1.0005 * np.array([[np.cos(a), -np.sin(a), 0.0], [np.sin(a), np.cos(a), 0.0], [0.0, 0.0, 0.0]])
+    matrix[2, 2] = 1.0
+    return matrix, np.array([1250.0, -830.0, 12.0])
+
+
+def main():
+    rng = np.random.default_rng(1)
+    gds = np.column_stack([rng.integers(-5000, 5000, (DEVICES, 2)), np.zeros(DEVICES)]).astype(float)
+    catalog = DeviceCatalog(number=range(1, DEVICES + 1), coordinate=gds, polarization=["TE"] * DEVICES,
+                            wavelength=["1550"] * DEVICES, type=["ring"] * DEVICES,
+                            devicename=[f"d{i}" for i in range(DEVICES)])
+    matrix, displacement = true_transform()
+    truth = gds @ matrix.T + displacement
+
+    fiducials = rng.choice(DEVICES, FIDUCIALS, replace=False) + 1
+    stage = truth[fiducials - 1] + np.column_stack([rng.normal(0, 0.5, (FIDUCIALS, 2)), np.zeros(FIDUCIALS)])
+    stage[BAD_FIDUCIAL, 0] += 40.0
+
+    # Previous: exact fit through the first three marks, then one device at a time
+    t0 = time.perf_counter()
+    m3, d3 = StageTransform._solve(gds[fiducials[:3] - 1], stage[:3])
+    per_device = [(np.matmul(m3, np.array(c)) + d3).tolist() for c in gds.tolist()]
+    t_old = time.perf_counter() - t0
+    err_old = np.abs(np.array(per_device) - truth)[:, :2].max()
+
+    t0 = time.perf_counter()
+    transform = catalog.register(fiducials.tolist(), stage)
+    t_fit = time.perf_counter() - t0
+    catalog.transform = transform
+    t0 = time.perf_counter()
+    mapped = catalog.coordinate
+    t_apply = time.perf_counter() - t0
+    err_new = np.abs(mapped - truth)[:, :2].max()
+
+    selection = rng.choice(DEVICES, SELECTION, replace=False) + 1
+    t0 = time.perf_counter()
+    catalog.stage_coordinates(selection)
+    t_lookup = time.perf_counter() - t0
+
+    print(f"per device, 3 marks     {t_old * 1e3:8.1f} ms for {DEVICES} devices, max xy error {err_old:6.2f} um")
+    print(f"StageTransform          fit {t_fit * 1e3:.2f} ms + apply {t_apply * 1e3:.2f} ms, "
+          f"max xy error {err_new:6.2f} um")
+    print(f"cached lookup of {SELECTION} devices {t_lookup * 1e3:.2f} ms")
+    print("\n".join(transform.report()))
+
+
+if __name__ == "__main__":
+    main()
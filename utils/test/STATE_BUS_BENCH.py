@@ -0,0 +1,151 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import multiprocessing
+
+from utils.state_bus import StateBusClient, StateBusServer
+
+"""
+GUI shared state: json file read-modify-write + getmtime polling vs the state bus.
+
+1. Lost updates: WRITERS processes each save KEYS distinct keys as fast as they
+   can, like File.save does, then counts the keys that survived.
+2. Cost of one keyed update: whole file read-modify-write vs bus set().
+3. Change latency seen by another process: mtime polled at the remi idle
+   interval (0.1 s) vs the bus push callback.
+Run from the repo root: python -m utils.test.STATE_BUS_BENCH
+"""
+
+WRITERS = 4
+KEYS = 100
+IDLE_S = 0.1
+
+BASE = {"User": "Guest", "Project": "MyProject", "Image": "TSP/none.png",
+        "FineA": {"window_size": 20, "step_size": 2, "max_iters": 10, "detector": 1, "timeout_s": 30},
+        "AreaS": {"pattern": "spiral", "x_size": 20.0, "x_step": 1.0, "y_size": 20.0, "y_step": 1.0},
+        "Sweep": {"wvl": 1550.0, "speed": 1.0, "power": 1.0, "step": 0.001, "start": 1540.0, "end": 1580.0}}
+
+
+def file_save(path, key, value):
+    # lib_gui.File.save before the bus
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError):
+        data = {}
+    data[key] = value
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    for _ in range(50):
+        try:
+            os.replace(tmp, path)
+            return
+        except PermissionError:
+            time.sleep(0.001)
+
+
+def file_writer(path, w):
+    for k in range(KEYS):
+        file_save(path, f"w{w}_k{k}", k)
+
+
+def bus_writer(w):
+    bus = StateBusClient()
+    for k in range(KEYS):
+        bus.set("shared_memory", {f"w{w}_k{k}": k})
+    bus.sync("shared_memory")  # every set above has been applied
+    bus.close()
+
+
+def run_writers(target, args):
+    # spawn, forking next to the running server threads can inherit a held lock
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=target, args=args(w)) for w in range(WRITERS)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    path = os.path.join(tmp, "shared_memory.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(BASE, f)
+
+    server = StateBusServer(persist_dir=tmp, flush_interval=0.05)
+    server.start()
+    os.environ.update(server.env())  # the writer processes find the bus like the GUIs do
+
+    # 1. lost updates
+    run_writers(file_writer, lambda w: (path, w))
+    with open(path, "r", encoding="utf-8") as f:
+        kept_file = sum(1 for k in json.load(f) if k.startswith("w"))
+    run_writers(bus_writer, lambda w: (w,))
+    reader = StateBusClient()
+    reader.subscribe("shared_memory")
+    kept_bus = sum(1 for k in reader.get("shared_memory") if k.startswith("w"))
+    print(f"lost updates  file RMW kept {kept_file}/{WRITERS * KEYS} keys, bus kept {kept_bus}/{WRITERS * KEYS}")
+
+    # 2. cost per keyed update
+    n = 300
+    t0 = time.perf_counter()
+    for i in range(n):
+        file_save(path, "ScanPos", {"x": i, "y": 0, "move": 1})
+    t_file = (time.perf_counter() - t0) / n
+    t0 = time.perf_counter()
+    for i in range(n):
+        reader.set("shared_memory", {"ScanPos": {"x": i, "y": 0, "move": 1}})
+    reader.sync("shared_memory")
+    t_bus = (time.perf_counter() - t0) / n
+    print(f"update cost   file RMW {t_file * 1e6:7.0f} us | bus set {t_bus * 1e6:5.0f} us")
+
+    # 3. change latency in another "GUI"
+    seen = {}
+    got = threading.Event()
+
+    def on_change(topic, changes):
+        if "Ping" in changes:
+            seen["bus"] = time.perf_counter()
+            got.set()
+
+    watcher = StateBusClient()
+    watcher.subscribe("shared_memory", on_change)
+    lat_file, lat_bus = [], []
+    for i in range(20):
+        mtime0 = os.path.getmtime(path)
+        time.sleep(IDLE_S * (0.1 + 0.04 * i))  # write lands at a varying phase of the idle tick
+        t_write = time.perf_counter()
+        file_save(path, "Ping", i)
+        # remi calls idle every IDLE_S, the first tick after the write sees it
+        next_tick = t_write + (IDLE_S - (t_write % IDLE_S))
+        while time.perf_counter() < next_tick or os.path.getmtime(path) == mtime0:
+            time.sleep(0.001)
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+        lat_file.append(time.perf_counter() - t_write)
+
+        got.clear()
+        t_write = time.perf_counter()
+        reader.set("shared_memory", {"Ping": i})
+        got.wait(1.0)
+        lat_bus.append(seen["bus"] - t_write)
+    print(f"latency       mtime poll median {statistics.median(lat_file) * 1e3:5.1f} ms max {max(lat_file) * 1e3:5.1f} ms"
+          f" | bus push median {statistics.median(lat_bus) * 1e3:5.2f} ms max {max(lat_bus) * 1e3:5.2f} ms")
+
+    server.flush()
+    with open(path, "r", encoding="utf-8") as f:
+        on_disk = json.load(f)
+    print(f"persisted     {len(on_disk)} keys written back, Ping={on_disk.get('Ping')}, "
+          f"{server.updates} updates in {server.flushes} file writes")
+    watcher.close()
+    reader.close()
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()